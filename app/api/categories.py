@@ -2,7 +2,6 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from typing import List
-import random
 
 from app.models.database import get_db
 from app.models.category import Category
@@ -15,7 +14,7 @@ from app.api.schemas import (
     CategorySuggestRequest,
     CategorySuggestResponse
 )
-from app.services.groq_client import groq_client
+from app.services.category_suggester import category_suggester
 from app.utils.user_context import get_active_user_id
 
 router = APIRouter()
@@ -166,20 +165,6 @@ async def delete_category(
     )
 
 
-SUGGESTION_PRESETS = [
-    {"keywords": ["food", "dining", "restaurant", "coffee", "drink", "grocer", "mcd"], "name": "Mâncare & Restaurante", "icon": "🍽️", "color": "#F97316"},
-    {"keywords": ["travel", "plane", "flight", "vacation", "trip"], "name": "Călătorii", "icon": "✈️", "color": "#38BDF8"},
-    {"keywords": ["health", "doctor", "med", "pharma", "gym"], "name": "Sănătate & Wellness", "icon": "💊", "color": "#34D399"},
-    {"keywords": ["home", "rent", "utility", "electric", "gas", "mortgage"], "name": "Utilități & Locuință", "icon": "🏠", "color": "#FACC15"},
-    {"keywords": ["shopping", "clothes", "fashion", "gift", "store"], "name": "Cumpărături", "icon": "🛍️", "color": "#F472B6"},
-    {"keywords": ["transport", "car", "fuel", "taxi", "uber", "bus"], "name": "Transport", "icon": "🚗", "color": "#60A5FA"},
-    {"keywords": ["education", "books", "course", "learning"], "name": "Educație", "icon": "📚", "color": "#A78BFA"},
-    {"keywords": ["entertainment", "movie", "game", "music", "fun"], "name": "Distracție & Timp liber", "icon": "🎬", "color": "#FB7185"},
-    {"keywords": ["pets", "dog", "cat", "animal"], "name": "Animale & Îngrijire", "icon": "🐾", "color": "#FDBA74"},
-    {"keywords": ["charity", "donation"], "name": "Caritate", "icon": "🤝", "color": "#FDE047"},
-]
-
-
 @router.post("/suggest", response_model=CategorySuggestResponse)
 async def suggest_category(
     request: CategorySuggestRequest
@@ -188,21 +173,5 @@ async def suggest_category(
     if not description:
         raise HTTPException(status_code=400, detail="Description is required")
 
-    try:
-        suggestion = await groq_client.suggest_category(description)
-        return CategorySuggestResponse(**suggestion)
-    except Exception:
-        for preset in SUGGESTION_PRESETS:
-            if any(keyword in description.lower() for keyword in preset["keywords"]):
-                return CategorySuggestResponse(
-                    name=preset["name"],
-                    icon=preset["icon"],
-                    color=preset["color"]
-                )
-
-        fallback = random.choice(SUGGESTION_PRESETS)
-        return CategorySuggestResponse(
-            name=fallback["name"],
-            icon=fallback["icon"],
-            color=fallback["color"]
-        )
+    suggestion = await category_suggester.suggest(description)
+    return CategorySuggestResponse(**suggestion)
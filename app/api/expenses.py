@@ -1,4 +1,4 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Depends, HTTPException
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
@@ -8,14 +8,18 @@ import os
 import tempfile
 import uuid
 import csv
+import hashlib
 from io import StringIO
-import json
 
 from app.models.database import get_db
 from app.models.expense import Expense
 from app.models.category import Category
 from app.services.groq_client import groq_client
-from app.utils.crypto import encrypt_data, decrypt_data
+from app.services.local_parser import local_parser
+from app.services.vendor_registry import record_receipt
+from app.tasks.sfs_import import ImportProgress, read_sources, run_import_job
+from app.utils.config import settings
+from app.models.encrypted import decrypt_all
 from app.utils.user_context import get_active_user_id
 from app.api.schemas import (
     ManualExpenseRequest,
@@ -130,8 +134,10 @@ async def create_expense_from_text(
     # Get user's custom categories
     user_categories = _get_user_category_names(db, user_id)
 
-    # Parse text with Groq AI
-    parsed_data = await groq_client.parse_text(request.text, user_categories)
+    # Parse simple texts locally, everything else with Groq AI
+    parsed_data = local_parser.parse(request.text, user_categories)
+    if parsed_data is None:
+        parsed_data = await groq_client.parse_text(request.text, user_categories)
 
     # Create expense record
     expense = await _create_expense_from_parsed_data(
@@ -157,7 +163,9 @@ async def preview_expense_from_text(
 
     user_id = get_active_user_id(db)
     user_categories = _get_user_category_names(db, user_id)
-    parsed_data = await groq_client.parse_text(request.text, user_categories)
+    parsed_data = local_parser.parse(request.text, user_categories)
+    if parsed_data is None:
+        parsed_data = await groq_client.parse_text(request.text, user_categories)
 
     return ExpensePreviewResponse(
         status="preview",
@@ -183,6 +191,72 @@ async def confirm_expense_from_parsed_data(
     return _build_expense_detail_response(expense)
 
 
+# Imports running in this process, so a repeated upload does not start a second run
+_running_imports: set[str] = set()
+
+
+def _import_progress_path(job_id: str) -> str:
+    return os.path.join(settings.SFS_IMPORT_PROGRESS_DIR, f"{job_id}.json")
+
+
+async def _run_import(job_id: str, user_id: str, sources: list, progress_path: str) -> None:
+    try:
+        await run_import_job(user_id, sources, progress_path)
+    finally:
+        _running_imports.discard(job_id)
+
+
+@router.post("/import/sfs", status_code=202)
+async def import_sfs_receipts(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk import SFS receipts from a text file of links or a zip of receipt photos.
+
+    The import runs in the background; poll GET /import/sfs/{job_id} for its
+    progress. Uploading the same file again resumes: imported receipts are skipped.
+    """
+    content = await file.read()
+    if not content:
+        raise HTTPException(status_code=400, detail="File is empty")
+
+    sources = read_sources(content)
+    if not sources:
+        raise HTTPException(status_code=400, detail="No SFS links or receipt photos found")
+
+    # TODO: Get from authenticated user
+    user_id = get_active_user_id(db)
+
+    # Same user and file -> same progress file
+    job_id = hashlib.sha256(user_id.encode() + content).hexdigest()[:16]
+    progress_path = _import_progress_path(job_id)
+
+    if job_id not in _running_imports:
+        _running_imports.add(job_id)
+        progress = ImportProgress(progress_path)
+        progress.status = "running"
+        progress.summary = {"total": len(sources)}
+        progress.save()
+        background_tasks.add_task(_run_import, job_id, user_id, sources, progress_path)
+
+    return {"status": "running", "job_id": job_id, "total": len(sources)}
+
+
+@router.get("/import/sfs/{job_id}")
+async def get_sfs_import(job_id: str):
+    """Status and summary of a bulk SFS import (imported, duplicates, failures so far)."""
+    if not job_id.isalnum():
+        raise HTTPException(status_code=404, detail="Import not found")
+    progress_path = _import_progress_path(job_id)
+    if not os.path.exists(progress_path):
+        raise HTTPException(status_code=404, detail="Import not found")
+
+    progress = ImportProgress(progress_path)
+    return {"job_id": job_id, "status": progress.status, **progress.summary}
+
+
 @router.get("", response_model=ExpenseListResponse)
 async def list_expenses(
     db: Session = Depends(get_db),
@@ -253,7 +327,6 @@ async def list_expenses(
         query = query.filter(Expense.source == source)
 
     if search:
-        from app.utils.crypto import decrypt_data
         # Note: Search in encrypted vendor is complex
         # For now, we'll fetch all and filter in Python
         # TODO: Consider storing vendor hash for better search performance
@@ -282,15 +355,16 @@ async def list_expenses(
     # Apply pagination
     expenses = query.offset(skip).limit(limit).all()
 
+    # Decrypt the page's vendors in one batch; the proxies keep them for serialization
+    decrypt_all([expense.vendor for expense in expenses])
+
     # If search is provided, filter by vendor (decrypt and search)
     if search and expenses:
         search_term = search.lower()
         filtered_expenses = []
         for expense in expenses:
-            decrypted_vendor = _decrypt_vendor_value(expense.vendor)
+            decrypted_vendor = _vendor_text(expense)
             if decrypted_vendor and search_term in decrypted_vendor.lower():
-                # cache decrypted vendor for later serialization
-                expense._decrypted_vendor_cache = decrypted_vendor
                 filtered_expenses.append(expense)
         expenses = filtered_expenses
         total = len(filtered_expenses)
@@ -321,10 +395,6 @@ async def get_expense_detail(
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
 
-    # Decrypt json_data and vendor
-    decrypted_json = _decrypt_json_payload(expense.json_data)
-    decrypted_vendor = _decrypt_vendor_value(expense.vendor)
-
     # Create response
     return _build_expense_detail_response(expense)
 
@@ -356,8 +426,8 @@ async def update_expense(
         expense.currency = update_data.currency
 
     if update_data.vendor is not None:
-        # Re-encrypt vendor
-        expense.vendor = encrypt_data(update_data.vendor)
+        # Encrypted on assignment
+        expense.vendor = update_data.vendor
 
     if update_data.purchase_date is not None:
         expense.purchase_date = update_data.purchase_date
@@ -367,8 +437,8 @@ async def update_expense(
 
     # Update json_data with notes and items if provided
     if update_data.notes is not None or update_data.items is not None:
-        # Decrypt existing json_data
-        existing_json = _decrypt_json_payload(expense.json_data) or {}
+        # Copy of the existing json_data
+        existing_json = dict(_json_payload(expense) or {})
 
         # Update with new data
         if update_data.notes is not None:
@@ -377,8 +447,8 @@ async def update_expense(
         if update_data.items is not None:
             existing_json['items'] = update_data.items
 
-        # Re-encrypt
-        expense.json_data = encrypt_data(existing_json)
+        # Encrypted on assignment
+        expense.json_data = existing_json
 
     db.commit()
     db.refresh(expense)
@@ -461,10 +531,13 @@ async def export_expenses_csv(
     # Write header
     writer.writerow(['Date', 'Vendor', 'Amount', 'Currency', 'Category', 'Source', 'Notes', 'AI Confidence'])
 
+    # Decrypt all vendors and payloads in batches
+    decrypt_all([expense.vendor for expense in expenses] + [expense.json_data for expense in expenses])
+
     # Write data
     for expense in expenses:
-        # Decrypt vendor
-        vendor = _decrypt_vendor_value(expense.vendor) or "[encrypted]"
+        vendor = _vendor_text(expense) or "[encrypted]"
+        payload = _json_payload(expense)
 
         # Get category name
         category_name = ""
@@ -474,13 +547,7 @@ async def export_expenses_csv(
                 category_name = category.name
 
         # Get notes from json_data
-        notes = ""
-        if expense.json_data:
-            try:
-                json_obj = decrypt_data(expense.json_data)
-                notes = json_obj.get('notes', '')
-            except:
-                pass
+        notes = payload.get('notes', '') if payload else ""
 
         writer.writerow([
             expense.purchase_date.strftime("%Y-%m-%d") if expense.purchase_date else "",
@@ -503,8 +570,8 @@ async def export_expenses_csv(
 
 
 def _build_expense_detail_response(expense: Expense) -> ExpenseDetailResponse:
-    decrypted_json = _decrypt_json_payload(expense.json_data)
-    decrypted_vendor = _decrypt_vendor_value(expense.vendor)
+    decrypted_json = _json_payload(expense)
+    decrypted_vendor = _vendor_text(expense)
     category_name = _derive_category_name(expense)
 
     return ExpenseDetailResponse(
@@ -546,10 +613,6 @@ async def _create_expense_from_parsed_data(
         Created Expense object
     """
 
-    # Encrypt sensitive data
-    encrypted_json = encrypt_data(parsed_data)
-    encrypted_vendor = encrypt_data(parsed_data.get("vendor", "")) if parsed_data.get("vendor") else None
-
     # Parse date
     purchase_date = None
     if parsed_data.get("purchase_date"):
@@ -572,10 +635,10 @@ async def _create_expense_from_parsed_data(
         source=source,
         amount=parsed_data.get("amount"),
         currency=parsed_data.get("currency", "MDL"),
-        vendor=encrypted_vendor,
+        vendor=parsed_data.get("vendor") or None,
         purchase_date=purchase_date,
         category_id=category_id,
-        json_data=encrypted_json,
+        json_data=parsed_data,
         ai_confidence=parsed_data.get("confidence"),
         vendor_fiscal_code=parsed_data.get("fiscal_code"),
         vendor_registration_number=parsed_data.get("registration_number"),
@@ -583,6 +646,7 @@ async def _create_expense_from_parsed_data(
     )
 
     db.add(expense)
+    record_receipt(db, parsed_data)
     db.commit()
     db.refresh(expense)
 
@@ -607,19 +671,14 @@ def _get_user_category_names(db: Session, user_id: str) -> list[str]:
     return [cat.name for cat in categories]
 
 
-def _decrypt_vendor_value(encrypted_vendor: Optional[str]) -> Optional[str]:
-    if not encrypted_vendor:
-        return None
-    try:
-        return decrypt_data(encrypted_vendor)
-    except Exception:
+def _vendor_text(expense: Expense) -> Optional[str]:
+    if expense.vendor is None:
         return None
+    return expense.vendor.get() or None
 
 
 def _serialize_expense(expense: Expense) -> ExpenseResponse:
-    decrypted_vendor = getattr(expense, "_decrypted_vendor_cache", None)
-    if decrypted_vendor is None:
-        decrypted_vendor = _decrypt_vendor_value(expense.vendor)
+    decrypted_vendor = _vendor_text(expense)
 
     category_name = _derive_category_name(expense)
 
@@ -642,28 +701,18 @@ def _serialize_expense(expense: Expense) -> ExpenseResponse:
     )
 
 
-def _decrypt_json_payload(encrypted_payload: Optional[str]) -> Optional[dict]:
-    if not encrypted_payload:
-        return None
-    try:
-        data = decrypt_data(encrypted_payload)
-        if isinstance(data, str):
-            try:
-                return json.loads(data)
-            except json.JSONDecodeError:
-                return None
-        if isinstance(data, dict):
-            return data
-    except Exception:
+def _json_payload(expense: Expense) -> Optional[dict]:
+    if expense.json_data is None:
         return None
-    return None
+    payload = expense.json_data.get()
+    return payload if isinstance(payload, dict) else None
 
 
 def _derive_category_name(expense: Expense) -> Optional[str]:
     if expense.category and expense.category.name:
         return expense.category.name
 
-    payload = _decrypt_json_payload(expense.json_data)
+    payload = _json_payload(expense)
     if payload and isinstance(payload.get("category"), str):
         return payload["category"]
 
@@ -1,7 +1,6 @@
 """
 Statistics API endpoints
 """
-import json
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, extract
@@ -12,7 +11,7 @@ from calendar import monthrange
 from app.models.database import get_db
 from app.models.expense import Expense
 from app.models.category import Category
-from app.utils.crypto import decrypt_data
+from app.models.encrypted import decrypt_all
 from app.utils.user_context import get_active_user_id
 
 router = APIRouter()
@@ -317,9 +316,10 @@ async def get_statistics_by_vendor(
 
     # Decrypt vendor names and aggregate
     vendor_map = {}
+    decrypt_all([r.vendor for r in results])
     for r in results:
         try:
-            decrypted_vendor = decrypt_data(r.vendor)
+            decrypted_vendor = r.vendor.value
             total = float(r.total or 0)
             count = int(r.count or 0)
 
@@ -565,6 +565,7 @@ def _build_category_metadata(db: Session, user_id: str) -> Dict[str, Dict[str, C
 
 def _aggregate_categories(expenses: List[Expense], categories_meta: Dict[str, Dict[str, Category]]):
     aggregates: Dict[str, Dict[str, float | int | str]] = {}
+    decrypt_all([expense.json_data for expense in expenses])
 
     for expense in expenses:
         amount = float(expense.amount or 0)
@@ -640,18 +641,15 @@ def _resolve_category(expense: Expense, categories_meta: Dict[str, Dict[str, Cat
 
 
 def _category_from_json(expense: Expense) -> Optional[str]:
-    if not expense.json_data:
+    if expense.json_data is None:
         return None
-    try:
-        data = decrypt_data(expense.json_data)
-        if isinstance(data, str):
-            data = json.loads(data)
-        category_name = data.get("category")
-        if isinstance(category_name, str):
-            category_name = category_name.strip()
-            return category_name or None
-    except Exception:
+    payload = expense.json_data.get()
+    if not isinstance(payload, dict):
         return None
+    category_name = payload.get("category")
+    if isinstance(category_name, str):
+        category_name = category_name.strip()
+        return category_name or None
     return None
 
 
@@ -123,14 +123,14 @@ async def telegram_webhook(request: Request, db: Session = Depends(get_db)):
             else:
                 # Regular text - treat as expense
                 if user:
-                    await handlers.handle_text_expense(chat_id, user.id, text, db)
+                    await handlers.handle_text_message(chat_id, user.id, text, db)
                 else:
                     # Create user first
                     await handlers.handle_start(chat_id, user_data, db)
                     # Refresh user
                     user = db.query(User).filter(User.telegram_user_id == telegram_user_id).first()
                     if user:
-                        await handlers.handle_text_expense(chat_id, user.id, text, db)
+                        await handlers.handle_text_message(chat_id, user.id, text, db)
 
         elif "photo" in message:
             # Handle photo receipts
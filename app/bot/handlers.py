@@ -5,33 +5,30 @@ from sqlalchemy.orm import Session
 from app.bot.telegram_bot import telegram_bot
 from app.models.user import User
 from app.models.category import Category
+from app.models.encrypted import decrypt_all
 from app.models.expense import Expense
 from app.services.groq_client import groq_client
-from app.utils.crypto import encrypt_data
+from app.services.groq_scheduler import PRIORITY_INTERACTIVE
+from app.services.local_parser import local_parser
+from app.services.resilience import UpstreamUnavailableError
+from app.services.vendor_registry import record_receipt
+from app.utils.audio_preprocess import SilentAudioError
 from app.utils.qr_decoder import decode_qr_codes
+from app.utils.categories import CATEGORY_KEYWORDS, ICON_THEMES
+from app.utils.config import settings
 from datetime import datetime
 from typing import Any, Optional, Tuple
+import logging
+import time
 import uuid
 
-CATEGORY_KEYWORDS = {
-    "Mâncare & Restaurante": [
-        "lapte", "pui", "carne", "banan", "morcov", "ceapa", "ulei", "oua",
-        "iaurt", "smantana", "fruct", "legum", "cafea", "paine", "covrig",
-        "branza", "lavas", "drojdie", "cartofi", "pere", "mere", "dorada",
-        "usturoi", "radacina", "patrunjel", "marar", "cotlet", "bors", "apio",
-        "piept", "smântână", "covrigei", "lavas", "petrunjel", "chifla",
-        "gambe", "crema", "frisca", "lapte", "laptele", "salată", "legume"
-    ],
-    "Cumpărături": [
-        "detergent", "sapun", "servetel", "hartie", "plastic",
-        "baterie", "cosmet", "covor", "electronic", "lamp", "articol casnic",
-        "sacosa", "odorizant"
-    ],
-    "Sănătate": ["vitamin", "farmacie", "medical", "pastila", "supliment", "medicament"],
-    "Utilități & Locuință": ["factura", "energie", "gaz", "apa", "electric", "chir", "intretinere"],
-    "Transport": ["benzina", "diesel", "taxi", "uber", "transport", "autobuz", "masina", "motorina"],
-    "Distracție & Timp liber": ["cinema", "joc", "spectacol", "bilete", "cadou", "hobby", "concert"],
-}
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between two edits of a streaming preview message
+STREAM_PREVIEW_MIN_INTERVAL = 0.7
+
+# How each upstream is named to the user when its circuit is open
+UPSTREAM_LABELS = {"groq": "AI", "sfs": "SFS", "telegram": "Telegram"}
 
 
 async def handle_start(chat_id: int, user_data: dict, db: Session):
@@ -246,79 +243,11 @@ async def handle_add_category(chat_id: int, user_id: str, category_name: str, db
     existing_categories = db.query(Category).filter(Category.user_id == user_id).all()
     used_icons = {cat.icon for cat in existing_categories}
 
-    # Comprehensive icon pool organized by themes
-    icon_themes = {
-        "food": {
-            "keywords": ["mancare", "food", "restaurant", "dining", "cafea", "coffee", "bautura", "drink", "groceries", "alimente"],
-            "icons": ["🍕", "🍔", "🍟", "🌮", "🍱", "🍜", "🥗", "🍝", "🥘", "🍲", "☕", "🍺", "🍷", "🥤", "🧃"]
-        },
-        "transport": {
-            "keywords": ["transport", "masina", "car", "taxi", "bus", "autobuz", "benzina", "fuel", "parking"],
-            "icons": ["🚗", "🚕", "🚌", "🚎", "🚙", "🚐", "⛽", "🅿️", "🚦", "🛣️"]
-        },
-        "shopping": {
-            "keywords": ["shopping", "cumparaturi", "haine", "clothes", "pantaloni", "fashion", "magazin", "store"],
-            "icons": ["🛍️", "👕", "👔", "👗", "👠", "👜", "🎽", "👖", "🧥", "🧢"]
-        },
-        "health": {
-            "keywords": ["sanatate", "health", "doctor", "pharmacy", "farmacie", "medical", "spital", "hospital"],
-            "icons": ["💊", "🏥", "⚕️", "💉", "🩺", "🩹", "🧬", "🦷", "👨‍⚕️", "👩‍⚕️"]
-        },
-        "education": {
-            "keywords": ["educatie", "education", "scoala", "school", "university", "universitate", "studii", "curs", "course"],
-            "icons": ["📚", "📖", "✏️", "📝", "🎓", "🏫", "📐", "🖊️", "📔", "📕"]
-        },
-        "entertainment": {
-            "keywords": ["entertainment", "distractie", "hobby", "film", "movie", "cinema", "muzica", "music", "joc", "game"],
-            "icons": ["🎮", "🎬", "🎵", "🎸", "🎹", "🎭", "🎪", "🎨", "🎯", "🎲"]
-        },
-        "sports": {
-            "keywords": ["sport", "fitness", "gym", "sala", "fotbal", "football", "baschet", "basketball"],
-            "icons": ["⚽", "🏀", "🏈", "⚾", "🎾", "🏐", "🏋️", "🚴", "🏊", "🤸"]
-        },
-        "home": {
-            "keywords": ["casa", "home", "chirie", "rent", "utilities", "utilitati", "electric", "apa", "water", "gaz"],
-            "icons": ["🏠", "🏡", "🔑", "🚪", "🛋️", "🛏️", "🚿", "💡", "🔌", "🧹"]
-        },
-        "family": {
-            "keywords": ["familie", "family", "copii", "kids", "children", "baby", "bebelus"],
-            "icons": ["👨‍👩‍👧", "👨‍👩‍👧‍👦", "👶", "🧒", "👪", "💑", "💏", "👫", "👬", "👭"]
-        },
-        "gifts": {
-            "keywords": ["cadouri", "gifts", "prezent", "present", "aniversare", "birthday"],
-            "icons": ["🎁", "🎀", "🎉", "🎊", "🎈", "🎂", "🧧", "💝", "🌹", "💐"]
-        },
-        "pets": {
-            "keywords": ["animale", "pets", "caine", "dog", "pisica", "cat", "veterinar", "vet"],
-            "icons": ["🐾", "🐕", "🐈", "🐶", "🐱", "🐕‍🦺", "🐩", "🐈‍⬛", "🦮", "🐇"]
-        },
-        "travel": {
-            "keywords": ["vacanta", "vacation", "travel", "calatorie", "zbor", "flight", "hotel", "turism"],
-            "icons": ["✈️", "🛫", "🛬", "🏖️", "🗺️", "🧳", "🎒", "🏨", "🗼", "🏰"]
-        },
-        "tech": {
-            "keywords": ["tech", "tehnologie", "computer", "calculator", "laptop", "phone", "telefon", "software", "gadget", "server"],
-            "icons": ["💻", "🖥️", "⌨️", "🖱️", "📱", "📲", "💾", "💿", "📀", "🖨️"]
-        },
-        "beauty": {
-            "keywords": ["beauty", "frumusete", "cosmetica", "coafura", "hair", "salon", "machiaj", "makeup"],
-            "icons": ["💄", "💅", "💇", "💆", "🧴", "🧼", "🧽", "🪒", "✂️", "💈"]
-        },
-        "finance": {
-            "keywords": ["finance", "banca", "bank", "investitie", "investment", "asigurare", "insurance"],
-            "icons": ["💰", "💵", "💴", "💶", "💷", "💳", "💸", "🏦", "📊", "📈"]
-        },
-        "work": {
-            "keywords": ["work", "munca", "office", "birou", "business", "afacere"],
-            "icons": ["💼", "📇", "📋", "📁", "📂", "🗂️", "📌", "📎", "🖇️", "✒️"]
-        }
-    }
-
     # Function to find best icon match
     def find_unique_icon(category_name_lower: str, used_icons: set) -> str:
         # Try to match theme based on keywords
         matched_themes = []
-        for theme_name, theme_data in icon_themes.items():
+        for theme_name, theme_data in ICON_THEMES.items():
             for keyword in theme_data["keywords"]:
                 if keyword in category_name_lower:
                     matched_themes.append((theme_name, theme_data["icons"]))
@@ -331,7 +260,7 @@ async def handle_add_category(chat_id: int, user_id: str, category_name: str, db
                     return icon
 
         # If no match or all matched icons used, try all themes
-        for theme_name, theme_data in icon_themes.items():
+        for theme_name, theme_data in ICON_THEMES.items():
             for icon in theme_data["icons"]:
                 if icon not in used_icons:
                     return icon
@@ -398,10 +327,9 @@ Trimite-mi:
             source_icon = {"photo": "📸", "voice": "🎤", "manual": "✍️"}.get(exp.source, "📝")
 
             vendor_text = ""
-            if exp.vendor:
+            if exp.vendor is not None:
                 try:
-                    from app.utils.crypto import crypto_service
-                    vendor_text = f" - {crypto_service.decrypt_data(exp.vendor)}"
+                    vendor_text = f" - {exp.vendor.value}"
                 except:
                     pass
 
@@ -417,6 +345,190 @@ Trimite-mi:
     await telegram_bot.send_message(chat_id, text)
 
 
+def _try_later_text(error: UpstreamUnavailableError) -> str:
+    """Short 'try again later' answer for an upstream whose breaker is open."""
+    label = UPSTREAM_LABELS.get(error.upstream, error.upstream)
+    minutes = max(1, round((error.retry_after or 60) / 60))
+    return (
+        f"⏳ <b>Serviciul {label} nu răspunde momentan</b>\n\n"
+        f"Încearcă din nou în aproximativ {minutes} min."
+    )
+
+
+async def _report_unavailable(chat_id: int, error: UpstreamUnavailableError, message_id: Optional[int] = None):
+    """Answer 'try again later', unless Telegram itself is the upstream that is down."""
+    if error.upstream == "telegram":
+        logger.warning(f"Telegram unavailable ({error.reason}), no reply sent to chat {chat_id}")
+        return
+    await _send_or_edit(chat_id, message_id, _try_later_text(error))
+
+
+def _message_id(response: Any) -> Optional[int]:
+    """Extract the message id from a Telegram sendMessage response."""
+    if isinstance(response, dict) and response.get("ok"):
+        return (response.get("result") or {}).get("message_id")
+    return None
+
+
+async def _send_or_edit(chat_id: int, message_id: Optional[int], text: str, reply_markup: Optional[dict] = None):
+    """Edit the given bot message into `text`, or send a new message if that is not possible."""
+    if message_id:
+        result = await telegram_bot.edit_message_text(chat_id, message_id, text, reply_markup=reply_markup)
+        if isinstance(result, dict) and result.get("ok"):
+            return result
+    return await telegram_bot.send_message(chat_id, text, reply_markup=reply_markup)
+
+
+def _streaming_preview(chat_id: int, message_id: int):
+    """
+    Build the on_field callback for groq_client.parse_text_stream that shows
+    amount, vendor and category in the progress message as soon as they arrive.
+    """
+    preview: dict = {}
+    state = {"last_edit": 0.0, "rendered": ""}
+
+    async def on_field(key: str, value: Any):
+        if key not in ("amount", "currency", "vendor", "category") or value in (None, ""):
+            return
+        preview[key] = value
+        if "amount" not in preview:
+            return
+
+        # Telegram rate-limits edits; the final confirmation replaces the preview anyway
+        now = time.monotonic()
+        if now - state["last_edit"] < STREAM_PREVIEW_MIN_INTERVAL:
+            return
+
+        lines = ["🤖 <b>Procesez cheltuiala...</b>", ""]
+        lines.append(f"💰 <b>Sumă:</b> {preview['amount']} {preview.get('currency', 'MDL')}")
+        if preview.get("vendor"):
+            lines.append(f"🏪 <b>Vendor:</b> {preview['vendor']}")
+        if preview.get("category"):
+            lines.append(f"📂 <b>Categorie:</b> {preview['category']}")
+        rendered = "\n".join(lines)
+        if rendered == state["rendered"]:
+            return
+
+        state["last_edit"] = now
+        state["rendered"] = rendered
+        try:
+            await telegram_bot.edit_message_text(chat_id, message_id, rendered)
+        except Exception:
+            pass
+
+    return on_field
+
+
+def _build_confirmation(chat_id: int, user_id: str, parsed_data: dict, category_names: list[str]) -> Tuple[str, dict]:
+    """
+    Store parsed expense data in the pending cache and build the confirmation message
+
+    Returns:
+        Tuple of (confirmation text, inline keyboard with DA/NU buttons)
+    """
+    # Store in pending cache and ask for confirmation
+    from app.bot.pending_cache import pending_cache
+
+    # Check if we have multiple items with categories (split into separate expenses)
+    items = parsed_data.get('items', [])
+    has_multiple_items = len(items) > 1
+
+    if has_multiple_items:
+        # Multiple items - will create separate expenses for each
+        confirmation_id = pending_cache.store(user_id, parsed_data, chat_id)
+
+        # Parse date for display
+        purchase_date = None
+        if parsed_data.get("purchase_date"):
+            try:
+                purchase_date = datetime.strptime(parsed_data["purchase_date"], "%Y-%m-%d").date()
+            except:
+                purchase_date = datetime.now().date()
+        else:
+            purchase_date = datetime.now().date()
+
+        # Build detailed list with categories
+        items_detail = ""
+        for idx, item in enumerate(items, 1):
+            item_name = item.get('name', 'Unknown')
+            qty, unit_price, line_total = _item_pricing(item)
+            qty_present = item.get('qty') is not None
+            item_category = item.get('category', parsed_data.get('category', 'N/A'))
+
+            # Validate item category
+            if item_category and category_names:
+                if item_category not in category_names:
+                    # Find closest match
+                    item_lower = item_category.lower()
+                    best_match = None
+                    for cat_name in category_names:
+                        if item_lower in cat_name.lower() or cat_name.lower() in item_lower:
+                            best_match = cat_name
+                            break
+                    if not best_match:
+                        best_match = category_names[0] if category_names else "Uncategorized"
+                    item['category'] = best_match
+                    item_category = best_match
+
+            amount_value = line_total if line_total is not None else (unit_price or 0.0)
+            detail_line = f"{idx}. <b>{item_name}</b> - {amount_value:.2f} {parsed_data.get('currency', 'MDL')}"
+            if qty_present and unit_price is not None and qty and qty > 1:
+                detail_line += f" <i>({qty:g} x {unit_price:.2f})</i>"
+            items_detail += detail_line + "\n"
+            items_detail += f"   📂 {item_category}\n\n"
+
+        confirmation_text = f"""
+❓ <b>Confirmi {len(items)} cheltuieli separate?</b>
+
+📅 <b>Data:</b> {purchase_date.strftime('%d.%m.%Y')}
+💰 <b>Total:</b> {parsed_data.get('amount')} {parsed_data.get('currency', 'MDL')}
+
+<b>📝 Cheltuieli care vor fi create:</b>
+{items_detail}
+⚠️ <i>Fiecare produs va fi salvat ca cheltuială separată!</i>
+"""
+
+    else:
+        # Single item or no items - standard flow
+        confirmation_id = pending_cache.store(user_id, parsed_data, chat_id)
+
+        vendor_str = f"\n🏪 <b>Vendor:</b> {parsed_data.get('vendor')}" if parsed_data.get('vendor') else ""
+        category_str = f"\n📂 <b>Categorie:</b> {parsed_data.get('category')}" if parsed_data.get('category') else ""
+
+        confidence_icon = "🎯" if parsed_data.get('confidence', 0) > 0.8 else "⚠️"
+
+        # Parse date for display
+        purchase_date = None
+        if parsed_data.get("purchase_date"):
+            try:
+                purchase_date = datetime.strptime(parsed_data["purchase_date"], "%Y-%m-%d").date()
+            except:
+                purchase_date = datetime.now().date()
+        else:
+            purchase_date = datetime.now().date()
+
+        confirmation_text = f"""
+❓ <b>Confirmi cheltuiala?</b>
+
+💰 <b>Sumă:</b> {parsed_data.get('amount')} {parsed_data.get('currency', 'MDL')}{vendor_str}{category_str}
+📅 <b>Data:</b> {purchase_date.strftime('%d.%m.%Y')}
+
+{confidence_icon} <i>Confidence: {int(parsed_data.get('confidence', 0) * 100)}%</i>
+"""
+
+    # Create inline keyboard with DA/NU buttons
+    inline_keyboard = {
+        "inline_keyboard": [
+            [
+                {"text": "✅ DA", "callback_data": f"confirm_{confirmation_id}"},
+                {"text": "❌ NU", "callback_data": f"cancel_{confirmation_id}"}
+            ]
+        ]
+    }
+
+    return confirmation_text, inline_keyboard
+
+
 async def handle_text_expense(chat_id: int, user_id: str, text: str, db: Session):
     """Handle text message as expense"""
 
@@ -428,7 +540,7 @@ async def handle_text_expense(chat_id: int, user_id: str, text: str, db: Session
     if 'mev.sfs.md/receipt-verifier' in text:
         from app.services.sfs_scraper import sfs_scraper
 
-        await telegram_bot.send_message(chat_id, "🧾 Procesez bon fiscal SFS Moldova...")
+        progress = await telegram_bot.send_message(chat_id, "🧾 Procesez bon fiscal SFS Moldova...")
 
         try:
             # Extract URL from text
@@ -440,7 +552,7 @@ async def handle_text_expense(chat_id: int, user_id: str, text: str, db: Session
                 qr_url = match.group(0)
 
                 # Parse SFS receipt
-                parsed_data = await sfs_scraper.parse_qr_url(qr_url)
+                parsed_data = await sfs_scraper.parse_qr_url(qr_url, db)
 
                 # Continue with standard expense creation...
                 # (same code as below)
@@ -448,6 +560,9 @@ async def handle_text_expense(chat_id: int, user_id: str, text: str, db: Session
                 await telegram_bot.send_message(chat_id, "❌ Link SFS invalid. Te rog trimite link-ul complet.")
                 return
 
+        except UpstreamUnavailableError as e:
+            await _report_unavailable(chat_id, e)
+            return
         except Exception as e:
             error_text = f"""
 ❌ <b>Eroare la procesarea bonului SFS</b>
@@ -460,125 +575,134 @@ Nu am putut prelua datele de pe site-ul SFS.
             return
     else:
         # Send "typing" indicator
-        await telegram_bot.send_message(chat_id, "🤖 Procesez cheltuiala...")
+        progress = await telegram_bot.send_message(chat_id, "🤖 Procesez cheltuiala...")
+
+    # The progress message is edited in place as the answer streams in
+    progress_message_id = _message_id(progress)
 
     try:
         if 'parsed_data' not in locals():
-            parsed_data = await groq_client.parse_text(text, category_names)
+            # Simple texts like "50 lei cafea" are parsed locally, the rest goes to Groq
+            parsed_data = local_parser.parse(text, category_names)
+            if parsed_data is None:
+                if settings.GROQ_STREAMING_ENABLED and progress_message_id:
+                    parsed_data = await groq_client.parse_text_stream(
+                        text,
+                        category_names,
+                        _streaming_preview(chat_id, progress_message_id),
+                        PRIORITY_INTERACTIVE,
+                    )
+                else:
+                    parsed_data = await groq_client.parse_text(text, category_names, PRIORITY_INTERACTIVE)
             parsed_data = _apply_category_mapping(parsed_data, category_names)
 
-        # Store in pending cache and ask for confirmation
-        from app.bot.pending_cache import pending_cache
+        confirmation_text, inline_keyboard = _build_confirmation(chat_id, user_id, parsed_data, category_names)
+        await _send_or_edit(chat_id, progress_message_id, confirmation_text, reply_markup=inline_keyboard)
 
-        # Check if we have multiple items with categories (split into separate expenses)
-        items = parsed_data.get('items', [])
-        has_multiple_items = len(items) > 1
+    except UpstreamUnavailableError as e:
+        await _report_unavailable(chat_id, e, progress_message_id)
 
-        if has_multiple_items:
-            # Multiple items - will create separate expenses for each
-            confirmation_id = pending_cache.store(user_id, parsed_data, chat_id)
+    except Exception as e:
+        error_text = f"""
+❌ <b>Eroare la procesare</b>
 
-            # Parse date for display
-            purchase_date = None
-            if parsed_data.get("purchase_date"):
-                try:
-                    purchase_date = datetime.strptime(parsed_data["purchase_date"], "%Y-%m-%d").date()
-                except:
-                    purchase_date = datetime.now().date()
-            else:
-                purchase_date = datetime.now().date()
+Nu am putut procesa cheltuiala. Te rog încearcă din nou.
 
-            # Build detailed list with categories
-            items_detail = ""
-            for idx, item in enumerate(items, 1):
-                item_name = item.get('name', 'Unknown')
-                qty, unit_price, line_total = _item_pricing(item)
-                qty_present = item.get('qty') is not None
-                item_category = item.get('category', parsed_data.get('category', 'N/A'))
+<b>Exemple:</b>
+• "Cafea 50 lei"
+• "Taxi 120 MDL"
+• "Cumpărături 200"
 
-                # Validate item category
-                if item_category and category_names:
-                    if item_category not in category_names:
-                        # Find closest match
-                        item_lower = item_category.lower()
-                        best_match = None
-                        for cat_name in category_names:
-                            if item_lower in cat_name.lower() or cat_name.lower() in item_lower:
-                                best_match = cat_name
-                                break
-                        if not best_match:
-                            best_match = category_names[0] if category_names else "Uncategorized"
-                        item['category'] = best_match
-                        item_category = best_match
+<i>Error: {str(e)}</i>
+"""
+        await telegram_bot.send_message(chat_id, error_text)
 
-                amount_value = line_total if line_total is not None else (unit_price or 0.0)
-                detail_line = f"{idx}. <b>{item_name}</b> - {amount_value:.2f} {parsed_data.get('currency', 'MDL')}"
-                if qty_present and unit_price is not None and qty and qty > 1:
-                    detail_line += f" <i>({qty:g} x {unit_price:.2f})</i>"
-                items_detail += detail_line + "\n"
-                items_detail += f"   📂 {item_category}\n\n"
 
-            confirmation_text = f"""
-❓ <b>Confirmi {len(items)} cheltuieli separate?</b>
+def _split_expense_lines(text: str) -> list[str]:
+    """Split a pasted multi-line list ("pâine 12\nlapte 25") into one text per expense."""
+    lines = [line.strip(" \t-•*") for line in text.splitlines()]
+    lines = [line for line in lines if line]
+    if len(lines) > 1 and all(any(char.isdigit() for char in line) for line in lines):
+        return lines
+    return [text]
 
-📅 <b>Data:</b> {purchase_date.strftime('%d.%m.%Y')}
-💰 <b>Total:</b> {parsed_data.get('amount')} {parsed_data.get('currency', 'MDL')}
 
-<b>📝 Cheltuieli care vor fi create:</b>
-{items_detail}
-⚠️ <i>Fiecare produs va fi salvat ca cheltuială separată!</i>
-"""
+async def handle_text_message(chat_id: int, user_id: str, text: str, db: Session):
+    """
+    Handle a regular text message. Texts the local parser understands are
+    answered right away; the others are collected with the messages the chat
+    sends in quick succession and parsed together in one Groq request, in the
+    background so the webhook is acknowledged without waiting for the burst.
+    """
+    if 'mev.sfs.md/receipt-verifier' in text:
+        await handle_text_expense(chat_id, user_id, text, db)
+        return
 
-        else:
-            # Single item or no items - standard flow
-            confirmation_id = pending_cache.store(user_id, parsed_data, chat_id)
+    from app.bot.text_batcher import text_batcher
 
-            vendor_str = f"\n🏪 <b>Vendor:</b> {parsed_data.get('vendor')}" if parsed_data.get('vendor') else ""
-            category_str = f"\n📂 <b>Categorie:</b> {parsed_data.get('category')}" if parsed_data.get('category') else ""
+    category_names = [name for (name,) in db.query(Category.name).filter(Category.user_id == user_id).all()]
+    if text_batcher.window <= 0 or local_parser.parse(text, category_names) is not None:
+        await handle_text_expense(chat_id, user_id, text, db)
+        return
 
-            confidence_icon = "🎯" if parsed_data.get('confidence', 0) > 0.8 else "⚠️"
+    text_batcher.submit(chat_id, text, lambda burst: handle_text_burst(chat_id, user_id, burst))
 
-            # Parse date for display
-            purchase_date = None
-            if parsed_data.get("purchase_date"):
-                try:
-                    purchase_date = datetime.strptime(parsed_data["purchase_date"], "%Y-%m-%d").date()
-                except:
-                    purchase_date = datetime.now().date()
-            else:
-                purchase_date = datetime.now().date()
 
-            confirmation_text = f"""
-❓ <b>Confirmi cheltuiala?</b>
+async def handle_text_burst(chat_id: int, user_id: str, burst: list[str]):
+    """
+    Parse a burst of text messages with a session of its own (the webhook's
+    session is closed by then). A single message is parsed as one expense;
+    with several messages, pasted multi-line lists are split into one
+    expense per line.
+    """
+    from app.models.database import SessionLocal
 
-💰 <b>Sumă:</b> {parsed_data.get('amount')} {parsed_data.get('currency', 'MDL')}{vendor_str}{category_str}
-📅 <b>Data:</b> {purchase_date.strftime('%d.%m.%Y')}
+    with SessionLocal() as db:
+        if len(burst) == 1:
+            await handle_text_expense(chat_id, user_id, burst[0], db)
+            return
+        texts = [line for message in burst for line in _split_expense_lines(message)]
+        await handle_text_expenses(chat_id, user_id, texts, db)
 
-{confidence_icon} <i>Confidence: {int(parsed_data.get('confidence', 0) * 100)}%</i>
-"""
 
-        # Create inline keyboard with DA/NU buttons
-        inline_keyboard = {
-            "inline_keyboard": [
-                [
-                    {"text": "✅ DA", "callback_data": f"confirm_{confirmation_id}"},
-                    {"text": "❌ NU", "callback_data": f"cancel_{confirmation_id}"}
-                ]
-            ]
-        }
+async def handle_text_expenses(chat_id: int, user_id: str, texts: list[str], db: Session):
+    """Handle several expense texts at once, with one confirmation per expense"""
+
+    categories = db.query(Category).filter(Category.user_id == user_id).all()
+    category_names = [cat.name for cat in categories]
+
+    progress = await telegram_bot.send_message(chat_id, f"🤖 Procesez {len(texts)} cheltuieli...")
+    progress_message_id = _message_id(progress)
+
+    try:
+        # Simple texts are parsed locally, the rest share one Groq request
+        results: list[Optional[dict]] = [local_parser.parse(text, category_names) for text in texts]
+        remote_indexes = [index for index, parsed in enumerate(results) if parsed is None]
+        if remote_indexes:
+            remote_results = await groq_client.parse_text_batch(
+                [texts[index] for index in remote_indexes],
+                category_names,
+                PRIORITY_INTERACTIVE,
+            )
+            for index, parsed in zip(remote_indexes, remote_results):
+                results[index] = parsed
+
+        for index, parsed_data in enumerate(results):
+            parsed_data = _apply_category_mapping(parsed_data, category_names)
+            confirmation_text, inline_keyboard = _build_confirmation(chat_id, user_id, parsed_data, category_names)
+            if index == 0:
+                await _send_or_edit(chat_id, progress_message_id, confirmation_text, reply_markup=inline_keyboard)
+            else:
+                await telegram_bot.send_message(chat_id, confirmation_text, reply_markup=inline_keyboard)
 
-        await telegram_bot.send_message(chat_id, confirmation_text, reply_markup=inline_keyboard)
+    except UpstreamUnavailableError as e:
+        await _report_unavailable(chat_id, e, progress_message_id)
 
     except Exception as e:
         error_text = f"""
 ❌ <b>Eroare la procesare</b>
 
-Nu am putut procesa cheltuiala. Te rog încearcă din nou.
-
-<b>Exemple:</b>
-• "Cafea 50 lei"
-• "Taxi 120 MDL"
-• "Cumpărături 200"
+Nu am putut procesa cele {len(texts)} cheltuieli. Te rog încearcă din nou.
 
 <i>Error: {str(e)}</i>
 """
@@ -599,7 +723,6 @@ async def handle_stats(chat_id: int, user_id: str, db: Session):
     # Calculate stats (skip expenses with null amount)
     from datetime import datetime, timedelta
     from collections import defaultdict
-    from app.utils.crypto import crypto_service
 
     valid_expenses = [exp for exp in expenses if exp.amount is not None]
 
@@ -636,16 +759,14 @@ async def handle_stats(chat_id: int, user_id: str, db: Session):
 
     # Category breakdown
     category_totals = defaultdict(float)
-    for exp in valid_expenses:
-        if exp.currency == "MDL" and exp.json_data:
-            try:
-                data = crypto_service.decrypt_data(exp.json_data)
-                import json
-                parsed = json.loads(data)
-                category = parsed.get("category", "Necategorizat")
-                category_totals[category] += float(exp.amount)
-            except:
-                category_totals["Necategorizat"] += float(exp.amount)
+    mdl_with_data = [exp for exp in valid_expenses if exp.currency == "MDL" and exp.json_data is not None]
+    decrypt_all([exp.json_data for exp in mdl_with_data])
+    for exp in mdl_with_data:
+        try:
+            category = exp.json_data.value.get("category", "Necategorizat")
+            category_totals[category] += float(exp.amount)
+        except:
+            category_totals["Necategorizat"] += float(exp.amount)
 
     # Sort categories by total (descending)
     sorted_categories = sorted(category_totals.items(), key=lambda x: x[1], reverse=True)
@@ -655,9 +776,9 @@ async def handle_stats(chat_id: int, user_id: str, db: Session):
     for exp in sorted(valid_expenses, key=lambda x: x.created_at, reverse=True)[:5]:
         date_str = exp.created_at.strftime("%d.%m") if exp.created_at else "?"
         vendor = ""
-        if exp.vendor:
+        if exp.vendor is not None:
             try:
-                vendor = crypto_service.decrypt_data(exp.vendor)
+                vendor = exp.vendor.value
                 vendor = f" - {vendor[:15]}" if len(vendor) > 15 else f" - {vendor}"
             except:
                 pass
@@ -761,8 +882,11 @@ async def handle_photo_expense(chat_id: int, user_id: str, photo_data: list, db:
         await telegram_bot.send_message(chat_id, "🧾 Cod QR SFS detectat. Procesez bonul oficial...")
 
         try:
-            parsed_data = await sfs_scraper.parse_qr_url(sfs_link)
+            parsed_data = await sfs_scraper.parse_qr_url(sfs_link, db)
             parsed_data = _apply_category_mapping(parsed_data, category_names)
+        except UpstreamUnavailableError as e:
+            await _report_unavailable(chat_id, e)
+            return
         except Exception as e:
             await telegram_bot.send_message(
                 chat_id,
@@ -840,9 +964,6 @@ async def handle_photo_expense(chat_id: int, user_id: str, photo_data: list, db:
 
         else:
             # Un singur total -> creăm cheltuiala direct
-            encrypted_json = encrypt_data(parsed_data)
-            encrypted_vendor = encrypt_data(parsed_data.get("vendor", "")) if parsed_data.get("vendor") else None
-
             purchase_date = None
             if parsed_data.get("purchase_date"):
                 try:
@@ -865,15 +986,16 @@ async def handle_photo_expense(chat_id: int, user_id: str, photo_data: list, db:
                 source="photo",
                 amount=parsed_data.get("amount"),
                 currency=parsed_data.get("currency", "MDL"),
-                vendor=encrypted_vendor,
+                vendor=parsed_data.get("vendor") or None,
                 purchase_date=purchase_date,
                 category_id=matched_category_id,
-                json_data=encrypted_json,
+                json_data=parsed_data,
                 ai_confidence=parsed_data.get("confidence"),
                 **vendor_metadata
             )
 
             db.add(expense)
+            record_receipt(db, parsed_data)
             db.commit()
 
             text = f"""
@@ -888,6 +1010,9 @@ Categoria: {parsed_data.get('category', 'Fără categorie')}
             await telegram_bot.send_message(chat_id, text)
             return
 
+    except UpstreamUnavailableError as e:
+        await _report_unavailable(chat_id, e)
+
     except Exception as e:
         await telegram_bot.send_message(
             chat_id,
@@ -917,11 +1042,7 @@ async def handle_voice_expense(chat_id: int, user_id: str, voice_data: dict, db:
 
         try:
             # Parse with Groq AI Speech-to-Text
-            parsed_data = await groq_client.parse_voice(temp_path)
-
-            # Encrypt sensitive data
-            encrypted_json = encrypt_data(parsed_data)
-            encrypted_vendor = encrypt_data(parsed_data.get("vendor", "")) if parsed_data.get("vendor") else None
+            parsed_data = await groq_client.parse_voice(temp_path, PRIORITY_INTERACTIVE)
 
             # Parse date
             purchase_date = None
@@ -939,9 +1060,9 @@ async def handle_voice_expense(chat_id: int, user_id: str, voice_data: dict, db:
                 source="voice",
                 amount=parsed_data.get("amount"),
                 currency=parsed_data.get("currency", "MDL"),
-                vendor=encrypted_vendor,
+                vendor=parsed_data.get("vendor") or None,
                 purchase_date=purchase_date,
-                json_data=encrypted_json,
+                json_data=parsed_data,
                 ai_confidence=parsed_data.get("confidence")
             )
 
@@ -977,6 +1098,15 @@ async def handle_voice_expense(chat_id: int, user_id: str, voice_data: dict, db:
             if os.path.exists(temp_path):
                 os.remove(temp_path)
 
+    except SilentAudioError:
+        await telegram_bot.send_message(
+            chat_id,
+            "🔇 <b>Mesajul vocal pare gol</b>\n\nNu am auzit nimic. Înregistrează din nou și menționează suma și moneda."
+        )
+
+    except UpstreamUnavailableError as e:
+        await _report_unavailable(chat_id, e)
+
     except Exception as e:
         error_text = f"""
 ❌ <b>Eroare la procesarea mesajului vocal</b>
@@ -1080,7 +1210,6 @@ def _vendor_metadata(parsed_data: dict) -> dict:
 async def handle_callback_query(callback_query: dict, db: Session):
     """Handle inline keyboard button callbacks (DA/NU confirmations)"""
     from app.bot.pending_cache import pending_cache
-    from app.utils.crypto import encrypt_data
 
     callback_id = callback_query.get("id")
     callback_data = callback_query.get("data")
@@ -1157,9 +1286,6 @@ async def handle_callback_query(callback_query: dict, db: Session):
                         "address": parsed_data.get("address"),
                     }
 
-                    encrypted_json = encrypt_data(item_data)
-                    encrypted_vendor = encrypt_data(item_name) if item_name else None
-
                     matched_category_id = None
                     if item_category and categories:
                         for cat in categories:
@@ -1172,10 +1298,10 @@ async def handle_callback_query(callback_query: dict, db: Session):
                         source="manual",
                         amount=amount_value,
                         currency=parsed_data.get("currency", "MDL"),
-                        vendor=encrypted_vendor,
+                        vendor=item_name or None,
                         purchase_date=purchase_date,
                         category_id=matched_category_id,
-                        json_data=encrypted_json,
+                        json_data=item_data,
                         ai_confidence=parsed_data.get("confidence"),
                         **vendor_metadata
                     )
@@ -1186,6 +1312,7 @@ async def handle_callback_query(callback_query: dict, db: Session):
                         summary_line += f" [{qty:g} x {unit_price:.2f}]"
                     expenses_created.append(summary_line)
 
+                record_receipt(db, parsed_data)
                 db.commit()
                 pending_cache.delete(confirmation_id)
 
@@ -1203,9 +1330,6 @@ async def handle_callback_query(callback_query: dict, db: Session):
                 await telegram_bot.send_message(chat_id, success_text)
 
             else:
-                encrypted_json = encrypt_data(parsed_data)
-                encrypted_vendor = encrypt_data(parsed_data.get("vendor", "")) if parsed_data.get("vendor") else None
-
                 matched_category_id = None
                 if parsed_data.get("category") and categories:
                     for cat in categories:
@@ -1218,15 +1342,16 @@ async def handle_callback_query(callback_query: dict, db: Session):
                     source="manual",
                     amount=parsed_data.get("amount"),
                     currency=parsed_data.get("currency", "MDL"),
-                    vendor=encrypted_vendor,
+                    vendor=parsed_data.get("vendor") or None,
                     purchase_date=purchase_date,
                     category_id=matched_category_id,
-                    json_data=encrypted_json,
+                    json_data=parsed_data,
                     ai_confidence=parsed_data.get("confidence"),
                     **vendor_metadata
                 )
 
                 db.add(expense)
+                record_receipt(db, parsed_data)
                 db.commit()
                 db.refresh(expense)
 
@@ -1262,21 +1387,15 @@ async def handle_callback_query(callback_query: dict, db: Session):
                 return
 
             # Check if category has expenses
-            from app.utils.crypto import crypto_service
-            import json
 
             expenses_with_category = []
             all_expenses = db.query(Expense).filter(Expense.owner_user_id == user.id).all()
+            decrypt_all([exp.json_data for exp in all_expenses])
 
             for exp in all_expenses:
-                if exp.json_data:
-                    try:
-                        data = crypto_service.decrypt_data(exp.json_data)
-                        parsed = json.loads(data)
-                        if parsed.get("category") == category.name:
-                            expenses_with_category.append(exp)
-                    except:
-                        pass
+                parsed = exp.json_data.get() if exp.json_data is not None else None
+                if parsed and parsed.get("category") == category.name:
+                    expenses_with_category.append(exp)
 
             if len(expenses_with_category) > 0:
                 # Has expenses - need to migrate
@@ -1341,25 +1460,16 @@ Alege categoria în care vrei să muți cheltuielile:
                 return
 
             # Migrate all expenses
-            from app.utils.crypto import crypto_service
-            import json
-
             all_expenses = db.query(Expense).filter(Expense.owner_user_id == user.id).all()
-            migrated_count = 0
+            decrypt_all([exp.json_data for exp in all_expenses])
 
+            # Update category in json_data; the matches are re-encrypted in one batch at commit
+            migrated_count = 0
             for exp in all_expenses:
-                if exp.json_data:
-                    try:
-                        data = crypto_service.decrypt_data(exp.json_data)
-                        parsed = json.loads(data)
-
-                        if parsed.get("category") == old_category.name:
-                            # Update category in json_data
-                            parsed["category"] = new_category.name
-                            exp.json_data = encrypt_data(parsed)
-                            migrated_count += 1
-                    except:
-                        pass
+                parsed = exp.json_data.get() if exp.json_data is not None else None
+                if parsed and parsed.get("category") == old_category.name:
+                    exp.json_data = {**parsed, "category": new_category.name}
+                    migrated_count += 1
 
             db.commit()
 
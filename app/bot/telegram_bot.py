@@ -1,15 +1,51 @@
 """
 Telegram Bot integration using webhooks
 """
+import asyncio
 import httpx
+import logging
 from typing import Optional
+from app.services.resilience import upstreams
 from app.utils.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 class TelegramBot:
     def __init__(self):
         self.token = settings.TELEGRAM_BOT_TOKEN
-        self.base_url = f"https://api.telegram.org/bot{self.token}"
+        self.api_root = settings.TELEGRAM_API_BASE_URL.rstrip("/")
+        self.base_url = f"{self.api_root}/bot{self.token}"
+
+    async def _call(self, method: str, data: Optional[dict] = None, http_method: str = "POST") -> dict:
+        """
+        Call a Bot API method and return its JSON answer.
+        A 429 is retried once when its retry_after is short enough.
+        """
+        url = f"{self.base_url}/{method}"
+
+        for attempt in range(2):
+            async with upstreams["telegram"].guard() as call:
+                async with httpx.AsyncClient() as client:
+                    if http_method == "GET":
+                        response = await client.get(url)
+                    else:
+                        response = await client.post(url, json=data)
+                if response.status_code >= 500:
+                    call.fail()
+                result = response.json()
+
+            if response.status_code != 429 or attempt:
+                return result
+
+            retry_after = (result.get("parameters") or {}).get("retry_after", 1)
+            if retry_after > settings.TELEGRAM_MAX_RETRY_AFTER_SECONDS:
+                logger.warning(f"Telegram {method} rate limited for {retry_after}s, giving up")
+                return result
+            logger.warning(f"Telegram {method} rate limited, retrying in {retry_after}s")
+            await asyncio.sleep(retry_after)
+
+        return result
 
     async def send_message(
         self,
@@ -19,10 +55,29 @@ class TelegramBot:
         reply_markup: Optional[dict] = None
     ) -> dict:
         """Send a message to a Telegram chat"""
-        url = f"{self.base_url}/sendMessage"
+        data = {
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": parse_mode
+        }
 
+        if reply_markup:
+            data["reply_markup"] = reply_markup
+
+        return await self._call("sendMessage", data)
+
+    async def edit_message_text(
+        self,
+        chat_id: int,
+        message_id: int,
+        text: str,
+        parse_mode: str = "HTML",
+        reply_markup: Optional[dict] = None
+    ) -> dict:
+        """Replace the text of a message sent by the bot"""
         data = {
             "chat_id": chat_id,
+            "message_id": message_id,
             "text": text,
             "parse_mode": parse_mode
         }
@@ -30,14 +85,10 @@ class TelegramBot:
         if reply_markup:
             data["reply_markup"] = reply_markup
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=data)
-            return response.json()
+        return await self._call("editMessageText", data)
 
     async def send_photo(self, chat_id: int, photo: str, caption: str = None) -> dict:
         """Send a photo to a Telegram chat"""
-        url = f"{self.base_url}/sendPhoto"
-
         data = {
             "chat_id": chat_id,
             "photo": photo
@@ -46,49 +97,34 @@ class TelegramBot:
         if caption:
             data["caption"] = caption
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=data)
-            return response.json()
+        return await self._call("sendPhoto", data)
 
     async def get_file(self, file_id: str) -> dict:
         """Get file info from Telegram"""
-        url = f"{self.base_url}/getFile"
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json={"file_id": file_id})
-            return response.json()
+        return await self._call("getFile", {"file_id": file_id})
 
     async def download_file(self, file_path: str) -> bytes:
         """Download a file from Telegram servers"""
-        url = f"https://api.telegram.org/file/bot{self.token}/{file_path}"
+        url = f"{self.api_root}/file/bot{self.token}/{file_path}"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
+        async with upstreams["telegram"].guard() as call:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(url)
+            if response.status_code >= 500:
+                call.fail()
             return response.content
 
     async def set_webhook(self, webhook_url: str) -> dict:
         """Set webhook URL for receiving updates"""
-        url = f"{self.base_url}/setWebhook"
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json={"url": webhook_url})
-            return response.json()
+        return await self._call("setWebhook", {"url": webhook_url})
 
     async def delete_webhook(self) -> dict:
         """Delete webhook"""
-        url = f"{self.base_url}/deleteWebhook"
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url)
-            return response.json()
+        return await self._call("deleteWebhook")
 
     async def get_webhook_info(self) -> dict:
         """Get current webhook info"""
-        url = f"{self.base_url}/getWebhookInfo"
-
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            return response.json()
+        return await self._call("getWebhookInfo", http_method="GET")
 
 
 telegram_bot = TelegramBot()
@@ -0,0 +1,104 @@
+"""
+Per-chat debounce for expense text messages
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Burst:
+    texts: List[str]
+    last_seen: float
+    full: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class TextMessageBatcher:
+    """
+    Collects text messages a chat sends in quick succession.
+
+    The first message of a burst waits until the chat has been quiet for
+    `window` seconds (at most `max_wait` in total) and receives every text of
+    the burst; messages arriving meanwhile are handed to it and get None.
+
+    Bursts live in the memory of one process: with several workers only the
+    messages a worker receives are merged.
+    """
+
+    def __init__(self, window: float = 1.0, max_wait: float = 3.0, max_size: int = 10):
+        self.window = window
+        self.max_wait = max_wait
+        self.max_size = max_size
+        self._bursts: Dict[int, _Burst] = {}
+        # Background waits started by submit(), referenced until they finish
+        self._tasks: Set[asyncio.Task] = set()
+
+    def submit(self, chat_id: int, text: str, on_burst: Callable[[List[str]], Awaitable[None]]) -> None:
+        """
+        Add a text to the chat's current burst without waiting for it.
+
+        When the text starts a burst, the wait runs in a background task that
+        calls `on_burst` with every text of the burst once the chat is quiet.
+        """
+        async def wait_and_flush():
+            texts = await self.collect(chat_id, text)
+            if texts is None:
+                return
+            try:
+                await on_burst(texts)
+            except Exception as e:
+                logger.error(f"Text burst of chat {chat_id} failed: {e}", exc_info=True)
+
+        task = asyncio.create_task(wait_and_flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def collect(self, chat_id: int, text: str) -> Optional[List[str]]:
+        """
+        Add a text to the chat's current burst.
+
+        Returns:
+            All texts of the burst for the first message, None for the others
+        """
+        if self.window <= 0:
+            return [text]
+
+        burst = self._bursts.get(chat_id)
+        if burst is not None:
+            burst.texts.append(text)
+            burst.last_seen = time.monotonic()
+            if len(burst.texts) >= self.max_size:
+                burst.full.set()
+            return None
+
+        burst = _Burst(texts=[text], last_seen=time.monotonic())
+        self._bursts[chat_id] = burst
+        deadline = burst.last_seen + self.max_wait
+
+        try:
+            while len(burst.texts) < self.max_size:
+                wait = min(burst.last_seen + self.window, deadline) - time.monotonic()
+                if wait <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(burst.full.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._bursts.pop(chat_id, None)
+
+        return burst.texts
+
+
+# Singleton instance
+text_batcher = TextMessageBatcher(
+    window=settings.TELEGRAM_TEXT_DEBOUNCE_SECONDS,
+    max_wait=settings.TELEGRAM_TEXT_DEBOUNCE_MAX_SECONDS,
+    max_size=settings.GROQ_TEXT_BATCH_MAX_SIZE,
+)
@@ -1,7 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import expenses, categories, auth, webhook, statistics
+from app.services.groq_client import groq_client
+from app.services.resilience import upstreams_snapshot
+from app.services.sfs_scraper import sfs_scraper
 from app.utils.config import settings
+from app.utils.crypto import crypto_service
 
 app = FastAPI(
     title="Expense Bot AI",
@@ -34,5 +38,18 @@ async def health_check():
     return {
         "status": "healthy",
         "version": "1.0.0",
-        "service": "expense-bot-ai"
+        "service": "expense-bot-ai",
+        "groq": {
+            "scheduler": groq_client.scheduler.snapshot(),
+            "cascade": groq_client.cascade_metrics.snapshot(),
+            "requests": dict(groq_client.request_stats),
+        },
+        "sfs": {
+            "cache": sfs_scraper.cache_stats.snapshot(),
+            "candidates": {pattern: dict(stats) for pattern, stats in sfs_scraper.pattern_stats.items()},
+        },
+        "upstreams": upstreams_snapshot(),
+        "crypto": {
+            "cache": crypto_service.cache.snapshot(),
+        },
     }
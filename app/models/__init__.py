@@ -5,5 +5,8 @@ from app.models.category import Category
 from app.models.group import Group
 from app.models.user_group import UserGroup
 from app.models.expense import Expense
+from app.models.sfs_receipt import SFSReceipt
+from app.models.vendor import Vendor
+from app.models.data_key import DataKey
 
-__all__ = ["Base", "User", "Category", "Group", "UserGroup", "Expense"]
+__all__ = ["Base", "User", "Category", "Group", "UserGroup", "Expense", "SFSReceipt", "Vendor", "DataKey"]
@@ -0,0 +1,158 @@
+"""
+Per-user data keys for envelope encryption
+
+Expense fields are encrypted with their owner's data key; the data keys are
+stored wrapped (encrypted) by the master key, ENCRYPTION_KEY. Every ciphertext
+carries the id of its data key, so rotating keys never requires rewriting
+everything at once: see app.tasks.rotate_keys.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, LargeBinary, String, event, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, relationship
+
+from app.models.database import Base, engine, statement_savepoint
+from app.utils.config import settings
+from app.utils.crypto import crypto_service
+
+# Session.info entry: keys created in the current transaction, by user id
+_CREATED_KEYS = "data_keys_created"
+# Random ids tried before giving up (a collision in 2^31 ids is already rare)
+_CREATE_ATTEMPTS = 5
+
+
+class DataKey(Base):
+    """AES key of one user, wrapped by the master key"""
+    __tablename__ = "data_keys"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # Random; written in every ciphertext header
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=False, index=True)
+    master_key_id = Column(String(16), nullable=False)  # key_fingerprint of the wrapping master key
+    wrapped_key = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    retired_at = Column(DateTime, nullable=True)  # No new values; kept for decrypting old ones
+
+    user = relationship("User", back_populates="data_keys")
+
+    __table_args__ = (
+        # One active key per user, also when several workers create it at once
+        Index(
+            "uq_data_keys_active_user",
+            "user_id",
+            unique=True,
+            sqlite_where=retired_at.is_(None),
+            postgresql_where=retired_at.is_(None),
+        ),
+    )
+
+    def __repr__(self):
+        return f"<DataKey {self.id} of {self.user_id}>"
+
+
+class DataKeyStore:
+    """
+    Active data key of each user, created on first use, and loading of wrapped
+    keys by id for decryption.
+
+    Active key ids are cached for CRYPTO_DATA_KEY_CACHE_SECONDS. A key created
+    in a transaction is only cached for everyone once that transaction commits,
+    and is dropped from memory again if the transaction rolls back.
+    """
+
+    def __init__(self, bind=None):
+        self.bind = bind  # Engine for loading keys (default: app.models.database.engine)
+        self._active: dict[str, tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def active_key_id(self, db: Session, user_id: str) -> int:
+        """Id of the key new values of this user are encrypted with (added to db if the user has none)."""
+        created = db.info.get(_CREATED_KEYS, {})
+        if user_id in created:
+            return created[user_id]
+
+        cached = self._active.get(user_id)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+
+        key_id = self._stored_key_id(db, user_id)
+        if key_id is None:
+            return self.create_key(db, user_id)
+        self._remember(user_id, key_id)
+        return key_id
+
+    def create_key(self, db: Session, user_id: str) -> int:
+        """
+        Insert a new active key for the user in db's transaction (committed with it).
+
+        The row is written at once, so the database checks the random id and
+        the one active key per user before the key is used. If another
+        transaction created the user's key first, that key is returned.
+        """
+        connection = db.connection()
+        for _ in range(_CREATE_ATTEMPTS):
+            key_id, wrapped_key, master_key_id = crypto_service.generate_data_key()
+            try:
+                with statement_savepoint(connection):
+                    connection.execute(insert(DataKey.__table__).values(
+                        id=key_id, user_id=user_id, master_key_id=master_key_id, wrapped_key=wrapped_key,
+                    ))
+            except IntegrityError:
+                # Either the id is taken or the user got an active key meanwhile
+                active_key_id = self._stored_key_id(db, user_id)
+                if active_key_id is not None:
+                    self._remember(user_id, active_key_id)
+                    return active_key_id
+                continue
+            # The id is now held by this transaction: no other key can be stored under it
+            crypto_service.add_data_key(key_id, crypto_service.unwrap_data_key(key_id, wrapped_key, master_key_id))
+            db.info.setdefault(_CREATED_KEYS, {})[user_id] = key_id
+            return key_id
+        raise RuntimeError(f"No free data key id for user {user_id} after {_CREATE_ATTEMPTS} attempts")
+
+    def load(self, key_id: int) -> Optional[bytes]:
+        """Unwrapped key by id, None if there is no such key (crypto_service.key_loader)."""
+        with (self.bind or engine).connect() as connection:
+            row = connection.execute(
+                select(DataKey.master_key_id, DataKey.wrapped_key).where(DataKey.id == key_id)
+            ).first()
+        if row is None:
+            return None
+        return crypto_service.unwrap_data_key(key_id, bytes(row.wrapped_key), row.master_key_id)
+
+    @staticmethod
+    def _stored_key_id(db: Session, user_id: str) -> Optional[int]:
+        return db.execute(
+            select(DataKey.id)
+            .where(DataKey.user_id == user_id, DataKey.retired_at.is_(None))
+            .order_by(DataKey.created_at.desc())
+            .limit(1)
+        ).scalar()
+
+    def forget(self) -> None:
+        """Drop cached active key ids (after retiring keys)."""
+        with self._lock:
+            self._active.clear()
+
+    def _remember(self, user_id: str, key_id: int) -> None:
+        with self._lock:
+            self._active[user_id] = (key_id, time.monotonic() + settings.CRYPTO_DATA_KEY_CACHE_SECONDS)
+
+    def _after_commit(self, db: Session) -> None:
+        for user_id, key_id in db.info.pop(_CREATED_KEYS, {}).items():
+            self._remember(user_id, key_id)
+
+    def _after_transaction_end(self, db: Session, transaction) -> None:
+        if transaction.parent is None:
+            # Rolled back: the keys were never stored, and their ids may be reused
+            for key_id in db.info.pop(_CREATED_KEYS, {}).values():
+                crypto_service.forget_data_key(key_id)
+
+
+data_keys = DataKeyStore()
+crypto_service.key_loader = data_keys.load
+event.listen(Session, "after_commit", data_keys._after_commit)
+event.listen(Session, "after_transaction_end", data_keys._after_transaction_end)
@@ -1,3 +1,5 @@
+from contextlib import nullcontext
+
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
@@ -16,3 +18,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def statement_savepoint(connection):
+    """Savepoint around one statement that may fail without failing the transaction."""
+    if connection.dialect.name == "sqlite":
+        # SQLite only undoes the failed statement, and savepoints through the
+        # sqlite3 driver would commit the transaction on release
+        return nullcontext()
+    return connection.begin_nested()
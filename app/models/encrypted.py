@@ -0,0 +1,231 @@
+"""
+Encrypted column types
+
+Columns declared as EncryptedText (base64 text, as encrypt_data writes it) or
+EncryptedJSON (binary, as encrypt_bytes writes it) load as LazyDecrypted
+proxies: nothing is decrypted until .value (or .get()) is first read, and the
+result is kept on the proxy. Plaintext assigned to such a column (a str, or a
+dict for EncryptedJSON) becomes a pending proxy that is encrypted when the
+session flushes, with the owner's data key (see app.models.data_key), so call
+sites never handle ciphertext themselves.
+
+    expense.vendor = "Kaufland"
+    expense.vendor.value        # "Kaufland"
+    decrypt_all([expense.vendor for expense in expenses])  # one batch for a whole page
+"""
+import json
+from typing import Iterable, Optional
+
+from sqlalchemy import LargeBinary, Text, event
+from sqlalchemy.orm import Session
+from sqlalchemy.types import TypeDecorator
+
+from app.models.data_key import data_keys
+from app.utils.config import settings
+from app.utils.crypto import crypto_service
+
+_UNSET = object()
+
+
+class LazyDecrypted:
+    """Ciphertext of one column value, decrypted on first access"""
+
+    __slots__ = ("ciphertext", "is_json", "_value", "_error", "_pending")
+
+    def __init__(self, ciphertext: Optional[str | bytes], is_json: bool = False):
+        self.ciphertext = ciphertext
+        self.is_json = is_json
+        self._value = _UNSET
+        self._error: Optional[str] = None
+        self._pending: Optional[str] = None
+
+    @classmethod
+    def from_plaintext(cls, value: str | dict, is_json: bool = False) -> "LazyDecrypted":
+        """Proxy for assigned plaintext, encrypted by seal() (ciphertext is None until then)."""
+        proxy = cls(None, is_json)
+        if isinstance(value, dict):
+            # Serialized now, so later changes to the caller's dict are not stored
+            proxy._pending = json.dumps(value)
+        elif isinstance(value, str):
+            proxy._pending = value
+            if not is_json:
+                proxy._value = value
+        else:
+            raise ValueError("Data must be string or dict")
+        return proxy
+
+    def seal(self, key_id: Optional[int] = None) -> None:
+        """Encrypt pending plaintext with the data key (default: the master key)."""
+        if self.ciphertext is None:
+            seal_all([self], key_id)
+
+    @property
+    def is_decrypted(self) -> bool:
+        return self._value is not _UNSET
+
+    @property
+    def value(self) -> str | dict:
+        """Plaintext (a dict for JSON columns); raises ValueError if it does not decrypt."""
+        if self._value is _UNSET:
+            if self._error is not None:
+                raise ValueError(self._error)
+            if self.ciphertext is None:
+                self._value = json.loads(self._pending) if self._pending else {}
+                return self._value
+            try:
+                if self.is_json:
+                    self._value = crypto_service.decrypt_json(self.ciphertext)
+                else:
+                    self._value = crypto_service.decrypt_data(self.ciphertext)
+            except ValueError as e:
+                self._error = str(e)
+                raise
+        return self._value
+
+    def get(self, default=None):
+        """Plaintext, or default if it does not decrypt."""
+        try:
+            return self.value
+        except ValueError:
+            return default
+
+    def __repr__(self) -> str:
+        state = "decrypted" if self.is_decrypted else "encrypted"
+        return f"<LazyDecrypted {state}>"
+
+
+def decrypt_all(values: Iterable[Optional[LazyDecrypted]]) -> None:
+    """
+    Decrypt the proxies that are not decrypted yet in batches (decrypt_many),
+    so a page of rows costs one pass instead of one call per field.
+    Values that do not decrypt are left to fail on access.
+    """
+    pending = {False: [], True: []}
+    for value in values:
+        if (
+            isinstance(value, LazyDecrypted)
+            and value.ciphertext is not None
+            and not value.is_decrypted
+            and value._error is None
+        ):
+            pending[value.is_json].append(value)
+
+    for is_json, proxies in pending.items():
+        if not proxies:
+            continue
+        ciphertexts = [proxy.ciphertext for proxy in proxies]
+        if is_json:
+            results = crypto_service.decrypt_json_many(ciphertexts, strict=False)
+        else:
+            results = crypto_service.decrypt_many(ciphertexts, strict=False)
+        for proxy, result in zip(proxies, results):
+            if result is None:
+                proxy._error = "Decryption failed"
+            else:
+                proxy._value = result
+
+
+def seal_all(proxies: Iterable[LazyDecrypted], key_id: Optional[int] = None) -> None:
+    """Encrypt the pending proxies with one data key, in a batch per column kind."""
+    pending = {False: [], True: []}
+    for proxy in proxies:
+        if proxy.ciphertext is None:
+            pending[proxy.is_json].append(proxy)
+
+    for is_json, batch in pending.items():
+        if not batch:
+            continue
+        ciphertexts = crypto_service.encrypt_many([proxy._pending for proxy in batch], binary=is_json, key_id=key_id)
+        for proxy, ciphertext in zip(batch, ciphertexts):
+            proxy.ciphertext = ciphertext
+            proxy._pending = None
+
+
+class _EncryptedType(TypeDecorator):
+    is_json = False
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, LazyDecrypted):
+            # Values not sealed at flush (no owner, or data keys disabled) use the master key
+            value.seal()
+            return value.ciphertext
+        if isinstance(value, (bytes, memoryview)):
+            # Already encrypted, e.g. bulk updates that copy ciphertext
+            return bytes(value)
+        proxy = LazyDecrypted.from_plaintext(value, self.is_json)
+        proxy.seal()
+        return proxy.ciphertext
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, memoryview):
+            value = bytes(value)
+        return LazyDecrypted(value, self.is_json)
+
+
+class EncryptedText(_EncryptedType):
+    """Encrypted string stored as base64 text"""
+    impl = Text
+    cache_ok = True
+
+
+class EncryptedJSON(_EncryptedType):
+    """Encrypted dict stored as binary (format byte, nonce, ciphertext)"""
+    impl = LargeBinary
+    cache_ok = True
+    is_json = True
+
+
+# Mapped class -> (owner id attribute, encrypted attribute names)
+_owned_columns: dict[type, tuple[str, list[str]]] = {}
+
+
+def encrypt_on_assignment(*attributes, owner=None) -> None:
+    """
+    Make plaintext assigned to encrypted columns (including constructor
+    arguments) a LazyDecrypted right away, so the attribute always holds
+    None or a proxy. With owner (the user id column), pending values are
+    encrypted at flush with that user's data key.
+    """
+    if owner is not None:
+        _owned_columns[owner.class_] = (owner.key, [attribute.key for attribute in attributes])
+
+    for attribute in attributes:
+        is_json = attribute.property.columns[0].type.is_json
+
+        def wrap(target, value, oldvalue, initiator, is_json=is_json):
+            if value is None or isinstance(value, LazyDecrypted):
+                return value
+            if isinstance(value, (bytes, memoryview)):
+                return LazyDecrypted(bytes(value), is_json)
+            return LazyDecrypted.from_plaintext(value, is_json)
+
+        event.listen(attribute, "set", wrap, retval=True)
+
+
+@event.listens_for(Session, "before_flush")
+def _seal_with_data_keys(db: Session, flush_context, instances) -> None:
+    """Encrypt pending values of owned rows with the owner's data key, one batch per key."""
+    if not settings.CRYPTO_DATA_KEYS_ENABLED:
+        return
+
+    by_key: dict[int, list[LazyDecrypted]] = {}
+    for instance in list(db.new) + list(db.dirty):
+        owned = _owned_columns.get(type(instance))
+        if owned is None:
+            continue
+        owner_attribute, names = owned
+        # Only values in the instance state: reading expired attributes would load them
+        pending = [
+            value for value in (instance.__dict__.get(name) for name in names)
+            if isinstance(value, LazyDecrypted) and value.ciphertext is None
+        ]
+        user_id = getattr(instance, owner_attribute)
+        if pending and user_id is not None:
+            by_key.setdefault(data_keys.active_key_id(db, user_id), []).extend(pending)
+
+    for key_id, proxies in by_key.items():
+        seal_all(proxies, key_id)
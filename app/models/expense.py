@@ -2,7 +2,9 @@ from sqlalchemy import Column, String, Numeric, Date, DateTime, ForeignKey, Floa
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
+from typing import Optional
 from app.models.database import Base
+from app.models.encrypted import EncryptedJSON, EncryptedText, LazyDecrypted, encrypt_on_assignment
 
 
 class Expense(Base):
@@ -15,14 +17,18 @@ class Expense(Base):
     source = Column(String, nullable=False)  # photo | voice | manual
     amount = Column(Numeric(12, 2), nullable=True)
     currency = Column(String(10), nullable=True)
-    vendor = Column(Text, nullable=True)  # Encrypted
+    vendor = Column(EncryptedText, nullable=True)
     vendor_fiscal_code = Column(String(128), nullable=True)
     vendor_registration_number = Column(String(128), nullable=True)
     vendor_address = Column(Text, nullable=True)
     purchase_date = Column(Date, nullable=True)
 
     category_id = Column(String(36), ForeignKey("categories.id"), nullable=True)
-    json_data = Column(JSON, nullable=True)  # Encrypted parsed info from Groq
+    # Encrypted parsed info from Groq, read and written through json_data below.
+    # New values are binary; rows written before keep base64 text in the legacy
+    # JSON column until app.tasks.migrate_ciphertext converts them.
+    json_data_legacy = Column("json_data", JSON(none_as_null=True), nullable=True)
+    json_data_bin = Column(EncryptedJSON, nullable=True)
     ai_confidence = Column(Float, nullable=True)
 
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -33,5 +39,31 @@ class Expense(Base):
     category = relationship("Category", back_populates="expenses")
     group = relationship("Group", back_populates="expenses")
 
+    @property
+    def json_data(self) -> Optional[LazyDecrypted]:
+        """Parsed info, decrypted on first .value access (from either column)."""
+        if self.json_data_bin is not None:
+            return self.json_data_bin
+        if self.json_data_legacy is None:
+            return None
+        proxy = getattr(self, "_json_data_legacy_proxy", None)
+        if proxy is None or proxy.ciphertext != self.json_data_legacy:
+            proxy = LazyDecrypted(self.json_data_legacy, is_json=True)
+            self._json_data_legacy_proxy = proxy
+        return proxy
+
+    @json_data.setter
+    def json_data(self, value):
+        if isinstance(value, LazyDecrypted) and isinstance(value.ciphertext, str):
+            # Unmigrated value assigned back as is
+            self.json_data_legacy = value.ciphertext
+            self.json_data_bin = None
+        else:
+            self.json_data_bin = value
+            self.json_data_legacy = None
+
     def __repr__(self):
         return f"<Expense {self.id} - {self.amount} {self.currency}>"
+
+
+encrypt_on_assignment(Expense.vendor, Expense.json_data_bin, owner=Expense.owner_user_id)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime, Text
+from datetime import datetime
+from app.models.database import Base
+
+
+class SFSReceipt(Base):
+    """Parsed SFS receipt, cached by receipt code (fiscal receipts never change)"""
+    __tablename__ = "sfs_receipts"
+
+    receipt_code = Column(String(255), primary_key=True)
+    data = Column(Text, nullable=False)  # Encrypted parse_qr_url result
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<SFSReceipt {self.receipt_code}>"
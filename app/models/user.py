@@ -18,6 +18,7 @@ class User(Base):
     categories = relationship("Category", back_populates="user", cascade="all, delete-orphan")
     expenses = relationship("Expense", back_populates="owner", cascade="all, delete-orphan")
     user_groups = relationship("UserGroup", back_populates="user", cascade="all, delete-orphan")
+    data_keys = relationship("DataKey", back_populates="user", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<User {self.username or self.id}>"
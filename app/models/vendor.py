@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, Integer, DateTime, Text, JSON
+from datetime import datetime
+from app.models.database import Base
+
+
+class Vendor(Base):
+    """Merchant known from SFS receipts, keyed by fiscal code"""
+    __tablename__ = "vendors"
+
+    fiscal_code = Column(String(128), primary_key=True)
+    registration_number = Column(String(128), nullable=True)
+    name = Column(Text, nullable=True)
+    address = Column(Text, nullable=True)
+
+    # Category most often confirmed for this vendor's receipts
+    default_category = Column(String, nullable=True)
+    category_counts = Column(JSON, nullable=True)  # {category name: confirmed receipts}
+    usage_count = Column(Integer, default=0, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Vendor {self.fiscal_code} - {self.name}>"
@@ -0,0 +1,156 @@
+"""
+Local category suggestion engine
+
+Matches a category description against SUGGESTION_PRESETS and the bot's
+ICON_THEMES keywords with diacritic-insensitive stemming. Strong matches are
+answered locally; only ambiguous descriptions go to Groq, and its answers are
+cached per normalized description.
+"""
+import logging
+import random
+import re
+from collections import Counter, OrderedDict
+from typing import Optional
+
+from app.services.groq_client import FALLBACK_CATEGORY_NAME, groq_client
+from app.services.local_parser import normalize_text
+from app.utils.categories import ICON_THEMES, SUGGESTION_PRESETS
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
+# Romanian and English inflections, longest first
+_SUFFIXES = (
+    "urilor", "ilor", "elor", "ului", "iile", "uri", "ele", "ile", "ing", "ies",
+    "ul", "le", "ii", "ea", "es", "a", "e", "i", "s",
+)
+_MIN_STEM = 3
+
+# Share of the keyword score the runner-up may reach before the match is ambiguous
+_AMBIGUITY_RATIO = 0.6
+
+
+def stem(word: str) -> str:
+    """Strip a common inflection from a normalized word."""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM:
+            return word[:-len(suffix)]
+    return word
+
+
+def normalize_description(description: str) -> str:
+    """Lowercased, diacritic-free, single-spaced description (the cache key)."""
+    return " ".join(_WORD_PATTERN.findall(normalize_text(description)))
+
+
+class CategorySuggester:
+    """Suggests a category name, icon and color for a free-text description"""
+
+    def __init__(self, cache_size: int = 512):
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, dict] = OrderedDict()
+        self.stats: Counter = Counter()
+
+        self._presets = {preset["name"]: preset for preset in SUGGESTION_PRESETS}
+        # stem -> preset names it votes for
+        self._index: dict[str, set[str]] = {}
+        for preset in SUGGESTION_PRESETS:
+            for keyword in preset["keywords"]:
+                self._add_keyword(keyword, preset["name"])
+            for word in _WORD_PATTERN.findall(normalize_text(preset["name"])):
+                if len(word) > _MIN_STEM:
+                    self._add_keyword(word, preset["name"])
+        for theme in ICON_THEMES.values():
+            if theme.get("preset") in self._presets:
+                for keyword in theme["keywords"]:
+                    self._add_keyword(keyword, theme["preset"])
+
+        self._stems = sorted(self._index, key=len, reverse=True)
+
+    def _add_keyword(self, keyword: str, preset_name: str) -> None:
+        for word in _WORD_PATTERN.findall(normalize_text(keyword)):
+            self._index.setdefault(stem(word), set()).add(preset_name)
+
+    def _scores(self, normalized: str) -> Counter:
+        scores: Counter = Counter()
+        for word in normalized.split():
+            word_stem = stem(word)
+            matched = self._index.get(word_stem)
+            if matched is None:
+                # Keyword stems are prefixes of longer words ("grocer" in "groceries")
+                matched = next(
+                    (self._index[candidate] for candidate in self._stems
+                     if len(candidate) >= 4 and word_stem.startswith(candidate)),
+                    None,
+                )
+            for preset_name in matched or ():
+                scores[preset_name] += 1
+        return scores
+
+    def match(self, description: str) -> Optional[dict]:
+        """
+        Suggest a preset locally.
+
+        Returns:
+            {"name", "icon", "color"} when one preset clearly wins, else None
+        """
+        ranked = self._scores(normalize_description(description)).most_common(2)
+        if not ranked:
+            return None
+        if len(ranked) > 1 and ranked[1][1] >= ranked[0][1] * _AMBIGUITY_RATIO:
+            return None
+        return self._suggestion(self._presets[ranked[0][0]])
+
+    def best_guess(self, description: str) -> dict:
+        """Highest scoring preset even if ambiguous, or a random preset."""
+        ranked = self._scores(normalize_description(description)).most_common(1)
+        preset = self._presets[ranked[0][0]] if ranked else random.choice(SUGGESTION_PRESETS)
+        return self._suggestion(preset)
+
+    async def suggest(self, description: str) -> dict:
+        """
+        Suggest a category for a description
+
+        Returns:
+            {"name", "icon", "color"} from the local matcher, the LLM answer
+            cache, Groq, or the best local guess if Groq fails
+        """
+        local = self.match(description)
+        if local:
+            self.stats["local"] += 1
+            return local
+
+        key = normalize_description(description)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.stats["cache_hit"] += 1
+            return dict(cached)
+
+        try:
+            suggestion = await groq_client.suggest_category(description)
+        except Exception as e:
+            logger.warning(f"Groq category suggestion failed ({str(e)}), using local best guess")
+            self.stats["fallback"] += 1
+            return self.best_guess(description)
+
+        if suggestion.get("name") == FALLBACK_CATEGORY_NAME:
+            # Groq did not answer with usable JSON
+            self.stats["fallback"] += 1
+            return self.best_guess(description)
+
+        self.stats["llm"] += 1
+        self._cache[key] = dict(suggestion)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return suggestion
+
+    @staticmethod
+    def _suggestion(preset: dict) -> dict:
+        return {"name": preset["name"], "icon": preset["icon"], "color": preset["color"]}
+
+
+# Singleton instance
+category_suggester = CategorySuggester(cache_size=settings.CATEGORY_SUGGEST_CACHE_SIZE)
@@ -1,57 +1,376 @@
+import asyncio
 import httpx
+import json
 import logging
 import base64
-from typing import Optional
-from tenacity import retry, stop_after_attempt, wait_exponential
+import os
+import random
+import time
+from collections import Counter
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+from app.services.json_stream import IncrementalJSONObjectParser
+from app.services.resilience import upstreams
+from app.services.groq_scheduler import (
+    GroqScheduler,
+    RetryBudget,
+    PRIORITY_BATCH,
+    RETRYABLE_STATUS_CODES,
+    estimate_tokens,
+    parse_retry_after,
+)
 from app.utils.config import settings
+from app.utils.audio_preprocess import prepare_voice_chunks
+from app.utils.image_preprocess import prepare_receipt_image
+from app.utils.metrics import LatencyRecorder
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_CATEGORY_NAMES = [
+    "Mâncare & Restaurante", "Transport", "Cumpărături", "Distracție & Timp liber",
+    "Utilități & Locuință", "Sănătate", "Alte cheltuieli",
+]
+
+# Name suggest_category returns when Groq does not answer with usable JSON
+FALLBACK_CATEGORY_NAME = "Custom Category"
+
+CATEGORY_PALETTE = [
+    "#F97316", "#38BDF8", "#34D399", "#FACC15",
+    "#F472B6", "#60A5FA", "#A78BFA", "#FB7185",
+    "#FDBA74", "#FDE047", "#10B981", "#94A3B8"
+]
+
+
+def _is_model_unavailable(response: httpx.Response) -> bool:
+    """True when the error means the model is deprecated, missing or overloaded."""
+    if response.status_code in (404, 503):
+        return True
+    if response.status_code == 400:
+        try:
+            code = (response.json().get("error") or {}).get("code")
+        except (ValueError, AttributeError):
+            return False
+        return code in ("model_decommissioned", "model_not_found")
+    return False
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    """Mark the exception of a losing hedged call as retrieved, so asyncio does not log it."""
+    if not task.cancelled():
+        task.exception()
+
+
+class CascadeMetrics:
+    """Per-model latency and escalation counters for the model cascade"""
+
+    def __init__(self):
+        self.latency: dict[str, LatencyRecorder] = {}
+        self.calls = 0
+        self.escalations: Counter = Counter()
+
+    def record_latency(self, model: str, seconds: float) -> None:
+        self.latency.setdefault(model, LatencyRecorder()).record(seconds)
+
+    def snapshot(self) -> dict:
+        escalated = sum(self.escalations.values())
+        return {
+            "calls": self.calls,
+            "escalation_rate": round(escalated / self.calls, 3) if self.calls else None,
+            "escalations": dict(self.escalations),
+            "models": {model: recorder.snapshot() for model, recorder in self.latency.items()},
+        }
+
 
 class GroqClient:
     """Client for interacting with Groq AI API"""
 
     def __init__(self):
         self.api_key = settings.GROQ_API_KEY
-        self.base_url = "https://api.groq.com/openai/v1"
+        self.base_url = settings.GROQ_BASE_URL.rstrip("/")
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.scheduler = GroqScheduler(max_concurrent=settings.GROQ_MAX_CONCURRENT_REQUESTS)
+        self.retry_budget = RetryBudget(ratio=settings.GROQ_RETRY_BUDGET_RATIO)
+        self.cascade_metrics = CascadeMetrics()
+        self.model_latency: dict[str, LatencyRecorder] = {}
+        self.request_stats: Counter = Counter()
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-    async def _make_request(self, endpoint: str, payload: dict) -> dict:
+    async def _make_request(self, endpoint: str, payload: dict, priority: int = PRIORITY_BATCH) -> dict:
         """
-        Make HTTP request to Groq API with retry logic
+        Make HTTP request to Groq API through the rate-limit scheduler.
+        Slow calls are hedged and unavailable models fail over to the
+        next model in GROQ_MODEL_FAILOVER.
 
         Args:
             endpoint: API endpoint path
             payload: Request payload
+            priority: Scheduler lane (PRIORITY_INTERACTIVE for bot messages)
 
         Returns:
             API response as dict
         """
+        model = payload.get("model")
+        chain = [model] + settings.GROQ_MODEL_FAILOVER.get(model, []) if model else [None]
+
+        for index, candidate in enumerate(chain):
+            request_payload = {**payload, "model": candidate} if candidate else payload
+            try:
+                return await self._hedged_request(endpoint, request_payload, priority)
+            except httpx.HTTPStatusError as e:
+                if index == len(chain) - 1 or not _is_model_unavailable(e.response):
+                    raise
+                logger.warning(f"Groq model {candidate} unavailable ({e.response.status_code}), failing over to {chain[index + 1]}")
+                self.request_stats["failovers"] += 1
+
+    async def _hedged_request(self, endpoint: str, payload: dict, priority: int) -> dict:
+        """
+        Send the request; if it is still running after the model's hedge delay,
+        fire a duplicate (optionally to GROQ_HEDGE_MODELS[model]) and return
+        whichever answers first, cancelling the other.
+        """
+        model = payload.get("model")
+        delay = self._hedge_delay(model)
+        primary = asyncio.create_task(self._request_json(endpoint, payload, priority))
+        tasks = {primary}
+
+        try:
+            if delay is None:
+                return await primary
+
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self.scheduler.can_hedge():
+                return await primary
+
+            hedge_payload = {**payload, "model": settings.GROQ_HEDGE_MODELS.get(model, model)}
+            hedge = asyncio.create_task(self._request_json(endpoint, hedge_payload, priority))
+            tasks.add(hedge)
+            self.request_stats["hedges"] += 1
+            logger.info(f"Hedging slow Groq call to {model} after {delay:.2f}s")
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.request_stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if task.done():
+                    _retrieve_exception(task)
+                else:
+                    task.cancel()
+                    task.add_done_callback(_retrieve_exception)
+
+    async def _request_json(self, endpoint: str, payload: dict, priority: int) -> dict:
+        response = await self._send(
+            endpoint,
+            priority=priority,
+            estimated_tokens=estimate_tokens(payload),
+            json=payload,
+            headers=self.headers,
+        )
+        return response.json()
+
+    def _hedge_delay(self, model: Optional[str]) -> Optional[float]:
+        """Seconds to wait before hedging a call to `model`, or None to not hedge."""
+        if not settings.GROQ_HEDGE_ENABLED or not model:
+            return None
+
+        recorder = self.model_latency.get(model)
+        if recorder is None or len(recorder) < settings.GROQ_HEDGE_MIN_SAMPLES:
+            return settings.GROQ_HEDGE_DEFAULT_DELAY_SECONDS
+
+        return max(settings.GROQ_HEDGE_MIN_DELAY_SECONDS, recorder.percentile(settings.GROQ_HEDGE_PERCENTILE))
+
+    async def _send(
+        self,
+        endpoint: str,
+        priority: int = PRIORITY_BATCH,
+        estimated_tokens: int = 0,
+        **request_kwargs,
+    ) -> httpx.Response:
+        """
+        POST to a Groq endpoint through the upstream circuit breaker and bulkhead.
+        Raises UpstreamUnavailableError without calling Groq while the circuit is open.
+        """
+        async with upstreams["groq"].guard():
+            return await self._send_with_retries(endpoint, priority, estimated_tokens, **request_kwargs)
+
+    async def _send_with_retries(
+        self,
+        endpoint: str,
+        priority: int,
+        estimated_tokens: int,
+        **request_kwargs,
+    ) -> httpx.Response:
+        """
+        POST to a Groq endpoint, retrying only retryable failures within the retry budget.
+        """
         url = f"{self.base_url}/{endpoint}"
+        self.retry_budget.record_request()
+        attempt = 0
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        while True:
+            response = None
+            error = None
+
+            await self.scheduler.acquire(priority, estimated_tokens)
             try:
-                response = await client.post(url, json=payload, headers=self.headers)
-                response.raise_for_status()
-                return response.json()
+                started = time.perf_counter()
+                async with httpx.AsyncClient(timeout=60.0) as client:
+                    response = await client.post(url, **request_kwargs)
+                if response.is_success:
+                    self._record_model_latency(request_kwargs, time.perf_counter() - started)
+                self.scheduler.update_from_headers(response.headers)
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                error = e
+            finally:
+                self.scheduler.release()
+
+            if response is not None and response.is_success:
+                return response
+
+            retry_after = None
+            if response is not None:
+                retry_after = parse_retry_after(response.headers)
+                if response.status_code == 429:
+                    self.scheduler.block_for(retry_after if retry_after is not None else 1.0)
+                retryable = response.status_code in RETRYABLE_STATUS_CODES
+            else:
+                retryable = True
+
+            if not retryable or not self._should_retry(attempt, retry_after):
+                if response is not None:
+                    logger.error(f"Groq API error: {response.status_code} - {response.text}")
+                    response.raise_for_status()
+                logger.error(f"Groq API request failed: {str(error)}")
+                raise error
+
+            delay = retry_after if retry_after is not None else self._backoff_delay(attempt)
+            status = response.status_code if response is not None else type(error).__name__
+            logger.warning(f"Groq {endpoint} failed ({status}), retry {attempt + 1} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _record_model_latency(self, request_kwargs: dict, seconds: float) -> None:
+        """Record the HTTP time of a successful call (no queueing or retry sleeps) for the hedge delay."""
+        payload = request_kwargs.get("json")
+        model = payload.get("model") if isinstance(payload, dict) else None
+        if model:
+            self.model_latency.setdefault(model, LatencyRecorder()).record(seconds)
+
+    def _should_retry(self, attempt: int, retry_after: Optional[float]) -> bool:
+        if attempt >= settings.GROQ_MAX_RETRIES:
+            return False
+        if retry_after is not None and retry_after > settings.GROQ_MAX_RETRY_WAIT_SECONDS:
+            # Waiting that long is worse for the user than failing now
+            return False
+        return self.retry_budget.try_spend()
+
+    def _backoff_delay(self, attempt: int) -> float:
+        delay = min(settings.GROQ_MAX_RETRY_WAIT_SECONDS, 0.5 * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _cascade_json(
+        self,
+        payload: dict,
+        validate: Callable[[dict], Optional[str]],
+        priority: int = PRIORITY_BATCH,
+        models: Optional[list[str]] = None,
+    ) -> dict:
+        """
+        Run a JSON completion through the model cascade.
 
-            except httpx.HTTPStatusError as e:
-                logger.error(f"Groq API error: {e.response.status_code} - {e.response.text}")
-                raise
+        The fast model answers first; the large model is only called when the
+        fast answer is not valid JSON, fails `validate` (which returns the
+        escalation reason or None) or the request itself fails. Pass `models`
+        to run an explicit list of tiers (e.g. only the large model after a
+        streamed fast answer was rejected).
+
+        Returns:
+            Parsed JSON dict from the first acceptable tier (the large model's
+            answer is returned even if it does not validate)
+        """
+        escalated = models is not None
+        if models is None:
+            models = [settings.GROQ_TEXT_MODEL]
+            if settings.GROQ_CASCADE_ENABLED and settings.GROQ_FAST_MODEL != settings.GROQ_TEXT_MODEL:
+                models.insert(0, settings.GROQ_FAST_MODEL)
+
+        if not escalated:
+            self.cascade_metrics.calls += 1
+        for index, model in enumerate(models):
+            is_last = index == len(models) - 1
+            started = time.perf_counter()
+            try:
+                response = await self._make_request("chat/completions", {**payload, "model": model}, priority)
             except Exception as e:
-                logger.error(f"Groq API request failed: {str(e)}")
-                raise
+                if is_last:
+                    raise
+                reason = "error"
+                logger.warning(f"Cascade tier {model} failed ({str(e)}), escalating")
+                self.cascade_metrics.escalations[reason] += 1
+                continue
+            finally:
+                self.cascade_metrics.record_latency(model, time.perf_counter() - started)
+
+            content = response["choices"][0]["message"]["content"]
+            try:
+                data = json.loads(content)
+                if not isinstance(data, dict):
+                    raise ValueError("Groq response is not a JSON object")
+                reason = validate(data)
+            except ValueError:
+                if is_last:
+                    raise
+                reason = "invalid_json"
+
+            if reason is None or is_last:
+                return data
+
+            logger.info(f"Cascade escalating from {model}: {reason}")
+            self.cascade_metrics.escalations[reason] += 1
+
+    def _validate_expense(self, data: dict, categories: list[str]) -> Optional[str]:
+        """Return why a parsed expense should be escalated, or None if it is acceptable."""
+        amount = data.get("amount")
+        try:
+            if amount is None or float(amount) < 0:
+                return "invalid_amount"
+        except (TypeError, ValueError):
+            return "invalid_amount"
 
-    async def parse_photo(self, file_path: str) -> dict:
+        try:
+            confidence = float(data.get("confidence") or 0)
+        except (TypeError, ValueError):
+            confidence = 0.0
+        if confidence < settings.GROQ_CASCADE_MIN_CONFIDENCE:
+            return "low_confidence"
+
+        allowed = set(categories or DEFAULT_CATEGORY_NAMES)
+        used = [data.get("category")]
+        items = data.get("items") or []
+        if not isinstance(items, list):
+            return "invalid_items"
+        used.extend(item.get("category") for item in items if isinstance(item, dict))
+        if any(category not in allowed for category in used if category is not None):
+            return "unknown_category"
+
+        return None
+
+    async def parse_photo(self, file_path: str, priority: int = PRIORITY_BATCH) -> dict:
         """
         Parse receipt photo using Groq vision model
 
         Args:
             file_path: Path to image file
+            priority: Scheduler lane for the request
 
         Returns:
             Parsed expense data dict with fields:
@@ -65,9 +384,21 @@ class GroqClient:
         """
         logger.info(f"Parsing photo: {file_path}")
 
-        # Read and encode image as base64
-        with open(file_path, "rb") as f:
-            image_data = base64.b64encode(f.read()).decode('utf-8')
+        # Shrink the photo before upload (CPU-bound, keep it off the event loop)
+        if settings.GROQ_VISION_PREPROCESS:
+            image_bytes, mime_type = await asyncio.to_thread(
+                prepare_receipt_image,
+                file_path,
+                settings.GROQ_VISION_MAX_EDGE,
+                settings.GROQ_VISION_IMAGE_FORMAT,
+                settings.GROQ_VISION_IMAGE_QUALITY,
+            )
+        else:
+            with open(file_path, "rb") as f:
+                image_bytes, mime_type = f.read(), "image/jpeg"
+
+        # Encode image as base64
+        image_data = base64.b64encode(image_bytes).decode('utf-8')
 
         # Use vision-capable model (llama-3.2-11b-vision-preview)
         payload = {
@@ -88,7 +419,7 @@ class GroqClient:
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/jpeg;base64,{image_data}"
+                                "url": f"data:{mime_type};base64,{image_data}"
                             }
                         }
                     ]
@@ -99,7 +430,7 @@ class GroqClient:
         }
 
         try:
-            response = await self._make_request("chat/completions", payload)
+            response = await self._make_request("chat/completions", payload, priority)
             content = response["choices"][0]["message"]["content"]
 
             # Parse JSON from response
@@ -113,12 +444,13 @@ class GroqClient:
             logger.error(f"Failed to parse photo: {str(e)}")
             raise
 
-    async def parse_voice(self, file_path: str) -> dict:
+    async def parse_voice(self, file_path: str, priority: int = PRIORITY_BATCH) -> dict:
         """
         Transcribe and parse voice message using Groq speech model
 
         Args:
             file_path: Path to audio file
+            priority: Scheduler lane for the requests
 
         Returns:
             Parsed expense data dict (same format as parse_photo)
@@ -126,42 +458,54 @@ class GroqClient:
         logger.info(f"Parsing voice: {file_path}")
 
         # Step 1: Transcribe audio using Whisper
-        transcription_url = f"{self.base_url}/audio/transcriptions"
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        # Silence is trimmed and long notes are split at pauses into chunks
+        # transcribed concurrently; the original is uploaded if that is not possible
+        chunks = None
+        if settings.GROQ_VOICE_PREPROCESS:
+            chunks = await asyncio.to_thread(
+                prepare_voice_chunks,
+                file_path,
+                settings.GROQ_VOICE_SILENCE_DB,
+                settings.GROQ_VOICE_MIN_SPEECH_SECONDS,
+                settings.GROQ_VOICE_CHUNK_SECONDS,
+            )
+
+        if chunks:
+            uploads = [(f"chunk-{index}.ogg", chunk) for index, chunk in enumerate(chunks)]
+        else:
+            # Read upfront so the upload can be replayed on retry
             with open(file_path, "rb") as f:
-                files = {"file": f}
-                data = {
-                    "model": "whisper-large-v3",
-                    "language": "ro",  # Romanian
-                    "response_format": "json"
-                }
-                headers = {"Authorization": f"Bearer {self.api_key}"}
-
-                response = await client.post(transcription_url, files=files, data=data, headers=headers)
-                response.raise_for_status()
-                transcription = response.json()
+                uploads = [(os.path.basename(file_path), f.read())]
 
-        transcribed_text = transcription.get("text", "")
+        texts = await asyncio.gather(*(self._transcribe(name, audio_bytes, priority) for name, audio_bytes in uploads))
+        transcribed_text = " ".join(text.strip() for text in texts if text.strip())
         logger.info(f"Transcribed text: {transcribed_text}")
 
         # Step 2: Parse transcribed text
-        return await self.parse_text(transcribed_text, [])
-
-    async def parse_text(self, text: str, categories: list[str]) -> dict:
-        """
-        Parse manual text input and extract expense information
-
-        Args:
-            text: User's text input
-            categories: List of user's custom category names
-
-        Returns:
-            Parsed expense data dict (same format as parse_photo)
-        """
-        logger.info(f"Parsing text: {text[:50]}...")
+        return await self.parse_text(transcribed_text, [], priority)
+
+    async def _transcribe(self, file_name: str, audio_bytes: bytes, priority: int) -> str:
+        """Transcribe one audio file with Whisper and return its text."""
+        files = {"file": (file_name, audio_bytes)}
+        data = {
+            "model": "whisper-large-v3",
+            "language": "ro",  # Romanian
+            "response_format": "json"
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+
+        response = await self._send(
+            "audio/transcriptions",
+            priority=priority,
+            files=files,
+            data=data,
+            headers=headers,
+        )
+        return response.json().get("text", "")
 
-        categories_text = ", ".join(categories) if categories else "Mâncare & Restaurante, Transport, Cumpărături, Distracție & Timp liber, Utilități & Locuință, Sănătate, Alte cheltuieli"
+    def _text_payload(self, text: str, categories: list[str]) -> dict:
+        """Build the chat payload (without model) for parsing an expense text."""
+        categories_text = ", ".join(categories) if categories else ", ".join(DEFAULT_CATEGORY_NAMES)
 
         category_guidance = (
             "Folosește DOAR aceste categorii exacte și alege-o pe cea mai apropiată pentru fiecare produs.\n"
@@ -174,8 +518,7 @@ class GroqClient:
             "- Alte cheltuieli: doar dacă nu există o potrivire bună în lista de mai sus"
         )
 
-        payload = {
-            "model": "llama-3.3-70b-versatile",
+        return {
             "messages": [
                 {
                     "role": "system",
@@ -220,12 +563,28 @@ Reguli stricte:
             "response_format": {"type": "json_object"}
         }
 
-        try:
-            response = await self._make_request("chat/completions", payload)
-            content = response["choices"][0]["message"]["content"]
+    async def parse_text(self, text: str, categories: list[str], priority: int = PRIORITY_BATCH) -> dict:
+        """
+        Parse manual text input and extract expense information
 
-            import json
-            parsed_data = json.loads(content)
+        Args:
+            text: User's text input
+            categories: List of user's custom category names
+            priority: Scheduler lane for the request
+
+        Returns:
+            Parsed expense data dict (same format as parse_photo)
+        """
+        logger.info(f"Parsing text: {text[:50]}...")
+
+        payload = self._text_payload(text, categories)
+
+        try:
+            parsed_data = await self._cascade_json(
+                payload,
+                lambda data: self._validate_expense(data, categories),
+                priority,
+            )
 
             logger.info(f"Text parsed successfully: {parsed_data.get('amount')} {parsed_data.get('currency')}")
             return parsed_data
@@ -234,15 +593,182 @@ Reguli stricte:
             logger.error(f"Failed to parse text: {str(e)}")
             raise
 
-    async def suggest_category(self, description: str) -> dict:
+    async def parse_text_batch(
+        self,
+        texts: list[str],
+        categories: list[str],
+        priority: int = PRIORITY_BATCH,
+    ) -> list[dict]:
+        """
+        Parse several expense texts with one request per batch
+
+        Args:
+            texts: User text inputs, one expense each
+            categories: List of user's custom category names
+            priority: Scheduler lane for the requests
+
+        Returns:
+            Parsed expense data dicts (same format as parse_text), in input order
+        """
+        if len(texts) <= 1:
+            return [await self.parse_text(text, categories, priority) for text in texts]
+
+        size = max(1, settings.GROQ_TEXT_BATCH_MAX_SIZE)
+        chunks = [texts[start:start + size] for start in range(0, len(texts), size)]
+        results = await asyncio.gather(*(self._parse_text_chunk(chunk, categories, priority) for chunk in chunks))
+        return [parsed for chunk_results in results for parsed in chunk_results]
+
+    async def _parse_text_chunk(self, texts: list[str], categories: list[str], priority: int) -> list[dict]:
+        """Pack numbered texts into one completion and split the results back out."""
+        if len(texts) == 1:
+            return [await self.parse_text(texts[0], categories, priority)]
+
+        logger.info(f"Parsing {len(texts)} texts in one batch")
+
+        numbered = "\n".join(f"{index}. {text}" for index, text in enumerate(texts, 1))
+        payload = self._text_payload(numbered, categories)
+        payload["messages"][0]["content"] += f"""
+
+Mod lot: mesajul utilizatorului conține {len(texts)} cheltuieli numerotate, câte una pe linie.
+Întoarce {{"results": [...]}} cu exact {len(texts)} obiecte cu structura de mai sus, în aceeași ordine, câte unul pentru fiecare linie."""
+        payload["max_tokens"] = 800 + 400 * len(texts)
+
+        def validate(data: dict) -> Optional[str]:
+            results = data.get("results")
+            if not isinstance(results, list) or len(results) != len(texts):
+                return "invalid_batch"
+            for parsed in results:
+                reason = self._validate_expense(parsed, categories) if isinstance(parsed, dict) else "invalid_json"
+                if reason:
+                    return reason
+            return None
+
+        try:
+            data = await self._cascade_json(payload, validate, priority)
+        except Exception as e:
+            logger.error(f"Failed to parse text batch: {str(e)}")
+            raise
+
+        results = data.get("results")
+        if (
+            not isinstance(results, list)
+            or len(results) != len(texts)
+            or not all(isinstance(parsed, dict) for parsed in results)
+        ):
+            raise ValueError(f"Groq batch answer does not hold {len(texts)} expense objects")
+
+        return results
+
+    async def _stream_chat(self, payload: dict, priority: int = PRIORITY_BATCH) -> AsyncIterator[str]:
+        """
+        Stream a chat completion and yield content deltas as they arrive.
+        Streams are not retried; callers fall back to a regular call instead.
+        """
+        url = f"{self.base_url}/chat/completions"
+        async with upstreams["groq"].guard():
+            self.retry_budget.record_request()
+            async for delta in self._stream_deltas(url, payload, priority):
+                yield delta
+
+    async def _stream_deltas(self, url: str, payload: dict, priority: int) -> AsyncIterator[str]:
+        await self.scheduler.acquire(priority, estimate_tokens(payload))
+        try:
+            async with httpx.AsyncClient(timeout=60.0) as client:
+                async with client.stream("POST", url, json={**payload, "stream": True}, headers=self.headers) as response:
+                    self.scheduler.update_from_headers(response.headers)
+                    if not response.is_success:
+                        await response.aread()
+                        if response.status_code == 429:
+                            retry_after = parse_retry_after(response.headers)
+                            self.scheduler.block_for(retry_after if retry_after is not None else 1.0)
+                        logger.error(f"Groq API error: {response.status_code} - {response.text}")
+                        response.raise_for_status()
+
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        choices = json.loads(data).get("choices") or []
+                        delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                        if delta:
+                            yield delta
+        finally:
+            self.scheduler.release()
+
+    async def parse_text_stream(
+        self,
+        text: str,
+        categories: list[str],
+        on_field: Callable[[str, Any], Awaitable[None]],
+        priority: int = PRIORITY_BATCH,
+    ) -> dict:
+        """
+        Parse manual text input with a streamed completion
+
+        Args:
+            text: User's text input
+            categories: List of user's custom category names
+            on_field: Awaited with (key, value) for every top-level field
+                (amount, vendor, category, ...) as soon as it is complete
+            priority: Scheduler lane for the request
+
+        Returns:
+            Parsed expense data dict (same format as parse_text). Answers that
+            fail validation are escalated to the large model, and a failed
+            stream falls back to parse_text.
+        """
+        logger.info(f"Streaming text parse: {text[:50]}...")
+
+        payload = self._text_payload(text, categories)
+        # Groq JSON mode does not stream; the prompt already asks for JSON only
+        payload.pop("response_format", None)
+        model = settings.GROQ_FAST_MODEL if settings.GROQ_CASCADE_ENABLED else settings.GROQ_TEXT_MODEL
+        parser = IncrementalJSONObjectParser()
+
+        started = time.perf_counter()
+        stream = self._stream_chat({**payload, "model": model}, priority)
+        try:
+            while True:
+                # Only the stream and its parsing fall back; errors of on_field propagate
+                try:
+                    fields = parser.feed(await anext(stream))
+                except StopAsyncIteration:
+                    break
+                except (httpx.HTTPError, httpx.StreamError, ValueError) as e:
+                    logger.warning(f"Streaming parse failed ({str(e)}), falling back to a regular call")
+                    return await self.parse_text(text, categories, priority)
+                for key, value in fields:
+                    await on_field(key, value)
+        finally:
+            await stream.aclose()
+
+        self.cascade_metrics.calls += 1
+        self.cascade_metrics.record_latency(model, time.perf_counter() - started)
+
+        parsed_data = dict(parser.fields)
+        reason = self._validate_expense(parsed_data, categories) if parsed_data else "invalid_json"
+        if reason is None or model == settings.GROQ_TEXT_MODEL:
+            if not parsed_data:
+                raise ValueError("Groq stream did not contain a JSON object")
+            logger.info(f"Text parsed successfully (streamed): {parsed_data.get('amount')} {parsed_data.get('currency')}")
+            return parsed_data
+
+        logger.info(f"Cascade escalating from {model}: {reason}")
+        self.cascade_metrics.escalations[reason] += 1
+        return await self._cascade_json(
+            {**payload, "response_format": {"type": "json_object"}},
+            lambda data: self._validate_expense(data, categories),
+            priority,
+            models=[settings.GROQ_TEXT_MODEL],
+        )
+
+    async def suggest_category(self, description: str, priority: int = PRIORITY_BATCH) -> dict:
         """
         Use Groq LLM to suggest a category name, icon, and color.
         """
-        palette = [
-            "#F97316", "#38BDF8", "#34D399", "#FACC15",
-            "#F472B6", "#60A5FA", "#A78BFA", "#FB7185",
-            "#FDBA74", "#FDE047", "#10B981", "#94A3B8"
-        ]
+        palette = CATEGORY_PALETTE
         palette_text = ", ".join(palette)
         instructions = (
             "Return ONLY valid JSON with keys: name, icon, color. "
@@ -255,7 +781,6 @@ Reguli stricte:
         )
 
         payload = {
-            "model": "llama-3.3-70b-versatile",
             "messages": [
                 {
                     "role": "system",
@@ -270,32 +795,36 @@ Reguli stricte:
             "max_tokens": 300
         }
 
-        response = await self._make_request("chat/completions", payload)
-        content = response["choices"][0]["message"]["content"]
+        def validate(data: dict) -> Optional[str]:
+            if not data.get("name") or not data.get("icon"):
+                return "missing_fields"
+            if data.get("color") not in palette:
+                return "invalid_color"
+            return None
 
-        import json
         try:
-            data = json.loads(content)
-            name = data.get("name") or "Custom Category"
-            icon = data.get("icon") or "🏷️"
-            color = data.get("color") or "#10B981"
-
-            if color not in palette:
-                color = palette[0]
-
-            return {
-                "name": name,
-                "icon": icon,
-                "color": color
-            }
-        except Exception:
+            data = await self._cascade_json(payload, validate, priority)
+        except ValueError:
             logger.warning("Groq category suggestion not JSON, returning fallback.")
             return {
-                "name": "Custom Category",
+                "name": FALLBACK_CATEGORY_NAME,
                 "icon": "🏷️",
                 "color": "#10B981"
             }
 
+        name = data.get("name") or FALLBACK_CATEGORY_NAME
+        icon = data.get("icon") or "🏷️"
+        color = data.get("color") or "#10B981"
+
+        if color not in palette:
+            color = palette[0]
+
+        return {
+            "name": name,
+            "icon": icon,
+            "color": color
+        }
+
 
 # Singleton instance
 groq_client = GroqClient()
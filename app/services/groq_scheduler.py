@@ -0,0 +1,229 @@
+"""
+Client-side scheduler for Groq API calls.
+
+Tracks the request/token budgets Groq reports in its x-ratelimit-* headers,
+holds calls back while the budget is exhausted (or a retry-after is active)
+and dispatches queued calls by priority, so interactive bot messages are not
+stuck behind API batch work.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Mapping, Optional
+
+# Lower value = dispatched first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse Groq reset durations like "2m59.56s", "7.66s" or "120ms" into seconds.
+    Plain numbers are treated as seconds.
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+
+    multipliers = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    return sum(float(number) * multipliers[unit] for number, unit in parts)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Return the retry-after header value in seconds, if present and numeric."""
+    raw = headers.get("retry-after")
+    if raw is None:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        return None
+
+
+def estimate_tokens(payload: dict) -> int:
+    """Rough token estimate for a chat payload (prompt chars / 4 + completion budget)."""
+    prompt_chars = len(json.dumps(payload.get("messages", []), ensure_ascii=False))
+    return prompt_chars // 4 + int(payload.get("max_tokens") or 0)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class GroqScheduler:
+    """Priority queue in front of the Groq API that respects its rate-limit headers"""
+
+    def __init__(self, max_concurrent: int = 4, batch_request_reserve: int = 2):
+        self.max_concurrent = max_concurrent
+        # Requests kept back for interactive calls once the window is nearly spent
+        self.batch_request_reserve = batch_request_reserve
+
+        self.remaining_requests: Optional[int] = None
+        self.remaining_tokens: Optional[int] = None
+        self.requests_reset_at = 0.0
+        self.tokens_reset_at = 0.0
+        self.blocked_until = 0.0
+
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def acquire(self, priority: int = PRIORITY_BATCH, tokens: int = 0) -> None:
+        """Wait until a call with the given priority and token estimate may be sent."""
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(priority, next(self._seq), tokens, loop.create_future())
+        heapq.heappush(self._waiters, waiter)
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Slot was granted right before cancellation - give it back
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            raise
+
+    def release(self) -> None:
+        """Mark an in-flight call as finished."""
+        self._in_flight = max(0, self._in_flight - 1)
+        self._dispatch()
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Refresh the known budgets from a Groq response."""
+        now = time.monotonic()
+
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        if remaining_requests is not None and remaining_requests.isdigit():
+            self.remaining_requests = int(remaining_requests)
+            reset = parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+            if reset is not None:
+                self.requests_reset_at = now + reset
+
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None and remaining_tokens.isdigit():
+            self.remaining_tokens = int(remaining_tokens)
+            reset = parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+            if reset is not None:
+                self.tokens_reset_at = now + reset
+
+        self._dispatch()
+
+    def block_for(self, seconds: float) -> None:
+        """Hold back every call for the given number of seconds (e.g. after a 429)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def can_hedge(self) -> bool:
+        """Whether there is spare capacity for a duplicate (hedged) call right now."""
+        now = time.monotonic()
+        if self._waiters or self._in_flight >= self.max_concurrent or now < self.blocked_until:
+            return False
+        if self.remaining_requests is not None and now < self.requests_reset_at:
+            return self.remaining_requests > self.batch_request_reserve
+        return True
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+            "remaining_requests": self.remaining_requests,
+            "remaining_tokens": self.remaining_tokens,
+            "blocked_for": round(max(0.0, self.blocked_until - now), 3),
+        }
+
+    def _delay_for(self, waiter: _Waiter, now: float) -> float:
+        """Seconds the waiter must still wait for budget (0 = may go now)."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+
+        if self.remaining_requests is not None and now < self.requests_reset_at:
+            reserve = self.batch_request_reserve if waiter.priority > PRIORITY_INTERACTIVE else 0
+            if self.remaining_requests <= reserve:
+                return self.requests_reset_at - now
+
+        if (
+            self.remaining_tokens is not None
+            and now < self.tokens_reset_at
+            and waiter.tokens > self.remaining_tokens
+        ):
+            return self.tokens_reset_at - now
+
+        return 0.0
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        now = time.monotonic()
+        while self._waiters and self._in_flight < self.max_concurrent:
+            head = self._waiters[0]
+            if head.future.done():
+                heapq.heappop(self._waiters)
+                continue
+
+            delay = self._delay_for(head, now)
+            if delay > 0:
+                loop = head.future.get_loop()
+                self._timer = loop.call_later(delay, self._dispatch)
+                return
+
+            heapq.heappop(self._waiters)
+            self._in_flight += 1
+            # Spend the budget optimistically until the next response headers arrive
+            if self.remaining_requests is not None:
+                self.remaining_requests = max(0, self.remaining_requests - 1)
+            if self.remaining_tokens is not None:
+                self.remaining_tokens = max(0, self.remaining_tokens - head.tokens)
+            head.future.set_result(None)
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of recent traffic, so a degraded API is not
+    hammered with retry storms. Every request deposits `ratio` tokens and
+    every retry spends one.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._balance = max_tokens
+
+    def record_request(self) -> None:
+        self._balance = min(self.max_tokens, self._balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._balance >= 1.0:
+            self._balance -= 1.0
+            return True
+        return False
+
+    @property
+    def balance(self) -> float:
+        return self._balance
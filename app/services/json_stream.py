@@ -0,0 +1,110 @@
+"""
+Incremental parser for streamed JSON objects.
+
+Feeds on completion chunks as they arrive and reports each top-level field of
+the object as soon as its value is complete, so callers can render "amount",
+"vendor" or "category" before the whole completion has been generated.
+"""
+import json
+from typing import Any
+
+
+class IncrementalJSONObjectParser:
+    """Emits (key, value) pairs of a streamed top-level JSON object"""
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect = "key"  # key | colon | value | comma
+        self._key: str | None = None
+        self._token_start: int | None = None
+        self.fields: dict[str, Any] = {}
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return self._buffer
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        """
+        Add a chunk of the completion.
+
+        Returns:
+            Top-level fields completed by this chunk, in order
+        """
+        self._buffer += chunk
+        completed: list[tuple[str, Any]] = []
+
+        while self._pos < len(self._buffer):
+            char = self._buffer[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._finish_string(completed)
+                self._pos += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._token_start is None:
+                    self._token_start = self._pos
+            elif char in "{[":
+                if self._depth == 1 and self._expect == "value" and self._token_start is None:
+                    self._token_start = self._pos
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 1:
+                    self._finish_literal(completed)
+                self._depth = max(0, self._depth - 1)
+                if self._depth == 1 and self._expect == "value" and self._token_start is not None:
+                    self._emit(self._buffer[self._token_start:self._pos + 1], completed)
+            elif self._depth == 1:
+                if char == ",":
+                    self._finish_literal(completed)
+                    self._expect = "key"
+                elif char == ":":
+                    self._expect = "value"
+                elif self._expect == "value" and not char.isspace() and self._token_start is None:
+                    self._token_start = self._pos
+
+            self._pos += 1
+
+        return completed
+
+    def _finish_string(self, completed: list) -> None:
+        raw = self._buffer[self._token_start:self._pos + 1]
+        if self._expect == "key":
+            try:
+                self._key = json.loads(raw)
+            except ValueError:
+                self._key = None
+            self._token_start = None
+            self._expect = "colon"
+        elif self._expect == "value":
+            self._emit(raw, completed)
+
+    def _finish_literal(self, completed: list) -> None:
+        """Numbers, true/false/null end at the next comma or closing brace."""
+        if self._expect == "value" and self._token_start is not None:
+            self._emit(self._buffer[self._token_start:self._pos].strip(), completed)
+
+    def _emit(self, raw: str, completed: list) -> None:
+        self._token_start = None
+        self._expect = "comma"
+        if self._key is None:
+            return
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        self.fields[self._key] = value
+        completed.append((self._key, value))
@@ -0,0 +1,242 @@
+"""
+Deterministic fast-path parser for simple expense texts like "50 lei cafea"
+or "benzina 600". Anything it cannot parse confidently is left to Groq.
+"""
+import logging
+import re
+import time
+import unicodedata
+from datetime import date
+from typing import Optional
+
+from app.utils.categories import CATEGORY_KEYWORDS, CATEGORY_KEYWORDS_RU
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"\d+(?:[.,]\d+)?|[^\W\d_]+|[€$]")
+_CYRILLIC_PATTERN = re.compile(r"[Ѐ-ӿ]")
+# A sign written on the number itself ("-50"), not a dash between words
+_SIGNED_NUMBER_PATTERN = re.compile(r"(?<![\w.,])[-+−]\d")
+
+CURRENCY_ALIASES = {
+    "lei": "MDL", "leu": "MDL", "mdl": "MDL",
+    "лей": "MDL", "леев": "MDL", "лея": "MDL", "мдл": "MDL",
+    "eur": "EUR", "euro": "EUR", "euri": "EUR", "€": "EUR", "евро": "EUR",
+    "usd": "USD", "$": "USD", "dolari": "USD", "dolar": "USD",
+    "доллар": "USD", "доллара": "USD", "долларов": "USD",
+    "ron": "RON",
+}
+
+STOPWORDS = {
+    # Romanian
+    "am", "ai", "a", "au", "cheltuit", "platit", "dat", "cumparat", "luat",
+    "pe", "la", "de", "pentru", "si", "in", "cu", "din", "un", "o", "azi", "astazi",
+    # Russian
+    "на", "за", "в", "и", "с", "потратил", "потратила", "заплатил", "заплатила",
+    "купил", "купила", "сегодня",
+}
+
+# Relative dates and weekdays: the purchase was not today, the LLM resolves the date
+DATE_WORDS = {
+    # Romanian
+    "ieri", "alaltaieri", "aseara", "noapte", "trecut", "trecuta", "trecute",
+    "luni", "marti", "miercuri", "joi", "vineri", "sambata", "duminica",
+    # Russian
+    "вчера", "позавчера", "ночью", "вечером", "прошлый", "прошлая", "прошлое",
+    "прошлой", "прошлую", "прошлом", "прошлого", "понедельник", "вторник",
+    "среду", "среда", "четверг", "пятницу", "пятница", "субботу", "суббота",
+    "воскресенье",
+}
+
+# A word after these that is no category keyword is likely a vendor name
+# ("cafea la Starbucks"), which the LLM extracts
+VENDOR_PREPOSITIONS = {"la", "в", "у"}
+
+# Numbers followed by these are quantities ("mere 1 kg"), not amounts
+QUANTITY_UNITS = {
+    "kg", "g", "gr", "mg", "l", "ml", "buc", "bucati", "bucata", "pcs",
+    "кг", "г", "гр", "л", "мл", "шт",
+}
+
+# Keywords are whole words or stems; a word matches a keyword only if the rest
+# of it is an inflection ending ("cafeaua", "gazul", "аптеку"), so "apa" does
+# not match "apartament" and "gaz" does not match "gazeta"
+INFLECTION_ENDINGS = {
+    "",
+    # Romanian (articles, plurals, cases)
+    "a", "e", "i", "ul", "ului", "le", "lor", "ua", "ea", "ele", "uri", "urile",
+    "ie", "ia", "iei", "ii", "ice", "itate", "itatea",
+    # Russian (case and number endings, -ка/-ки diminutives)
+    "а", "я", "у", "ю", "ы", "и", "е", "о", "ь", "ой", "ом", "ам", "ами", "ах", "ов", "ью",
+    "ка", "ку", "ки", "ке", "ок",
+}
+
+# Longer descriptions usually carry vendor/date details the LLM handles better
+MAX_DESCRIPTION_WORDS = 4
+
+
+def normalize_text(value: str) -> str:
+    """Lowercase and strip Romanian diacritics (ă, â, î, ș, ț)."""
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+_CURRENCIES = {normalize_text(alias): code for alias, code in CURRENCY_ALIASES.items()}
+_STOPWORDS = {normalize_text(word) for word in STOPWORDS}
+_UNITS = {normalize_text(unit) for unit in QUANTITY_UNITS}
+_DATE_WORDS = {normalize_text(word) for word in DATE_WORDS}
+_PREPOSITIONS = {normalize_text(word) for word in VENDOR_PREPOSITIONS}
+_ENDINGS = {normalize_text(ending) for ending in INFLECTION_ENDINGS}
+
+
+class LocalExpenseParser:
+    """Keyword/regex parser producing the same parsed_data shape as GroqClient.parse_text"""
+
+    def __init__(self, min_confidence: float = 0.85):
+        self.min_confidence = min_confidence
+        self._single_keywords: list[tuple[str, str]] = []
+        self._phrase_keywords: list[tuple[str, str]] = []
+
+        for table in (CATEGORY_KEYWORDS, CATEGORY_KEYWORDS_RU):
+            for category, keywords in table.items():
+                for keyword in keywords:
+                    normalized = normalize_text(keyword)
+                    target = self._phrase_keywords if " " in normalized else self._single_keywords
+                    if (normalized, category) not in target:
+                        target.append((normalized, category))
+
+    def parse(self, text: str, categories: Optional[list[str]] = None) -> Optional[dict]:
+        """
+        Parse a simple expense text.
+
+        Args:
+            text: User's text input
+            categories: User's category names (a match outside this list is not trusted)
+
+        Returns:
+            Parsed expense data dict, or None when the text should go to the LLM
+        """
+        started = time.perf_counter()
+        result = self._parse(text or "", categories or [])
+        elapsed_us = (time.perf_counter() - started) * 1_000_000
+
+        if result is None or result["confidence"] < self.min_confidence:
+            logger.debug(f"Local parser fallback after {elapsed_us:.0f}us")
+            return None
+
+        logger.info(f"Local parser hit in {elapsed_us:.0f}us: {result['amount']} {result['currency']} -> {result['category']}")
+        return result
+
+    def _parse(self, text: str, categories: list[str]) -> Optional[dict]:
+        tokens = _TOKEN_PATTERN.findall(normalize_text(text.strip()))
+        if not tokens:
+            return None
+        # Refunds, dates and vendors are not handled here
+        if _SIGNED_NUMBER_PATTERN.search(text):
+            return None
+        if any(token in _DATE_WORDS for token in tokens):
+            return None
+        if self._names_vendor(tokens):
+            return None
+
+        amounts = []
+        currency = None
+        words = []
+        for index, token in enumerate(tokens):
+            if token in _UNITS and index > 0 and tokens[index - 1][0].isdigit():
+                continue
+            if token[0].isdigit():
+                if index + 1 < len(tokens) and tokens[index + 1] in _UNITS:
+                    # Quantity, not the amount paid
+                    continue
+                amounts.append(float(token.replace(",", ".")))
+            elif token in _CURRENCIES:
+                if currency and _CURRENCIES[token] != currency:
+                    return None
+                currency = _CURRENCIES[token]
+            elif token not in _STOPWORDS:
+                words.append(token)
+
+        # Several numbers means quantities, dates or multiple items - not a simple text
+        if len(amounts) != 1 or amounts[0] <= 0:
+            return None
+        if not words or len(words) > MAX_DESCRIPTION_WORDS:
+            return None
+
+        matched = self._match_categories(words)
+        if len(matched) == 1:
+            category = matched.pop()
+            confidence = 0.95
+        else:
+            # No keyword or conflicting keywords
+            category = None
+            confidence = 0.5
+
+        if category and categories and category not in categories:
+            confidence = 0.6
+        if currency is None:
+            currency = "MDL"
+            confidence -= 0.05
+
+        amount = amounts[0]
+        description = " ".join(self._original_words(text))
+        language = "ru" if _CYRILLIC_PATTERN.search(text) else "ro"
+
+        return {
+            "amount": amount,
+            "currency": currency,
+            "vendor": "",
+            "purchase_date": date.today().isoformat(),
+            "category": category or "Alte cheltuieli",
+            "items": [
+                {
+                    "name": description,
+                    "qty": 1,
+                    "price": amount,
+                    "category": category or "Alte cheltuieli",
+                }
+            ],
+            "notes": text.strip(),
+            "language": language,
+            "confidence": round(confidence, 2),
+        }
+
+    def _names_vendor(self, tokens: list[str]) -> bool:
+        for token, following in zip(tokens, tokens[1:]):
+            if token not in _PREPOSITIONS or not following[0].isalpha():
+                continue
+            if following in _CURRENCIES or following in _STOPWORDS:
+                continue
+            if not self._match_categories([following]):
+                return True
+        return False
+
+    def _match_categories(self, words: list[str]) -> set[str]:
+        matched = set()
+        for word in words:
+            for keyword, category in self._single_keywords:
+                if word.startswith(keyword) and word[len(keyword):] in _ENDINGS:
+                    matched.add(category)
+
+        joined = " ".join(words)
+        for phrase, category in self._phrase_keywords:
+            if phrase in joined:
+                matched.add(category)
+        return matched
+
+    def _original_words(self, text: str) -> list[str]:
+        """Description words as the user typed them (diacritics kept)."""
+        words = []
+        tokens = _TOKEN_PATTERN.findall(text.strip())
+        for index, token in enumerate(tokens):
+            normalized = normalize_text(token)
+            if token[0].isdigit() or normalized in _CURRENCIES or normalized in _STOPWORDS:
+                continue
+            if normalized in _UNITS and index > 0 and tokens[index - 1][0].isdigit():
+                continue
+            words.append(token)
+        return words
+
+
+local_parser = LocalExpenseParser(min_confidence=settings.LOCAL_PARSER_MIN_CONFIDENCE)
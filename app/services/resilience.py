@@ -0,0 +1,221 @@
+"""
+Circuit breakers and bulkheads for upstream services (Groq, SFS, Telegram)
+
+A bulkhead caps how many calls may be outstanding against one upstream, so a
+slow dependency cannot take every worker with it. A circuit breaker opens
+after consecutive failures and rejects calls immediately until a recovery
+timeout has passed, then lets a trial call through (half-open) to decide
+whether to close again.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+
+import httpx
+
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class UpstreamUnavailableError(Exception):
+    """Raised instead of calling an upstream whose breaker is open or bulkhead is full"""
+
+    def __init__(self, upstream: str, reason: str, retry_after: Optional[float] = None):
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"{upstream} unavailable ({reason})")
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """Client errors (4xx, incl. 429) mean the upstream is up; everything else is a failure."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return True
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures -> half-open after `recovery_timeout`"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._half_open_calls = 0
+
+    def before_call(self) -> None:
+        """Raise UpstreamUnavailableError if the call must not be attempted."""
+        if self.state == STATE_OPEN:
+            remaining = self.opened_at + self.recovery_timeout - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                raise UpstreamUnavailableError(self.name, "circuit open", retry_after=remaining)
+            self.state = STATE_HALF_OPEN
+            self._half_open_calls = 0
+            logger.info(f"Circuit {self.name} half-open, letting a trial call through")
+
+        if self.state == STATE_HALF_OPEN:
+            if self._half_open_calls >= self.half_open_max_calls:
+                self.rejected += 1
+                raise UpstreamUnavailableError(self.name, "circuit half-open", retry_after=self.recovery_timeout)
+            self._half_open_calls += 1
+
+    def release_call(self) -> None:
+        """Give back the trial slot of a call that ended without an outcome (e.g. cancelled)."""
+        if self.state == STATE_HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    def record_success(self) -> None:
+        if self.state != STATE_CLOSED:
+            logger.info(f"Circuit {self.name} closed")
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == STATE_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != STATE_OPEN:
+                logger.warning(f"Circuit {self.name} open after {self.consecutive_failures} failures")
+            self.state = STATE_OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        retry_after = None
+        if self.state == STATE_OPEN:
+            retry_after = round(max(0.0, self.opened_at + self.recovery_timeout - time.monotonic()), 1)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "rejected": self.rejected,
+            "retry_after": retry_after,
+        }
+
+
+class Bulkhead:
+    """Caps concurrent calls to an upstream; callers wait at most `max_wait` for a slot"""
+
+    def __init__(self, name: str, max_concurrent: int = 10, max_wait: float = 2.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def acquire(self) -> None:
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise UpstreamUnavailableError(self.name, "too many concurrent calls") from None
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def snapshot(self) -> dict:
+        return {"in_flight": self.in_flight, "limit": self.max_concurrent, "rejected": self.rejected}
+
+
+class _Call:
+    """Handle yielded by Upstream.guard(); mark a call failed without raising"""
+
+    def __init__(self):
+        self.failed = False
+
+    def fail(self) -> None:
+        self.failed = True
+
+
+class Upstream:
+    """Circuit breaker plus bulkhead for one external dependency"""
+
+    def __init__(self, name: str, breaker: CircuitBreaker, bulkhead: Bulkhead):
+        self.name = name
+        self.breaker = breaker
+        self.bulkhead = bulkhead
+
+    @asynccontextmanager
+    async def guard(
+        self,
+        is_failure: Callable[[BaseException], bool] = is_upstream_failure,
+    ) -> AsyncIterator[_Call]:
+        """
+        Run one call under the breaker and bulkhead.
+
+        Exceptions raised inside count as failures when `is_failure` says so
+        (cancellation never does); use call.fail() for failures reported in a
+        response without raising, e.g. a 5xx answer.
+        """
+        self.breaker.before_call()
+        try:
+            await self.bulkhead.acquire()
+        except BaseException:
+            # Never attempted: a half-open breaker must not wait for its outcome
+            self.breaker.release_call()
+            raise
+        call = _Call()
+        recorded = False
+        try:
+            yield call
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if is_failure(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            recorded = True
+            raise
+        else:
+            if call.failed:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            recorded = True
+        finally:
+            self.bulkhead.release()
+            if not recorded:
+                self.breaker.release_call()
+
+    def snapshot(self) -> dict:
+        return {"circuit": self.breaker.snapshot(), "bulkhead": self.bulkhead.snapshot()}
+
+
+def _build_upstream(name: str, max_concurrent: int) -> Upstream:
+    return Upstream(
+        name,
+        CircuitBreaker(
+            name,
+            failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+            recovery_timeout=settings.CIRCUIT_RECOVERY_SECONDS,
+        ),
+        Bulkhead(name, max_concurrent=max_concurrent, max_wait=settings.BULKHEAD_MAX_WAIT_SECONDS),
+    )
+
+
+# One instance per upstream, shared by every client of that upstream
+upstreams: dict[str, Upstream] = {
+    "groq": _build_upstream("groq", settings.GROQ_BULKHEAD_LIMIT),
+    "sfs": _build_upstream("sfs", settings.SFS_BULKHEAD_LIMIT),
+    "telegram": _build_upstream("telegram", settings.TELEGRAM_BULKHEAD_LIMIT),
+}
+
+
+def upstreams_snapshot() -> dict:
+    """Breaker and bulkhead state of every upstream, for the health endpoint."""
+    return {name: upstream.snapshot() for name, upstream in upstreams.items()}
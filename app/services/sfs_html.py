@@ -0,0 +1,125 @@
+"""
+HTML backends for SFS receipt pages
+
+A backend reduces a receipt page to the two things the scraper reads: the
+text of every <p class="text-gray-600"> (company block) and the span texts
+of every <div class="flex justify-between items-center"> (receipt lines),
+in document order. The lxml backend does this in one pass over the tree;
+the BeautifulSoup backend is the reference it must agree with.
+"""
+import logging
+from dataclasses import dataclass, field
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+COMPANY_CLASS = "text-gray-600"
+LINE_CLASS = "flex justify-between items-center"
+
+
+@dataclass
+class ReceiptPage:
+    """Stripped texts extracted from a receipt page"""
+    company_lines: list[str] = field(default_factory=list)
+    # Span texts of each receipt line, only lines with exactly two spans
+    rows: list[tuple[str, str]] = field(default_factory=list)
+
+
+class HTMLBackend:
+    """Turns receipt HTML into a ReceiptPage"""
+
+    name = ""
+
+    def scan(self, html: str) -> ReceiptPage:
+        raise NotImplementedError
+
+
+class SoupBackend(HTMLBackend):
+    """BeautifulSoup with the pure-Python html.parser (reference behaviour)"""
+
+    name = "html.parser"
+
+    def scan(self, html: str) -> ReceiptPage:
+        soup = BeautifulSoup(html, "html.parser")
+        page = ReceiptPage()
+        page.company_lines = [elem.get_text(strip=True) for elem in soup.find_all("p", class_=COMPANY_CLASS)]
+        for div in soup.find_all("div", class_=LINE_CLASS):
+            spans = div.find_all("span")
+            if len(spans) == 2:
+                page.rows.append((spans[0].get_text(strip=True), spans[1].get_text(strip=True)))
+        return page
+
+
+def _stripped_text(element) -> str:
+    """Same as BeautifulSoup's get_text(strip=True): stripped text nodes, comments skipped."""
+    parts = []
+
+    def walk(node):
+        if isinstance(node.tag, str):
+            if node.text and node.text.strip():
+                parts.append(node.text.strip())
+            for child in node:
+                walk(child)
+        if node is not element and node.tail and node.tail.strip():
+            parts.append(node.tail.strip())
+
+    walk(element)
+    return "".join(parts)
+
+
+class LxmlBackend(HTMLBackend):
+    """lxml's C parser; walks the tree once"""
+
+    name = "lxml"
+
+    def __init__(self):
+        from lxml import etree, html as lxml_html
+
+        self._etree = etree
+        self._parser = lxml_html.HTMLParser(encoding="utf-8")
+
+    def scan(self, html: str) -> ReceiptPage:
+        page = ReceiptPage()
+        if not html or not html.strip():
+            return page
+        try:
+            root = self._etree.fromstring(html.encode("utf-8"), self._parser)
+        except self._etree.ParserError:
+            return page
+        if root is None:
+            return page
+
+        for element in root.iter("p", "div"):
+            classes = element.get("class")
+            if not classes:
+                continue
+            tokens = classes.split()
+            if element.tag == "p":
+                if COMPANY_CLASS in tokens:
+                    page.company_lines.append(_stripped_text(element))
+            elif " ".join(tokens) == LINE_CLASS:
+                spans = [span for span in element.iter("span") if span is not element]
+                if len(spans) == 2:
+                    page.rows.append((_stripped_text(spans[0]), _stripped_text(spans[1])))
+        return page
+
+
+BACKENDS = {
+    SoupBackend.name: SoupBackend,
+    LxmlBackend.name: LxmlBackend,
+}
+
+
+def get_backend(name: str) -> HTMLBackend:
+    """
+    Backend by name; falls back to html.parser when lxml is not installed.
+    """
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        raise ValueError(f"Unknown SFS HTML backend: {name}")
+    try:
+        return backend_class()
+    except ImportError:
+        logger.warning(f"SFS HTML backend {name} unavailable, using html.parser")
+        return SoupBackend()
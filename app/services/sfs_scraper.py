@@ -2,54 +2,196 @@
 SFS Moldova Receipt Scraper
 Scrapes receipt data from https://mev.sfs.md/receipt-verifier/
 """
+import asyncio
 import httpx
-from bs4 import BeautifulSoup
 import re
 import logging
+from collections import Counter
 from datetime import datetime
+from typing import Optional
 from urllib.parse import urlparse
 
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.sfs_receipt import SFSReceipt
+from app.services.resilience import upstreams
+from app.services.sfs_html import HTMLBackend, get_backend
+from app.services.vendor_registry import apply_known_vendor
+from app.utils.config import settings
+from app.utils.crypto import decrypt_json, encrypt_data
+from app.utils.metrics import HitMissCounter
+
 logger = logging.getLogger(__name__)
 
+# Leading line number on item names, e.g. "12A- Lapte"
+_LINE_NUMBER_PATTERN = re.compile(r'^\s*\d+[A-Za-z]*[-\s]+')
+_DATE_PATTERN = re.compile(r'(\d{2}\.\d{2}\.\d{4})')
+
+
+def _is_complete(result: object) -> bool:
+    """Whether a parsed receipt has its total, i.e. is worth caching."""
+    if not isinstance(result, dict):
+        return False
+    amount = result.get("amount")
+    return isinstance(amount, (int, float)) and amount > 0
+
 
 class SFSScraper:
-    def __init__(self):
+    def __init__(self, html_backend: Optional[HTMLBackend] = None):
         self.base_url = "https://mev.sfs.md/receipt-verifier"
+        self.html_backend = html_backend or get_backend(settings.SFS_HTML_PARSER)
+        self.cache_stats = HitMissCounter()
+        # Candidate URL pattern -> Counter(success=..., failure=...)
+        self.pattern_stats: dict[str, Counter] = {}
+
+    def _cached_receipt(self, db: Session, code: str) -> Optional[dict]:
+        """Cached parse of a receipt, None if missing or unreadable (then SFS is fetched again)."""
+        try:
+            receipt = db.get(SFSReceipt, code)
+            if receipt is None:
+                return None
+            result = decrypt_json(receipt.data)
+        except SQLAlchemyError as e:
+            logger.warning(f"SFS receipt cache unavailable for {code}: {str(e)}")
+            return None
+        except ValueError as e:
+            # Also json.JSONDecodeError
+            logger.warning(f"Ignoring unreadable cached SFS receipt {code}: {str(e)}")
+            return None
+        if not _is_complete(result):
+            return None
+        return result
+
+    def _store_receipt(self, db: Session, code: str, result: dict) -> None:
+        """
+        Cache a complete parse in a session of its own, so the caller's
+        transaction is neither committed nor rolled back here.
+        """
+        if not _is_complete(result):
+            logger.info(f"Not caching incomplete SFS receipt {code}")
+            return
+        try:
+            with Session(bind=db.get_bind()) as cache_db:
+                cache_db.merge(SFSReceipt(receipt_code=code, data=encrypt_data(result)))
+                cache_db.commit()
+        except Exception as e:
+            logger.warning(f"Could not cache SFS receipt {code}: {str(e)}")
 
-    def _build_candidate_urls(self, qr_url: str) -> list[str]:
+    def receipt_code(self, qr_url: str) -> Optional[str]:
+        """Canonical receipt code from an SFS link, e.g. "H902005680/6049.00/1941/2025-02-11"."""
+        if not qr_url:
+            return None
+        try:
+            path = urlparse(qr_url.strip()).path or ""
+        except Exception:
+            return None
+        code = None
+        if "/receipt-verifier/" in path:
+            code = path.split("/receipt-verifier/")[-1].strip("/")
+        elif "/receipt/" in path:
+            code = path.split("/receipt/")[-1].strip("/")
+        return code or None
+
+    def _build_candidate_urls(self, qr_url: str) -> list[tuple[str, str]]:
+        """
+        (pattern, url) pairs to try for a link, best pattern first.
+        Patterns are ranked by their remembered success rate.
+        """
         candidates = []
         if not qr_url:
             return candidates
 
         qr_url = qr_url.strip()
         if qr_url:
-            candidates.append(qr_url)
+            candidates.append(("original", qr_url))
 
-        try:
-            parsed = urlparse(qr_url)
-            path = parsed.path or ""
-            code = None
-            if "/receipt-verifier/" in path:
-                code = path.split("/receipt-verifier/")[-1].strip("/")
-            elif "/receipt/" in path:
-                code = path.split("/receipt/")[-1].strip("/")
-
-            if code:
-                candidates.append(f"https://mev.sfs.md/receipt-verifier/{code}")
-                candidates.append(f"https://mev.sfs.md/receipt-verifier/{code}/")
-                candidates.append(f"https://sift-mev.sfs.md/receipt/{code}")
-        except Exception:
-            pass
+        code = self.receipt_code(qr_url)
+        if code:
+            candidates.append(("receipt_verifier", f"https://mev.sfs.md/receipt-verifier/{code}"))
+            candidates.append(("receipt_verifier_slash", f"https://mev.sfs.md/receipt-verifier/{code}/"))
+            candidates.append(("sift", f"https://sift-mev.sfs.md/receipt/{code}"))
+
+        candidates.sort(key=lambda candidate: self._pattern_score(candidate[0]), reverse=True)
 
         seen = set()
         unique = []
-        for url in candidates:
+        for pattern, url in candidates:
             if url and url not in seen:
                 seen.add(url)
-                unique.append(url)
+                unique.append((pattern, url))
         return unique
 
-    async def parse_qr_url(self, qr_url: str) -> dict:
+    def _pattern_score(self, pattern: str) -> float:
+        """Smoothed success rate, so untried patterns start at 0.5."""
+        stats = self.pattern_stats.get(pattern)
+        if not stats:
+            return 0.5
+        return (stats["success"] + 1) / (stats["success"] + stats["failure"] + 2)
+
+    def _record_pattern(self, pattern: str, success: bool) -> None:
+        stats = self.pattern_stats.setdefault(pattern, Counter())
+        stats["success" if success else "failure"] += 1
+
+    async def _fetch(self, candidates: list[tuple[str, str]], headers: dict) -> str:
+        """
+        Fetch a receipt page under the SFS circuit breaker and bulkhead.
+        Timeouts and 5xx count against the breaker; 4xx do not.
+        """
+        async with upstreams["sfs"].guard():
+            async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
+                return await self._race(client, candidates, headers)
+
+    async def _race(self, client: httpx.AsyncClient, candidates: list[tuple[str, str]], headers: dict) -> str:
+        """
+        Request the candidates concurrently with a staggered start and return the
+        first successful page; the others are cancelled. Each candidate starts
+        SFS_CANDIDATE_STAGGER_SECONDS after the previous one, or as soon as it fails.
+        """
+        if not candidates:
+            raise ValueError("Nu am putut accesa bonul SFS.")
+
+        stagger = settings.SFS_CANDIDATE_STAGGER_SECONDS
+        started = [asyncio.Event() for _ in candidates]
+        failed = [asyncio.Event() for _ in candidates]
+
+        async def attempt(index: int, pattern: str, url: str) -> str:
+            if index:
+                await started[index - 1].wait()
+                try:
+                    await asyncio.wait_for(failed[index - 1].wait(), timeout=stagger)
+                except asyncio.TimeoutError:
+                    pass
+            started[index].set()
+            try:
+                logger.info(f"Trying SFS URL: {url}")
+                response = await client.get(url, headers=headers)
+                response.raise_for_status()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._record_pattern(pattern, success=False)
+                failed[index].set()
+                raise
+            self._record_pattern(pattern, success=True)
+            return response.text
+
+        tasks = [asyncio.create_task(attempt(index, *candidate)) for index, candidate in enumerate(candidates)]
+        last_error = None
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    return await next_done
+                except Exception as e:
+                    last_error = e
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        raise last_error
+
+    async def parse_qr_url(self, qr_url: str, db: Optional[Session] = None) -> dict:
         """
         Parse receipt from SFS QR code URL
 
@@ -57,10 +199,35 @@ class SFSScraper:
 
         Args:
             qr_url: Full URL from QR code
+            db: Session for the persistent receipt cache and the vendor registry;
+                without it SFS is always fetched and the vendor is not looked up
 
         Returns:
             dict with parsed expense data
         """
+        code = self.receipt_code(qr_url)
+        use_cache = db is not None and code is not None and settings.SFS_RECEIPT_CACHE_ENABLED
+
+        result = None
+        if use_cache:
+            result = self._cached_receipt(db, code)
+            if result is not None:
+                self.cache_stats.hit()
+                logger.info(f"SFS receipt {code} served from cache")
+            else:
+                self.cache_stats.miss()
+
+        if result is None:
+            result = await self._fetch_and_parse(qr_url)
+            if use_cache:
+                self._store_receipt(db, code, result)
+
+        if db is not None:
+            # Known vendors keep their canonical name and learned category
+            apply_known_vendor(db, result)
+        return result
+
+    async def _fetch_and_parse(self, qr_url: str) -> dict:
         try:
             logger.info(f"Parsing SFS receipt: {qr_url}")
 
@@ -79,165 +246,130 @@ class SFSScraper:
                 'Cache-Control': 'max-age=0'
             }
 
-            response_text = None
-            last_error = None
-
-            candidate_urls = self._build_candidate_urls(qr_url)
-            if not candidate_urls:
+            candidates = self._build_candidate_urls(qr_url)
+            if not candidates:
                 raise ValueError("Invalid QR URL")
 
-            async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
-                for candidate in candidate_urls:
-                    try:
-                        logger.info(f"Trying SFS URL: {candidate}")
-                        response = await client.get(candidate, headers=headers)
-                        response.raise_for_status()
-                        response_text = response.text
-                        break
-                    except Exception as e:
-                        last_error = e
-
-            if response_text is None:
-                if last_error:
-                    raise last_error
-                raise ValueError("Nu am putut accesa bonul SFS.")
-
-            # Parse HTML
-            soup = BeautifulSoup(response_text, 'html.parser')
-
-            # Extract company info
-            company_name = None
-            fiscal_code = None
-            address = None
-            registration_number = None
-
-            # Find all text elements
-            text_elements = soup.find_all('p', class_='text-gray-600')
-
-            for elem in text_elements:
-                text = elem.get_text(strip=True)
-
-                if 'COD FISCAL' in text:
-                    fiscal_code = text.replace('COD FISCAL:', '').strip()
-                elif 'NUMARUL DE ÎNREGISTRARE' in text or 'NUMĂRUL DE ÎNREGISTRARE' in text:
-                    registration_number = text.split(':')[-1].strip()
-                elif not company_name and text and not text.startswith('`') and len(text) > 5:
-                    # First non-empty text is usually company name
-                    if 'S.R.L.' in text or 'S.A.' in text or 'I.I.' in text:
-                        company_name = text
-                elif 'mun.' in text or 'str.' in text.lower():
-                    address = text
-
-            # Extract items
-            items = []
-            total_amount = 0.0
-            currency = "MDL"
-            pending_item = None
-
-            # Find all product lines
-            item_divs = soup.find_all('div', class_='flex justify-between items-center')
-
-            for div in item_divs:
-                spans = div.find_all('span')
-                if len(spans) != 2:
-                    continue
-
-                raw_name = spans[0].get_text(strip=True)
-                raw_value = spans[1].get_text(strip=True)
-                name_text = re.sub(r'^\s*\d+[A-Za-z]*[-\s]+', '', raw_name).strip() or raw_name.strip()
-                value_text = raw_value.replace('\xa0', ' ').strip()
-
-                # Product line with quantity x price
-                if 'x' in value_text and name_text and not name_text.upper().startswith('TVA'):
-                    qty_price = self._parse_quantity_price(value_text)
-                    if qty_price:
-                        qty, price = qty_price
-                        pending_item = {
-                            "name": name_text,
-                            "qty": qty,
-                            "price": price
-                        }
-                    continue
-
-                # Some receipts show line totals right after the product line
-                if pending_item and not name_text and value_text:
-                    total_value, detected_currency = self._parse_amount(value_text)
-                    if total_value is not None:
-                        pending_item["total"] = total_value
-                        if detected_currency:
-                            currency = detected_currency
-                        items.append(pending_item)
-                        pending_item = None
-                    continue
-
-                # Fallback if no separate total line exists
-                if pending_item and name_text:
-                    items.append(pending_item)
-                    pending_item = None
-
-                # Extract overall total
-                if name_text.upper() == 'TOTAL':
-                    total_value, detected_currency = self._parse_amount(value_text or name_text)
-                    if total_value is not None:
-                        total_amount = total_value
-                    if detected_currency:
-                        currency = detected_currency
-
-            if pending_item:
-                items.append(pending_item)
-
-            # Extract date and time
-            purchase_date = None
-            purchase_time = None
-
-            for div in item_divs:
-                spans = div.find_all('span')
-                if len(spans) == 2:
-                    name_text = spans[0].get_text(strip=True)
-                    value_text = spans[1].get_text(strip=True)
-
-                    if 'DATA' in name_text:
-                        # Parse date like "DATA 11.02.2025"
-                        date_match = re.search(r'(\d{2}\.\d{2}\.\d{4})', name_text)
-                        if date_match:
-                            date_str = date_match.group(1)
-                            try:
-                                purchase_date = datetime.strptime(date_str, '%d.%m.%Y').strftime('%Y-%m-%d')
-                            except:
-                                pass
-
-                    if 'ORA' in name_text or 'ORA' in value_text:
-                        # Extract time
-                        time_match = re.search(r'(\d{2}:\d{2}:\d{2})', value_text)
-                        if time_match:
-                            purchase_time = time_match.group(1)
-
-            # Determine category based on items
-            category = self._determine_category(items, company_name)
-
-            # Build result
-            result = {
-                "amount": total_amount,
-                "currency": currency,
-                "vendor": company_name or "Unknown",
-                "purchase_date": purchase_date or datetime.now().strftime('%Y-%m-%d'),
-                "category": category,
-                "items": items,
-                "notes": f"Bon fiscal {registration_number}" if registration_number else "Bon fiscal",
-                "language": "ro",
-                "confidence": 1.0,  # Perfect confidence - official government data!
-                "fiscal_code": fiscal_code,
-                "registration_number": registration_number,
-                "address": address
-            }
+            response_text = await self._fetch(candidates, headers)
 
-            logger.info(f"Successfully parsed SFS receipt: {company_name} - {total_amount} MDL")
+            result = self.parse_html(response_text)
+            logger.info(f"Successfully parsed SFS receipt: {result['vendor']} - {result['amount']} MDL")
             return result
 
         except Exception as e:
             logger.error(f"Error parsing SFS receipt: {str(e)}", exc_info=True)
             raise
 
+    def parse_html(self, html: str) -> dict:
+        """
+        Parse a receipt page into expense data.
+
+        Company lines and receipt lines come from the HTML backend; items,
+        total, currency and date are read in a single pass over the lines.
+        """
+        page = self.html_backend.scan(html)
+
+        # Extract company info
+        company_name = None
+        fiscal_code = None
+        address = None
+        registration_number = None
+
+        for text in page.company_lines:
+            if 'COD FISCAL' in text:
+                fiscal_code = text.replace('COD FISCAL:', '').strip()
+            elif 'NUMARUL DE ÎNREGISTRARE' in text or 'NUMĂRUL DE ÎNREGISTRARE' in text:
+                registration_number = text.split(':')[-1].strip()
+            elif not company_name and text and not text.startswith('`') and len(text) > 5:
+                # First non-empty text is usually company name
+                if 'S.R.L.' in text or 'S.A.' in text or 'I.I.' in text:
+                    company_name = text
+            elif 'mun.' in text or 'str.' in text.lower():
+                address = text
+
+        # Extract items, total and date
+        items = []
+        total_amount = 0.0
+        currency = "MDL"
+        pending_item = None
+        purchase_date = None
+
+        for raw_name, raw_value in page.rows:
+            if 'DATA' in raw_name:
+                # Parse date like "DATA 11.02.2025"
+                date_match = _DATE_PATTERN.search(raw_name)
+                if date_match:
+                    try:
+                        purchase_date = datetime.strptime(date_match.group(1), '%d.%m.%Y').strftime('%Y-%m-%d')
+                    except ValueError:
+                        pass
+
+            name_text = _LINE_NUMBER_PATTERN.sub('', raw_name).strip() or raw_name.strip()
+            value_text = raw_value.replace('\xa0', ' ').strip()
+
+            # Product line with quantity x price
+            if 'x' in value_text and name_text and not name_text.upper().startswith('TVA'):
+                qty_price = self._parse_quantity_price(value_text)
+                if qty_price:
+                    qty, price = qty_price
+                    if pending_item:
+                        # Previous product had no separate total line
+                        items.append(pending_item)
+                    pending_item = {
+                        "name": name_text,
+                        "qty": qty,
+                        "price": price
+                    }
+                continue
+
+            # Some receipts show line totals right after the product line
+            if pending_item and not name_text and value_text:
+                total_value, detected_currency = self._parse_amount(value_text)
+                if total_value is not None:
+                    pending_item["total"] = total_value
+                    if detected_currency:
+                        currency = detected_currency
+                    items.append(pending_item)
+                    pending_item = None
+                continue
+
+            # Fallback if no separate total line exists
+            if pending_item and name_text:
+                items.append(pending_item)
+                pending_item = None
+
+            # Extract overall total
+            if name_text.upper() == 'TOTAL':
+                total_value, detected_currency = self._parse_amount(value_text or name_text)
+                if total_value is not None:
+                    total_amount = total_value
+                if detected_currency:
+                    currency = detected_currency
+
+        if pending_item:
+            items.append(pending_item)
+
+        # Determine category based on items
+        category = self._determine_category(items, company_name)
+
+        # Build result
+        result = {
+            "amount": total_amount,
+            "currency": currency,
+            "vendor": company_name or "Unknown",
+            "purchase_date": purchase_date or datetime.now().strftime('%Y-%m-%d'),
+            "category": category,
+            "items": items,
+            "notes": f"Bon fiscal {registration_number}" if registration_number else "Bon fiscal",
+            "language": "ro",
+            "confidence": 1.0,  # Perfect confidence - official government data!
+            "fiscal_code": fiscal_code,
+            "registration_number": registration_number,
+            "address": address
+        }
+
+        return result
+
     def _clean_number(self, value: str) -> float | None:
         if not value:
             return None
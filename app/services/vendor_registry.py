@@ -0,0 +1,101 @@
+"""
+Vendor registry keyed by fiscal code
+
+Every SFS receipt names its merchant by fiscal code. The first confirmed
+receipt registers the vendor (name, address, registration number); later ones
+bump its usage count and the count of the category it was confirmed under, so
+the most frequent category becomes the vendor's default. The registry is shared
+by all users, so only the built-in categories (app.utils.categories) are
+counted: a user's own category names never reach other users' receipts.
+Lookups are primary key reads, so scraping and confirmation stay O(1) per receipt.
+"""
+import logging
+from typing import Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.database import statement_savepoint
+from app.models.vendor import Vendor
+from app.utils.categories import CATEGORY_KEYWORDS
+
+logger = logging.getLogger(__name__)
+
+# Categories every user has; the only ones a vendor's default is learned from
+SHARED_CATEGORIES = frozenset(CATEGORY_KEYWORDS)
+
+
+def get_vendor(db: Session, fiscal_code: Optional[str]) -> Optional[Vendor]:
+    """Vendor by fiscal code (identity map first, then the primary key index)."""
+    if not fiscal_code:
+        return None
+    return db.get(Vendor, fiscal_code)
+
+
+def apply_known_vendor(db: Session, parsed_data: dict) -> dict:
+    """
+    Fill a parsed receipt from the registry: canonical name, address and the
+    learned default category replace what was derived from the page.
+    """
+    vendor = get_vendor(db, parsed_data.get("fiscal_code"))
+    if vendor is None:
+        return parsed_data
+
+    if vendor.name:
+        parsed_data["vendor"] = vendor.name
+    if vendor.address and not parsed_data.get("address"):
+        parsed_data["address"] = vendor.address
+    if vendor.default_category in SHARED_CATEGORIES:
+        parsed_data["category"] = vendor.default_category
+    return parsed_data
+
+
+def record_receipt(db: Session, parsed_data: dict) -> Optional[Vendor]:
+    """
+    Register or update the vendor of a confirmed receipt.
+    Does not commit; the caller commits together with the expense.
+    """
+    fiscal_code = parsed_data.get("fiscal_code")
+    if not fiscal_code:
+        return None
+
+    vendor = get_vendor(db, fiscal_code)
+    if vendor is None:
+        vendor = _insert_vendor(db, fiscal_code)
+
+    name = parsed_data.get("vendor")
+    if name and name != "Unknown":
+        vendor.name = name
+    if parsed_data.get("address"):
+        vendor.address = parsed_data["address"]
+    if parsed_data.get("registration_number"):
+        vendor.registration_number = parsed_data["registration_number"]
+
+    vendor.usage_count = (vendor.usage_count or 0) + 1
+    category = parsed_data.get("category")
+    if category in SHARED_CATEGORIES:
+        # Reassign so the JSON column is flagged as changed; names counted
+        # before custom categories were excluded are dropped here
+        counts = {name: count for name, count in (vendor.category_counts or {}).items() if name in SHARED_CATEGORIES}
+        counts[category] = counts.get(category, 0) + 1
+        vendor.category_counts = counts
+        vendor.default_category = max(counts, key=counts.get)
+
+    return vendor
+
+
+def _insert_vendor(db: Session, fiscal_code: str) -> Vendor:
+    """
+    Add an empty vendor row right away, in a savepoint: if a concurrent
+    confirmation or import stored the same fiscal code first, its row is used
+    and the caller's transaction goes on.
+    """
+    connection = db.connection()
+    try:
+        with statement_savepoint(connection):
+            connection.execute(insert(Vendor.__table__).values(fiscal_code=fiscal_code, usage_count=0, category_counts={}))
+    except IntegrityError:
+        logger.info(f"Vendor {fiscal_code} was registered concurrently, updating it")
+    # Either row is now visible to get_vendor for the rest of the transaction
+    return db.get(Vendor, fiscal_code)
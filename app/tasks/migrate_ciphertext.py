@@ -0,0 +1,147 @@
+"""
+Online migration of encrypted expense payloads to binary
+
+Moves expenses.json_data (base64 ciphertext stored as a JSON string) to
+expenses.json_data_bin (format byte + nonce + ciphertext). Nothing is
+decrypted: the ciphertext stays the same, only its encoding changes.
+
+Rows are walked by primary key (keyset pagination) in small batches, each in
+its own short transaction, with an optional pause between batches. A row is
+only converted while json_data_bin is still empty, so writes made by the
+running app are never overwritten. The job can be stopped at any time and
+started again; converted rows are no longer selected.
+
+    python -m app.tasks.migrate_ciphertext --batch-size 500 --pause 0.05
+"""
+import argparse
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import bindparam, null, select, update
+from sqlalchemy.orm import Session
+
+from app.models.expense import Expense
+from app.utils.crypto import crypto_service
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MigrationReport:
+    migrated: int = 0
+    skipped: int = 0  # Rewritten by the app while the batch was being converted
+    failed: list[str] = field(default_factory=list)
+    text_bytes: int = 0
+    binary_bytes: int = 0
+    elapsed_s: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "migrated": self.migrated,
+            "skipped": self.skipped,
+            "failed": len(self.failed),
+            "failed_ids": self.failed[:20],
+            "text_bytes": self.text_bytes,
+            "binary_bytes": self.binary_bytes,
+            "size_ratio": round(self.binary_bytes / self.text_bytes, 3) if self.text_bytes else None,
+            "elapsed_s": round(self.elapsed_s, 2),
+        }
+
+
+def migrate_json_data(
+    db: Session,
+    batch_size: int = 500,
+    pause_seconds: float = 0.0,
+    verify: bool = False,
+) -> MigrationReport:
+    """
+    Convert every legacy json_data value to json_data_bin.
+
+    Args:
+        db: Session used for one transaction per batch
+        batch_size: Rows read and updated per transaction
+        pause_seconds: Sleep between batches to leave room for the app
+        verify: Decrypt each converted value before writing it
+
+    Returns:
+        Counts and the storage size of the converted values before and after
+    """
+    table = Expense.__table__
+    report = MigrationReport()
+    started = time.perf_counter()
+    last_id = ""
+
+    while True:
+        rows = db.execute(
+            select(table.c.id, table.c.json_data)
+            .where(
+                table.c.id > last_id,
+                table.c.json_data.isnot(None),
+                table.c.json_data_bin.is_(None),
+            )
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        params = []
+        for row in rows:
+            if not isinstance(row.json_data, str):
+                continue
+            try:
+                binary = crypto_service.legacy_to_binary(row.json_data)
+                if verify:
+                    crypto_service.decrypt_data(binary)
+            except ValueError as e:
+                logger.warning(f"Expense {row.id} keeps its text json_data: {str(e)}")
+                report.failed.append(row.id)
+                continue
+            params.append({"expense_id": row.id, "binary": binary})
+            report.text_bytes += len(json.dumps(row.json_data))
+            report.binary_bytes += len(binary)
+
+        if params:
+            result = db.execute(
+                update(table)
+                .where(table.c.id == bindparam("expense_id"), table.c.json_data_bin.is_(None))
+                .values(json_data_bin=bindparam("binary"), json_data=null()),
+                params,
+            )
+            converted = result.rowcount if result.rowcount >= 0 else len(params)
+            report.migrated += converted
+            report.skipped += len(params) - converted
+        db.commit()
+        logger.info(f"Converted {report.migrated} expense payloads (last id {last_id})")
+
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+    report.elapsed_s = time.perf_counter() - started
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert encrypted expense payloads from base64 text to binary")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.05, help="Seconds to sleep between batches")
+    parser.add_argument("--verify", action="store_true", help="Decrypt every converted value before writing it")
+    args = parser.parse_args()
+
+    from app.models.database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        report = migrate_json_data(db, args.batch_size, args.pause, args.verify)
+    finally:
+        db.close()
+
+    print(json.dumps(report.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
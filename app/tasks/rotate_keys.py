@@ -0,0 +1,282 @@
+"""
+Online rotation of expense encryption keys
+
+Two steps, both in small batches with one short transaction each:
+
+1. Re-wrap: data keys wrapped by a previous master key (ENCRYPTION_PREVIOUS_KEYS)
+   are wrapped again by the current ENCRYPTION_KEY. Only the keys table is
+   written, so rotating the master key costs one update per user.
+2. Re-encrypt: expenses are walked by primary key (keyset pagination) and every
+   vendor / json_data value not encrypted with its owner's active data key is
+   decrypted and encrypted again with it. Values still encrypted with the master
+   key, and payloads still in the legacy text column, are moved to data keys
+   the same way. With --new-keys, every user first gets a fresh data key.
+
+A row is only written if it was not updated since it was read (updated_at is
+compared and kept), so writes made by the running app are never overwritten;
+rows skipped that way are picked up by the next run. Values already on the
+active key are not decrypted, so running the job again only does the
+remaining work. With --progress the position is saved after every batch and
+a stopped run continues where it was; the file is removed once the run completes.
+
+    python -m app.tasks.rotate_keys --batch-size 500 --pause 0.05 --progress rotation.json
+    python -m app.tasks.rotate_keys --new-keys --progress rotation.json
+
+Processes of the app keep using a user's previous key for up to
+CRYPTO_DATA_KEY_CACHE_SECONDS after --new-keys; run the job again after that.
+"""
+import argparse
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import bindparam, null, select, update
+from sqlalchemy.orm import Session
+
+from app.models.data_key import DataKey, data_keys
+from app.models.encrypted import LazyDecrypted, decrypt_all
+from app.models.expense import Expense
+from app.utils.crypto import crypto_service
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RotationReport:
+    rewrapped_keys: int = 0
+    retired_keys: int = 0
+    rotated: int = 0  # Rows re-encrypted
+    current: int = 0  # Rows already on their owner's active key
+    skipped: int = 0  # Updated by the app while the batch was being re-encrypted
+    failed: list[str] = field(default_factory=list)
+    elapsed_s: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "rewrapped_keys": self.rewrapped_keys,
+            "retired_keys": self.retired_keys,
+            "rotated": self.rotated,
+            "current": self.current,
+            "skipped": self.skipped,
+            "failed": len(self.failed),
+            "failed_ids": self.failed[:20],
+            "elapsed_s": round(self.elapsed_s, 2),
+            "rows_per_second": round((self.rotated + self.current) / self.elapsed_s, 1) if self.elapsed_s else None,
+        }
+
+
+class RotationProgress:
+    """Start time and last expense id of a rotation, persisted as JSON"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self.started_at = datetime.utcnow()
+        self.last_id = ""
+        if self.path and self.path.exists():
+            saved = json.loads(self.path.read_text(encoding="utf-8"))
+            self.started_at = datetime.fromisoformat(saved["started_at"])
+            self.last_id = saved.get("last_id", "")
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        temp_path.write_text(
+            json.dumps({"started_at": self.started_at.isoformat(), "last_id": self.last_id}),
+            encoding="utf-8",
+        )
+        temp_path.replace(self.path)
+
+
+def rewrap_data_keys(db: Session, batch_size: int = 500) -> int:
+    """Wrap every data key with the current master key; returns the number of keys changed."""
+    rewrapped = 0
+    last_id = 0
+    while True:
+        keys = db.execute(
+            select(DataKey.id, DataKey.master_key_id, DataKey.wrapped_key)
+            .where(DataKey.id > last_id, DataKey.master_key_id != crypto_service.master_key_id)
+            .order_by(DataKey.id)
+            .limit(batch_size)
+        ).all()
+        if not keys:
+            return rewrapped
+        last_id = keys[-1].id
+
+        params = []
+        for key in keys:
+            unwrapped = crypto_service.unwrap_data_key(key.id, bytes(key.wrapped_key), key.master_key_id)
+            params.append({
+                "key_id": key.id,
+                "old_master_key_id": key.master_key_id,
+                "wrapped": crypto_service.wrap_data_key(key.id, unwrapped),
+            })
+        result = db.execute(
+            update(DataKey.__table__)
+            .where(DataKey.id == bindparam("key_id"), DataKey.master_key_id == bindparam("old_master_key_id"))
+            .values(wrapped_key=bindparam("wrapped"), master_key_id=crypto_service.master_key_id),
+            params,
+        )
+        db.commit()
+        rewrapped += result.rowcount if result.rowcount >= 0 else len(params)
+
+
+def retire_data_keys(db: Session, created_before: datetime) -> int:
+    """Stop using the keys created before the rotation started; returns the number retired."""
+    result = db.execute(
+        update(DataKey.__table__)
+        .where(DataKey.retired_at.is_(None), DataKey.created_at < created_before)
+        .values(retired_at=datetime.utcnow())
+    )
+    db.commit()
+    data_keys.forget()
+    # Plaintexts decrypted with the retired keys are not kept around either
+    crypto_service.cache.clear()
+    return result.rowcount
+
+
+def rotate_keys(
+    db: Session,
+    batch_size: int = 500,
+    pause_seconds: float = 0.0,
+    new_keys: bool = False,
+    progress_path: Optional[str] = None,
+) -> RotationReport:
+    """
+    Re-wrap data keys and re-encrypt every expense with its owner's active data key.
+
+    Args:
+        db: Session used for one transaction per batch
+        batch_size: Rows read and updated per transaction
+        pause_seconds: Sleep between batches to leave room for the app
+        new_keys: Give every user a new data key and move all rows to it
+        progress_path: File the position is saved to after every batch, read on start
+
+    Returns:
+        Counts of keys and rows changed
+    """
+    table = Expense.__table__
+    report = RotationReport()
+    progress = RotationProgress(progress_path)
+    started = time.perf_counter()
+
+    report.rewrapped_keys = rewrap_data_keys(db, batch_size)
+    if new_keys:
+        report.retired_keys = retire_data_keys(db, progress.started_at)
+    progress.save()
+
+    while True:
+        rows = db.execute(
+            select(
+                table.c.id,
+                table.c.owner_user_id,
+                table.c.vendor,
+                table.c.json_data,
+                table.c.json_data_bin,
+                table.c.updated_at,
+            )
+            .where(table.c.id > progress.last_id)
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        # Values not on the owner's active key, read as raw text (no JSON parsing)
+        stale = []
+        for row in rows:
+            key_id = data_keys.active_key_id(db, row.owner_user_id)
+            payload = row.json_data_bin
+            if payload is None and isinstance(row.json_data, str):
+                payload = row.json_data
+            values = {
+                name: LazyDecrypted(value.ciphertext if isinstance(value, LazyDecrypted) else value)
+                for name, value in (("vendor", row.vendor), ("json_data", payload))
+                if value is not None
+            }
+            on_key = all(crypto_service.data_key_id(value.ciphertext) == key_id for value in values.values())
+            if on_key and row.json_data is None:
+                report.current += 1
+                continue
+            stale.append((row, key_id, values))
+        decrypt_all(value for _, _, values in stale for value in values.values())
+
+        params = []
+        for row, key_id, values in stale:
+            if any(value.get() is None for value in values.values()):
+                logger.warning(f"Expense {row.id} does not decrypt, left as is")
+                report.failed.append(row.id)
+                continue
+            vendor = values.get("vendor")
+            payload = values.get("json_data")
+            params.append({
+                "expense_id": row.id,
+                "old_updated_at": row.updated_at,
+                "new_vendor": LazyDecrypted(crypto_service.encrypt_data(vendor.value, key_id)) if vendor else None,
+                "new_json_data": crypto_service.encrypt_bytes(payload.value, key_id) if payload else None,
+            })
+
+        if params:
+            result = db.execute(
+                update(table)
+                .where(
+                    table.c.id == bindparam("expense_id"),
+                    table.c.updated_at.is_not_distinct_from(bindparam("old_updated_at")),
+                )
+                .values(
+                    vendor=bindparam("new_vendor"),
+                    json_data_bin=bindparam("new_json_data"),
+                    json_data=null(),
+                    updated_at=bindparam("old_updated_at"),
+                ),
+                params,
+            )
+            rotated = result.rowcount if result.rowcount >= 0 else len(params)
+            report.rotated += rotated
+            report.skipped += len(params) - rotated
+        # Also stores the data keys created for users met in this batch
+        db.commit()
+
+        progress.last_id = rows[-1].id
+        progress.save()
+        logger.info(f"Re-encrypted {report.rotated} expenses (last id {progress.last_id})")
+
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+    if progress.path:
+        progress.path.unlink(missing_ok=True)
+    report.elapsed_s = time.perf_counter() - started
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-wrap data keys and re-encrypt expenses with per-user data keys")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.05, help="Seconds to sleep between batches")
+    parser.add_argument("--new-keys", action="store_true", help="Give every user a new data key first")
+    parser.add_argument("--progress", default=None, help="Progress file, to continue a stopped run")
+    args = parser.parse_args()
+
+    from app.models.database import SessionLocal
+    from app.utils.config import settings
+
+    logging.basicConfig(level=logging.INFO)
+    # Every value is read once; keep plaintext out of the cache
+    settings.CRYPTO_CACHE_ENABLED = False
+    db = SessionLocal()
+    try:
+        report = rotate_keys(db, args.batch_size, args.pause, args.new_keys, args.progress)
+    finally:
+        db.close()
+
+    print(json.dumps(report.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
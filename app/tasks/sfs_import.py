@@ -0,0 +1,396 @@
+"""
+Bulk import of old SFS receipts
+
+Takes a text file of SFS links or a zip of receipt photos and runs every
+receipt through decode (QR) -> scrape -> categorize, then inserts expenses in
+batches. A bounded number of receipts is in flight at once, and each SFS host
+gets its own concurrency limit and minimum spacing between requests.
+
+Progress is a small JSON file (receipt code -> expense id, plus the status
+and summary of the latest run, which the API serves while an upload is
+imported in the background). Running the same import again skips receipts
+already imported and retries the failed ones.
+
+    python -m app.tasks.sfs_import receipts.zip --user-id <USER_ID>
+    python -m app.tasks.sfs_import links.txt --progress links.progress.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+from sqlalchemy.orm import Session
+
+from app.models.category import Category
+from app.models.expense import Expense
+from app.services.sfs_scraper import sfs_scraper
+from app.services.vendor_registry import record_receipt
+from app.utils.config import settings
+from app.utils.qr_decoder import decode_qr_codes
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+_LINK_PATTERN = re.compile(r"(?:https?://)?[\w.-]*sfs\.md/\S+", re.IGNORECASE)
+
+
+@dataclass
+class ImportSource:
+    """One receipt to import: a link, or a photo whose QR holds the link"""
+    name: str
+    link: Optional[str] = None
+    image: Optional[bytes] = None
+
+
+@dataclass
+class ImportSummary:
+    total: int = 0
+    imported: int = 0
+    already_imported: int = 0
+    duplicates: int = 0
+    failed: list[dict] = field(default_factory=list)
+    elapsed_s: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "imported": self.imported,
+            "already_imported": self.already_imported,
+            "duplicates": self.duplicates,
+            "failed": len(self.failed),
+            "failures": self.failed,
+            "elapsed_s": round(self.elapsed_s, 2),
+            "receipts_per_s": round(self.imported / self.elapsed_s, 2) if self.elapsed_s else None,
+        }
+
+
+def _normalize_link(value: str) -> Optional[str]:
+    match = _LINK_PATTERN.search(value or "")
+    if not match:
+        return None
+    link = match.group(0).rstrip(".,;")
+    if not link.lower().startswith("http"):
+        link = f"https://{link.lstrip('/')}"
+    return link
+
+
+def read_links(text: str) -> list[ImportSource]:
+    """Every SFS link in a text file (one per line, other text is ignored)."""
+    sources = []
+    for number, line in enumerate(text.splitlines(), 1):
+        link = _normalize_link(line)
+        if link:
+            sources.append(ImportSource(name=f"line {number}", link=link))
+    return sources
+
+
+def read_zip(content: bytes) -> list[ImportSource]:
+    """Receipt photos and link files inside a zip archive."""
+    sources = []
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        for info in sorted(archive.infolist(), key=lambda entry: entry.filename):
+            if info.is_dir():
+                continue
+            suffix = Path(info.filename).suffix.lower()
+            if suffix in IMAGE_SUFFIXES:
+                sources.append(ImportSource(name=info.filename, image=archive.read(info)))
+            elif suffix == ".txt":
+                for source in read_links(archive.read(info).decode("utf-8", errors="ignore")):
+                    source.name = f"{info.filename}:{source.name}"
+                    sources.append(source)
+    return sources
+
+
+def read_sources(content: bytes) -> list[ImportSource]:
+    """Links file or zip of images, told apart by content."""
+    if zipfile.is_zipfile(io.BytesIO(content)):
+        return read_zip(content)
+    return read_links(content.decode("utf-8", errors="ignore"))
+
+
+def _decode_link(image: bytes) -> Optional[str]:
+    with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as temp_file:
+        temp_file.write(image)
+        temp_path = temp_file.name
+    try:
+        for value in decode_qr_codes(temp_path):
+            link = _normalize_link(value)
+            if link:
+                return link
+        return None
+    finally:
+        os.remove(temp_path)
+
+
+class ImportProgress:
+    """Receipt codes already imported and the state of the latest run, persisted as JSON"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self.done: dict[str, str] = {}
+        self.status = "pending"  # pending, running, completed or failed
+        self.summary: dict = {}
+        if self.path and self.path.exists():
+            saved = json.loads(self.path.read_text(encoding="utf-8"))
+            self.done = saved.get("done", {})
+            self.status = saved.get("status", self.status)
+            self.summary = saved.get("summary", {})
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        temp_path.write_text(
+            json.dumps({"status": self.status, "summary": self.summary, "done": self.done}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        temp_path.replace(self.path)
+
+
+class HostThrottle:
+    """Per-host concurrency limit and minimum interval between request starts"""
+
+    def __init__(self, max_concurrent: int, min_interval: float):
+        self.max_concurrent = max_concurrent
+        self.min_interval = min_interval
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._last_start: dict[str, float] = {}
+
+    async def acquire(self, host: str) -> None:
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.max_concurrent))
+        await semaphore.acquire()
+        async with self._locks.setdefault(host, asyncio.Lock()):
+            wait = self._last_start.get(host, 0.0) + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_start[host] = time.monotonic()
+
+    def release(self, host: str) -> None:
+        self._semaphores[host].release()
+
+
+def _match_category_id(categories: list[Category], name: Optional[str]) -> Optional[str]:
+    """Exact name, then containment either way, then "Alte cheltuieli"."""
+    lower = (name or "").lower()
+    for category in categories:
+        if category.name == name:
+            return category.id
+    for category in categories:
+        category_lower = category.name.lower()
+        if lower and (lower in category_lower or category_lower in lower):
+            return category.id
+    for category in categories:
+        if category.name.lower() == "alte cheltuieli":
+            return category.id
+    return None
+
+
+class SFSImporter:
+    """Imports SFS receipts for one user"""
+
+    def __init__(
+        self,
+        db: Session,
+        user_id: str,
+        progress: Optional[ImportProgress] = None,
+        concurrency: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        throttle: Optional[HostThrottle] = None,
+    ):
+        self.db = db
+        self.user_id = user_id
+        self.progress = progress or ImportProgress()
+        self.concurrency = concurrency or settings.SFS_IMPORT_CONCURRENCY
+        self.batch_size = batch_size or settings.SFS_IMPORT_BATCH_SIZE
+        self.throttle = throttle or HostThrottle(
+            settings.SFS_IMPORT_PER_HOST_CONCURRENCY,
+            settings.SFS_IMPORT_HOST_INTERVAL_SECONDS,
+        )
+        self.categories = db.query(Category).filter(Category.user_id == user_id).all()
+        self.summary = ImportSummary()
+        self._pending: list[tuple[str, dict]] = []
+        self._seen: set[str] = set()
+
+    async def run(self, sources: list[ImportSource]) -> ImportSummary:
+        started = time.perf_counter()
+        self.summary.total = len(sources)
+        self.progress.status = "running"
+        self.progress.summary = self.summary.as_dict()
+        self.progress.save()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(source: ImportSource):
+            async with semaphore:
+                try:
+                    await self._import(source)
+                except Exception as e:
+                    logger.warning(f"SFS import of {source.name} failed: {str(e)}")
+                    self.summary.failed.append({"source": source.name, "error": str(e) or type(e).__name__})
+
+        await asyncio.gather(*(one(source) for source in sources))
+        self._flush()
+        self.summary.elapsed_s = time.perf_counter() - started
+        self.progress.status = "completed"
+        self.progress.summary = self.summary.as_dict()
+        self.progress.save()
+        return self.summary
+
+    async def _import(self, source: ImportSource) -> None:
+        link = source.link
+        if link is None and source.image is not None:
+            link = await asyncio.to_thread(_decode_link, source.image)
+        if not link:
+            raise ValueError("Nu am găsit un cod QR SFS")
+
+        code = sfs_scraper.receipt_code(link)
+        if not code:
+            raise ValueError(f"Link SFS invalid: {link}")
+        if code in self.progress.done:
+            self.summary.already_imported += 1
+            return
+        if code in self._seen:
+            self.summary.duplicates += 1
+            return
+        self._seen.add(code)
+
+        host = urlparse(link).hostname or ""
+        await self.throttle.acquire(host)
+        try:
+            parsed_data = await sfs_scraper.parse_qr_url(link, self.db)
+        finally:
+            self.throttle.release(host)
+
+        self._pending.append((code, parsed_data))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+
+    def _build_expense(self, parsed_data: dict) -> Expense:
+        purchase_date = None
+        if parsed_data.get("purchase_date"):
+            try:
+                purchase_date = datetime.strptime(parsed_data["purchase_date"], "%Y-%m-%d").date()
+            except ValueError:
+                pass
+
+        expense = Expense(
+            owner_user_id=self.user_id,
+            source="import",
+            amount=parsed_data.get("amount"),
+            currency=parsed_data.get("currency", "MDL"),
+            vendor=parsed_data.get("vendor") or None,
+            purchase_date=purchase_date,
+            category_id=_match_category_id(self.categories, parsed_data.get("category")),
+            json_data=parsed_data,
+            ai_confidence=parsed_data.get("confidence"),
+            vendor_fiscal_code=parsed_data.get("fiscal_code"),
+            vendor_registration_number=parsed_data.get("registration_number"),
+            vendor_address=parsed_data.get("address"),
+        )
+        return expense
+
+    def _flush(self) -> None:
+        """
+        Commit the pending batch, then record it as done. If the commit fails
+        the batch is rolled back and its receipts are reported as failed, so
+        the next run of the same import retries them.
+        """
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        # Added only now, so a batch is stored or dropped as a whole
+        expenses = []
+        try:
+            for code, parsed_data in pending:
+                expense = self._build_expense(parsed_data)
+                self.db.add(expense)
+                record_receipt(self.db, parsed_data)
+                expenses.append((code, expense))
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"SFS import batch of {len(pending)} receipts not stored: {str(e)}")
+            error = f"Salvarea a eșuat: {str(e) or type(e).__name__}"
+            self.summary.failed.extend({"source": code, "error": error} for code, _ in pending)
+        else:
+            for code, expense in expenses:
+                self.progress.done[code] = expense.id
+            self.summary.imported += len(pending)
+        self.progress.summary = self.summary.as_dict()
+        self.progress.save()
+
+
+async def import_receipts(
+    db: Session,
+    user_id: str,
+    content: bytes,
+    progress_path: Optional[str] = None,
+) -> dict:
+    """Import a links file or zip of photos and return the summary."""
+    sources = read_sources(content)
+    importer = SFSImporter(db, user_id, ImportProgress(progress_path))
+    summary = await importer.run(sources)
+    return summary.as_dict()
+
+
+async def run_import_job(user_id: str, sources: list[ImportSource], progress_path: str) -> None:
+    """
+    Import in the background with a session of its own (the API answers before
+    the import ends); status and summary are written to the progress file.
+    """
+    from app.models.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        await SFSImporter(db, user_id, ImportProgress(progress_path)).run(sources)
+    except Exception as e:
+        logger.error(f"SFS import job {progress_path} failed: {str(e)}", exc_info=True)
+        progress = ImportProgress(progress_path)
+        progress.status = "failed"
+        progress.summary = {**progress.summary, "error": str(e) or type(e).__name__}
+        progress.save()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import SFS receipts from a links file or a zip of photos")
+    parser.add_argument("path", help="Text file with SFS links or zip of receipt photos")
+    parser.add_argument("--user-id", default=None, help="Owner of the expenses (default: DEFAULT_USER_ID or first user)")
+    parser.add_argument("--progress", default=None, help="Progress file (default: <path>.progress.json)")
+    args = parser.parse_args()
+
+    from app.models.database import SessionLocal
+    from app.utils.user_context import get_active_user_id
+
+    logging.basicConfig(level=logging.INFO)
+    content = Path(args.path).read_bytes()
+    db = SessionLocal()
+    try:
+        user_id = args.user_id or get_active_user_id(db)
+        report = asyncio.run(import_receipts(
+            db,
+            user_id,
+            content,
+            args.progress or f"{args.path}.progress.json",
+        ))
+    finally:
+        db.close()
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Voice note preprocessing before upload to the Groq speech model
+
+Decodes the note with ffmpeg, trims leading/trailing silence, splits long
+notes at pauses and re-encodes every chunk as Opus, so less audio is uploaded
+and long notes are transcribed in parallel.
+"""
+import logging
+import shutil
+import subprocess
+import time
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+# 20ms analysis frames
+_FRAME_SAMPLES = SAMPLE_RATE // 50
+_FRAME_SECONDS = _FRAME_SAMPLES / SAMPLE_RATE
+# Speech kept around every voiced segment so words are not clipped
+_PADDING_SECONDS = 0.2
+# Pauses shorter than this do not separate segments
+_MIN_GAP_SECONDS = 0.3
+# A stuck or very slow ffmpeg run is killed after this long
+_FFMPEG_TIMEOUT_SECONDS = 30.0
+
+
+class SilentAudioError(ValueError):
+    """Raised when a voice note contains no usable speech"""
+
+
+def _decode_pcm(file_path: str) -> np.ndarray:
+    """Decode any audio file to 16kHz mono int16 samples."""
+    result = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", file_path, "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"],
+        capture_output=True,
+        check=True,
+        timeout=_FFMPEG_TIMEOUT_SECONDS,
+    )
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+
+def _encode_opus(samples: np.ndarray, bitrate: str = "24k") -> bytes:
+    """Encode int16 mono samples as an Ogg/Opus file."""
+    result = subprocess.run(
+        [
+            "ffmpeg", "-v", "error",
+            "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-i", "-",
+            "-c:a", "libopus", "-b:a", bitrate, "-f", "ogg", "-",
+        ],
+        input=samples.tobytes(),
+        capture_output=True,
+        check=True,
+        timeout=_FFMPEG_TIMEOUT_SECONDS,
+    )
+    return result.stdout
+
+
+def _frame_levels(samples: np.ndarray) -> np.ndarray:
+    """RMS level of every 20ms frame in dBFS."""
+    frame_count = len(samples) // _FRAME_SAMPLES
+    if frame_count == 0:
+        return np.zeros(0)
+    frames = samples[:frame_count * _FRAME_SAMPLES].astype(np.float32).reshape(frame_count, _FRAME_SAMPLES)
+    rms = np.sqrt(np.mean(np.square(frames / 32768.0), axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def find_speech_segments(levels: np.ndarray, silence_db: float) -> list[tuple[int, int]]:
+    """
+    Group voiced frames into segments.
+
+    Returns:
+        List of (start_frame, end_frame) pairs, end exclusive, pauses shorter
+        than _MIN_GAP_SECONDS merged
+    """
+    voiced = np.flatnonzero(levels > silence_db)
+    if len(voiced) == 0:
+        return []
+
+    max_gap = int(_MIN_GAP_SECONDS / _FRAME_SECONDS)
+    segments = []
+    start = previous = int(voiced[0])
+    for frame in voiced[1:]:
+        frame = int(frame)
+        if frame - previous > max_gap:
+            segments.append((start, previous + 1))
+            start = frame
+        previous = frame
+    segments.append((start, previous + 1))
+    return segments
+
+
+def _plan_chunks(segments: list[tuple[int, int]], max_chunk_frames: int) -> list[tuple[int, int]]:
+    """Pack consecutive segments into chunks, cutting in the pauses between them."""
+    chunks = []
+    chunk_start, chunk_end = segments[0]
+    for start, end in segments[1:]:
+        if end - chunk_start <= max_chunk_frames:
+            chunk_end = end
+            continue
+        chunks.append((chunk_start, chunk_end))
+        chunk_start, chunk_end = start, end
+    chunks.append((chunk_start, chunk_end))
+
+    # Speech without any pause longer than a chunk is split hard
+    planned = []
+    for start, end in chunks:
+        while end - start > max_chunk_frames:
+            planned.append((start, start + max_chunk_frames))
+            start += max_chunk_frames
+        planned.append((start, end))
+    return planned
+
+
+def _padded_bounds(plan: list[tuple[int, int]], padding: int, total_frames: int) -> list[tuple[int, int]]:
+    """
+    Extend every chunk by `padding` frames on both sides without overlapping
+    its neighbours: a pause between two chunks is shared at its middle, and
+    hard splits get no padding at the cut, so no word is transcribed twice.
+    """
+    bounds = []
+    for index, (start, end) in enumerate(plan):
+        first = max(0, start - padding)
+        last = min(total_frames, end + padding)
+        if index > 0:
+            first = max(first, (plan[index - 1][1] + start) // 2)
+        if index < len(plan) - 1:
+            last = min(last, (end + plan[index + 1][0]) // 2)
+        bounds.append((first, last))
+    return bounds
+
+
+def prepare_voice_chunks(
+    file_path: str,
+    silence_db: float = -40.0,
+    min_speech_seconds: float = 0.3,
+    max_chunk_seconds: float = 30.0,
+) -> Optional[list[bytes]]:
+    """
+    Trim silence from a voice note and split it into chunks for transcription.
+
+    Args:
+        file_path: Path to the original voice note
+        silence_db: Frames quieter than this (dBFS) count as silence
+        min_speech_seconds: Notes with less voiced audio are rejected
+        max_chunk_seconds: Longest chunk sent in one transcription request
+
+    Returns:
+        Ogg/Opus encoded chunks in playback order, or None when ffmpeg is not
+        available, cannot decode the file or times out (upload the original instead)
+
+    Raises:
+        SilentAudioError: if the note is empty or near-silent
+    """
+    if shutil.which("ffmpeg") is None:
+        logger.warning("Voice preprocessing skipped, ffmpeg is not installed")
+        return None
+
+    started = time.perf_counter()
+    try:
+        samples = _decode_pcm(file_path)
+    except subprocess.CalledProcessError as e:
+        logger.warning(f"Voice preprocessing skipped, cannot decode {file_path}: {e.stderr.decode(errors='ignore')}")
+        return None
+    except subprocess.TimeoutExpired:
+        logger.warning(f"Voice preprocessing skipped, decoding {file_path} took over {_FFMPEG_TIMEOUT_SECONDS:.0f}s")
+        return None
+
+    levels = _frame_levels(samples)
+    segments = find_speech_segments(levels, silence_db)
+    voiced_seconds = sum(end - start for start, end in segments) * _FRAME_SECONDS
+    if voiced_seconds < min_speech_seconds:
+        raise SilentAudioError(f"Voice note has no speech ({voiced_seconds:.1f}s above {silence_db} dBFS)")
+
+    padding = int(_PADDING_SECONDS / _FRAME_SECONDS)
+    max_chunk_frames = max(1, int(max_chunk_seconds / _FRAME_SECONDS))
+    plan = _plan_chunks(segments, max_chunk_frames)
+    chunks = []
+    try:
+        for first, last in _padded_bounds(plan, padding, len(levels)):
+            chunks.append(_encode_opus(samples[first * _FRAME_SAMPLES:last * _FRAME_SAMPLES]))
+    except subprocess.CalledProcessError as e:
+        logger.warning(f"Voice preprocessing skipped, cannot encode chunks: {e.stderr.decode(errors='ignore')}")
+        return None
+    except subprocess.TimeoutExpired:
+        logger.warning(f"Voice preprocessing skipped, encoding a chunk took over {_FFMPEG_TIMEOUT_SECONDS:.0f}s")
+        return None
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    kept_seconds = sum(end - start for start, end in plan) * _FRAME_SECONDS
+    logger.info(
+        f"Voice preprocessed in {elapsed_ms:.0f}ms: {len(samples) / SAMPLE_RATE:.1f}s -> {kept_seconds:.1f}s "
+        f"in {len(chunks)} chunk(s), {sum(len(chunk) for chunk in chunks)} bytes"
+    )
+    return chunks
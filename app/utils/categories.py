@@ -0,0 +1,141 @@
+"""
+Shared category keyword tables used by the bot, the API and the local parsers
+"""
+
+CATEGORY_KEYWORDS = {
+    "Mâncare & Restaurante": [
+        "lapte", "pui", "carne", "banan", "morcov", "ceapa", "ulei", "oua",
+        "iaurt", "smantana", "fruct", "legum", "cafea", "paine", "covrig",
+        "branza", "lavas", "drojdie", "cartofi", "pere", "mere", "dorada",
+        "usturoi", "radacina", "patrunjel", "marar", "cotlet", "bors", "apio",
+        "piept", "smântână", "covrigei", "lavas", "petrunjel", "chifla",
+        "gambe", "crema", "frisca", "lapte", "laptele", "salată", "legume"
+    ],
+    "Cumpărături": [
+        "detergent", "sapun", "servetel", "hartie", "plastic",
+        "baterie", "cosmet", "covor", "electronic", "lamp", "articol casnic",
+        "sacosa", "odorizant"
+    ],
+    "Sănătate": ["vitamin", "farmacie", "medical", "pastila", "supliment", "medicament"],
+    "Utilități & Locuință": ["factura", "energie", "gaz", "apa", "electric", "chir", "intretinere"],
+    "Transport": ["benzina", "diesel", "taxi", "uber", "transport", "autobuz", "masina", "motorina"],
+    "Distracție & Timp liber": ["cinema", "joc", "spectacol", "bilete", "cadou", "hobby", "concert"],
+}
+
+# Russian stems for the same categories (messages are often written in Russian)
+CATEGORY_KEYWORDS_RU = {
+    "Mâncare & Restaurante": [
+        "молок", "хлеб", "мяс", "куриц", "кофе", "чай", "сыр", "яйц", "овощ",
+        "фрукт", "картош", "обед", "ужин", "завтрак", "кафе", "ресторан", "продукт"
+    ],
+    "Cumpărături": ["одежд", "обув", "магазин", "мыл", "шампун", "косметик", "пакет"],
+    "Sănătate": ["аптек", "лекарств", "витамин", "врач", "таблетк"],
+    "Utilități & Locuință": ["свет", "газ", "вода", "воду", "аренд", "квартир", "коммунал", "интернет"],
+    "Transport": ["бензин", "такси", "автобус", "маршрутк", "дизел", "топлив", "парковк"],
+    "Distracție & Timp liber": ["кино", "театр", "концерт", "игр", "подарок", "билет"],
+}
+
+# Presets offered by /api/v1/categories/suggest
+SUGGESTION_PRESETS = [
+    {"keywords": ["food", "dining", "restaurant", "coffee", "drink", "grocer", "mcd"], "name": "Mâncare & Restaurante", "icon": "🍽️", "color": "#F97316"},
+    {"keywords": ["travel", "plane", "flight", "vacation", "trip"], "name": "Călătorii", "icon": "✈️", "color": "#38BDF8"},
+    {"keywords": ["health", "doctor", "med", "pharma", "gym"], "name": "Sănătate & Wellness", "icon": "💊", "color": "#34D399"},
+    {"keywords": ["home", "rent", "utility", "electric", "gas", "mortgage"], "name": "Utilități & Locuință", "icon": "🏠", "color": "#FACC15"},
+    {"keywords": ["shopping", "clothes", "fashion", "gift", "store"], "name": "Cumpărături", "icon": "🛍️", "color": "#F472B6"},
+    {"keywords": ["transport", "car", "fuel", "taxi", "uber", "bus"], "name": "Transport", "icon": "🚗", "color": "#60A5FA"},
+    {"keywords": ["education", "books", "course", "learning"], "name": "Educație", "icon": "📚", "color": "#A78BFA"},
+    {"keywords": ["entertainment", "movie", "game", "music", "fun"], "name": "Distracție & Timp liber", "icon": "🎬", "color": "#FB7185"},
+    {"keywords": ["pets", "dog", "cat", "animal"], "name": "Animale & Îngrijire", "icon": "🐾", "color": "#FDBA74"},
+    {"keywords": ["charity", "donation"], "name": "Caritate", "icon": "🤝", "color": "#FDE047"},
+    {"keywords": ["sport", "fitness", "football", "tennis", "swim"], "name": "Sport & Fitness", "icon": "⚽", "color": "#10B981"},
+    {"keywords": ["family", "kids", "children", "baby", "school"], "name": "Familie & Copii", "icon": "👪", "color": "#FDBA74"},
+    {"keywords": ["birthday", "present", "party"], "name": "Cadouri", "icon": "🎁", "color": "#F472B6"},
+    {"keywords": ["tech", "computer", "laptop", "phone", "software", "subscription"], "name": "Tehnologie", "icon": "💻", "color": "#94A3B8"},
+    {"keywords": ["beauty", "hair", "salon", "makeup", "cosmetic"], "name": "Frumusețe & Îngrijire", "icon": "💄", "color": "#FB7185"},
+    {"keywords": ["finance", "bank", "insurance", "investment", "loan"], "name": "Finanțe & Asigurări", "icon": "💰", "color": "#10B981"},
+    {"keywords": ["work", "office", "business"], "name": "Muncă & Birou", "icon": "💼", "color": "#94A3B8"},
+]
+
+# Icon pool for new categories, organized by themes; "preset" links a theme to its suggestion preset
+ICON_THEMES = {
+    "food": {
+        "preset": "Mâncare & Restaurante",
+        "keywords": ["mancare", "food", "restaurant", "dining", "cafea", "coffee", "bautura", "drink", "groceries", "alimente"],
+        "icons": ["🍕", "🍔", "🍟", "🌮", "🍱", "🍜", "🥗", "🍝", "🥘", "🍲", "☕", "🍺", "🍷", "🥤", "🧃"]
+    },
+    "transport": {
+        "preset": "Transport",
+        "keywords": ["transport", "masina", "car", "taxi", "bus", "autobuz", "benzina", "fuel", "parking"],
+        "icons": ["🚗", "🚕", "🚌", "🚎", "🚙", "🚐", "⛽", "🅿️", "🚦", "🛣️"]
+    },
+    "shopping": {
+        "preset": "Cumpărături",
+        "keywords": ["shopping", "cumparaturi", "haine", "clothes", "pantaloni", "fashion", "magazin", "store"],
+        "icons": ["🛍️", "👕", "👔", "👗", "👠", "👜", "🎽", "👖", "🧥", "🧢"]
+    },
+    "health": {
+        "preset": "Sănătate & Wellness",
+        "keywords": ["sanatate", "health", "doctor", "pharmacy", "farmacie", "medical", "spital", "hospital"],
+        "icons": ["💊", "🏥", "⚕️", "💉", "🩺", "🩹", "🧬", "🦷", "👨‍⚕️", "👩‍⚕️"]
+    },
+    "education": {
+        "preset": "Educație",
+        "keywords": ["educatie", "education", "scoala", "school", "university", "universitate", "studii", "curs", "course"],
+        "icons": ["📚", "📖", "✏️", "📝", "🎓", "🏫", "📐", "🖊️", "📔", "📕"]
+    },
+    "entertainment": {
+        "preset": "Distracție & Timp liber",
+        "keywords": ["entertainment", "distractie", "hobby", "film", "movie", "cinema", "muzica", "music", "joc", "game"],
+        "icons": ["🎮", "🎬", "🎵", "🎸", "🎹", "🎭", "🎪", "🎨", "🎯", "🎲"]
+    },
+    "sports": {
+        "preset": "Sport & Fitness",
+        "keywords": ["sport", "fitness", "gym", "sala", "fotbal", "football", "baschet", "basketball"],
+        "icons": ["⚽", "🏀", "🏈", "⚾", "🎾", "🏐", "🏋️", "🚴", "🏊", "🤸"]
+    },
+    "home": {
+        "preset": "Utilități & Locuință",
+        "keywords": ["casa", "home", "chirie", "rent", "utilities", "utilitati", "electric", "apa", "water", "gaz"],
+        "icons": ["🏠", "🏡", "🔑", "🚪", "🛋️", "🛏️", "🚿", "💡", "🔌", "🧹"]
+    },
+    "family": {
+        "preset": "Familie & Copii",
+        "keywords": ["familie", "family", "copii", "kids", "children", "baby", "bebelus"],
+        "icons": ["👨‍👩‍👧", "👨‍👩‍👧‍👦", "👶", "🧒", "👪", "💑", "💏", "👫", "👬", "👭"]
+    },
+    "gifts": {
+        "preset": "Cadouri",
+        "keywords": ["cadouri", "gifts", "prezent", "present", "aniversare", "birthday"],
+        "icons": ["🎁", "🎀", "🎉", "🎊", "🎈", "🎂", "🧧", "💝", "🌹", "💐"]
+    },
+    "pets": {
+        "preset": "Animale & Îngrijire",
+        "keywords": ["animale", "pets", "caine", "dog", "pisica", "cat", "veterinar", "vet"],
+        "icons": ["🐾", "🐕", "🐈", "🐶", "🐱", "🐕‍🦺", "🐩", "🐈‍⬛", "🦮", "🐇"]
+    },
+    "travel": {
+        "preset": "Călătorii",
+        "keywords": ["vacanta", "vacation", "travel", "calatorie", "zbor", "flight", "hotel", "turism"],
+        "icons": ["✈️", "🛫", "🛬", "🏖️", "🗺️", "🧳", "🎒", "🏨", "🗼", "🏰"]
+    },
+    "tech": {
+        "preset": "Tehnologie",
+        "keywords": ["tech", "tehnologie", "computer", "calculator", "laptop", "phone", "telefon", "software", "gadget", "server"],
+        "icons": ["💻", "🖥️", "⌨️", "🖱️", "📱", "📲", "💾", "💿", "📀", "🖨️"]
+    },
+    "beauty": {
+        "preset": "Frumusețe & Îngrijire",
+        "keywords": ["beauty", "frumusete", "cosmetica", "coafura", "hair", "salon", "machiaj", "makeup"],
+        "icons": ["💄", "💅", "💇", "💆", "🧴", "🧼", "🧽", "🪒", "✂️", "💈"]
+    },
+    "finance": {
+        "preset": "Finanțe & Asigurări",
+        "keywords": ["finance", "banca", "bank", "investitie", "investment", "asigurare", "insurance"],
+        "icons": ["💰", "💵", "💴", "💶", "💷", "💳", "💸", "🏦", "📊", "📈"]
+    },
+    "work": {
+        "preset": "Muncă & Birou",
+        "keywords": ["work", "munca", "office", "birou", "business", "afacere"],
+        "icons": ["💼", "📇", "📋", "📁", "📂", "🗂️", "📌", "📎", "🖇️", "✒️"]
+    }
+}
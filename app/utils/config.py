@@ -14,15 +14,91 @@ class Settings(BaseSettings):
 
     # Groq AI
     GROQ_API_KEY: str
+    GROQ_BASE_URL: str = "https://api.groq.com/openai/v1"  # Point at tests/stubs/groq_server.py offline
+    GROQ_MAX_CONCURRENT_REQUESTS: int = 4
+    GROQ_MAX_RETRIES: int = 2
+    GROQ_RETRY_BUDGET_RATIO: float = 0.2  # Retries allowed per request sent
+    GROQ_MAX_RETRY_WAIT_SECONDS: float = 10.0
+    GROQ_TEXT_MODEL: str = "llama-3.3-70b-versatile"
+    GROQ_FAST_MODEL: str = "llama-3.1-8b-instant"
+    GROQ_CASCADE_ENABLED: bool = True
+    GROQ_CASCADE_MIN_CONFIDENCE: float = 0.7  # Below this the large model is asked
+    # Hedging: duplicate a call still running after the model's p-th percentile latency
+    GROQ_HEDGE_ENABLED: bool = True
+    GROQ_HEDGE_PERCENTILE: float = 95.0
+    GROQ_HEDGE_MIN_SAMPLES: int = 20
+    GROQ_HEDGE_DEFAULT_DELAY_SECONDS: float = 5.0  # Used until enough samples exist
+    GROQ_HEDGE_MIN_DELAY_SECONDS: float = 0.5
+    GROQ_HEDGE_MODELS: dict[str, str] = {}  # Optional alternate model for the hedge, JSON in env
+    GROQ_STREAMING_ENABLED: bool = True  # Stream bot text parses and render fields early
+    GROQ_TEXT_BATCH_MAX_SIZE: int = 10  # Expense texts packed into one batch request
+    # Receipt photos are auto-oriented, cropped, grayscaled and downsized before upload
+    GROQ_VISION_PREPROCESS: bool = True
+    GROQ_VISION_MAX_EDGE: int = 1600
+    GROQ_VISION_IMAGE_FORMAT: str = "JPEG"  # JPEG or WEBP
+    GROQ_VISION_IMAGE_QUALITY: int = 80
+    # Voice notes are trimmed of silence and long ones split at pauses before upload
+    GROQ_VOICE_PREPROCESS: bool = True
+    GROQ_VOICE_SILENCE_DB: float = -40.0  # Frames quieter than this (dBFS) are silence
+    GROQ_VOICE_MIN_SPEECH_SECONDS: float = 0.3  # Notes with less speech are rejected
+    GROQ_VOICE_CHUNK_SECONDS: float = 30.0
+    # Ordered fallbacks when a model is deprecated or overloaded, JSON in env
+    GROQ_MODEL_FAILOVER: dict[str, list[str]] = {
+        "llama-3.3-70b-versatile": ["llama-3.1-8b-instant"],
+        "llama-3.1-8b-instant": ["llama-3.3-70b-versatile"],
+        "llama-3.2-11b-vision-preview": ["llama-3.2-90b-vision-preview", "meta-llama/llama-4-scout-17b-16e-instruct"],
+    }
+
+    # Local fast-path parser (below this confidence the text goes to Groq)
+    LOCAL_PARSER_MIN_CONFIDENCE: float = 0.85
+    # Groq category suggestions cached per normalized description
+    CATEGORY_SUGGEST_CACHE_SIZE: int = 512
+
+    # SFS receipts
+    SFS_RECEIPT_CACHE_ENABLED: bool = True  # Reuse parsed receipts by receipt code instead of re-scraping
+    SFS_CANDIDATE_STAGGER_SECONDS: float = 1.0  # Head start of each candidate URL over the next one
+    SFS_HTML_PARSER: str = "lxml"  # lxml | html.parser (BeautifulSoup)
+    SFS_IMPORT_CONCURRENCY: int = 4  # Receipts in flight during a bulk import
+    SFS_IMPORT_PER_HOST_CONCURRENCY: int = 2
+    SFS_IMPORT_HOST_INTERVAL_SECONDS: float = 0.5  # Minimum spacing between requests to one SFS host
+    SFS_IMPORT_BATCH_SIZE: int = 50  # Expenses inserted per commit
+    SFS_IMPORT_PROGRESS_DIR: str = "data/imports"  # Progress files of API imports, for resuming
+
+    # Resilience: circuit breakers and bulkheads per upstream (Groq, SFS, Telegram)
+    CIRCUIT_FAILURE_THRESHOLD: int = 5  # Consecutive failures that open a circuit
+    CIRCUIT_RECOVERY_SECONDS: float = 30.0  # Open circuits let a trial call through after this
+    BULKHEAD_MAX_WAIT_SECONDS: float = 2.0  # Longest wait for a free slot before failing fast
+    GROQ_BULKHEAD_LIMIT: int = 32
+    SFS_BULKHEAD_LIMIT: int = 4
+    TELEGRAM_BULKHEAD_LIMIT: int = 32
 
     # Security
     ENCRYPTION_KEY: str
     JWT_SECRET_KEY: str = "your-secret-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_HOURS: int = 24
+    # Batch encrypt/decrypt (exports, statistics, re-encryption) is split across threads
+    CRYPTO_BATCH_THREADS: int = 0  # 0 = one per CPU, at most 8
+    CRYPTO_PARALLEL_MIN_BATCH: int = 256  # Smaller batches run inline
+    # Decrypted vendor/json_data values kept in memory (LRU, zeroized on eviction)
+    CRYPTO_CACHE_ENABLED: bool = True  # Set to false to never keep plaintext around
+    CRYPTO_CACHE_MAX_BYTES: int = 8 * 1024 * 1024
+    CRYPTO_CACHE_TTL_SECONDS: float = 300.0
+    # Binary payloads (json_data) are compressed before encryption
+    CRYPTO_COMPRESSION: str = "zlib"  # none | zlib | zstd (needs zstandard)
+    CRYPTO_COMPRESSION_MIN_BYTES: int = 128  # Smaller values are stored uncompressed
+    # Envelope encryption: expense fields use a per-user data key, stored wrapped by ENCRYPTION_KEY
+    CRYPTO_DATA_KEYS_ENABLED: bool = True  # false = new values use ENCRYPTION_KEY directly (old rows stay readable)
+    CRYPTO_DATA_KEY_CACHE_SECONDS: float = 300.0  # How long a process keeps using a user's key after rotation
+    ENCRYPTION_PREVIOUS_KEYS: str = ""  # Comma-separated former ENCRYPTION_KEY values, still accepted for decryption
 
     # Telegram
     TELEGRAM_BOT_TOKEN: str
+    TELEGRAM_API_BASE_URL: str = "https://api.telegram.org"  # Point at tests/stubs/telegram_server.py offline
+    TELEGRAM_MAX_RETRY_AFTER_SECONDS: float = 5.0  # Longer 429 waits are not retried
+    # Text messages from one chat arriving within this window are parsed together (0 disables)
+    TELEGRAM_TEXT_DEBOUNCE_SECONDS: float = 1.0
+    TELEGRAM_TEXT_DEBOUNCE_MAX_SECONDS: float = 3.0
 
     # Access Control
     ALLOWED_GROUP_ID: int = -5028155280  # Group ID care poate folosi bot-ul
@@ -1,81 +1,362 @@
 import base64
+import hashlib
 import json
+import logging
+import secrets
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.backends import default_backend
 from app.utils.config import settings
+from app.utils.metrics import HitMissCounter
 import os
 
+logger = logging.getLogger(__name__)
+
+# Binary ciphertext (LargeBinary columns): format version byte + nonce (12 bytes) + AES-GCM output.
+# Text columns keep the original layout, base64(nonce + AES-GCM output), without a header.
+FORMAT_V1 = 0x01  # Plaintext as is
+FORMAT_ZLIB = 0x02  # zlib-compressed plaintext, format byte authenticated as associated data
+FORMAT_ZSTD = 0x03  # zstd-compressed plaintext, format byte authenticated as associated data
+# Flag on the format byte: encrypted with a data key whose id follows as 4 bytes (big-endian).
+# The whole header (format byte + key id) is authenticated as associated data.
+DATA_KEY_FLAG = 0x80
+KEY_ID_SIZE = 4
+# Text columns holding data-key ciphertext store this prefix + base64 of the binary form
+# (':' is not in the base64 alphabet, so legacy text values never start with it)
+DATA_KEY_TEXT_PREFIX = "k1:"
+NONCE_SIZE = 12
+_TAG_SIZE = 16
+_MAX_KEY_ID = 2 ** 31 - 1  # Fits a signed 32-bit integer column
+
+# Rough per-entry cost of the digest key, entry tuple and dict slot, counted against the budget
+_CACHE_ENTRY_OVERHEAD = 120
+
+
+def key_fingerprint(key: bytes) -> str:
+    """Short id of a master key, stored next to the data keys it wraps."""
+    return hashlib.blake2b(key, digest_size=4).hexdigest()
+
+
+def _load_master_key(encoded: str) -> bytes:
+    key = base64.b64decode(encoded)
+    if len(key) not in [16, 24, 32]:
+        raise ValueError("Encryption key must be 16, 24, or 32 bytes")
+    return key
+
+
+def _to_plaintext(data: str | dict) -> bytes:
+    if isinstance(data, dict):
+        data = json.dumps(data)
+
+    if not isinstance(data, str):
+        raise ValueError("Data must be string or dict")
+
+    return data.encode('utf-8')
+
+
+@dataclass(frozen=True)
+class Codec:
+    """Compression applied to plaintext before encryption"""
+    name: str
+    format: int
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+def _zlib_codec() -> Codec:
+    return Codec("zlib", FORMAT_ZLIB, lambda data: zlib.compress(data, 6), zlib.decompress)
+
+
+def _zstd_codec() -> Codec:
+    import zstandard
+
+    # Module-level functions: compressor objects must not be shared across the batch threads
+    return Codec("zstd", FORMAT_ZSTD, lambda data: zstandard.compress(data, 3), zstandard.decompress)
+
+
+_CODEC_LOADERS = {"zlib": _zlib_codec, "zstd": _zstd_codec}
+_CODEC_NAMES = {FORMAT_ZLIB: "zlib", FORMAT_ZSTD: "zstd"}
+_codecs: dict[str, Codec] = {}
+
+
+def get_codec(name: str) -> Optional[Codec]:
+    """
+    Codec by name ("none" gives None); zstd falls back to zlib when the
+    zstandard package is not installed.
+    """
+    if name == "none":
+        return None
+    codec = _codecs.get(name)
+    if codec is None:
+        loader = _CODEC_LOADERS.get(name)
+        if loader is None:
+            raise ValueError(f"Unknown compression codec: {name}")
+        try:
+            codec = loader()
+        except ImportError:
+            logger.warning(f"Compression codec {name} unavailable, using zlib")
+            codec = get_codec("zlib")
+        _codecs[name] = codec
+    return codec
+
+
+class DecryptedCache:
+    """
+    Process-wide LRU of decrypted values, keyed by a digest of the ciphertext.
+
+    Plaintexts are held in bytearrays bounded by a byte budget and a TTL, and
+    overwritten with zeros when evicted, expired or cleared. Expired entries
+    are purged on every put, so values no longer read do not outlive the TTL
+    by more than the time to the next put. Strings already handed to callers
+    are ordinary Python strings and are not covered.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stats = HitMissCounter()
+        self.size_bytes = 0
+        self._entries: OrderedDict[bytes, tuple[float, bytearray]] = OrderedDict()
+        # (expires_at, key) in insertion order; the TTL is fixed, so oldest first
+        self._expiries: deque[tuple[float, bytes]] = deque()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(encrypted_data: str | bytes) -> bytes:
+        if isinstance(encrypted_data, str):
+            encrypted_data = encrypted_data.encode('ascii', 'replace')
+        return hashlib.blake2b(encrypted_data, digest_size=16).digest()
+
+    def get(self, encrypted_data: str | bytes) -> Optional[str]:
+        key = self._key(encrypted_data)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.miss()
+                return None
+            expires_at, plaintext = entry
+            if expires_at <= time.monotonic():
+                self._drop(key)
+                self.stats.miss()
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hit()
+            return plaintext.decode('utf-8')
+
+    def put(self, encrypted_data: str | bytes, value: str) -> None:
+        plaintext = bytearray(value.encode('utf-8'))
+        cost = len(plaintext) + _CACHE_ENTRY_OVERHEAD
+        if cost > self.max_bytes:
+            return
+        key = self._key(encrypted_data)
+        with self._lock:
+            now = time.monotonic()
+            self._purge_expired(now)
+            if key in self._entries:
+                self._drop(key)
+            expires_at = now + self.ttl_seconds
+            self._entries[key] = (expires_at, plaintext)
+            self._expiries.append((expires_at, key))
+            self.size_bytes += cost
+            while self.size_bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+            self._expiries.clear()
+
+    def _purge_expired(self, now: float) -> None:
+        while self._expiries and self._expiries[0][0] <= now:
+            expires_at, key = self._expiries.popleft()
+            entry = self._entries.get(key)
+            # Skip keys already evicted or put again since
+            if entry is not None and entry[0] == expires_at:
+                self._drop(key)
+
+    def _drop(self, key: bytes) -> None:
+        _, plaintext = self._entries.pop(key)
+        self.size_bytes -= len(plaintext) + _CACHE_ENTRY_OVERHEAD
+        plaintext[:] = bytes(len(plaintext))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": settings.CRYPTO_CACHE_ENABLED,
+            **self.stats.snapshot(),
+            "entries": len(self._entries),
+            "bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
 
 class CryptoService:
     """Service for encrypting and decrypting sensitive data using AES-GCM"""
 
     def __init__(self):
         # Decode base64 encryption key from settings
-        self.key = base64.b64decode(settings.ENCRYPTION_KEY)
-        if len(self.key) not in [16, 24, 32]:
-            raise ValueError("Encryption key must be 16, 24, or 32 bytes")
+        self.key = _load_master_key(settings.ENCRYPTION_KEY)
         self.aesgcm = AESGCM(self.key)
+        self.master_key_id = key_fingerprint(self.key)
+        # Master keys by id: the current one, then previous ones still accepted for decryption
+        self._master_keys = {self.master_key_id: self.aesgcm}
+        for encoded in settings.ENCRYPTION_PREVIOUS_KEYS.split(","):
+            if encoded.strip():
+                previous = _load_master_key(encoded.strip())
+                self._master_keys.setdefault(key_fingerprint(previous), AESGCM(previous))
+
+        # Unwrapped data keys by id; key_loader fetches the wrapped ones that are not here yet
+        self.key_loader: Optional[Callable[[int], Optional[bytes]]] = None
+        self._data_keys: dict[int, AESGCM] = {}
+        self._data_keys_lock = threading.Lock()
 
-    def encrypt_data(self, data: str | dict) -> str:
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.cache = DecryptedCache(settings.CRYPTO_CACHE_MAX_BYTES, settings.CRYPTO_CACHE_TTL_SECONDS)
+
+    def encrypt_data(self, data: str | dict, key_id: Optional[int] = None) -> str:
         """
         Encrypt data using AES-GCM.
 
         Args:
             data: String or dict to encrypt
+            key_id: Data key to encrypt with (default: the master key)
 
         Returns:
-            Base64-encoded encrypted data with nonce prepended
+            Base64-encoded encrypted data with nonce prepended; with a data key,
+            the binary form (see encrypt_bytes) in base64 after DATA_KEY_TEXT_PREFIX
         """
-        if isinstance(data, dict):
-            data = json.dumps(data)
-
-        if not isinstance(data, str):
-            raise ValueError("Data must be string or dict")
+        if key_id is not None:
+            return DATA_KEY_TEXT_PREFIX + base64.b64encode(self.encrypt_bytes(data, key_id)).decode('utf-8')
 
         # Generate random nonce (12 bytes recommended for GCM)
-        nonce = os.urandom(12)
+        nonce = os.urandom(NONCE_SIZE)
 
         # Encrypt the data
-        encrypted = self.aesgcm.encrypt(nonce, data.encode('utf-8'), None)
+        encrypted = self.aesgcm.encrypt(nonce, _to_plaintext(data), None)
 
         # Prepend nonce to encrypted data and encode as base64
         encrypted_with_nonce = nonce + encrypted
         return base64.b64encode(encrypted_with_nonce).decode('utf-8')
 
-    def decrypt_data(self, encrypted_data: str) -> str:
+    def encrypt_bytes(self, data: str | dict, key_id: Optional[int] = None) -> bytes:
+        """
+        Encrypt data for a binary column.
+
+        Args:
+            data: String or dict to encrypt
+            key_id: Data key to encrypt with (default: the master key)
+
+        Returns:
+            Format version byte (and data key id), nonce and ciphertext, without base64
+        """
+        plaintext = _to_plaintext(data)
+        nonce = os.urandom(NONCE_SIZE)
+        value_format = FORMAT_V1
+
+        # Compress (CRYPTO_COMPRESSION) when the value is large enough and it actually helps
+        codec = get_codec(settings.CRYPTO_COMPRESSION)
+        if codec is not None and len(plaintext) >= settings.CRYPTO_COMPRESSION_MIN_BYTES:
+            compressed = codec.compress(plaintext)
+            if len(compressed) < len(plaintext):
+                value_format = codec.format
+                plaintext = compressed
+
+        if key_id is not None:
+            header = bytes([value_format | DATA_KEY_FLAG]) + key_id.to_bytes(KEY_ID_SIZE, "big")
+            return header + nonce + self._data_key(key_id).encrypt(nonce, plaintext, header)
+
+        header = bytes([value_format])
+        associated_data = header if value_format != FORMAT_V1 else None
+        return header + nonce + self.aesgcm.encrypt(nonce, plaintext, associated_data)
+
+    def decrypt_data(self, encrypted_data: str | bytes) -> str:
         """
         Decrypt data using AES-GCM.
 
         Args:
-            encrypted_data: Base64-encoded encrypted data with nonce
+            encrypted_data: Base64-encoded encrypted data with nonce (text columns),
+                or binary ciphertext from encrypt_bytes (binary columns)
 
         Returns:
             Decrypted string
         """
         if not encrypted_data:
             return ""
+        if isinstance(encrypted_data, memoryview):
+            # PostgreSQL drivers return bytea as memoryview
+            encrypted_data = bytes(encrypted_data)
+
+        use_cache = settings.CRYPTO_CACHE_ENABLED
+        if use_cache:
+            cached = self.cache.get(encrypted_data)
+            if cached is not None:
+                return cached
 
         try:
-            # Decode from base64
-            encrypted_with_nonce = base64.b64decode(encrypted_data)
+            codec = None
+            header = None
+            aesgcm = None
+            binary = encrypted_data
+            if isinstance(encrypted_data, str):
+                if encrypted_data.startswith(DATA_KEY_TEXT_PREFIX):
+                    binary = base64.b64decode(encrypted_data[len(DATA_KEY_TEXT_PREFIX):])
+                else:
+                    binary = None
+                    # Decode from base64
+                    encrypted_with_nonce = base64.b64decode(encrypted_data)
+
+            if binary is not None:
+                value_format = binary[0] & ~DATA_KEY_FLAG
+                header_size = 1
+                if binary[0] & DATA_KEY_FLAG:
+                    header_size += KEY_ID_SIZE
+                    aesgcm = self._data_key(int.from_bytes(binary[1:header_size], "big"))
+                    header = binary[:header_size]
+                if value_format in _CODEC_NAMES:
+                    codec = get_codec(_CODEC_NAMES[value_format])
+                    if codec.format != value_format:
+                        raise ValueError(f"{_CODEC_NAMES[value_format]} is not installed")
+                    header = binary[:header_size]
+                elif value_format != FORMAT_V1:
+                    raise ValueError(f"unknown ciphertext format {binary[0]}")
+                encrypted_with_nonce = binary[header_size:]
 
             # Extract nonce and encrypted data
-            nonce = encrypted_with_nonce[:12]
-            encrypted = encrypted_with_nonce[12:]
+            nonce = encrypted_with_nonce[:NONCE_SIZE]
+            encrypted = encrypted_with_nonce[NONCE_SIZE:]
 
             # Decrypt
-            decrypted = self.aesgcm.decrypt(nonce, encrypted, None)
-            return decrypted.decode('utf-8')
+            if aesgcm is not None:
+                plaintext = aesgcm.decrypt(nonce, encrypted, header)
+            else:
+                plaintext = self._decrypt_with_master_keys(nonce, encrypted, header)
+            if codec is not None:
+                plaintext = codec.decompress(plaintext)
+            decrypted = plaintext.decode('utf-8')
 
         except Exception as e:
             raise ValueError(f"Decryption failed: {str(e)}")
 
-    def decrypt_json(self, encrypted_data: str) -> dict:
+        if use_cache:
+            self.cache.put(encrypted_data, decrypted)
+        return decrypted
+
+    def decrypt_json(self, encrypted_data: str | bytes) -> dict:
         """
         Decrypt data and parse as JSON.
 
         Args:
-            encrypted_data: Base64-encoded encrypted JSON data
+            encrypted_data: Encrypted JSON data, base64 text or binary
 
         Returns:
             Decrypted dict
@@ -85,22 +366,223 @@ class CryptoService:
             return {}
         return json.loads(decrypted)
 
+    def _decrypt_with_master_keys(self, nonce: bytes, encrypted: bytes, header: Optional[bytes]) -> bytes:
+        """Values without a key id: the current master key, then the previous ones."""
+        for aesgcm in self._master_keys.values():
+            try:
+                return aesgcm.decrypt(nonce, encrypted, header)
+            except InvalidTag:
+                continue
+        raise InvalidTag()
+
+    def encrypt_many(
+        self,
+        values: Sequence[str | dict],
+        binary: bool = False,
+        key_id: Optional[int] = None,
+    ) -> list[str] | list[bytes]:
+        """
+        Encrypt a batch of values; same output as encrypt_data (or encrypt_bytes
+        when binary is set) for each. Large batches are split across the crypto
+        thread pool.
+        """
+        if binary:
+            return self._map(lambda chunk: [self.encrypt_bytes(data, key_id) for data in chunk], list(values))
+        return self._map(lambda chunk: [self.encrypt_data(data, key_id) for data in chunk], list(values))
+
+    @staticmethod
+    def data_key_id(encrypted_data: Optional[str | bytes]) -> Optional[int]:
+        """Id of the data key a value is encrypted with, None for the master key."""
+        if not encrypted_data:
+            return None
+        if isinstance(encrypted_data, str):
+            if not encrypted_data.startswith(DATA_KEY_TEXT_PREFIX):
+                return None
+            encrypted_data = base64.b64decode(encrypted_data[len(DATA_KEY_TEXT_PREFIX):][:8])
+        if not encrypted_data[0] & DATA_KEY_FLAG:
+            return None
+        return int.from_bytes(encrypted_data[1:1 + KEY_ID_SIZE], "big")
+
+    def generate_data_key(self) -> tuple[int, bytes, str]:
+        """
+        Create a data key. It is not kept in memory: the id is only a candidate
+        until it is stored, see DataKeyStore.create_key.
+
+        Returns:
+            Random key id, the key wrapped by the current master key, and the
+            id of that master key
+        """
+        key_id = secrets.randbelow(_MAX_KEY_ID) + 1
+        key = AESGCM.generate_key(bit_length=256)
+        return key_id, self.wrap_data_key(key_id, key), self.master_key_id
+
+    def wrap_data_key(self, key_id: int, key: bytes) -> bytes:
+        """Encrypt a data key with the current master key (nonce + ciphertext)."""
+        nonce = os.urandom(NONCE_SIZE)
+        return nonce + self.aesgcm.encrypt(nonce, key, _wrap_associated_data(key_id))
+
+    def unwrap_data_key(self, key_id: int, wrapped_key: bytes, master_key_id: str) -> bytes:
+        """Decrypt a wrapped data key; the master key must be current or in ENCRYPTION_PREVIOUS_KEYS."""
+        aesgcm = self._master_keys.get(master_key_id)
+        if aesgcm is None:
+            raise ValueError(f"Master key {master_key_id} of data key {key_id} is not configured")
+        try:
+            return aesgcm.decrypt(wrapped_key[:NONCE_SIZE], wrapped_key[NONCE_SIZE:], _wrap_associated_data(key_id))
+        except InvalidTag:
+            raise ValueError(f"Data key {key_id} does not unwrap")
+
+    def add_data_key(self, key_id: int, key: bytes) -> None:
+        with self._data_keys_lock:
+            self._data_keys[key_id] = AESGCM(key)
+
+    def forget_data_key(self, key_id: int) -> None:
+        with self._data_keys_lock:
+            self._data_keys.pop(key_id, None)
+
+    def forget_data_keys(self) -> None:
+        """Drop the data keys held in memory and the values decrypted with them."""
+        with self._data_keys_lock:
+            self._data_keys.clear()
+        self.cache.clear()
+
+    def _data_key(self, key_id: int) -> AESGCM:
+        aesgcm = self._data_keys.get(key_id)
+        if aesgcm is not None:
+            return aesgcm
+        with self._data_keys_lock:
+            aesgcm = self._data_keys.get(key_id)
+            if aesgcm is None:
+                key = self.key_loader(key_id) if self.key_loader is not None else None
+                if key is None:
+                    raise ValueError(f"Unknown data key {key_id}")
+                aesgcm = self._data_keys[key_id] = AESGCM(key)
+        return aesgcm
+
+    @staticmethod
+    def legacy_to_binary(encrypted_data: str) -> bytes:
+        """
+        Convert base64 ciphertext from encrypt_data to the binary format
+        without decrypting it (used to migrate text columns to binary ones).
+        """
+        encrypted_with_nonce = base64.b64decode(encrypted_data, validate=True)
+        if len(encrypted_with_nonce) < NONCE_SIZE + _TAG_SIZE:
+            raise ValueError("Ciphertext is too short")
+        return bytes([FORMAT_V1]) + encrypted_with_nonce
+
+    def decrypt_many(self, encrypted_values: Sequence[Optional[str | bytes]], strict: bool = True) -> list[Optional[str]]:
+        """
+        Decrypt a batch of values, in order. Empty values give "" as in decrypt_data.
+
+        Args:
+            encrypted_values: Encrypted values, base64 text or binary
+            strict: Raise ValueError on the first value that does not decrypt;
+                when False such values give None instead
+
+        Returns:
+            Decrypted strings
+        """
+        chunk = self._decrypt_chunk if strict else self._decrypt_chunk_lenient
+        return self._map(chunk, list(encrypted_values))
+
+    def decrypt_json_many(self, encrypted_values: Sequence[Optional[str | bytes]], strict: bool = True) -> list[Optional[dict]]:
+        """
+        Decrypt a batch of JSON values. Empty values give {} as in decrypt_json;
+        with strict=False values that do not decrypt or parse give None.
+        """
+        chunk = self._decrypt_json_chunk if strict else self._decrypt_json_chunk_lenient
+        return self._map(chunk, list(encrypted_values))
+
+    def _map(self, chunk_func: Callable[[list], list], values: list) -> list:
+        """Run chunk_func over values, in parallel chunks when the batch is large."""
+        workers = self._worker_count()
+        if workers <= 1 or len(values) < settings.CRYPTO_PARALLEL_MIN_BATCH:
+            return chunk_func(values)
+
+        # Few large chunks: one task per worker keeps the per-task overhead negligible
+        chunk_size = -(-len(values) // workers)
+        chunks = [values[start:start + chunk_size] for start in range(0, len(values), chunk_size)]
+        results = []
+        for chunk_result in self._get_executor(workers).map(chunk_func, chunks):
+            results.extend(chunk_result)
+        return results
+
+    @staticmethod
+    def _worker_count() -> int:
+        return settings.CRYPTO_BATCH_THREADS or min(os.cpu_count() or 1, 8)
+
+    def _get_executor(self, workers: int) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crypto")
+        return self._executor
+
+    def _decrypt_chunk(self, values: list) -> list[str]:
+        return [self.decrypt_data(encrypted_data) for encrypted_data in values]
+
+    def _decrypt_chunk_lenient(self, values: list) -> list[Optional[str]]:
+        results = []
+        for encrypted_data in values:
+            try:
+                results.append(self.decrypt_data(encrypted_data))
+            except ValueError:
+                results.append(None)
+        return results
+
+    def _decrypt_json_chunk(self, values: list) -> list[dict]:
+        return [json.loads(text) if text else {} for text in self._decrypt_chunk(values)]
+
+    def _decrypt_json_chunk_lenient(self, values: list) -> list[Optional[dict]]:
+        results = []
+        for text in self._decrypt_chunk_lenient(values):
+            if text is None:
+                results.append(None)
+                continue
+            try:
+                results.append(json.loads(text) if text else {})
+            except ValueError:
+                results.append(None)
+        return results
+
+
+def _wrap_associated_data(key_id: int) -> bytes:
+    # Binds a wrapped key to its id, so wrapped keys cannot be swapped between rows
+    return b"data-key:" + key_id.to_bytes(KEY_ID_SIZE, "big")
+
 
 # Singleton instance
 crypto_service = CryptoService()
 
 
 # Convenience functions
-def encrypt_data(data: str | dict) -> str:
+def encrypt_data(data: str | dict, key_id: Optional[int] = None) -> str:
     """Encrypt data using AES-GCM"""
-    return crypto_service.encrypt_data(data)
+    return crypto_service.encrypt_data(data, key_id)
 
 
-def decrypt_data(encrypted_data: str) -> str:
+def decrypt_data(encrypted_data: str | bytes) -> str:
     """Decrypt data using AES-GCM"""
     return crypto_service.decrypt_data(encrypted_data)
 
 
-def decrypt_json(encrypted_data: str) -> dict:
+def decrypt_json(encrypted_data: str | bytes) -> dict:
     """Decrypt and parse JSON data"""
     return crypto_service.decrypt_json(encrypted_data)
+
+
+def encrypt_bytes(data: str | dict, key_id: Optional[int] = None) -> bytes:
+    """Encrypt data using AES-GCM for a binary column"""
+    return crypto_service.encrypt_bytes(data, key_id)
+
+
+def encrypt_many(values: Sequence[str | dict], binary: bool = False, key_id: Optional[int] = None) -> list[str] | list[bytes]:
+    """Encrypt a batch of values using AES-GCM"""
+    return crypto_service.encrypt_many(values, binary, key_id)
+
+
+def decrypt_many(encrypted_values: Sequence[Optional[str | bytes]], strict: bool = True) -> list[Optional[str]]:
+    """Decrypt a batch of values using AES-GCM"""
+    return crypto_service.decrypt_many(encrypted_values, strict)
+
+
+def decrypt_json_many(encrypted_values: Sequence[Optional[str | bytes]], strict: bool = True) -> list[Optional[dict]]:
+    """Decrypt and parse a batch of JSON values"""
+    return crypto_service.decrypt_json_many(encrypted_values, strict)
@@ -0,0 +1,188 @@
+"""
+Receipt photo preprocessing before upload to the Groq vision model
+"""
+import io
+import logging
+import mimetypes
+import os
+import time
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Size of the thumbnail used to locate the receipt
+_ANALYSIS_EDGE = 256
+# Only crop when the detected receipt covers this share of the photo
+_MIN_CROP_AREA = 0.15
+_MAX_CROP_AREA = 0.95
+_CROP_MARGIN = 0.03
+
+_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+def _otsu_threshold(histogram: list[int]) -> int:
+    """Otsu's threshold for a 256-bin grayscale histogram."""
+    total = sum(histogram)
+    weighted_total = sum(i * count for i, count in enumerate(histogram))
+
+    background_weight = 0
+    background_sum = 0
+    best_threshold = 127
+    best_variance = 0.0
+
+    for i, count in enumerate(histogram):
+        background_weight += count
+        if background_weight == 0:
+            continue
+        foreground_weight = total - background_weight
+        if foreground_weight == 0:
+            break
+
+        background_sum += i * count
+        background_mean = background_sum / background_weight
+        foreground_mean = (weighted_total - background_sum) / foreground_weight
+        variance = background_weight * foreground_weight * (background_mean - foreground_mean) ** 2
+        if variance > best_variance:
+            best_variance = variance
+            best_threshold = i
+
+    return best_threshold
+
+
+def _largest_region(mask: Image.Image) -> tuple[int, int, int, int] | None:
+    """
+    Bounding box of the largest 4-connected bright region of a binary mask,
+    so stray bright pixels (reflections, a lamp, paper scraps) are ignored.
+    """
+    width, height = mask.size
+    pixels = bytearray(mask.tobytes())
+    best_size = 0
+    best_bbox = None
+
+    for start, value in enumerate(pixels):
+        if not value:
+            continue
+        # Flood fill, clearing visited pixels in place
+        pixels[start] = 0
+        stack = [start]
+        size = 0
+        left, top, right, bottom = width, height, 0, 0
+        while stack:
+            index = stack.pop()
+            size += 1
+            y, x = divmod(index, width)
+            left, right = min(left, x), max(right, x)
+            top, bottom = min(top, y), max(bottom, y)
+            for neighbour in (
+                index - 1 if x > 0 else -1,
+                index + 1 if x < width - 1 else -1,
+                index - width if y > 0 else -1,
+                index + width if y < height - 1 else -1,
+            ):
+                if neighbour >= 0 and pixels[neighbour]:
+                    pixels[neighbour] = 0
+                    stack.append(neighbour)
+        if size > best_size:
+            best_size = size
+            best_bbox = (left, top, right + 1, bottom + 1)
+
+    return best_bbox
+
+
+def _original_mime(file_path: str, image_format: Optional[str] = None) -> str:
+    """MIME type of a file sent as is: from the decoded format, else the file name."""
+    if image_format and image_format in Image.MIME:
+        return Image.MIME[image_format]
+    return mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+
+
+def _receipt_bbox(image: Image.Image) -> tuple[int, int, int, int] | None:
+    """
+    Locate the receipt (bright paper) in a grayscale image.
+
+    Returns:
+        Crop box in image coordinates, or None if no clear receipt region
+    """
+    analysis = image.copy()
+    analysis.thumbnail((_ANALYSIS_EDGE, _ANALYSIS_EDGE))
+    analysis = ImageOps.autocontrast(analysis)
+
+    threshold = _otsu_threshold(analysis.histogram())
+    mask = analysis.point(lambda value: 255 if value > threshold else 0)
+    bbox = _largest_region(mask)
+    if not bbox:
+        return None
+
+    left, top, right, bottom = bbox
+    area_share = ((right - left) * (bottom - top)) / (analysis.width * analysis.height)
+    if not _MIN_CROP_AREA <= area_share <= _MAX_CROP_AREA:
+        return None
+
+    scale_x = image.width / analysis.width
+    scale_y = image.height / analysis.height
+    margin_x = image.width * _CROP_MARGIN
+    margin_y = image.height * _CROP_MARGIN
+    return (
+        max(0, int(left * scale_x - margin_x)),
+        max(0, int(top * scale_y - margin_y)),
+        min(image.width, int(right * scale_x + margin_x)),
+        min(image.height, int(bottom * scale_y + margin_y)),
+    )
+
+
+def prepare_receipt_image(
+    file_path: str,
+    max_edge: int = 1600,
+    image_format: str = "JPEG",
+    quality: int = 80,
+) -> tuple[bytes, str]:
+    """
+    Auto-orient, crop to the receipt, convert to grayscale, downsize and re-encode a photo.
+
+    Args:
+        file_path: Path to the original image
+        max_edge: Target length of the longest edge in pixels
+        image_format: "JPEG" or "WEBP"
+        quality: Encoder quality (1-95)
+
+    Returns:
+        Tuple of (image bytes, MIME type). Falls back to the original file
+        when it cannot be decoded or re-encoding would make it bigger.
+    """
+    started = time.perf_counter()
+    original_size = os.path.getsize(file_path)
+    image_format = image_format.upper()
+
+    try:
+        with Image.open(file_path) as source:
+            source_format = source.format
+            image = ImageOps.exif_transpose(source).convert("L")
+    except Exception as e:
+        logger.warning(f"Image preprocessing skipped, cannot decode {file_path}: {str(e)}")
+        with open(file_path, "rb") as f:
+            return f.read(), _original_mime(file_path)
+
+    bbox = _receipt_bbox(image)
+    if bbox:
+        image = image.crop(bbox)
+
+    image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, quality=quality, optimize=True)
+    processed = buffer.getvalue()
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if len(processed) >= original_size:
+        logger.info(f"Image preprocessing kept original ({original_size} bytes) after {elapsed_ms:.0f}ms")
+        with open(file_path, "rb") as f:
+            return f.read(), _original_mime(file_path, source_format)
+
+    saved = original_size - len(processed)
+    logger.info(
+        f"Image preprocessed in {elapsed_ms:.0f}ms: {original_size} -> {len(processed)} bytes "
+        f"(saved {saved} bytes, {saved / original_size:.0%}, {image.width}x{image.height}, cropped={bbox is not None})"
+    )
+    return processed, _MIME_TYPES.get(image_format, "image/jpeg")
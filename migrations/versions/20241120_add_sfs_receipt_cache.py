@@ -0,0 +1,24 @@
+"""add sfs receipt cache table"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5c1e9a7d2b3f"
+down_revision = "a6e5bbb0f1c1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "sfs_receipts",
+        sa.Column("receipt_code", sa.String(length=255), nullable=False),
+        sa.Column("data", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("receipt_code")
+    )
+
+
+def downgrade():
+    op.drop_table("sfs_receipts")
@@ -0,0 +1,30 @@
+"""add vendors table keyed by fiscal code"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8d4f2e6a9c10"
+down_revision = "5c1e9a7d2b3f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "vendors",
+        sa.Column("fiscal_code", sa.String(length=128), nullable=False),
+        sa.Column("registration_number", sa.String(length=128), nullable=True),
+        sa.Column("name", sa.Text(), nullable=True),
+        sa.Column("address", sa.Text(), nullable=True),
+        sa.Column("default_category", sa.String(), nullable=True),
+        sa.Column("category_counts", sa.JSON(), nullable=True),
+        sa.Column("usage_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("fiscal_code")
+    )
+
+
+def downgrade():
+    op.drop_table("vendors")
@@ -0,0 +1,45 @@
+"""add binary json_data_bin column to expenses
+
+Expand step of moving encrypted json_data from base64 text in a JSON column
+to raw bytes. Adding a nullable column does not rewrite the table; existing
+rows are converted in batches by `python -m app.tasks.migrate_ciphertext`
+while the app keeps reading both columns.
+"""
+import base64
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e3b7c1d95a24"
+down_revision = "8d4f2e6a9c10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("expenses", sa.Column("json_data_bin", sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    # Move binary values back to base64 text (dropping the format byte) before dropping the column.
+    # Only format 1 values have a text equivalent.
+    expenses = sa.table(
+        "expenses",
+        sa.column("id", sa.String),
+        sa.column("json_data", sa.JSON),
+        sa.column("json_data_bin", sa.LargeBinary),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(expenses.c.id, expenses.c.json_data_bin).where(expenses.c.json_data_bin.isnot(None)))
+    for expense_id, value in rows.fetchall():
+        value = bytes(value)
+        if value[0] != 1:
+            raise RuntimeError(f"Expense {expense_id} has ciphertext format {value[0]}, which has no text form")
+        bind.execute(
+            expenses.update()
+            .where(expenses.c.id == expense_id)
+            .values(json_data=base64.b64encode(value[1:]).decode("utf-8"), json_data_bin=None)
+        )
+    op.drop_column("expenses", "json_data_bin")
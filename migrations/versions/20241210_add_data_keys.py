@@ -0,0 +1,39 @@
+"""add data_keys table for per-user envelope encryption
+
+Existing values stay encrypted with ENCRYPTION_KEY and readable; new values
+use the owner's data key. `python -m app.tasks.rotate_keys` moves old rows to
+data keys in batches.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b91f4c7e2d58"
+down_revision = "e3b7c1d95a24"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "data_keys",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("user_id", sa.String(length=36), nullable=False),
+        sa.Column("master_key_id", sa.String(length=16), nullable=False),
+        sa.Column("wrapped_key", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("retired_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index(op.f("ix_data_keys_user_id"), "data_keys", ["user_id"], unique=False)
+
+
+def downgrade():
+    # Values encrypted with data keys cannot be read without this table
+    data_keys = sa.table("data_keys", sa.column("id", sa.Integer))
+    if op.get_bind().execute(sa.select(sa.func.count()).select_from(data_keys)).scalar():
+        raise RuntimeError("data_keys is not empty: dropping it would make the values encrypted with these keys unreadable")
+    op.drop_index(op.f("ix_data_keys_user_id"), table_name="data_keys")
+    op.drop_table("data_keys")
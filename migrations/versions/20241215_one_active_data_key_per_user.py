@@ -0,0 +1,56 @@
+"""allow one active data key per user
+
+Concurrent workers could each create an active key for the same user. All but
+the newest active key of a user are retired first: their values stay
+readable, and `python -m app.tasks.rotate_keys` moves them to the active key.
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c4a2e8f1b7d3"
+down_revision = "b91f4c7e2d58"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    data_keys = sa.table(
+        "data_keys",
+        sa.column("id", sa.Integer),
+        sa.column("user_id", sa.String),
+        sa.column("created_at", sa.DateTime),
+        sa.column("retired_at", sa.DateTime),
+    )
+    bind = op.get_bind()
+    active = bind.execute(
+        sa.select(data_keys.c.id, data_keys.c.user_id)
+        .where(data_keys.c.retired_at.is_(None))
+        .order_by(data_keys.c.user_id, data_keys.c.created_at.desc(), data_keys.c.id.desc())
+    ).all()
+    seen = set()
+    duplicates = []
+    for key_id, user_id in active:
+        if user_id in seen:
+            duplicates.append(key_id)
+        seen.add(user_id)
+    if duplicates:
+        bind.execute(
+            data_keys.update().where(data_keys.c.id.in_(duplicates)).values(retired_at=datetime.utcnow())
+        )
+
+    op.create_index(
+        "uq_data_keys_active_user",
+        "data_keys",
+        ["user_id"],
+        unique=True,
+        sqlite_where=sa.text("retired_at IS NULL"),
+        postgresql_where=sa.text("retired_at IS NULL"),
+    )
+
+
+def downgrade():
+    op.drop_index("uq_data_keys_active_user", table_name="data_keys")
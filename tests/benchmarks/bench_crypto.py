@@ -0,0 +1,226 @@
+"""
+Micro-benchmarks for app/utils/crypto.py
+
+    python -m tests.benchmarks.bench_crypto --rounds 2000 --output before.json
+    python -m tests.benchmarks.bench_crypto --rounds 2000 --baseline before.json
+
+Payloads are the values the app encrypts: a vendor name, and the parsed
+receipt JSON of a 1-item and a 40-item SFS receipt (tests/fixtures layout).
+For each payload it reports, as JSON:
+
+- single: encrypt_data / encrypt_bytes / decrypt_data / decrypt_json, one
+  value per call, as ops per second and p50/p95/p99 latency in microseconds;
+  text (base64) and binary forms, master key and data key
+- batch: encrypt_many / decrypt_many / decrypt_json_many on --batch values,
+  inline (one thread) and parallel (--threads), per value
+- cached: decrypt_data answered from the decrypted-value cache, and the cost
+  a cache adds to a miss
+- base64: stored size of the text form against the binary form, and the
+  time base64 adds to a decryption
+
+The cache is off except in "cached". With --baseline the previous report is
+compared: every throughput and latency figure gets its relative change
+(positive = faster). Run both sides on the same machine.
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import time
+from pathlib import Path
+from typing import Callable
+
+import cryptography
+
+from app.services.sfs_scraper import SFSScraper
+from app.utils.config import settings
+from app.utils.crypto import crypto_service
+from tests.benchmarks.bench_sfs_parser import synthetic_receipt
+
+
+def payloads() -> dict[str, str | dict]:
+    scraper = SFSScraper()
+    return {
+        "vendor": "FARMACIE EXEMPLU S.R.L.",
+        "receipt_1_item": scraper.parse_html(synthetic_receipt(1)),
+        "receipt_40_items": scraper.parse_html(synthetic_receipt(40)),
+    }
+
+
+def _latency(func: Callable, args: list, rounds: int) -> dict:
+    """Time func once per argument, cycling through args for `rounds` calls."""
+    samples = []
+    for index in range(rounds):
+        argument = args[index % len(args)]
+        started = time.perf_counter_ns()
+        func(argument)
+        samples.append(time.perf_counter_ns() - started)
+    ordered = sorted(samples)
+
+    def pick(pct: float) -> float:
+        return round(ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))] / 1000, 2)
+
+    return {
+        "ops_per_s": round(rounds / (sum(samples) / 1e9), 1),
+        "p50_us": pick(50),
+        "p95_us": pick(95),
+        "p99_us": pick(99),
+    }
+
+
+def _per_value(func: Callable, values: list, rounds: int) -> dict:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func(values)
+    elapsed = time.perf_counter() - started
+    count = rounds * len(values)
+    return {"values_per_s": round(count / elapsed, 1), "us_per_value": round(elapsed / count * 1e6, 2)}
+
+
+def single(payload: str | dict, key_id: int, rounds: int) -> dict:
+    is_json = isinstance(payload, dict)
+    texts = [crypto_service.encrypt_data(payload) for _ in range(64)]
+    binaries = [crypto_service.encrypt_bytes(payload) for _ in range(64)]
+    keyed = [crypto_service.encrypt_bytes(payload, key_id) for _ in range(64)]
+    decrypt = crypto_service.decrypt_json if is_json else crypto_service.decrypt_data
+
+    report = {
+        "encrypt_data": _latency(crypto_service.encrypt_data, [payload], rounds),
+        "encrypt_bytes": _latency(crypto_service.encrypt_bytes, [payload], rounds),
+        "encrypt_bytes_data_key": _latency(lambda value: crypto_service.encrypt_bytes(value, key_id), [payload], rounds),
+        "decrypt_data_text": _latency(crypto_service.decrypt_data, texts, rounds),
+        "decrypt_data_binary": _latency(crypto_service.decrypt_data, binaries, rounds),
+        "decrypt_data_binary_data_key": _latency(crypto_service.decrypt_data, keyed, rounds),
+    }
+    if is_json:
+        report["decrypt_json_text"] = _latency(decrypt, texts, rounds)
+        report["decrypt_json_binary"] = _latency(decrypt, binaries, rounds)
+    return report
+
+
+def batch(payload: str | dict, batch_size: int, threads: int, rounds: int) -> dict:
+    values = [payload] * batch_size
+    texts = crypto_service.encrypt_many(values)
+    binaries = crypto_service.encrypt_many(values, binary=True)
+    is_json = isinstance(payload, dict)
+
+    report = {}
+    for mode, workers in (("inline", 1), ("parallel", threads)):
+        settings.CRYPTO_BATCH_THREADS = workers
+        if crypto_service._executor is not None:
+            # Sized on first use: start a pool with the new thread count
+            crypto_service._executor.shutdown()
+            crypto_service._executor = None
+        report[mode] = {
+            "threads": workers,
+            "encrypt_many_binary": _per_value(lambda batch: crypto_service.encrypt_many(batch, binary=True), values, rounds),
+            "decrypt_many_text": _per_value(crypto_service.decrypt_many, texts, rounds),
+            "decrypt_many_binary": _per_value(crypto_service.decrypt_many, binaries, rounds),
+        }
+        if is_json:
+            report[mode]["decrypt_json_many_binary"] = _per_value(crypto_service.decrypt_json_many, binaries, rounds)
+    return report
+
+
+def cached(payload: str | dict, rounds: int) -> dict:
+    settings.CRYPTO_CACHE_ENABLED = True
+    crypto_service.cache.clear()
+    warm = [crypto_service.encrypt_bytes(payload) for _ in range(64)]
+    for value in warm:
+        crypto_service.decrypt_data(value)
+    # Every value distinct: each call is a miss followed by a put
+    cold = [crypto_service.encrypt_bytes(payload) for _ in range(rounds)]
+    report = {
+        "hit": _latency(crypto_service.decrypt_data, warm, rounds),
+        "miss": _latency(crypto_service.decrypt_data, cold, rounds),
+    }
+    crypto_service.cache.clear()
+    settings.CRYPTO_CACHE_ENABLED = False
+    report["uncached"] = _latency(crypto_service.decrypt_data, warm, rounds)
+    return report
+
+
+def base64_overhead(payload: str | dict, rounds: int) -> dict:
+    text = crypto_service.encrypt_data(payload)
+    binary = crypto_service.legacy_to_binary(text)
+    return {
+        "text_bytes": len(text),
+        "binary_bytes": len(binary),
+        "size_overhead": round(len(text) / len(binary) - 1, 3),
+        "b64decode": _latency(base64.b64decode, [text], rounds),
+        "b64encode": _latency(base64.b64encode, [binary[1:]], rounds),
+    }
+
+
+def flatten(report: dict, prefix: str = "") -> dict[str, float]:
+    """Throughput and latency figures by path, e.g. single.vendor.encrypt_data.p50_us"""
+    figures = {}
+    for name, value in report.items():
+        path = f"{prefix}.{name}" if prefix else name
+        if isinstance(value, dict):
+            figures.update(flatten(value, path))
+        elif name.endswith(("_per_s", "_us", "_per_value")) and isinstance(value, (int, float)):
+            figures[path] = value
+    return figures
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """Relative change of every figure in both reports; positive = faster."""
+    current = flatten(report["results"])
+    previous = flatten(baseline["results"])
+    changes = {}
+    for path, value in current.items():
+        before = previous.get(path)
+        if not before or not value:
+            continue
+        # Throughput: higher is better; latency: lower is better
+        change = value / before - 1 if path.endswith("_per_s") else before / value - 1
+        changes[path] = {"baseline": before, "current": value, "change": round(change, 3)}
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark encryption and decryption of typical values")
+    parser.add_argument("--rounds", type=int, default=2000, help="Calls per single-value measurement")
+    parser.add_argument("--batch", type=int, default=500, help="Values per batch call")
+    parser.add_argument("--batch-rounds", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=min(os.cpu_count() or 1, 8))
+    parser.add_argument("--output", default=None, help="Also write the report to this file")
+    parser.add_argument("--baseline", default=None, help="Earlier report to compare with")
+    args = parser.parse_args()
+
+    settings.CRYPTO_CACHE_ENABLED = False
+    settings.CRYPTO_PARALLEL_MIN_BATCH = 1
+    key_id, wrapped_key, master_key_id = crypto_service.generate_data_key()
+    crypto_service.add_data_key(key_id, crypto_service.unwrap_data_key(key_id, wrapped_key, master_key_id))
+
+    results = {"single": {}, "batch": {}, "cached": {}, "base64": {}}
+    for name, payload in payloads().items():
+        results["single"][name] = single(payload, key_id, args.rounds)
+        results["batch"][name] = batch(payload, args.batch, args.threads, args.batch_rounds)
+        results["cached"][name] = cached(payload, args.rounds)
+        results["base64"][name] = base64_overhead(payload, args.rounds)
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "cryptography": cryptography.__version__,
+            "cpus": os.cpu_count(),
+            "compression": settings.CRYPTO_COMPRESSION,
+            "compression_min_bytes": settings.CRYPTO_COMPRESSION_MIN_BYTES,
+        },
+        "parameters": {"rounds": args.rounds, "batch": args.batch, "batch_rounds": args.batch_rounds, "threads": args.threads},
+        "results": results,
+    }
+    if args.baseline:
+        report["comparison"] = compare(report, json.loads(Path(args.baseline).read_text(encoding="utf-8")))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
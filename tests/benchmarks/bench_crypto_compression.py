@@ -0,0 +1,161 @@
+"""
+Measure json_data storage with each compression codec
+
+    python -m tests.benchmarks.bench_crypto_compression --rounds 200 --items 40
+    python -m tests.benchmarks.bench_crypto_compression --from-db 1000
+
+Builds the payloads the app stores in expenses.json_data: parsed SFS receipts
+(the pages in tests/fixtures/sfs plus a synthetic receipt with --items lines),
+the per-item expenses a receipt is split into, and typical text expenses.
+With --from-db the latest N payloads from DATABASE_URL are used instead.
+
+For every codec it reports the stored size per payload, compared with the
+legacy base64 text in a JSON column (what PostgreSQL stored and sent before),
+and the encrypt/decrypt time per payload. The decrypted-value cache is off.
+"""
+import argparse
+import base64
+import json
+import time
+
+from app.services.sfs_scraper import SFSScraper
+from app.utils.config import settings
+from app.utils.crypto import crypto_service
+from tests.benchmarks.bench_sfs_parser import load_pages
+
+CODECS = ["none", "zlib", "zstd"]
+
+
+def receipt_payloads(items: int) -> list[dict]:
+    scraper = SFSScraper()
+    return [scraper.parse_html(html) for html in load_pages(items).values()]
+
+
+def item_payloads(receipts: list[dict]) -> list[dict]:
+    """One payload per item, as the bot stores receipts split into items."""
+    payloads = []
+    for receipt in receipts:
+        for item in receipt.get("items", []):
+            payloads.append({
+                "amount": item.get("total"),
+                "currency": receipt.get("currency", "MDL"),
+                "vendor": item.get("name"),
+                "category": receipt.get("category"),
+                "items": [item],
+                "purchase_date": receipt.get("purchase_date"),
+                "confidence": receipt.get("confidence", 0.8),
+                "fiscal_code": receipt.get("fiscal_code"),
+                "registration_number": receipt.get("registration_number"),
+                "address": receipt.get("address"),
+            })
+    return payloads
+
+
+def text_payloads() -> list[dict]:
+    samples = [
+        (50.0, "Cafenea", "Mâncare & Restaurante", "cafea și croissant"),
+        (230.0, "Petrom", "Transport", "benzină"),
+        (1200.0, "Moldtelecom", "Facturi & Utilități", "internet și televiziune"),
+        (89.9, "Farmacia Familiei", "Sănătate", "vitamine"),
+    ]
+    return [
+        {
+            "amount": amount,
+            "currency": "MDL",
+            "vendor": vendor,
+            "purchase_date": "2025-02-11",
+            "category": category,
+            "items": [],
+            "notes": notes,
+            "language": "ro",
+            "confidence": 0.9,
+        }
+        for amount, vendor, category, notes in samples
+    ]
+
+
+def database_payloads(limit: int) -> list[dict]:
+    from app.models.database import SessionLocal
+    from app.models.encrypted import decrypt_all
+    from app.models.expense import Expense
+
+    db = SessionLocal()
+    try:
+        expenses = db.query(Expense).order_by(Expense.created_at.desc()).limit(limit).all()
+        decrypt_all([expense.json_data for expense in expenses])
+        payloads = [expense.json_data.get() for expense in expenses if expense.json_data is not None]
+    finally:
+        db.close()
+    return [payload for payload in payloads if payload]
+
+
+def measure(payloads: list[dict], codec: str, rounds: int) -> dict:
+    settings.CRYPTO_COMPRESSION = codec
+    stored = [crypto_service.encrypt_bytes(payload) for payload in payloads]
+    plaintext_bytes = sum(len(json.dumps(payload).encode("utf-8")) for payload in payloads)
+    # Before: base64 of nonce + ciphertext, as a quoted JSON string
+    legacy_bytes = sum(len(base64.b64encode(bytes(12 + 16) + json.dumps(payload).encode("utf-8"))) + 2 for payload in payloads)
+    stored_bytes = sum(len(value) for value in stored)
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for payload in payloads:
+            crypto_service.encrypt_bytes(payload)
+    encrypt_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for value in stored:
+            crypto_service.decrypt_json(value)
+    decrypt_s = time.perf_counter() - started
+
+    operations = rounds * len(payloads)
+    return {
+        "compressed_share": round(sum(value[0] != 1 for value in stored) / len(stored), 3),
+        "plaintext_bytes_avg": round(plaintext_bytes / len(payloads), 1),
+        "stored_bytes_avg": round(stored_bytes / len(payloads), 1),
+        "saved_vs_legacy_text": round(1 - stored_bytes / legacy_bytes, 3),
+        "saved_vs_uncompressed_binary": round(1 - stored_bytes / (plaintext_bytes + len(payloads) * 29), 3),
+        "encrypt_us": round(encrypt_s / operations * 1e6, 1),
+        "decrypt_us": round(decrypt_s / operations * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure json_data compression before encryption")
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--items", type=int, default=40, help="Product lines in the synthetic receipt")
+    parser.add_argument("--from-db", type=int, default=0, help="Use the latest N payloads from DATABASE_URL")
+    parser.add_argument("--min-bytes", type=int, default=settings.CRYPTO_COMPRESSION_MIN_BYTES)
+    args = parser.parse_args()
+
+    settings.CRYPTO_CACHE_ENABLED = False
+    settings.CRYPTO_COMPRESSION_MIN_BYTES = args.min_bytes
+
+    if args.from_db:
+        shapes = {"database": database_payloads(args.from_db)}
+    else:
+        receipts = receipt_payloads(args.items)
+        shapes = {
+            "sfs_receipt": receipts,
+            "sfs_item": item_payloads(receipts),
+            "text_expense": text_payloads(),
+        }
+
+    report = {
+        "rounds": args.rounds,
+        "min_bytes": args.min_bytes,
+        "shapes": {
+            shape: {
+                "payloads": len(payloads),
+                "codecs": {codec: measure(payloads, codec, args.rounds) for codec in CODECS},
+            }
+            for shape, payloads in shapes.items()
+            if payloads
+        },
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark GroqClient against the local Groq stand-in
+
+    python -m tests.benchmarks.bench_groq_client --requests 200 --latency lognormal:0.4:0.5 --error-429-rate 0.05
+
+Reports throughput, latency percentiles, retries/429s seen by the stand-in and
+the scheduler state, without touching the real API.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.utils.config import settings
+from app.utils.metrics import LatencyRecorder
+from tests.stubs import serve_in_thread
+from tests.stubs.groq_server import GroqStubConfig, create_app
+
+TEXTS = ["pâine 12 lei", "taxi 70", "am dat 350 lei la benzinărie", "cafea și croissant 85", "farmacie 120 lei"]
+
+
+async def run(requests: int, concurrency: int) -> dict:
+    # Imported here so GROQ_BASE_URL is already pointing at the stand-in
+    from app.services.groq_client import GroqClient
+
+    client = GroqClient()
+    latency = LatencyRecorder(window=requests)
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await client.parse_text(TEXTS[index % len(TEXTS)], ["Alte cheltuieli"])
+            except Exception:
+                failures += 1
+            latency.record(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    p99 = latency.percentile(99)
+    return {
+        "requests": requests,
+        "failures": failures,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(requests / elapsed, 1),
+        "latency": {**latency.snapshot(), "p99_ms": round(p99 * 1000, 1) if p99 is not None else None},
+        "cascade": client.cascade_metrics.snapshot(),
+        "client": dict(client.request_stats),
+        "scheduler": client.scheduler.snapshot(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", default="lognormal:0.2:0.5")
+    parser.add_argument("--error-429-rate", type=float, default=0.0)
+    parser.add_argument("--requests-per-minute", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    config = GroqStubConfig(
+        latency=args.latency,
+        error_429_rate=args.error_429_rate,
+        retry_after_seconds=0,
+        requests_per_minute=args.requests_per_minute,
+        tokens_per_minute=args.requests_per_minute * 1000,
+        seed=args.seed,
+    )
+    app = create_app(config)
+    with serve_in_thread(app) as base_url:
+        settings.GROQ_BASE_URL = f"{base_url}/openai/v1"
+        report = asyncio.run(run(args.requests, args.concurrency))
+
+    report["stub"] = {"requests": len(app.state.stub.requests), "status_counts": app.state.stub.status_counts}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Measure how fast app.tasks.rotate_keys moves expenses between keys
+
+    python -m tests.benchmarks.bench_key_rotation --rows 20000 --users 50 --batch-sizes 200,1000
+    python -m tests.benchmarks.bench_key_rotation --database-url sqlite:////tmp/rotation.db
+
+Seeds a fresh database (a temporary SQLite file by default) with expenses
+encrypted the way they were before data keys (vendor and json_data with
+ENCRYPTION_KEY, receipts and text expenses mixed), then for every batch size
+times the job for:
+
+- master_to_data_keys: first run after the upgrade, every row is re-encrypted
+- new_data_keys: --new-keys, every row moves to a fresh key of its owner
+- noop: nothing to do, every row is only checked
+- rewrap: the master key was replaced, only the data keys are re-wrapped
+
+and reports rows (or keys) per second. The decrypted-value cache is off.
+"""
+import argparse
+import base64
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, DataKey, Expense, User
+from app.models.data_key import data_keys
+from app.models.encrypted import LazyDecrypted
+from app.tasks.rotate_keys import rewrap_data_keys, rotate_keys
+from app.utils.config import settings
+from app.utils.crypto import CryptoService, crypto_service
+from tests.benchmarks.bench_crypto_compression import item_payloads, receipt_payloads, text_payloads
+
+
+def payloads(items: int) -> list[dict]:
+    receipts = receipt_payloads(items)
+    return receipts + item_payloads(receipts) + text_payloads()
+
+
+def seed(engine, rows: int, users: int, items: int) -> None:
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    samples = payloads(items)
+    with engine.begin() as connection:
+        connection.execute(insert(User.__table__), [{"id": f"user-{index}", "username": f"user-{index}"} for index in range(users)])
+        for start in range(0, rows, 1000):
+            batch = [samples[index % len(samples)] for index in range(start, min(start + 1000, rows))]
+            vendors = crypto_service.encrypt_many([payload.get("vendor") or "Necunoscut" for payload in batch])
+            encrypted = crypto_service.encrypt_many(batch, binary=True)
+            connection.execute(insert(Expense.__table__), [
+                {
+                    "id": f"{start + offset:08d}",
+                    "owner_user_id": f"user-{(start + offset) % users}",
+                    "source": "manual",
+                    "vendor": LazyDecrypted(vendor),
+                    "json_data_bin": payload,
+                }
+                for offset, (vendor, payload) in enumerate(zip(vendors, encrypted))
+            ])
+
+
+def timed_rotation(session_factory, rows: int, batch_size: int, new_keys: bool) -> dict:
+    with session_factory() as db:
+        report = rotate_keys(db, batch_size=batch_size, new_keys=new_keys)
+    result = report.as_dict()
+    return {
+        "rotated": result["rotated"],
+        "current": result["current"],
+        "failed": result["failed"],
+        "elapsed_s": round(report.elapsed_s, 3),
+        "rows_per_second": round(rows / report.elapsed_s, 1),
+    }
+
+
+def timed_rewrap(session_factory, batch_size: int) -> dict:
+    # Replace the master key: the old one moves to the previous keys, as after an ENCRYPTION_KEY change
+    original_key = settings.ENCRYPTION_KEY
+    original_service = (crypto_service.key, crypto_service.aesgcm, crypto_service.master_key_id, dict(crypto_service._master_keys))
+    settings.ENCRYPTION_KEY = base64.b64encode(os.urandom(32)).decode()
+    replacement = CryptoService()
+    crypto_service.key, crypto_service.aesgcm, crypto_service.master_key_id = replacement.key, replacement.aesgcm, replacement.master_key_id
+    crypto_service._master_keys = {**replacement._master_keys, **original_service[3]}
+    try:
+        with session_factory() as db:
+            keys = db.query(DataKey).count()
+            started = time.perf_counter()
+            rewrapped = rewrap_data_keys(db, batch_size)
+            elapsed = time.perf_counter() - started
+    finally:
+        settings.ENCRYPTION_KEY = original_key
+        crypto_service.key, crypto_service.aesgcm, crypto_service.master_key_id, crypto_service._master_keys = original_service
+    return {"keys": keys, "rewrapped": rewrapped, "elapsed_s": round(elapsed, 4), "keys_per_second": round(rewrapped / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure expense key rotation throughput")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--items", type=int, default=40, help="Product lines in the synthetic receipt")
+    parser.add_argument("--batch-sizes", default="100,500,2000")
+    parser.add_argument("--database-url", default=None, help="Database to seed and rotate (it is emptied first)")
+    args = parser.parse_args()
+
+    settings.CRYPTO_CACHE_ENABLED = False
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url or f"sqlite:///{directory}/rotation.db"
+        engine = create_engine(database_url)
+        session_factory = sessionmaker(autoflush=False, bind=engine)
+        data_keys.bind = engine
+
+        results = {}
+        for batch_size in [int(value) for value in args.batch_sizes.split(",")]:
+            seed(engine, args.rows, args.users, args.items)
+            data_keys.forget()
+            results[batch_size] = {
+                "master_to_data_keys": timed_rotation(session_factory, args.rows, batch_size, new_keys=False),
+                "new_data_keys": timed_rotation(session_factory, args.rows, batch_size, new_keys=True),
+                "noop": timed_rotation(session_factory, args.rows, batch_size, new_keys=False),
+                "rewrap": timed_rewrap(session_factory, batch_size),
+            }
+        engine.dispose()
+
+    report = {
+        "database": engine.dialect.name,
+        "rows": args.rows,
+        "users": args.users,
+        "compression": settings.CRYPTO_COMPRESSION,
+        "batch_sizes": results,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark the SFS receipt HTML backends
+
+    python -m tests.benchmarks.bench_sfs_parser --rounds 200 --items 40
+
+Parses every page in tests/fixtures/sfs plus a synthetic receipt with --items
+product lines through SFSScraper.parse_html with each backend, checks that the
+backends agree and reports parse time and peak allocated memory per receipt.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+from app.services.sfs_html import BACKENDS, get_backend
+from app.services.sfs_scraper import SFSScraper
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "fixtures" / "sfs"
+
+
+def synthetic_receipt(items: int) -> str:
+    """Receipt page in the SFS layout with `items` product lines."""
+    lines = []
+    for index in range(1, items + 1):
+        price = 5 + index * 1.25
+        lines.append(
+            '<div class="flex justify-between items-center">'
+            f'<span>{index} Produs exemplu {index}</span><span>1.000 x {price:.2f}</span></div>'
+            '<div class="flex justify-between items-center">'
+            f'<span></span><span>{price:.2f} B</span></div>'
+        )
+    total = sum(5 + index * 1.25 for index in range(1, items + 1))
+    return (
+        '<html><body><div class="max-w-md">'
+        '<p class="text-gray-600">MAGAZIN EXEMPLU S.R.L.</p>'
+        '<p class="text-gray-600">COD FISCAL: 1012600000001</p>'
+        '<p class="text-gray-600">mun. Chişinău, str. Exemplu 1</p>'
+        '<p class="text-gray-600">NUMĂRUL DE ÎNREGISTRARE: J403001234</p>'
+        + "".join(lines)
+        + '<div class="flex justify-between items-center"><span>TOTAL</span>'
+        f'<span>{total:.2f} MDL</span></div>'
+        '<div class="flex justify-between items-center"><span>DATA 11.02.2025</span>'
+        '<span>ORA 14:35:12</span></div>'
+        '</div></body></html>'
+    )
+
+
+def load_pages(items: int) -> dict[str, str]:
+    pages = {path.stem: path.read_text(encoding="utf-8") for path in sorted(FIXTURES_DIR.glob("*.html"))}
+    pages[f"synthetic_{items}_items"] = synthetic_receipt(items)
+    return pages
+
+
+def measure(scraper: SFSScraper, pages: dict[str, str], rounds: int) -> dict:
+    documents = list(pages.values())
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for html in documents:
+            scraper.parse_html(html)
+    elapsed = time.perf_counter() - started
+    parsed = rounds * len(documents)
+
+    # Peak memory allocated while parsing one receipt, averaged over the pages
+    peaks = []
+    tracemalloc.start()
+    for html in documents:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        scraper.parse_html(html)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    return {
+        "receipts": parsed,
+        "receipts_per_s": round(parsed / elapsed, 1),
+        "ms_per_receipt": round(elapsed / parsed * 1000, 3),
+        "peak_alloc_kib_per_receipt": round(sum(peaks) / len(peaks) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SFS receipt HTML backends")
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--items", type=int, default=40, help="Product lines in the synthetic receipt")
+    args = parser.parse_args()
+
+    pages = load_pages(args.items)
+    scrapers = {name: SFSScraper(html_backend=get_backend(name)) for name in BACKENDS}
+
+    mismatches = [
+        page for page, html in pages.items()
+        if len({json.dumps(scraper.parse_html(html), sort_keys=True) for scraper in scrapers.values()}) > 1
+    ]
+
+    report = {
+        "pages": len(pages),
+        "rounds": args.rounds,
+        "mismatches": mismatches,
+        "backends": {name: measure(scraper, pages, args.rounds) for name, scraper in scrapers.items()},
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
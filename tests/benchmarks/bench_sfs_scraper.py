@@ -0,0 +1,97 @@
+"""
+Benchmark SFSScraper.parse_qr_url against the local SFS stand-in
+
+    python -m tests.benchmarks.bench_sfs_scraper --receipts 500 --concurrency 4 --latency lognormal:0.05:0.5
+
+Scrapes the fixture receipts from tests/fixtures/sfs over HTTP and reports
+receipts per second and latency percentiles. Every SFS host the scraper tries
+is routed to the stand-in, so nothing leaves the machine. Parse-only speed
+per HTML backend is in bench_sfs_parser.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+import app.services.sfs_scraper as sfs_module
+from app.services.sfs_scraper import SFSScraper
+from app.utils.metrics import LatencyRecorder
+from tests.stubs import serve_in_thread
+from tests.stubs.sfs_server import SFSStubConfig, create_app, fixture_names, receipt_path
+
+
+class _StubRouter(httpx.AsyncBaseTransport):
+    """Sends every request to the stand-in, keeping the path"""
+
+    def __init__(self, base_url: str):
+        self._target = httpx.URL(base_url)
+        self._transport = httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.url = request.url.copy_with(scheme=self._target.scheme, host=self._target.host, port=self._target.port)
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+async def run(base_url: str, receipts: int, concurrency: int) -> dict:
+    class RoutedClient(httpx.AsyncClient):
+        def __init__(self, *args, **kwargs):
+            # One transport per client: closing a client closes its transport
+            kwargs["transport"] = _StubRouter(base_url)
+            super().__init__(*args, **kwargs)
+
+    sfs_module.httpx.AsyncClient = RoutedClient
+    scraper = SFSScraper()
+    names = fixture_names()
+    latency = LatencyRecorder(window=receipts)
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await scraper.parse_qr_url(f"https://mev.sfs.md{receipt_path(names[index % len(names)])}")
+            except Exception:
+                failures += 1
+            latency.record(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(receipts)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "receipts": receipts,
+        "concurrency": concurrency,
+        "failures": failures,
+        "elapsed_s": round(elapsed, 3),
+        "receipts_per_s": round(receipts / elapsed, 1),
+        "latency": {**latency.snapshot(), "p99_ms": round(latency.percentile(99) * 1000, 1)},
+        "candidates": {pattern: dict(stats) for pattern, stats in scraper.pattern_stats.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SFS scraping against the local stand-in")
+    parser.add_argument("--receipts", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4, help="Keep at or below SFS_BULKHEAD_LIMIT")
+    parser.add_argument("--latency", default="lognormal:0.05:0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    app = create_app(SFSStubConfig(latency=args.latency, error_rate=args.error_rate, seed=args.seed))
+    with serve_in_thread(app) as base_url:
+        report = asyncio.run(run(base_url, args.receipts, args.concurrency))
+
+    report["stub"] = {"requests": len(app.state.stub.requests)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Load generator for the Telegram webhook
+
+Posts synthetic updates (text, photo, voice, callback) to
+/api/v1/telegram/webhook and reports updates per second and end-to-end
+p50/p95/p99 latency, overall and per update type.
+
+By default everything runs in-process against a temporary SQLite database,
+with the Telegram and Groq stand-ins from tests/stubs:
+
+    python -m tests.benchmarks.webhook_load --updates 500 --concurrency 20
+
+To load a running app instead, start it with TELEGRAM_API_BASE_URL and
+GROQ_BASE_URL pointing at the stand-ins and pass --target:
+
+    python -m tests.benchmarks.webhook_load --target http://127.0.0.1:8000 --chat-id <ALLOWED_GROUP_ID>
+"""
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+from contextlib import ExitStack
+from typing import Optional
+
+import httpx
+
+WEBHOOK_PATH = "/api/v1/telegram/webhook"
+
+TEXTS = [
+    "cafea 50 lei",
+    "taxi 70",
+    "pâine 12 lei",
+    "am cumpărat medicamente de la farmacie cu 230 lei",
+    "cina la restaurant cu prietenii 640 lei",
+]
+
+DEFAULT_MIX = "text=0.6,photo=0.15,voice=0.1,callback=0.15"
+
+
+class UpdateFactory:
+    """Builds Telegram updates with increasing update/message ids"""
+
+    def __init__(self, user_ids: list[int], chat_id: Optional[int], seed: int):
+        self.user_ids = user_ids
+        self.chat_id = chat_id
+        self._random = random.Random(seed)
+        self._ids = itertools.count(1)
+
+    def _message(self, user_id: int, **content) -> dict:
+        update_id = next(self._ids)
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "from": {"id": user_id, "is_bot": False, "first_name": "Load", "username": f"load{user_id}"},
+                "chat": {"id": self.chat_id or user_id, "type": "private"},
+                **content,
+            },
+        }
+
+    def start(self, user_id: int) -> dict:
+        return self._message(user_id, text="/start")
+
+    def build(self, kind: str, confirmation_ids: list[str]) -> dict:
+        user_id = self._random.choice(self.user_ids)
+
+        if kind == "text":
+            return self._message(user_id, text=self._random.choice(TEXTS))
+        if kind == "photo":
+            sizes = [{"file_id": f"photo-{size}", "width": size, "height": size} for size in (90, 320, 800)]
+            return self._message(user_id, photo=sizes)
+        if kind == "voice":
+            return self._message(user_id, voice={"file_id": "voice-1", "duration": 4, "mime_type": "audio/ogg"})
+
+        update_id = next(self._ids)
+        confirmation_id = self._random.choice(confirmation_ids) if confirmation_ids else "expired"
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": {"id": user_id, "is_bot": False, "first_name": "Load"},
+                "message": {"message_id": 1, "chat": {"id": self.chat_id or user_id, "type": "private"}},
+                "data": f"{self._random.choice(['confirm', 'cancel'])}_{confirmation_id}",
+            },
+        }
+
+
+def _parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        kind, weight = part.split("=")
+        mix[kind.strip()] = float(weight)
+    return mix
+
+
+def _percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(pct: float) -> float:
+        return round(ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))] * 1000, 1)
+
+    return {"count": len(ordered), "p50_ms": pick(50), "p95_ms": pick(95), "p99_ms": pick(99), "max_ms": pick(100)}
+
+
+async def run_load(
+    target: str,
+    factory: UpdateFactory,
+    updates: int,
+    concurrency: int,
+    mix: dict[str, float],
+    telegram_stub=None,
+) -> dict:
+    latencies: dict[str, list[float]] = {kind: [] for kind in mix}
+    errors: dict[str, int] = {}
+    kinds = random.Random(0).choices(list(mix), weights=list(mix.values()), k=updates)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    def confirmation_ids() -> list[str]:
+        if telegram_stub is None:
+            return []
+        ids = []
+        for call in telegram_stub.calls[-200:]:
+            markup = call["payload"].get("reply_markup") or {}
+            for row in markup.get("inline_keyboard", []):
+                for button in row:
+                    if button.get("callback_data", "").startswith("confirm_"):
+                        ids.append(button["callback_data"][len("confirm_"):])
+        return ids
+
+    async with httpx.AsyncClient(base_url=target, timeout=120.0) as client:
+        # Register every user first so concurrent updates do not race on user creation
+        for user_id in factory.user_ids:
+            await client.post(WEBHOOK_PATH, json=factory.start(user_id))
+
+        async def send(kind: str):
+            async with semaphore:
+                update = factory.build(kind, confirmation_ids() if kind == "callback" else [])
+                started = time.perf_counter()
+                try:
+                    response = await client.post(WEBHOOK_PATH, json=update)
+                    ok = response.status_code == 200 and response.json().get("ok", False)
+                except httpx.HTTPError:
+                    ok = False
+                latencies[kind].append(time.perf_counter() - started)
+                if not ok:
+                    errors[kind] = errors.get(kind, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(send(kind) for kind in kinds))
+        elapsed = time.perf_counter() - started
+
+    report = {
+        "updates": updates,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "updates_per_s": round(updates / elapsed, 1),
+        "latency": _percentiles([sample for samples in latencies.values() for sample in samples]),
+        "by_type": {kind: _percentiles(samples) for kind, samples in latencies.items()},
+        "errors": errors,
+    }
+    if telegram_stub is not None:
+        methods: dict[str, int] = {}
+        for call in telegram_stub.calls:
+            methods[call["method"]] = methods.get(call["method"], 0) + 1
+        report["telegram_calls"] = methods
+    return report
+
+
+def _configure_in_process_env(database_path: str, telegram_url: str, groq_url: str) -> None:
+    """Point the app at the stand-ins; must run before anything imports app.*"""
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{database_path}",
+        "TELEGRAM_API_BASE_URL": telegram_url,
+        "GROQ_BASE_URL": f"{groq_url}/openai/v1",
+        "ALLOWED_GROUP_ID": "0",
+        "ALLOWED_USER_IDS": "",
+        "TELEGRAM_TEXT_DEBOUNCE_SECONDS": "0",
+    })
+    os.environ.setdefault("GROQ_API_KEY", "load-test")
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "load-test")
+    os.environ.setdefault("ENCRYPTION_KEY", base64.b64encode(bytes(32)).decode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the Telegram webhook with synthetic updates")
+    parser.add_argument("--target", default=None, help="Base URL of a running app (default: in-process)")
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--chat-id", type=int, default=None, help="Send every update to this chat (e.g. ALLOWED_GROUP_ID)")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--telegram-latency", default="lognormal:0.05:0.5")
+    parser.add_argument("--telegram-429-rate", type=float, default=0.0)
+    parser.add_argument("--groq-latency", default="lognormal:0.3:0.5")
+    parser.add_argument("--groq-429-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    from tests.stubs import serve_in_thread
+    from tests.stubs import groq_server, telegram_server
+
+    mix = _parse_mix(args.mix)
+    factory = UpdateFactory([100000 + index for index in range(args.users)], args.chat_id, args.seed)
+
+    with ExitStack() as stack:
+        telegram_stub = None
+        target = args.target
+
+        if target is None:
+            telegram_app = telegram_server.create_app(telegram_server.TelegramStubConfig(
+                latency=args.telegram_latency,
+                error_429_rate=args.telegram_429_rate,
+                seed=args.seed,
+            ))
+            groq_app = groq_server.create_app(groq_server.GroqStubConfig(
+                latency=args.groq_latency,
+                error_429_rate=args.groq_429_rate,
+                retry_after_seconds=0,
+                requests_per_minute=100000,
+                tokens_per_minute=100000000,
+                seed=args.seed,
+            ))
+            telegram_stub = telegram_app.state.stub
+            telegram_url = stack.enter_context(serve_in_thread(telegram_app))
+            groq_url = stack.enter_context(serve_in_thread(groq_app))
+
+            database_dir = stack.enter_context(tempfile.TemporaryDirectory())
+            _configure_in_process_env(os.path.join(database_dir, "load.db"), telegram_url, groq_url)
+
+            from app.main import app as api_app
+            from app.models import Base
+            from app.models.database import engine
+
+            Base.metadata.create_all(engine)
+            target = stack.enter_context(serve_in_thread(api_app))
+
+        report = asyncio.run(run_load(target, factory, args.updates, args.concurrency, mix, telegram_stub))
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
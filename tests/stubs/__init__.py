@@ -0,0 +1,65 @@
+"""
+Local stand-ins for the external APIs the app talks to
+"""
+import math
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def serve_in_thread(app, port: int = 0) -> Iterator[str]:
+    """Run an ASGI app with uvicorn in a background thread and yield its base URL."""
+    import uvicorn
+
+    port = port or free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+class LatencyModel:
+    """
+    Samples response latencies in seconds.
+
+    Specs: "0" (none), "fixed:0.2", "uniform:0.1:0.5", "normal:0.3:0.05",
+    "lognormal:<median>:<sigma>" (long tail, closest to real API latency).
+    """
+
+    def __init__(self, spec: str = "0", seed: Optional[int] = None):
+        self.spec = spec
+        self._random = random.Random(seed)
+        kind, *args = spec.split(":")
+        values = [float(arg) for arg in args]
+
+        samplers: dict[str, Callable[[], float]] = {
+            "fixed": lambda: values[0],
+            "uniform": lambda: self._random.uniform(values[0], values[1]),
+            "normal": lambda: self._random.gauss(values[0], values[1]),
+            "lognormal": lambda: self._random.lognormvariate(math.log(values[0]), values[1]),
+        }
+        if kind not in samplers and kind.replace(".", "", 1).isdigit():
+            values = [float(kind)]
+            kind = "fixed"
+        if kind not in samplers:
+            raise ValueError(f"Unknown latency spec: {spec}")
+        self._sample = samplers[kind]
+
+    def sample(self) -> float:
+        return max(0.0, self._sample())
@@ -0,0 +1,269 @@
+"""
+Local stand-in for the Groq OpenAI-compatible API
+
+Implements the endpoints GroqClient uses (/chat/completions, including
+streaming, and /audio/transcriptions) with deterministic or scripted answers,
+configurable latency, rate-limit headers and 429 injection, so retries,
+caching and concurrency can be tested and benchmarked offline.
+
+Run standalone and point the app at it:
+
+    python -m tests.stubs.groq_server --port 8081 --latency lognormal:0.4:0.5 --error-429-rate 0.05
+    GROQ_BASE_URL=http://127.0.0.1:8081/openai/v1
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from tests.stubs import LatencyModel
+
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+@dataclass
+class GroqStubConfig:
+    latency: str = "0"
+    # Latencies used in order, one per chat request, before falling back to `latency`
+    latencies: list[float] = field(default_factory=list)
+    # Models answered with 404 model_not_found
+    unavailable_models: list[str] = field(default_factory=list)
+    # Delay between streamed chunks
+    stream_chunk_delay: float = 0.0
+    # Share of requests answered with 429 regardless of the budget
+    error_429_rate: float = 0.0
+    # The first N requests are answered with 429
+    error_429_first: int = 0
+    retry_after_seconds: float = 1.0
+    # Per-minute budgets reported in x-ratelimit-* headers (and enforced)
+    requests_per_minute: int = 30
+    tokens_per_minute: int = 6000
+    enforce_limits: bool = False
+    seed: Optional[int] = None
+    # Completions returned in order before falling back to the deterministic answer
+    scripted: list[Any] = field(default_factory=list)
+    transcription_text: str = "am cheltuit 50 lei pe cafea"
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+def _expense_for(text: str) -> dict:
+    """Deterministic expense answer for a text: first number is the amount."""
+    match = _NUMBER.search(text)
+    amount = float(match.group(0).replace(",", ".")) if match else 0.0
+    words = [word for word in re.findall(r"[^\W\d_]+", text) if len(word) > 2]
+    name = words[0] if words else "produs"
+    return {
+        "amount": amount,
+        "currency": "MDL",
+        "vendor": "",
+        "purchase_date": None,
+        "category": "Alte cheltuieli",
+        "items": [{"name": name, "qty": 1, "price": amount, "category": "Alte cheltuieli"}],
+        "notes": "",
+        "language": "ro",
+        "confidence": 0.9,
+    }
+
+
+def default_completion(payload: dict) -> dict:
+    """Answer a chat payload the way GroqClient expects, without any model."""
+    messages = payload.get("messages") or []
+    system = _message_text(messages[0]) if messages else ""
+    user = _message_text(messages[-1]) if messages else ""
+
+    if "Mod lot" in system:
+        lines = [re.sub(r"^\d+\.\s*", "", line) for line in user.splitlines() if line.strip()]
+        return {"results": [_expense_for(line) for line in lines]}
+    if "keys: name, icon, color" in user:
+        palette = re.findall(r"#[0-9A-Fa-f]{6}", user)
+        return {"name": "Categorie nouă", "icon": "🏷️", "color": palette[0] if palette else "#10B981"}
+    return _expense_for(user)
+
+
+class GroqStub:
+    """State of one stand-in server: config, budgets and recorded requests"""
+
+    def __init__(self, config: Optional[GroqStubConfig] = None):
+        self.config = config or GroqStubConfig()
+        self.latency = LatencyModel(self.config.latency, self.config.seed)
+        self._random = random.Random(self.config.seed)
+        self._scripted = deque(self.config.scripted)
+        self._latencies = deque(self.config.latencies)
+        self._window_started = time.monotonic()
+        self._requests_used = 0
+        self._tokens_used = 0
+        self.requests: list[dict] = []
+        self.status_counts: dict[int, int] = {}
+
+    def _roll_window(self) -> float:
+        """Reset the per-minute budgets when the window is over; return seconds left."""
+        elapsed = time.monotonic() - self._window_started
+        if elapsed >= 60:
+            self._window_started = time.monotonic()
+            self._requests_used = 0
+            self._tokens_used = 0
+            elapsed = 0.0
+        return 60 - elapsed
+
+    def _rate_limit_headers(self, reset_in: float) -> dict:
+        return {
+            "x-ratelimit-limit-requests": str(self.config.requests_per_minute),
+            "x-ratelimit-remaining-requests": str(max(0, self.config.requests_per_minute - self._requests_used)),
+            "x-ratelimit-reset-requests": f"{reset_in:.2f}s",
+            "x-ratelimit-limit-tokens": str(self.config.tokens_per_minute),
+            "x-ratelimit-remaining-tokens": str(max(0, self.config.tokens_per_minute - self._tokens_used)),
+            "x-ratelimit-reset-tokens": f"{reset_in:.2f}s",
+        }
+
+    def admit(self, endpoint: str, payload: dict) -> tuple[Optional[JSONResponse], dict]:
+        """Record a request and decide whether it is rate limited or its model unavailable."""
+        reset_in = self._roll_window()
+        self.requests.append({"endpoint": endpoint, "payload": payload, "at": time.time()})
+
+        tokens = len(json.dumps(payload.get("messages", []), ensure_ascii=False)) // 4
+        over_budget = self.config.enforce_limits and (
+            self._requests_used >= self.config.requests_per_minute
+            or self._tokens_used + tokens > self.config.tokens_per_minute
+        )
+        injected = (
+            len(self.requests) <= self.config.error_429_first
+            or self._random.random() < self.config.error_429_rate
+        )
+
+        if over_budget or injected:
+            retry_after = reset_in if over_budget else self.config.retry_after_seconds
+            headers = {**self._rate_limit_headers(reset_in), "retry-after": f"{retry_after:.0f}"}
+            self.status_counts[429] = self.status_counts.get(429, 0) + 1
+            body = {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}}
+            return JSONResponse(body, status_code=429, headers=headers), headers
+
+        if payload.get("model") in self.config.unavailable_models:
+            self.status_counts[404] = self.status_counts.get(404, 0) + 1
+            body = {"error": {"message": "The model does not exist", "type": "invalid_request_error", "code": "model_not_found"}}
+            return JSONResponse(body, status_code=404), {}
+
+        self._requests_used += 1
+        self._tokens_used += tokens + int(payload.get("max_tokens") or 0) // 4
+        self.status_counts[200] = self.status_counts.get(200, 0) + 1
+        return None, self._rate_limit_headers(reset_in)
+
+    def next_latency(self) -> float:
+        return self._latencies.popleft() if self._latencies else self.latency.sample()
+
+    def next_content(self, payload: dict) -> str:
+        if self._scripted:
+            scripted = self._scripted.popleft()
+            if callable(scripted):
+                scripted = scripted(payload)
+            return scripted if isinstance(scripted, str) else json.dumps(scripted, ensure_ascii=False)
+        return json.dumps(default_completion(payload), ensure_ascii=False)
+
+
+def create_app(config: Optional[GroqStubConfig] = None) -> FastAPI:
+    """Build the stand-in app; the GroqStub instance is available as app.state.stub."""
+    stub = GroqStub(config)
+    app = FastAPI(title="Groq stand-in")
+    app.state.stub = stub
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        rejected, headers = stub.admit("chat/completions", payload)
+        if rejected:
+            return rejected
+
+        await asyncio.sleep(stub.next_latency())
+        content = stub.next_content(payload)
+        model = payload.get("model", "stub")
+        created = int(time.time())
+
+        if payload.get("stream"):
+            async def events():
+                step = 12
+                for start in range(0, len(content), step):
+                    chunk = {
+                        "id": "chatcmpl-stub",
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {"content": content[start:start + step]}, "finish_reason": None}],
+                    }
+                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                    if stub.config.stream_chunk_delay:
+                        await asyncio.sleep(stub.config.stream_chunk_delay)
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+        body = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(content) // 4, "total_tokens": len(content) // 4},
+        }
+        return JSONResponse(body, headers=headers)
+
+    @app.post("/openai/v1/audio/transcriptions")
+    async def audio_transcriptions(request: Request):
+        form = await request.form()
+        upload = form.get("file")
+        size = len(await upload.read()) if upload is not None else 0
+        rejected, headers = stub.admit("audio/transcriptions", {"model": form.get("model"), "bytes": size})
+        if rejected:
+            return rejected
+
+        await asyncio.sleep(stub.latency.sample())
+        return JSONResponse({"text": stub.config.transcription_text}, headers=headers)
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": len(stub.requests), "status_counts": stub.status_counts}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local Groq API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", default="lognormal:0.4:0.5")
+    parser.add_argument("--stream-chunk-delay", type=float, default=0.02)
+    parser.add_argument("--error-429-rate", type=float, default=0.0)
+    parser.add_argument("--requests-per-minute", type=int, default=30)
+    parser.add_argument("--tokens-per-minute", type=int, default=6000)
+    parser.add_argument("--enforce-limits", action="store_true")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = GroqStubConfig(
+        latency=args.latency,
+        stream_chunk_delay=args.stream_chunk_delay,
+        error_429_rate=args.error_429_rate,
+        requests_per_minute=args.requests_per_minute,
+        tokens_per_minute=args.tokens_per_minute,
+        enforce_limits=args.enforce_limits,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Local stand-in for the SFS receipt verifier
+
+Serves the receipt pages in tests/fixtures/sfs. The first segment of the
+receipt code picks the fixture, so
+/receipt-verifier/multi_item/60.49/1941/2025-02-11 returns multi_item.html;
+both the mev (/receipt-verifier/...) and sift (/receipt/...) layouts are
+answered. Unknown receipts get a 404, like the real site.
+
+Run standalone and send the bot links pointing at it:
+
+    python -m tests.stubs.sfs_server --port 8083 --latency lognormal:0.3:0.5
+    http://127.0.0.1:8083/receipt-verifier/tva_lines/151.80/1/2025-03-03
+"""
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse, PlainTextResponse
+
+from tests.stubs import LatencyModel
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "fixtures" / "sfs"
+
+
+def fixture_names() -> list[str]:
+    return sorted(path.stem for path in FIXTURES_DIR.glob("*.html"))
+
+
+def receipt_path(name: str, code: str = "0.00/1/2025-01-01") -> str:
+    """Path of a fixture receipt on the stand-in."""
+    return f"/receipt-verifier/{name}/{code}"
+
+
+@dataclass
+class SFSStubConfig:
+    latency: str = "0"
+    # Share of requests answered with 503, as SFS does under load
+    error_rate: float = 0.0
+    seed: Optional[int] = None
+
+
+class SFSStub:
+    """State of one stand-in server: fixture pages and a request log"""
+
+    def __init__(self, config: Optional[SFSStubConfig] = None):
+        self.config = config or SFSStubConfig()
+        self.latency = LatencyModel(self.config.latency, self.config.seed)
+        self._random = random.Random(self.config.seed)
+        self.pages = {path.stem: path.read_text(encoding="utf-8") for path in FIXTURES_DIR.glob("*.html")}
+        self.requests: list[str] = []
+
+    async def answer(self, path: str, code: str):
+        self.requests.append(path)
+        await asyncio.sleep(self.latency.sample())
+        if self._random.random() < self.config.error_rate:
+            return PlainTextResponse("Service Unavailable", status_code=503)
+
+        page = self.pages.get(code.strip("/").split("/")[0])
+        if page is None:
+            return PlainTextResponse("Not Found", status_code=404)
+        return HTMLResponse(page)
+
+
+def create_app(config: Optional[SFSStubConfig] = None) -> FastAPI:
+    """Build the stand-in app; the SFSStub instance is available as app.state.stub."""
+    stub = SFSStub(config)
+    app = FastAPI(title="SFS receipt verifier stand-in")
+    app.state.stub = stub
+
+    @app.get("/receipt-verifier/{code:path}")
+    async def receipt_verifier(code: str):
+        return await stub.answer(f"/receipt-verifier/{code}", code)
+
+    @app.get("/receipt/{code:path}")
+    async def receipt(code: str):
+        return await stub.answer(f"/receipt/{code}", code)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local SFS receipt verifier stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8083)
+    parser.add_argument("--latency", default="lognormal:0.3:0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = SFSStubConfig(latency=args.latency, error_rate=args.error_rate, seed=args.seed)
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
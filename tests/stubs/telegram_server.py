@@ -0,0 +1,192 @@
+"""
+Local stand-in for the Telegram Bot API
+
+Implements the methods TelegramBot uses (sendMessage, editMessageText,
+sendPhoto, getFile, file download, setWebhook, deleteWebhook,
+getWebhookInfo), records every call, simulates latency and answers 429 with
+retry_after, so the webhook can be load-tested end to end offline.
+
+Run standalone and point the app at it:
+
+    python -m tests.stubs.telegram_server --port 8082 --latency lognormal:0.05:0.5
+    TELEGRAM_API_BASE_URL=http://127.0.0.1:8082
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from tests.stubs import LatencyModel
+
+
+def _sample_photo() -> bytes:
+    """Small receipt-like JPEG (white paper on a dark background)."""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (640, 960), (40, 40, 40))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((120, 80, 520, 880), fill=(245, 245, 240))
+    for line in range(12):
+        draw.line((160, 140 + line * 50, 480, 140 + line * 50), fill=(90, 90, 90), width=3)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=80)
+    return buffer.getvalue()
+
+
+# Not a playable note: the app falls back to uploading it as-is
+_SAMPLE_VOICE = b"OggS" + bytes(2048)
+
+
+@dataclass
+class TelegramStubConfig:
+    latency: str = "0"
+    # Share of calls answered with 429 and the retry_after they carry
+    error_429_rate: float = 0.0
+    retry_after_seconds: int = 1
+    seed: Optional[int] = None
+
+
+class TelegramStub:
+    """State of one stand-in server: recorded calls, messages and files"""
+
+    def __init__(self, config: Optional[TelegramStubConfig] = None):
+        self.config = config or TelegramStubConfig()
+        self.latency = LatencyModel(self.config.latency, self.config.seed)
+        self._random = random.Random(self.config.seed)
+        self._message_ids = itertools.count(1)
+        self.calls: list[dict] = []
+        self.messages: dict[tuple[int, int], str] = {}
+        self.webhook_url = ""
+        self.files = {"photos/receipt.jpg": _sample_photo(), "voice/note.oga": _SAMPLE_VOICE}
+
+    def record(self, method: str, payload: dict) -> None:
+        self.calls.append({"method": method, "payload": payload, "at": time.time()})
+
+    def calls_for(self, method: str) -> list[dict]:
+        return [call for call in self.calls if call["method"] == method]
+
+    def rate_limited(self) -> Optional[JSONResponse]:
+        if self._random.random() >= self.config.error_429_rate:
+            return None
+        retry_after = self.config.retry_after_seconds
+        return JSONResponse(
+            {
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after},
+            },
+            status_code=429,
+        )
+
+    def handle(self, method: str, payload: dict) -> JSONResponse:
+        chat_id = payload.get("chat_id")
+
+        if method in ("sendMessage", "sendPhoto"):
+            message_id = next(self._message_ids)
+            self.messages[(chat_id, message_id)] = payload.get("text") or payload.get("caption") or ""
+            return _ok({"message_id": message_id, "chat": {"id": chat_id}, "date": int(time.time()), "text": payload.get("text")})
+
+        if method == "editMessageText":
+            key = (chat_id, payload.get("message_id"))
+            if key not in self.messages:
+                return _error(400, "Bad Request: message to edit not found")
+            if self.messages[key] == payload.get("text"):
+                return _error(400, "Bad Request: message is not modified")
+            self.messages[key] = payload.get("text", "")
+            return _ok({"message_id": key[1], "chat": {"id": chat_id}, "date": int(time.time()), "text": payload.get("text")})
+
+        if method == "getFile":
+            file_id = payload.get("file_id", "")
+            file_path = "voice/note.oga" if "voice" in file_id else "photos/receipt.jpg"
+            return _ok({"file_id": file_id, "file_size": len(self.files[file_path]), "file_path": file_path})
+
+        if method == "setWebhook":
+            self.webhook_url = payload.get("url", "")
+            return _ok(True)
+
+        if method == "deleteWebhook":
+            self.webhook_url = ""
+            return _ok(True)
+
+        if method == "getWebhookInfo":
+            return _ok({"url": self.webhook_url, "pending_update_count": 0})
+
+        if method == "answerCallbackQuery":
+            return _ok(True)
+
+        return _error(404, "Not Found: method not found")
+
+
+def _ok(result) -> JSONResponse:
+    return JSONResponse({"ok": True, "result": result})
+
+
+def _error(code: int, description: str) -> JSONResponse:
+    return JSONResponse({"ok": False, "error_code": code, "description": description}, status_code=code)
+
+
+def create_app(config: Optional[TelegramStubConfig] = None) -> FastAPI:
+    """Build the stand-in app; the TelegramStub instance is available as app.state.stub."""
+    stub = TelegramStub(config)
+    app = FastAPI(title="Telegram Bot API stand-in")
+    app.state.stub = stub
+
+    @app.api_route("/bot{token}/{method}", methods=["GET", "POST"])
+    async def bot_method(token: str, method: str, request: Request):
+        body = await request.body()
+        payload = await request.json() if body else {}
+        stub.record(method, payload)
+
+        await asyncio.sleep(stub.latency.sample())
+        return stub.rate_limited() or stub.handle(method, payload)
+
+    @app.get("/file/bot{token}/{file_path:path}")
+    async def download(token: str, file_path: str):
+        stub.record("download", {"file_path": file_path})
+        await asyncio.sleep(stub.latency.sample())
+        content = stub.files.get(file_path)
+        if content is None:
+            return _error(404, "Not Found")
+        return Response(content, media_type="application/octet-stream")
+
+    @app.get("/stats")
+    async def stats():
+        counts: dict[str, int] = {}
+        for call in stub.calls:
+            counts[call["method"]] = counts.get(call["method"], 0) + 1
+        return {"calls": len(stub.calls), "methods": counts}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local Telegram Bot API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--latency", default="lognormal:0.05:0.5")
+    parser.add_argument("--error-429-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = TelegramStubConfig(
+        latency=args.latency,
+        error_429_rate=args.error_429_rate,
+        retry_after_seconds=args.retry_after,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
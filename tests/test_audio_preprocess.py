@@ -0,0 +1,61 @@
+import subprocess
+
+import numpy as np
+
+import app.utils.audio_preprocess as audio_module
+from app.utils.audio_preprocess import _frame_levels, _padded_bounds, _plan_chunks, find_speech_segments
+
+
+def _levels(pattern: str) -> np.ndarray:
+    """One 20ms frame per character: '#' speech, '.' silence"""
+    return np.array([-20.0 if char == "#" else -70.0 for char in pattern])
+
+
+def test_leading_and_trailing_silence_trimmed():
+    """Test that speech segments exclude silence at both ends"""
+    segments = find_speech_segments(_levels("." * 50 + "#" * 30 + "." * 40), silence_db=-40.0)
+
+    assert segments == [(50, 80)]
+
+
+def test_short_pauses_are_merged():
+    """Test that pauses under the minimum gap do not split a segment"""
+    segments = find_speech_segments(_levels("#" * 10 + "." * 5 + "#" * 10 + "." * 50 + "#" * 10), silence_db=-40.0)
+
+    assert segments == [(0, 25), (75, 85)]
+
+
+def test_silent_note_has_no_segments():
+    """Test that digital silence yields no speech"""
+    levels = _frame_levels(np.zeros(16000, dtype=np.int16))
+
+    assert find_speech_segments(levels, silence_db=-40.0) == []
+
+
+def test_chunks_cut_at_pauses_and_hard_split():
+    """Test chunk planning respects the maximum chunk length"""
+    assert _plan_chunks([(0, 40), (60, 90), (120, 150)], max_chunk_frames=100) == [(0, 90), (120, 150)]
+    assert _plan_chunks([(0, 250)], max_chunk_frames=100) == [(0, 100), (100, 200), (200, 250)]
+
+
+def test_padding_never_overlaps_neighbouring_chunks():
+    """Test that hard splits are cut without padding and pauses are shared at their middle"""
+    hard_split = _padded_bounds([(0, 100), (100, 200), (200, 250)], padding=10, total_frames=260)
+    at_pauses = _padded_bounds([(0, 90), (96, 150)], padding=10, total_frames=150)
+
+    assert hard_split == [(0, 100), (100, 200), (200, 260)]
+    assert at_pauses == [(0, 93), (93, 150)]
+
+
+def test_ffmpeg_timeout_falls_back_to_the_original(monkeypatch, tmp_path):
+    """Test that a hanging ffmpeg is given up on instead of blocking the handler"""
+    def hanging_ffmpeg(command, **kwargs):
+        assert kwargs["timeout"] > 0
+        raise subprocess.TimeoutExpired(command, kwargs["timeout"])
+
+    monkeypatch.setattr(audio_module.shutil, "which", lambda name: "/usr/bin/ffmpeg")
+    monkeypatch.setattr(audio_module.subprocess, "run", hanging_ffmpeg)
+    voice = tmp_path / "voice.ogg"
+    voice.write_bytes(b"OggS")
+
+    assert audio_module.prepare_voice_chunks(str(voice)) is None
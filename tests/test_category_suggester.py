@@ -0,0 +1,53 @@
+import asyncio
+
+from app.services import category_suggester as suggester_module
+from app.services.category_suggester import CategorySuggester, normalize_description
+
+
+def test_strong_match_answers_locally():
+    """Test diacritic-insensitive, inflected descriptions match a preset"""
+    suggester = CategorySuggester()
+
+    assert suggester.match("Benzină pentru mașină")["name"] == "Transport"
+    assert suggester.match("Cafenele și restaurante")["name"] == "Mâncare & Restaurante"
+    assert suggester.match("vacanță la mare, hotel")["name"] == "Călătorii"
+
+
+def test_unknown_description_is_ambiguous():
+    """Test that descriptions without keywords are left to the LLM"""
+    assert CategorySuggester().match("ceva complet diferit") is None
+
+
+def test_llm_answers_are_cached_per_normalized_description(monkeypatch):
+    """Test that Groq is called once for equivalent ambiguous descriptions"""
+    calls = []
+
+    async def fake_suggest(description, priority=None):
+        calls.append(description)
+        return {"name": "Hobby", "icon": "🎨", "color": "#A78BFA"}
+
+    monkeypatch.setattr(suggester_module.groq_client, "suggest_category", fake_suggest)
+    suggester = CategorySuggester()
+
+    first = asyncio.run(suggester.suggest("Pictură în ulei"))
+    second = asyncio.run(suggester.suggest("  pictura in ULEI "))
+
+    assert first == second == {"name": "Hobby", "icon": "🎨", "color": "#A78BFA"}
+    assert calls == ["Pictură în ulei"]
+    assert suggester.stats["llm"] == 1 and suggester.stats["cache_hit"] == 1
+    assert normalize_description("  pictura in ULEI ") == "pictura in ulei"
+
+
+def test_groq_failure_falls_back_to_best_guess(monkeypatch):
+    """Test the local best guess when Groq is unavailable"""
+
+    async def failing_suggest(description, priority=None):
+        raise RuntimeError("Groq down")
+
+    monkeypatch.setattr(suggester_module.groq_client, "suggest_category", failing_suggest)
+    suggester = CategorySuggester()
+
+    result = asyncio.run(suggester.suggest("ceva complet diferit"))
+
+    assert result["name"]
+    assert suggester.stats["fallback"] == 1
@@ -1,5 +1,20 @@
+import base64
+import threading
+
 import pytest
-from app.utils.crypto import encrypt_data, decrypt_data, decrypt_json
+from app.utils.config import settings
+from app.utils.crypto import (
+    CryptoService,
+    DecryptedCache,
+    crypto_service,
+    decrypt_data,
+    decrypt_json,
+    decrypt_json_many,
+    decrypt_many,
+    encrypt_bytes,
+    encrypt_data,
+    encrypt_many,
+)
 
 
 def test_encrypt_decrypt_string():
@@ -77,3 +92,292 @@ def test_decrypt_json_empty():
     """Test decrypting empty encrypted JSON"""
     result = decrypt_json("")
     assert result == {}
+
+
+def test_encrypt_decrypt_many_roundtrip():
+    """Test that batch encryption and decryption match the scalar functions"""
+    values = ["Kaufland", {"amount": 12.5, "category": "Transport"}, "Cheltuială: pâine și brânză", ""]
+
+    encrypted = encrypt_many(values)
+
+    assert [decrypt_data(value) for value in encrypted] == decrypt_many(encrypted)
+    assert decrypt_many(encrypted)[0] == "Kaufland"
+    assert decrypt_json_many(encrypted[1:2]) == [{"amount": 12.5, "category": "Transport"}]
+    assert decrypt_many([]) == []
+
+
+def test_decrypt_many_empty_and_invalid_values():
+    """Test empty values and the strict flag of batch decryption"""
+    encrypted = encrypt_data("ok")
+
+    assert decrypt_many([None, "", encrypted]) == ["", "", "ok"]
+    assert decrypt_json_many([None, encrypt_data({"a": 1})]) == [{}, {"a": 1}]
+
+    with pytest.raises(ValueError):
+        decrypt_many([encrypted, "invalid_base64_data!"])
+    assert decrypt_many([encrypted, "invalid_base64_data!"], strict=False) == ["ok", None]
+    assert decrypt_json_many([encrypt_data("not json"), encrypted], strict=False) == [None, None]
+
+
+def test_large_batches_are_split_across_threads(monkeypatch):
+    """Test that large batches run in parallel chunks and keep their order"""
+    monkeypatch.setattr(settings, "CRYPTO_BATCH_THREADS", 4)
+    monkeypatch.setattr(settings, "CRYPTO_PARALLEL_MIN_BATCH", 10)
+    threads = set()
+    decrypt_chunk = crypto_service._decrypt_chunk
+
+    def recording_chunk(values):
+        threads.add(threading.current_thread().name)
+        return decrypt_chunk(values)
+
+    monkeypatch.setattr(crypto_service, "_decrypt_chunk", recording_chunk)
+    values = [f"cheltuiala {index}" for index in range(103)]
+
+    encrypted = encrypt_many(values)
+
+    assert decrypt_many(encrypted) == values
+    assert all(name.startswith("crypto") for name in threads)
+    assert decrypt_many(encrypted[:5]) == values[:5]
+    assert threading.current_thread().name in threads
+
+
+def test_decrypt_data_is_served_from_cache(monkeypatch):
+    """Test that a repeated ciphertext is decrypted once and parsed JSON is not shared"""
+    monkeypatch.setattr(crypto_service, "cache", DecryptedCache(max_bytes=1 << 20, ttl_seconds=60))
+    encrypted = encrypt_data({"category": "Transport"})
+
+    first = decrypt_json(encrypted)
+    first["category"] = "Altceva"
+
+    assert decrypt_json(encrypted) == {"category": "Transport"}
+    assert decrypt_many([encrypted]) == ['{"category": "Transport"}']
+    assert crypto_service.cache.stats.snapshot() == {"hits": 2, "misses": 1, "hit_rate": 0.667}
+
+
+def test_cache_kill_switch(monkeypatch):
+    """Test that nothing is cached when the cache is disabled"""
+    monkeypatch.setattr(crypto_service, "cache", DecryptedCache(max_bytes=1 << 20, ttl_seconds=60))
+    monkeypatch.setattr(settings, "CRYPTO_CACHE_ENABLED", False)
+    encrypted = encrypt_data("Kaufland")
+
+    assert decrypt_data(encrypted) == "Kaufland"
+    assert decrypt_data(encrypted) == "Kaufland"
+    assert len(crypto_service.cache) == 0
+    assert crypto_service.cache.stats.hits + crypto_service.cache.stats.misses == 0
+
+
+def test_cache_byte_budget_evicts_and_zeroizes():
+    """Test LRU eviction under the byte budget and zeroing of evicted plaintext"""
+    cache = DecryptedCache(max_bytes=3 * (100 + 120), ttl_seconds=60)
+    for name in "abc":
+        cache.put(name, name * 100)
+
+    assert cache.get("a") == "a" * 100
+    evicted = cache._entries[cache._key("b")][1]
+    cache.put("d", "d" * 100)
+
+    assert cache.get("b") is None
+    assert evicted == bytearray(100)
+    assert [cache.get(name) for name in "acd"] == ["a" * 100, "c" * 100, "d" * 100]
+    assert cache.size_bytes <= cache.max_bytes
+
+    # Values larger than the whole budget are not cached
+    cache.put("e", "e" * 1000)
+    assert cache.get("e") is None
+
+
+def test_cache_entries_expire(monkeypatch):
+    """Test that entries older than the TTL are dropped and zeroed"""
+    now = [1000.0]
+    monkeypatch.setattr("app.utils.crypto.time.monotonic", lambda: now[0])
+    cache = DecryptedCache(max_bytes=1 << 20, ttl_seconds=10)
+    cache.put("x", "secret")
+    plaintext = cache._entries[cache._key("x")][1]
+
+    now[0] += 5
+    assert cache.get("x") == "secret"
+    now[0] += 10
+    assert cache.get("x") is None
+    assert plaintext == bytearray(6)
+    assert cache.size_bytes == 0
+
+
+def test_cache_put_purges_expired_entries(monkeypatch):
+    """Test that expired entries are dropped on put even if never read again"""
+    now = [1000.0]
+    monkeypatch.setattr("app.utils.crypto.time.monotonic", lambda: now[0])
+    cache = DecryptedCache(max_bytes=1 << 20, ttl_seconds=10)
+    cache.put("x", "secret")
+    cache.put("y", "other")
+    plaintext = cache._entries[cache._key("x")][1]
+
+    now[0] += 5
+    # Put again: expires later than its first insertion
+    cache.put("y", "other")
+    now[0] += 6
+    cache.put("z", "new")
+
+    assert plaintext == bytearray(6)
+    assert sorted(cache._entries) == sorted([cache._key("y"), cache._key("z")])
+    now[0] += 10
+    cache.put("w", "last")
+    assert list(cache._entries) == [cache._key("w")]
+
+
+def test_forget_data_keys_clears_the_cache(monkeypatch):
+    """Test that values decrypted with forgotten keys leave the cache"""
+    service = CryptoService()
+    monkeypatch.setattr(service, "cache", DecryptedCache(max_bytes=1 << 20, ttl_seconds=60))
+    service.cache.put("ciphertext", "secret")
+
+    service.forget_data_keys()
+
+    assert len(service.cache) == 0
+    assert service._data_keys == {}
+
+
+def test_binary_ciphertext_roundtrip():
+    """Test the binary format next to the base64 text format"""
+    data = {"vendor": "Kaufland", "items": ["pâine", "brânză"]}
+
+    binary = encrypt_bytes(data)
+    text = encrypt_data(data)
+
+    assert binary[0] == 1
+    assert len(binary) == len(base64.b64decode(text)) + 1 < len(text)
+    assert decrypt_json(binary) == decrypt_json(memoryview(binary)) == decrypt_json(text) == data
+    assert decrypt_json_many([binary, text, None]) == [data, data, {}]
+    assert [type(value) for value in encrypt_many(["a", "b"], binary=True)] == [bytes, bytes]
+
+
+def test_legacy_text_converts_to_binary_without_reencryption():
+    """Test that base64 ciphertext is re-encoded as the binary format"""
+    text = encrypt_data("Cheltuială la magazin")
+
+    binary = crypto_service.legacy_to_binary(text)
+
+    assert binary[1:] == base64.b64decode(text)
+    assert decrypt_data(binary) == "Cheltuială la magazin"
+    with pytest.raises(ValueError):
+        crypto_service.legacy_to_binary("not base64!")
+
+
+def test_unknown_binary_format_is_rejected():
+    """Test that binary values with an unknown format byte do not decrypt"""
+    binary = bytearray(encrypt_bytes("x"))
+    binary[0] = 0x7F
+
+    with pytest.raises(ValueError, match="format"):
+        decrypt_data(bytes(binary))
+
+
+@pytest.mark.parametrize("codec, format_byte", [("zlib", 0x02), ("zstd", 0x03)])
+def test_compressed_payloads_roundtrip(monkeypatch, codec, format_byte):
+    """Test compression before encryption and reading of uncompressed rows"""
+    receipt = {"category": "Mâncare & Restaurante", "items": [{"name": f"Produs {index}", "qty": 1.0} for index in range(30)]}
+    monkeypatch.setattr(settings, "CRYPTO_COMPRESSION", "none")
+    uncompressed = encrypt_bytes(receipt)
+    monkeypatch.setattr(settings, "CRYPTO_COMPRESSION", codec)
+
+    compressed = encrypt_bytes(receipt)
+
+    assert uncompressed[0] == 0x01
+    assert compressed[0] == format_byte
+    assert len(compressed) < len(uncompressed) / 3
+    assert decrypt_json(compressed) == decrypt_json(uncompressed) == receipt
+    # Values below the threshold are stored as is
+    assert encrypt_bytes("Kaufland")[0] == 0x01
+
+
+def test_compression_format_byte_is_authenticated(monkeypatch):
+    """Test that a changed format byte fails to decrypt"""
+    monkeypatch.setattr(settings, "CRYPTO_COMPRESSION", "zlib")
+    compressed = bytearray(encrypt_bytes({"items": ["pâine"] * 50}))
+
+    for forged in (0x01, 0x03):
+        compressed[0] = forged
+        with pytest.raises(ValueError):
+            decrypt_data(bytes(compressed))
+
+
+def test_unknown_codec_is_rejected(monkeypatch):
+    """Test that a misspelled CRYPTO_COMPRESSION is reported"""
+    monkeypatch.setattr(settings, "CRYPTO_COMPRESSION", "lz4")
+
+    with pytest.raises(ValueError, match="lz4"):
+        encrypt_bytes({"items": ["pâine"] * 50})
+
+
+def _stored_data_key(service: CryptoService = crypto_service) -> tuple[int, bytes, str]:
+    """A data key as DataKeyStore.create_key leaves it: usable once stored"""
+    key_id, wrapped_key, master_key_id = service.generate_data_key()
+    service.add_data_key(key_id, service.unwrap_data_key(key_id, wrapped_key, master_key_id))
+    return key_id, wrapped_key, master_key_id
+
+
+def test_data_key_ciphertext_carries_key_id(monkeypatch):
+    """Test encryption with a data key, in text and binary form"""
+    monkeypatch.setattr(settings, "CRYPTO_COMPRESSION", "zlib")
+    key_id, _, _ = _stored_data_key()
+    receipt = {"items": [{"name": "pâine", "qty": 1.0}] * 20}
+
+    text = encrypt_data("Kaufland", key_id)
+    binary = encrypt_bytes(receipt, key_id)
+
+    assert text.startswith("k1:")
+    assert binary[0] == 0x02 | 0x80
+    assert crypto_service.data_key_id(text) == crypto_service.data_key_id(binary) == key_id
+    assert crypto_service.data_key_id(encrypt_data("Kaufland")) is None
+    assert decrypt_data(text) == "Kaufland"
+    assert decrypt_json_many([binary, encrypt_bytes(receipt)]) == [receipt, receipt]
+
+    # The key id is authenticated: another key id does not decrypt the value
+    other_key_id, _, _ = _stored_data_key()
+    forged = binary[:1] + other_key_id.to_bytes(4, "big") + binary[5:]
+    with pytest.raises(ValueError):
+        decrypt_data(forged)
+
+
+def test_unknown_data_keys_are_loaded(monkeypatch):
+    """Test that data keys missing in memory come from key_loader"""
+    key_id, wrapped_key, master_key_id = _stored_data_key()
+    binary = encrypt_bytes("Linella", key_id)
+    loaded = []
+
+    def loader(requested_id):
+        loaded.append(requested_id)
+        if requested_id != key_id:
+            return None
+        return crypto_service.unwrap_data_key(requested_id, wrapped_key, master_key_id)
+
+    monkeypatch.setattr(crypto_service, "_data_keys", {})
+    monkeypatch.setattr(crypto_service, "key_loader", loader)
+    monkeypatch.setattr(settings, "CRYPTO_CACHE_ENABLED", False)
+
+    assert decrypt_many([binary, binary]) == ["Linella", "Linella"]
+    assert loaded == [key_id]
+    with pytest.raises(ValueError, match="Unknown data key"):
+        decrypt_data(binary[:1] + (key_id + 1).to_bytes(4, "big") + binary[5:])
+    # A wrapped key only unwraps under its own id
+    with pytest.raises(ValueError):
+        crypto_service.unwrap_data_key(key_id + 1, wrapped_key, master_key_id)
+
+
+def test_previous_master_keys_still_decrypt(monkeypatch):
+    """Test reading values and data keys after ENCRYPTION_KEY is replaced"""
+    old_service = CryptoService()
+    legacy = old_service.encrypt_data({"category": "Transport"})
+    key_id, wrapped_key, old_master_key_id = old_service.generate_data_key()
+
+    monkeypatch.setattr(settings, "ENCRYPTION_PREVIOUS_KEYS", settings.ENCRYPTION_KEY)
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY", base64.b64encode(bytes(range(32))).decode())
+    new_service = CryptoService()
+
+    assert new_service.master_key_id != old_master_key_id
+    assert new_service.decrypt_json(legacy) == {"category": "Transport"}
+    key = new_service.unwrap_data_key(key_id, wrapped_key, old_master_key_id)
+    assert new_service.unwrap_data_key(key_id, new_service.wrap_data_key(key_id, key), new_service.master_key_id) == key
+
+    monkeypatch.setattr(settings, "ENCRYPTION_PREVIOUS_KEYS", "")
+    with pytest.raises(ValueError, match="not configured"):
+        CryptoService().unwrap_data_key(key_id, wrapped_key, old_master_key_id)
@@ -0,0 +1,196 @@
+import pytest
+from sqlalchemy import text
+
+from app.models import DataKey, Expense, User
+from app.models.data_key import data_keys
+from app.models.encrypted import LazyDecrypted, decrypt_all
+from app.utils.config import settings
+from app.utils.crypto import crypto_service, encrypt_data
+
+
+@pytest.fixture
+def session_factory(session_factory, monkeypatch):
+    # Count real decryptions, not cache hits
+    monkeypatch.setattr(settings, "CRYPTO_CACHE_ENABLED", False)
+    with session_factory() as session:
+        session.add(User(id="user-1", username="lazy"))
+        session.commit()
+    return session_factory
+
+
+@pytest.fixture
+def decrypt_calls(monkeypatch):
+    calls = []
+    decrypt_data = crypto_service.decrypt_data
+
+    def counting_decrypt(encrypted_data):
+        calls.append(encrypted_data)
+        return decrypt_data(encrypted_data)
+
+    monkeypatch.setattr(crypto_service, "decrypt_data", counting_decrypt)
+    return calls
+
+
+def _add(session, expense_id: str, vendor=None, json_data=None) -> None:
+    session.add(Expense(id=expense_id, owner_user_id="user-1", source="manual", amount=10, vendor=vendor, json_data=json_data))
+
+
+def test_plaintext_is_encrypted_on_assignment(session_factory):
+    """Test that assigned plaintext is stored encrypted and read back lazily"""
+    payload = {"category": "Transport", "items": []}
+    with session_factory() as session:
+        _add(session, "e1", vendor="Kaufland", json_data=payload)
+        # Later changes to the caller's dict are not stored
+        payload["category"] = "Altceva"
+        session.commit()
+
+        stored_vendor, stored_json = session.execute(text("SELECT vendor, json_data_bin FROM expenses")).one()
+        assert "Kaufland" not in stored_vendor
+        # Both fields use the owner's data key
+        data_key = session.query(DataKey).filter(DataKey.user_id == "user-1").one()
+        assert crypto_service.data_key_id(stored_vendor) == data_key.id
+        assert crypto_service.data_key_id(stored_json) == data_key.id
+
+    with session_factory() as session:
+        expense = session.get(Expense, "e1")
+        assert isinstance(expense.vendor, LazyDecrypted)
+        assert expense.vendor.value == "Kaufland"
+        assert expense.json_data.value == {"category": "Transport", "items": []}
+
+        expense.vendor = "Linella"
+        expense.json_data = {**expense.json_data.value, "notes": "pâine"}
+        session.commit()
+
+    with session_factory() as session:
+        expense = session.get(Expense, "e1")
+        assert expense.vendor.value == "Linella"
+        assert expense.json_data.value["notes"] == "pâine"
+
+
+def test_untouched_fields_are_never_decrypted(session_factory, decrypt_calls):
+    """Test that loading rows costs nothing until a field is read, then once"""
+    with session_factory() as session:
+        for index in range(3):
+            _add(session, f"e{index}", vendor=f"Vendor {index}", json_data={"index": index})
+        session.commit()
+
+    with session_factory() as session:
+        expenses = session.query(Expense).order_by(Expense.id).all()
+        assert sum(float(expense.amount) for expense in expenses) == 30
+        assert decrypt_calls == []
+
+        assert expenses[0].vendor.value == "Vendor 0"
+        assert expenses[0].vendor.value == "Vendor 0"
+        assert len(decrypt_calls) == 1
+
+
+def test_decrypt_all_batches_a_page(session_factory, monkeypatch):
+    """Test that decrypt_all resolves proxies with one batch call per kind"""
+    with session_factory() as session:
+        for index in range(4):
+            _add(session, f"e{index}", vendor=f"Vendor {index}", json_data={"index": index})
+        session.commit()
+
+    batches = []
+    decrypt_many = crypto_service.decrypt_many
+
+    def recording_many(values, strict=True):
+        batches.append(len(values))
+        return decrypt_many(values, strict)
+
+    monkeypatch.setattr(crypto_service, "decrypt_many", recording_many)
+    with session_factory() as session:
+        expenses = session.query(Expense).order_by(Expense.id).all()
+        decrypt_all([expense.vendor for expense in expenses] + [expense.json_data for expense in expenses])
+
+        assert batches == [4]
+        assert all(expense.vendor.is_decrypted and expense.json_data.is_decrypted for expense in expenses)
+        assert [expense.json_data.value["index"] for expense in expenses] == [0, 1, 2, 3]
+
+
+def test_undecryptable_values_and_legacy_rows(session_factory):
+    """Test failures on access and payloads still in the legacy text column"""
+    with session_factory() as session:
+        session.add(Expense(
+            id="legacy",
+            owner_user_id="user-1",
+            source="manual",
+            json_data_legacy=encrypt_data({"category": "Sănătate"}),
+        ))
+        session.commit()
+        session.execute(text("UPDATE expenses SET vendor = 'not base64!'"))
+        session.commit()
+
+    with session_factory() as session:
+        expense = session.get(Expense, "legacy")
+        decrypt_all([expense.vendor])
+
+        assert expense.vendor.get() is None
+        with pytest.raises(ValueError):
+            expense.vendor.value
+        assert expense.json_data.value == {"category": "Sănătate"}
+        assert expense.json_data is expense.json_data
+
+
+def test_each_user_gets_a_data_key(session_factory, monkeypatch):
+    """Test per-user keys, keys of rolled back transactions and loading keys by id"""
+    with session_factory() as session:
+        session.add(User(id="user-2", username="other"))
+        session.commit()
+        _add(session, "discarded", vendor="Kaufland")
+        session.flush()
+        discarded_key_id = crypto_service.data_key_id(session.get(Expense, "discarded").vendor.ciphertext)
+        session.rollback()
+        # Its id may be taken by another key later
+        assert discarded_key_id not in crypto_service._data_keys
+
+        _add(session, "e1", vendor="Kaufland")
+        session.add(Expense(id="e2", owner_user_id="user-2", source="manual", vendor="Linella"))
+        session.commit()
+        key_ids = {row.user_id: row.id for row in session.query(DataKey).all()}
+
+    assert len(key_ids) == 2 and discarded_key_id not in key_ids.values()
+    # A fresh process only has the wrapped keys in the database
+    monkeypatch.setattr(crypto_service, "_data_keys", {})
+    with session_factory() as session:
+        expenses = session.query(Expense).order_by(Expense.id).all()
+        assert [crypto_service.data_key_id(expense.vendor.ciphertext) for expense in expenses] == [key_ids["user-1"], key_ids["user-2"]]
+        assert [expense.vendor.value for expense in expenses] == ["Kaufland", "Linella"]
+
+
+def test_data_key_ids_are_checked_before_use(session_factory, monkeypatch):
+    """Test that a random id already in use is not taken over by a new key"""
+    with session_factory() as session:
+        session.add(User(id="user-2", username="other"))
+        _add(session, "e1", vendor="Kaufland")
+        session.commit()
+        taken_id = session.query(DataKey.id).scalar()
+        taken_key = crypto_service._data_keys[taken_id]
+
+        candidates = iter([taken_id, taken_id + 1])
+
+        def colliding_key():
+            key_id = next(candidates)
+            return key_id, crypto_service.wrap_data_key(key_id, bytes(32)), crypto_service.master_key_id
+
+        monkeypatch.setattr(crypto_service, "generate_data_key", colliding_key)
+        session.add(Expense(id="e2", owner_user_id="user-2", source="manual", vendor="Linella"))
+        session.commit()
+
+        assert session.query(DataKey.id).filter(DataKey.user_id == "user-2").scalar() == taken_id + 1
+        assert crypto_service._data_keys[taken_id] is taken_key
+        session.expire_all()
+        assert session.get(Expense, "e1").vendor.value == "Kaufland"
+
+
+def test_key_created_by_another_worker_is_used(session_factory):
+    """Test that a user never gets a second active key"""
+    with session_factory() as session:
+        _add(session, "e1", vendor="Kaufland")
+        session.commit()
+        active_id = session.query(DataKey.id).scalar()
+
+        # A worker that has not seen the key yet tries to create one
+        assert data_keys.create_key(session, "user-1") == active_id
+        session.commit()
+        assert session.query(DataKey).count() == 1
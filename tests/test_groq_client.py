@@ -0,0 +1,292 @@
+import asyncio
+import gc
+import json
+import time
+
+import httpx
+import pytest
+
+import app.services.groq_client as groq_module
+from app.services.groq_client import GroqClient
+from tests.stubs.groq_server import GroqStubConfig, create_app, default_completion
+
+STUB_BASE_URL = "http://groq-stub/openai/v1"
+
+
+@pytest.fixture
+def groq_stub(monkeypatch):
+    """Route GroqClient to an in-process stand-in server and return a factory"""
+
+    def build(**config) -> tuple[GroqClient, object]:
+        app = create_app(GroqStubConfig(**config))
+        transport = httpx.ASGITransport(app=app)
+
+        class StubClient(httpx.AsyncClient):
+            def __init__(self, *args, **kwargs):
+                kwargs["transport"] = transport
+                super().__init__(*args, **kwargs)
+
+        monkeypatch.setattr(groq_module.httpx, "AsyncClient", StubClient)
+        monkeypatch.setattr(groq_module.settings, "GROQ_BASE_URL", STUB_BASE_URL)
+        monkeypatch.setattr(groq_module.settings, "GROQ_HEDGE_ENABLED", False)
+        return GroqClient(), app.state.stub
+
+    return build
+
+
+def test_base_url_comes_from_settings(groq_stub):
+    """Test that the client talks to GROQ_BASE_URL"""
+    client, _ = groq_stub()
+
+    assert client.base_url == STUB_BASE_URL
+
+
+def test_parse_text_against_stub(groq_stub):
+    """Test a text parse end to end with the deterministic answer"""
+    client, stub = groq_stub()
+
+    result = asyncio.run(client.parse_text("taxi 70 lei", ["Alte cheltuieli"]))
+
+    assert result["amount"] == 70.0
+    assert stub.requests[0]["payload"]["model"] == groq_module.settings.GROQ_FAST_MODEL
+    assert client.scheduler.remaining_requests is not None
+
+
+def test_429_is_retried_after_retry_after(groq_stub):
+    """Test that an injected 429 is retried and then succeeds"""
+    client, stub = groq_stub(error_429_first=1, retry_after_seconds=0)
+
+    result = asyncio.run(client.parse_text("cafea 50", ["Alte cheltuieli"]))
+
+    assert result["amount"] == 50.0
+    assert stub.status_counts[429] == 1
+    assert stub.status_counts[200] == 1
+
+
+def test_escalates_scripted_low_confidence_answer(groq_stub):
+    """Test that the cascade escalates a scripted low-confidence fast answer"""
+    low_confidence = {"amount": 12, "currency": "MDL", "category": "Alte cheltuieli", "confidence": 0.2, "items": []}
+    client, stub = groq_stub(scripted=[low_confidence])
+
+    result = asyncio.run(client.parse_text("pâine 12", ["Alte cheltuieli"]))
+
+    assert result["confidence"] == 0.9
+    assert [request["payload"]["model"] for request in stub.requests] == [
+        groq_module.settings.GROQ_FAST_MODEL,
+        groq_module.settings.GROQ_TEXT_MODEL,
+    ]
+
+
+def test_stream_and_batch_against_stub(groq_stub):
+    """Test the streamed and batched parse paths"""
+    client, stub = groq_stub()
+    fields = []
+
+    async def on_field(key, value):
+        fields.append(key)
+
+    streamed = asyncio.run(client.parse_text_stream("benzina 600", ["Alte cheltuieli"], on_field))
+    batch = asyncio.run(client.parse_text_batch(["pâine 12", "lapte 25", "taxi 70"], ["Alte cheltuieli"]))
+
+    assert streamed["amount"] == 600.0
+    assert fields[0] == "amount"
+    assert [parsed["amount"] for parsed in batch] == [12.0, 25.0, 70.0]
+    assert len(stub.requests) == 2
+
+
+def test_failed_stream_falls_back_but_callback_errors_propagate(groq_stub):
+    """Test that only stream errors fall back to a regular call"""
+    client, stub = groq_stub(error_429_first=1, retry_after_seconds=0.01)
+
+    async def on_field(key, value):
+        raise RuntimeError("rendering failed")
+
+    # The stream is rejected before any field is shown: parsed again without streaming
+    result = asyncio.run(client.parse_text_stream("benzina 600", ["Alte cheltuieli"], on_field))
+    assert result["amount"] == 600.0
+    assert len(stub.requests) == 2
+
+    with pytest.raises(RuntimeError, match="rendering failed"):
+        asyncio.run(client.parse_text_stream("benzina 600", ["Alte cheltuieli"], on_field))
+    assert len(stub.requests) == 3
+    assert client.scheduler.snapshot()["in_flight"] == 0
+
+
+def test_streamed_calls_fill_the_retry_budget(groq_stub):
+    """Test that streamed requests count towards the retry budget like the others"""
+    client, _ = groq_stub()
+    while client.retry_budget.try_spend():
+        pass
+
+    async def on_field(key, value):
+        pass
+
+    asyncio.run(client.parse_text_stream("benzina 600", ["Alte cheltuieli"], on_field))
+
+    assert client.retry_budget.balance == client.retry_budget.ratio
+
+
+def test_voice_transcription_against_stub(groq_stub, tmp_path, monkeypatch):
+    """Test transcription followed by a text parse"""
+    monkeypatch.setattr(groq_module.settings, "GROQ_VOICE_PREPROCESS", False)
+    client, stub = groq_stub(transcription_text="am dat 45 lei pe pâine")
+    voice = tmp_path / "voice.ogg"
+    voice.write_bytes(b"OggS" + b"\0" * 64)
+
+    result = asyncio.run(client.parse_voice(str(voice)))
+
+    assert result["amount"] == 45.0
+    assert stub.requests[0]["endpoint"] == "audio/transcriptions"
+    assert json.dumps(stub.requests[1]["payload"], ensure_ascii=False).count("45 lei") == 1
+
+
+def test_escalates_invalid_json_and_unknown_category(groq_stub):
+    """Test that a fast answer that is not JSON, or uses another category, goes to the large model"""
+    foreign_category = {"amount": 30, "currency": "MDL", "category": "Vacanță", "confidence": 0.95, "items": []}
+    client, stub = groq_stub(scripted=["nu este JSON", default_completion, foreign_category])
+
+    first = asyncio.run(client.parse_text("cafea 30", ["Alte cheltuieli"]))
+    second = asyncio.run(client.parse_text("cafea 30", ["Alte cheltuieli"]))
+
+    assert first["category"] == second["category"] == "Alte cheltuieli"
+    assert [request["payload"]["model"] for request in stub.requests] == [
+        groq_module.settings.GROQ_FAST_MODEL,
+        groq_module.settings.GROQ_TEXT_MODEL,
+    ] * 2
+    snapshot = client.cascade_metrics.snapshot()
+    assert snapshot["calls"] == 2
+    assert snapshot["escalations"] == {"invalid_json": 1, "unknown_category": 1}
+    assert snapshot["escalation_rate"] == 1.0
+    assert snapshot["models"][groq_module.settings.GROQ_FAST_MODEL]["count"] == 2
+
+
+def test_accepted_fast_answer_is_not_escalated(groq_stub):
+    """Test that a valid fast answer is returned without calling the large model"""
+    client, stub = groq_stub()
+
+    asyncio.run(client.parse_text("taxi 70", ["Alte cheltuieli"]))
+
+    assert len(stub.requests) == 1
+    assert client.cascade_metrics.snapshot()["escalation_rate"] == 0.0
+
+
+def test_escalation_reasons():
+    """Test the reasons _validate_expense gives for a parsed expense"""
+    client = GroqClient()
+    valid = {"amount": 10, "confidence": 0.9, "category": "Transport", "items": [{"category": "Transport"}]}
+
+    assert client._validate_expense(valid, ["Transport"]) is None
+    assert client._validate_expense({**valid, "amount": None}, ["Transport"]) == "invalid_amount"
+    assert client._validate_expense({**valid, "amount": "zece"}, ["Transport"]) == "invalid_amount"
+    assert client._validate_expense({**valid, "amount": -1}, ["Transport"]) == "invalid_amount"
+    assert client._validate_expense({**valid, "confidence": 0.1}, ["Transport"]) == "low_confidence"
+    assert client._validate_expense({**valid, "items": "pâine"}, ["Transport"]) == "invalid_items"
+    assert client._validate_expense({**valid, "items": [{"category": "Vacanță"}]}, ["Transport"]) == "unknown_category"
+    # Without the user's categories the defaults apply
+    assert client._validate_expense({**valid, "category": "Sănătate", "items": []}, []) is None
+
+
+def test_health_reports_cascade_metrics(monkeypatch):
+    """Test the groq section of the /health payload"""
+    import app.main as main_module
+
+    metrics = groq_module.CascadeMetrics()
+    metrics.calls = 4
+    metrics.escalations["low_confidence"] = 1
+    metrics.record_latency("fast-model", 0.2)
+    monkeypatch.setattr(main_module.groq_client, "cascade_metrics", metrics)
+
+    async def fetch():
+        transport = httpx.ASGITransport(app=main_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as http:
+            return (await http.get("/api/v1/health")).json()
+
+    payload = asyncio.run(fetch())
+
+    assert payload["status"] == "healthy"
+    assert payload["groq"]["cascade"] == {
+        "calls": 4,
+        "escalation_rate": 0.25,
+        "escalations": {"low_confidence": 1},
+        "models": {"fast-model": {"count": 1, "p50_ms": 200.0, "p95_ms": 200.0}},
+    }
+    assert set(payload["groq"]["scheduler"]) >= {"in_flight", "queued"}
+    assert {"sfs", "upstreams", "crypto"} <= set(payload)
+
+
+def _chat_payload(model: str) -> dict:
+    return {"model": model, "messages": [{"role": "user", "content": "cafea 30"}]}
+
+
+def test_hedge_wins_over_a_slow_call(groq_stub, monkeypatch):
+    """Test that a duplicate sent after the hedge delay answers first"""
+    client, stub = groq_stub(latencies=[0.5, 0.0])
+    monkeypatch.setattr(groq_module.settings, "GROQ_HEDGE_ENABLED", True)
+    monkeypatch.setattr(groq_module.settings, "GROQ_HEDGE_DEFAULT_DELAY_SECONDS", 0.05)
+
+    started = time.monotonic()
+    result = asyncio.run(client._make_request("chat/completions", _chat_payload("fast-model")))
+
+    assert time.monotonic() - started < 0.4
+    assert json.loads(result["choices"][0]["message"]["content"])["amount"] == 30.0
+    assert len(stub.requests) == 2
+    assert client.request_stats["hedges"] == 1
+    assert client.request_stats["hedge_wins"] == 1
+
+
+def test_hedge_loses_to_the_original_call(groq_stub, monkeypatch):
+    """Test that the original call still wins when it answers before the duplicate"""
+    client, stub = groq_stub(latencies=[0.15, 0.5])
+    monkeypatch.setattr(groq_module.settings, "GROQ_HEDGE_ENABLED", True)
+    monkeypatch.setattr(groq_module.settings, "GROQ_HEDGE_DEFAULT_DELAY_SECONDS", 0.05)
+
+    started = time.monotonic()
+    asyncio.run(client._make_request("chat/completions", _chat_payload("fast-model")))
+
+    assert time.monotonic() - started < 0.4
+    assert len(stub.requests) == 2
+    assert client.request_stats["hedges"] == 1
+    assert client.request_stats["hedge_wins"] == 0
+
+
+def test_failed_hedge_is_retrieved(groq_stub, monkeypatch):
+    """Test that a duplicate failing first does not fail the call nor leave its error unretrieved"""
+    client, stub = groq_stub(latencies=[0.15], unavailable_models=["gone-model"])
+    monkeypatch.setattr(groq_module.settings, "GROQ_HEDGE_ENABLED", True)
+    monkeypatch.setattr(groq_module.settings, "GROQ_HEDGE_DEFAULT_DELAY_SECONDS", 0.05)
+    monkeypatch.setattr(groq_module.settings, "GROQ_HEDGE_MODELS", {"fast-model": "gone-model"})
+    unhandled = []
+
+    async def scenario():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unhandled.append(context))
+        result = await client._make_request("chat/completions", _chat_payload("fast-model"))
+        gc.collect()
+        return result
+
+    result = asyncio.run(scenario())
+
+    assert result["model"] == "fast-model"
+    assert stub.status_counts[404] == 1
+    assert unhandled == []
+
+
+def test_unavailable_model_fails_over(groq_stub, monkeypatch):
+    """Test that a missing model is replaced by the next one of GROQ_MODEL_FAILOVER"""
+    client, stub = groq_stub(unavailable_models=["old-model"])
+    monkeypatch.setattr(groq_module.settings, "GROQ_MODEL_FAILOVER", {"old-model": ["new-model"]})
+
+    result = asyncio.run(client._make_request("chat/completions", _chat_payload("old-model")))
+
+    assert result["model"] == "new-model"
+    assert [request["payload"]["model"] for request in stub.requests] == ["old-model", "new-model"]
+    assert client.request_stats["failovers"] == 1
+
+
+def test_model_latency_excludes_queueing(groq_stub):
+    """Test that the hedge delay samples only time the HTTP call"""
+    client, _ = groq_stub()
+    client.scheduler.block_for(0.2)
+
+    asyncio.run(client._make_request("chat/completions", _chat_payload("fast-model")))
+
+    assert client.model_latency["fast-model"].percentile(100) < 0.15
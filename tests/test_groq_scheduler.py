@@ -0,0 +1,152 @@
+import asyncio
+import time
+
+from app.services.groq_scheduler import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    GroqScheduler,
+    RetryBudget,
+    parse_reset_duration,
+)
+
+
+def test_interactive_calls_are_dispatched_before_batch_calls():
+    """Test that a freed slot goes to the interactive lane first, FIFO within a lane"""
+    scheduler = GroqScheduler(max_concurrent=1)
+    order = []
+
+    async def call(name: str, priority: int):
+        await scheduler.acquire(priority)
+        order.append(name)
+        await asyncio.sleep(0)
+        scheduler.release()
+
+    async def scenario():
+        # Holds the only slot while the others queue up
+        await scheduler.acquire(PRIORITY_BATCH)
+        tasks = [
+            asyncio.create_task(call("batch-1", PRIORITY_BATCH)),
+            asyncio.create_task(call("batch-2", PRIORITY_BATCH)),
+            asyncio.create_task(call("interactive-1", PRIORITY_INTERACTIVE)),
+            asyncio.create_task(call("interactive-2", PRIORITY_INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+    assert order == ["interactive-1", "interactive-2", "batch-1", "batch-2"]
+
+
+def test_concurrency_limit_is_respected():
+    """Test that no more than max_concurrent calls are in flight"""
+    scheduler = GroqScheduler(max_concurrent=2)
+    in_flight = []
+    peak = []
+
+    async def call():
+        await scheduler.acquire()
+        in_flight.append(1)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+        scheduler.release()
+
+    async def scenario():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(scenario())
+
+    assert max(peak) == 2
+    assert scheduler.snapshot()["in_flight"] == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    """Test that a cancelled acquire neither keeps its place nor leaks a slot"""
+    scheduler = GroqScheduler(max_concurrent=1)
+
+    async def scenario():
+        await scheduler.acquire()
+        waiter = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert scheduler.snapshot()["queued"] == 0
+        scheduler.release()
+        await asyncio.wait_for(scheduler.acquire(), timeout=1)
+
+    asyncio.run(scenario())
+
+
+def test_batch_calls_keep_a_reserve_for_interactive_ones():
+    """Test that batch calls wait for the window reset once only the reserve is left"""
+    scheduler = GroqScheduler(max_concurrent=4, batch_request_reserve=2)
+    scheduler.update_from_headers({
+        "x-ratelimit-remaining-requests": "2",
+        "x-ratelimit-reset-requests": "0.1s",
+    })
+
+    async def scenario():
+        await asyncio.wait_for(scheduler.acquire(PRIORITY_INTERACTIVE), timeout=0.05)
+        # No spare capacity for duplicate calls inside the reserve either
+        assert not scheduler.can_hedge()
+        started = time.monotonic()
+        await scheduler.acquire(PRIORITY_BATCH)
+        return time.monotonic() - started
+
+    waited = asyncio.run(scenario())
+
+    assert waited >= 0.05
+
+
+def test_token_budget_and_retry_after_hold_calls_back():
+    """Test waiting for the token window and for a retry-after block"""
+    scheduler = GroqScheduler()
+    scheduler.update_from_headers({
+        "x-ratelimit-remaining-tokens": "100",
+        "x-ratelimit-reset-tokens": "80ms",
+    })
+
+    async def scenario():
+        started = time.monotonic()
+        await scheduler.acquire(tokens=500)
+        token_wait = time.monotonic() - started
+        scheduler.release()
+
+        scheduler.block_for(0.05)
+        started = time.monotonic()
+        await scheduler.acquire(PRIORITY_INTERACTIVE)
+        return token_wait, time.monotonic() - started
+
+    token_wait, blocked_wait = asyncio.run(scenario())
+
+    assert token_wait >= 0.06
+    assert blocked_wait >= 0.04
+
+
+def test_retry_budget_is_exhausted_and_refilled():
+    """Test that retries are capped to a fraction of the requests"""
+    budget = RetryBudget(ratio=0.5, max_tokens=2.0)
+
+    assert budget.try_spend()
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+    budget.record_request()
+    assert not budget.try_spend()
+    budget.record_request()
+    assert budget.try_spend()
+
+    for _ in range(10):
+        budget.record_request()
+    assert budget.balance == 2.0
+
+
+def test_parse_reset_duration():
+    """Test the duration formats of the x-ratelimit-reset-* headers"""
+    assert parse_reset_duration("2m59.56s") == 179.56
+    assert parse_reset_duration("120ms") == 0.12
+    assert parse_reset_duration("7") == 7.0
+    assert parse_reset_duration("soon") is None
+    assert parse_reset_duration(None) is None
@@ -0,0 +1,70 @@
+import io
+
+from PIL import Image, ImageDraw
+
+from app.utils.image_preprocess import _receipt_bbox, prepare_receipt_image
+
+
+def receipt_photo(stray_pixel: bool = True) -> Image.Image:
+    """A 1000x1200 dark table with a bright receipt and, optionally, a small reflection"""
+    image = Image.new("L", (1000, 1200), 40)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((300, 200, 699, 999), fill=235)
+    for y in range(260, 940, 40):
+        draw.line((340, y, 640, y), fill=90, width=4)
+    if stray_pixel:
+        draw.rectangle((10, 10, 17, 17), fill=255)
+    return image
+
+
+def test_crop_ignores_stray_bright_pixels():
+    """Test that the crop box follows the receipt, not a reflection in the corner"""
+    left, top, right, bottom = _receipt_bbox(receipt_photo())
+
+    # Receipt edges plus the 3% margin, within a thumbnail pixel
+    assert 255 <= left <= 275
+    assert 155 <= top <= 170
+    assert 725 <= right <= 745
+    assert 1030 <= bottom <= 1045
+
+
+def test_no_crop_without_a_receipt():
+    """Test that a uniform photo is not cropped"""
+    assert _receipt_bbox(Image.new("L", (800, 600), 128)) is None
+
+
+def test_crops_and_resizes(tmp_path):
+    """Test the preprocessed image: cropped to the receipt, longest edge capped, re-encoded"""
+    path = tmp_path / "receipt.png"
+    receipt_photo().convert("RGB").save(path)
+
+    data, mime_type = prepare_receipt_image(str(path), max_edge=400, image_format="WEBP")
+
+    assert mime_type == "image/webp"
+    with Image.open(io.BytesIO(data)) as result:
+        assert result.format == "WEBP"
+        assert max(result.size) == 400
+        # Portrait receipt, not the landscape photo
+        assert result.height > result.width
+
+
+def test_undecodable_file_is_sent_with_its_own_type(tmp_path):
+    """Test the fallback for a file Pillow cannot read"""
+    path = tmp_path / "receipt.pdf"
+    path.write_bytes(b"%PDF-1.4 not an image")
+
+    data, mime_type = prepare_receipt_image(str(path))
+
+    assert data == b"%PDF-1.4 not an image"
+    assert mime_type == "application/pdf"
+
+
+def test_original_kept_when_smaller(tmp_path):
+    """Test that a tiny PNG is sent as is, labelled as PNG"""
+    path = tmp_path / "upload"
+    Image.new("L", (4, 4), 200).save(path, format="PNG")
+
+    data, mime_type = prepare_receipt_image(str(path))
+
+    assert data == path.read_bytes()
+    assert mime_type == "image/png"
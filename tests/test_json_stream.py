@@ -0,0 +1,42 @@
+import json
+
+from app.services.json_stream import IncrementalJSONObjectParser
+
+COMPLETION = json.dumps({
+    "amount": 45.5,
+    "currency": "MDL",
+    "vendor": "Linella \"Centru\"",
+    "category": "Mâncare & Restaurante",
+    "items": [{"name": "pâine, albă", "qty": 1, "line_total": 45.5}],
+    "confidence": 0.9,
+    "purchase_date": None,
+}, ensure_ascii=False)
+
+
+def test_fields_emitted_in_order_for_any_chunking():
+    """Test that every chunk size yields the same fields in order"""
+    for size in (1, 3, 7, 64):
+        parser = IncrementalJSONObjectParser()
+        emitted = []
+        for start in range(0, len(COMPLETION), size):
+            emitted.extend(parser.feed(COMPLETION[start:start + size]))
+
+        assert [key for key, _ in emitted] == list(json.loads(COMPLETION))
+        assert parser.fields == json.loads(COMPLETION)
+
+
+def test_amount_available_before_completion_ends():
+    """Test that a field is reported as soon as it is complete"""
+    parser = IncrementalJSONObjectParser()
+
+    assert parser.feed('{"amount": 12') == []
+    assert parser.feed('0, "vend') == [("amount", 120)]
+    assert parser.feed('or": "Kaufland"') == [("vendor", "Kaufland")]
+
+
+def test_code_fence_around_object():
+    """Test that markdown fences around the JSON are ignored"""
+    parser = IncrementalJSONObjectParser()
+    parser.feed('```json\n{"amount": 5, "currency": "EUR"}\n```')
+
+    assert parser.fields == {"amount": 5, "currency": "EUR"}
@@ -0,0 +1,113 @@
+from app.services.local_parser import LocalExpenseParser
+
+parser = LocalExpenseParser(min_confidence=0.85)
+
+
+def test_parse_amount_currency_keyword():
+    """Test the common "<amount> <currency> <keyword>" text"""
+    result = parser.parse("50 lei cafea")
+
+    assert result is not None
+    assert result["amount"] == 50.0
+    assert result["currency"] == "MDL"
+    assert result["category"] == "Mâncare & Restaurante"
+    assert result["items"][0]["name"] == "cafea"
+    assert result["items"][0]["price"] == 50.0
+
+
+def test_parse_without_currency_defaults_to_mdl():
+    """Test keyword followed by amount without a currency"""
+    result = parser.parse("benzina 600")
+
+    assert result is not None
+    assert result["amount"] == 600.0
+    assert result["currency"] == "MDL"
+    assert result["category"] == "Transport"
+
+
+def test_parse_romanian_diacritics_and_decimal_comma():
+    """Test Romanian sentence with diacritics and decimal comma"""
+    result = parser.parse("am cheltuit 45,50 lei pe pâine")
+
+    assert result is not None
+    assert result["amount"] == 45.5
+    assert result["items"][0]["name"] == "pâine"
+    assert result["language"] == "ro"
+
+
+def test_parse_russian_text():
+    """Test Russian text with Russian currency word"""
+    result = parser.parse("за такси 150 лей")
+
+    assert result is not None
+    assert result["amount"] == 150.0
+    assert result["currency"] == "MDL"
+    assert result["category"] == "Transport"
+    assert result["language"] == "ru"
+
+
+def test_multiple_amounts_fall_back():
+    """Test that multi-item texts are left to the LLM"""
+    assert parser.parse("lapte 25, pâine 15") is None
+
+
+def test_unknown_keyword_falls_back():
+    """Test that texts without a known keyword are left to the LLM"""
+    assert parser.parse("restaurant 250") is None
+
+
+def test_category_outside_user_list_falls_back():
+    """Test that a category the user does not have is not trusted"""
+    assert parser.parse("taxi 120", ["Mâncare & Restaurante"]) is None
+
+
+def test_keywords_match_whole_words_and_inflections():
+    """Test that keywords do not match longer, unrelated words"""
+    assert parser.parse("apartament 5000") is None
+    assert parser.parse("gazeta 20") is None
+    assert parser.parse("factura gaz 300")["category"] == "Utilități & Locuință"
+    assert parser.parse("gazul 300")["category"] == "Utilități & Locuință"
+    assert parser.parse("cafeaua 35")["category"] == "Mâncare & Restaurante"
+    assert parser.parse("в аптеку 120 лей")["category"] == "Sănătate"
+
+
+def test_quantities_are_not_amounts():
+    """Test that numbers followed by a unit are not read as the amount paid"""
+    assert parser.parse("mere 1 kg") is None
+    assert parser.parse("lapte 2 l") is None
+
+    result = parser.parse("mere 2kg 30 lei")
+    assert result is not None
+    assert result["amount"] == 30.0
+    assert result["items"][0]["name"] == "mere"
+
+
+def test_relative_dates_fall_back():
+    """Test that texts naming another day are left to the LLM, which resolves the date"""
+    assert parser.parse("cafea 50 lei ieri") is None
+    assert parser.parse("alaltăieri benzina 600") is None
+    assert parser.parse("azi-noapte taxi 120") is None
+    assert parser.parse("chirie 5000 lei luna trecută") is None
+    assert parser.parse("cafea 40 săptămâna trecută") is None
+    assert parser.parse("вчера кофе 50 лей") is None
+    assert parser.parse("позавчера такси 150") is None
+    assert parser.parse("на прошлой неделе такси 150") is None
+    # Today is the default anyway
+    assert parser.parse("azi cafea 50 lei") is not None
+
+
+def test_vendor_names_fall_back():
+    """Test that a vendor after "la"/"в"/"у" is left to the LLM instead of being dropped"""
+    assert parser.parse("cafea 50 lei la Starbucks") is None
+    assert parser.parse("benzina 600 la Petrom") is None
+    assert parser.parse("кофе 50 лей в Андис") is None
+    # A category keyword after the preposition is a place, not a vendor
+    assert parser.parse("la farmacie 50 lei")["category"] == "Sănătate"
+
+
+def test_signed_amounts_fall_back():
+    """Test that a minus sign is not ignored"""
+    assert parser.parse("cafea -50 lei") is None
+    assert parser.parse("cafea +50 lei") is None
+    # A dash between words is no sign
+    assert parser.parse("cafea - 50 lei") is not None
@@ -0,0 +1,43 @@
+from app.utils.metrics import HitMissCounter, LatencyRecorder
+
+
+def test_percentiles_use_the_nearest_sample():
+    """Test percentile selection on a known set of samples"""
+    recorder = LatencyRecorder()
+    for seconds in [0.5, 0.1, 0.4, 0.2, 0.3]:
+        recorder.record(seconds)
+
+    assert recorder.percentile(0) == 0.1
+    assert recorder.percentile(50) == 0.3
+    assert recorder.percentile(95) == 0.5
+    assert recorder.percentile(100) == 0.5
+    assert recorder.snapshot() == {"count": 5, "p50_ms": 300.0, "p95_ms": 500.0}
+
+
+def test_only_the_latest_samples_are_kept():
+    """Test that old samples leave the window but still count"""
+    recorder = LatencyRecorder(window=3)
+    for seconds in [10.0, 10.0, 0.1, 0.2, 0.3]:
+        recorder.record(seconds)
+
+    assert len(recorder) == 3
+    assert recorder.count == 5
+    assert recorder.percentile(100) == 0.3
+
+
+def test_empty_recorder_and_counter():
+    """Test the snapshots before anything was recorded"""
+    assert LatencyRecorder().percentile(50) is None
+    assert LatencyRecorder().snapshot() == {"count": 0, "p50_ms": None, "p95_ms": None}
+    assert HitMissCounter().snapshot() == {"hits": 0, "misses": 0, "hit_rate": None}
+
+
+def test_hit_rate():
+    """Test the hit rate of a cache counter"""
+    counter = HitMissCounter()
+    counter.hit()
+    counter.hit()
+    counter.hit()
+    counter.miss()
+
+    assert counter.snapshot() == {"hits": 3, "misses": 1, "hit_rate": 0.75}
@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import text
+
+from app.models import Expense, User
+from app.tasks.migrate_ciphertext import migrate_json_data
+from app.utils.crypto import encrypt_bytes, encrypt_data
+
+
+@pytest.fixture
+def db(db):
+    db.add(User(id="user-1", username="migrate"))
+    db.commit()
+    return db
+
+
+def _add_legacy_expense(db, expense_id: str, legacy_text) -> None:
+    db.add(Expense(id=expense_id, owner_user_id="user-1", source="manual", json_data_legacy=legacy_text))
+
+
+def test_legacy_rows_are_converted_in_batches(db):
+    """Test that text payloads move to the binary column and still decrypt"""
+    for index in range(5):
+        _add_legacy_expense(db, f"legacy-{index}", encrypt_data({"category": "Transport", "index": index}))
+    db.add(Expense(id="binary", owner_user_id="user-1", source="manual", json_data={"category": "Sănătate"}))
+    _add_legacy_expense(db, "broken", "not base64!")
+    _add_legacy_expense(db, "empty", None)
+    db.commit()
+
+    report = migrate_json_data(db, batch_size=2)
+
+    assert report.migrated == 5
+    assert report.failed == ["broken"]
+    assert report.binary_bytes < report.text_bytes
+    db.expire_all()
+    for index in range(5):
+        expense = db.get(Expense, f"legacy-{index}")
+        assert expense.json_data_legacy is None
+        assert isinstance(expense.json_data_bin.ciphertext, bytes)
+        assert expense.json_data.value == {"category": "Transport", "index": index}
+    assert db.get(Expense, "binary").json_data.value == {"category": "Sănătate"}
+    assert db.get(Expense, "broken").json_data_legacy == "not base64!"
+    assert db.execute(text("SELECT json_data FROM expenses WHERE id = 'legacy-0'")).scalar() is None
+
+    # Running again finds nothing left to convert
+    assert migrate_json_data(db, batch_size=2).migrated == 0
+
+
+def test_rows_written_by_the_app_are_not_overwritten(db):
+    """Test the guard against values rewritten while a batch is converted"""
+    _add_legacy_expense(db, "legacy", encrypt_data({"category": "Transport"}))
+    db.commit()
+    # The app stores a new binary value but the legacy text is still there
+    db.execute(
+        Expense.__table__.update().values(json_data_bin=encrypt_bytes({"category": "Facturi"}))
+    )
+    db.commit()
+
+    report = migrate_json_data(db)
+
+    assert report.migrated == 0
+    db.expire_all()
+    assert db.get(Expense, "legacy").json_data.value == {"category": "Facturi"}
@@ -0,0 +1,233 @@
+import asyncio
+
+import httpx
+import pytest
+
+import app.services.resilience as resilience
+from app.services.resilience import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    Bulkhead,
+    CircuitBreaker,
+    Upstream,
+    UpstreamUnavailableError,
+)
+
+
+def _upstream(name: str = "test", failure_threshold: int = 2, recovery_timeout: float = 30.0, max_concurrent: int = 4) -> Upstream:
+    return Upstream(
+        name,
+        CircuitBreaker(name, failure_threshold=failure_threshold, recovery_timeout=recovery_timeout),
+        Bulkhead(name, max_concurrent=max_concurrent, max_wait=0.05),
+    )
+
+
+def _status_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "http://upstream")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status_code, request=request))
+
+
+async def _fail(upstream: Upstream, error: Exception):
+    async with upstream.guard():
+        raise error
+
+
+def test_circuit_opens_after_consecutive_failures():
+    """Test that an open circuit rejects calls without running them"""
+    upstream = _upstream()
+    calls = []
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectTimeout):
+                await _fail(upstream, httpx.ConnectTimeout("timeout"))
+        with pytest.raises(UpstreamUnavailableError) as excinfo:
+            async with upstream.guard():
+                calls.append(1)
+        return excinfo.value
+
+    error = asyncio.run(scenario())
+
+    assert upstream.breaker.state == STATE_OPEN
+    assert error.upstream == "test"
+    assert error.retry_after > 0
+    assert calls == []
+    assert upstream.snapshot()["circuit"]["rejected"] == 1
+
+
+def test_client_errors_do_not_open_the_circuit():
+    """Test that 4xx and 429 answers count as a healthy upstream"""
+    upstream = _upstream()
+
+    async def scenario():
+        for status_code in (429, 404, 400):
+            with pytest.raises(httpx.HTTPStatusError):
+                await _fail(upstream, _status_error(status_code))
+
+    asyncio.run(scenario())
+
+    assert upstream.breaker.state == STATE_CLOSED
+    assert upstream.breaker.consecutive_failures == 0
+
+
+def test_half_open_trial_call_closes_or_reopens(monkeypatch):
+    """Test recovery through a single half-open trial call"""
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    upstream = _upstream(failure_threshold=1, recovery_timeout=10.0)
+
+    async def scenario():
+        with pytest.raises(httpx.ReadTimeout):
+            await _fail(upstream, httpx.ReadTimeout("timeout"))
+        assert upstream.breaker.state == STATE_OPEN
+
+        now[0] += 11
+        with pytest.raises(httpx.ReadTimeout):
+            await _fail(upstream, httpx.ReadTimeout("timeout"))
+        assert upstream.breaker.state == STATE_OPEN
+
+        now[0] += 11
+        async with upstream.guard() as call:
+            assert upstream.breaker.state == STATE_HALF_OPEN
+            with pytest.raises(UpstreamUnavailableError):
+                async with upstream.guard():
+                    pass
+            assert call is not None
+
+    asyncio.run(scenario())
+
+    assert upstream.breaker.state == STATE_CLOSED
+
+
+def test_cancelled_trial_call_frees_its_slot(monkeypatch):
+    """Test that a half-open trial call cancelled midway lets the next trial through"""
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    upstream = _upstream(failure_threshold=1, recovery_timeout=10.0)
+
+    async def scenario():
+        with pytest.raises(httpx.ReadTimeout):
+            await _fail(upstream, httpx.ReadTimeout("timeout"))
+        now[0] += 11
+
+        started = asyncio.Event()
+
+        async def trial():
+            async with upstream.guard():
+                started.set()
+                await asyncio.Event().wait()
+
+        task = asyncio.create_task(trial())
+        await started.wait()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # Cancellation is neither a success nor a failure
+        assert upstream.breaker.state == STATE_HALF_OPEN
+        assert upstream.breaker.consecutive_failures == 1
+
+        async with upstream.guard():
+            pass
+
+    asyncio.run(scenario())
+
+    assert upstream.breaker.state == STATE_CLOSED
+
+
+def test_no_try_later_reply_through_an_open_telegram_circuit(monkeypatch):
+    """Test that the bot does not answer through Telegram when Telegram is the upstream that is down"""
+    from app.bot import handlers
+
+    sent = []
+
+    async def send_message(chat_id, text, reply_markup=None):
+        sent.append(text)
+        return {"ok": True, "result": {"message_id": 1}}
+
+    monkeypatch.setattr(handlers.telegram_bot, "send_message", send_message)
+
+    async def scenario():
+        await handlers._report_unavailable(1, UpstreamUnavailableError("telegram", "circuit open", retry_after=20))
+        await handlers._report_unavailable(1, UpstreamUnavailableError("groq", "circuit open", retry_after=20))
+
+    asyncio.run(scenario())
+
+    assert len(sent) == 1
+    assert "AI" in sent[0]
+
+
+def test_failed_call_without_exception_counts():
+    """Test call.fail() for a 5xx answer that is returned, not raised"""
+    upstream = _upstream(failure_threshold=1)
+
+    async def scenario():
+        async with upstream.guard() as call:
+            call.fail()
+
+    asyncio.run(scenario())
+
+    assert upstream.breaker.state == STATE_OPEN
+
+
+def test_bulkhead_rejects_when_full():
+    """Test that calls beyond the limit fail fast instead of queueing"""
+    upstream = _upstream(max_concurrent=1)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def hold():
+            async with upstream.guard():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(UpstreamUnavailableError) as excinfo:
+            async with upstream.guard():
+                pass
+        release.set()
+        await holder
+        return excinfo.value
+
+    error = asyncio.run(scenario())
+
+    assert error.reason == "too many concurrent calls"
+    assert upstream.bulkhead.snapshot() == {"in_flight": 0, "limit": 1, "rejected": 1}
+    # A full bulkhead is not an upstream failure
+    assert upstream.breaker.state == STATE_CLOSED
+
+
+def test_groq_client_fails_fast_when_circuit_open(monkeypatch):
+    """Test that GroqClient raises UpstreamUnavailableError after repeated 5xx"""
+    import app.services.groq_client as groq_module
+
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(500, json={"error": {"message": "down"}})
+
+    transport = httpx.MockTransport(handler)
+
+    class MockClient(httpx.AsyncClient):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = transport
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(groq_module.httpx, "AsyncClient", MockClient)
+    monkeypatch.setattr(groq_module.settings, "GROQ_HEDGE_ENABLED", False)
+    monkeypatch.setattr(groq_module.settings, "GROQ_MAX_RETRIES", 0)
+    monkeypatch.setitem(resilience.upstreams, "groq", _upstream("groq", failure_threshold=1))
+
+    client = groq_module.GroqClient()
+
+    async def scenario():
+        with pytest.raises(httpx.HTTPStatusError):
+            await client._send("chat/completions", json={})
+        with pytest.raises(UpstreamUnavailableError):
+            await client._send("chat/completions", json={})
+
+    asyncio.run(scenario())
+
+    assert len(requests) == 1
+    assert resilience.upstreams_snapshot()["groq"]["circuit"]["state"] == STATE_OPEN
@@ -0,0 +1,166 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+import app.tasks.rotate_keys as rotate_module
+from app.models import DataKey, Expense, User
+from app.models.encrypted import LazyDecrypted
+from app.tasks.rotate_keys import rotate_keys
+from app.utils.config import settings
+from app.utils.crypto import CryptoService, DecryptedCache, crypto_service, encrypt_data
+
+
+@pytest.fixture
+def db(db):
+    db.add_all([User(id="user-1", username="ana"), User(id="user-2", username="ion")])
+    db.commit()
+    return db
+
+
+def _add_master_key_rows(db, monkeypatch, count: int) -> None:
+    """Rows as written before data keys: everything encrypted with ENCRYPTION_KEY"""
+    monkeypatch.setattr(settings, "CRYPTO_DATA_KEYS_ENABLED", False)
+    for index in range(count):
+        db.add(Expense(
+            id=f"e{index:02d}",
+            owner_user_id=f"user-{index % 2 + 1}",
+            source="manual",
+            vendor=f"Vendor {index}",
+            json_data={"category": "Transport", "index": index},
+        ))
+    db.add(Expense(
+        id="legacy",
+        owner_user_id="user-1",
+        source="manual",
+        json_data_legacy=encrypt_data({"category": "Facturi"}),
+    ))
+    db.commit()
+    monkeypatch.setattr(settings, "CRYPTO_DATA_KEYS_ENABLED", True)
+
+
+def _key_ids(db) -> dict[str, set]:
+    db.expire_all()
+    key_ids = {}
+    for expense in db.query(Expense).all():
+        values = [expense.vendor, expense.json_data_bin, expense.json_data_legacy]
+        key_ids[expense.id] = {
+            crypto_service.data_key_id(value.ciphertext if hasattr(value, "ciphertext") else value)
+            for value in values if value is not None
+        }
+    return key_ids
+
+
+def test_master_key_rows_move_to_user_keys(db, monkeypatch):
+    """Test that old rows are re-encrypted with their owner's data key"""
+    _add_master_key_rows(db, monkeypatch, 5)
+    updated_at = db.get(Expense, "e03").updated_at
+
+    report = rotate_keys(db, batch_size=2)
+
+    assert report.rotated == 6
+    assert report.failed == []
+    keys = {key.user_id: key.id for key in db.query(DataKey).all()}
+    assert set(keys) == {"user-1", "user-2"}
+    for expense_id, key_ids in _key_ids(db).items():
+        owner = db.get(Expense, expense_id).owner_user_id
+        assert key_ids == {keys[owner]}
+    expense = db.get(Expense, "e03")
+    assert expense.vendor.value == "Vendor 3"
+    assert expense.json_data.value == {"category": "Transport", "index": 3}
+    assert expense.updated_at == updated_at
+    legacy = db.get(Expense, "legacy")
+    assert legacy.json_data_legacy is None
+    assert legacy.json_data.value == {"category": "Facturi"}
+
+    # Nothing left to do on a second run
+    report = rotate_keys(db, batch_size=2)
+    assert report.rotated == 0
+    assert report.current == 6
+
+
+def test_new_keys_retire_the_old_ones(db, monkeypatch):
+    """Test rotation to fresh data keys; old keys stay readable until then"""
+    db.add(Expense(id="e1", owner_user_id="user-1", source="manual", vendor="Kaufland", json_data={"category": "Sănătate"}))
+    db.commit()
+    old_key_id = crypto_service.data_key_id(db.get(Expense, "e1").json_data_bin.ciphertext)
+
+    report = rotate_keys(db, new_keys=True)
+
+    assert report.retired_keys == 1
+    assert report.rotated == 1
+    active = db.query(DataKey).filter(DataKey.retired_at.is_(None)).one()
+    assert active.id != old_key_id
+    assert _key_ids(db) == {"e1": {active.id}}
+    # New values use the new key as well
+    db.add(Expense(id="e2", owner_user_id="user-1", source="manual", vendor="Linella"))
+    db.commit()
+    assert crypto_service.data_key_id(db.get(Expense, "e2").vendor.ciphertext) == active.id
+
+
+def test_retired_keys_leave_no_plaintext_cached(db, monkeypatch):
+    """Test that retiring keys clears the decrypted-value cache"""
+    monkeypatch.setattr(crypto_service, "cache", DecryptedCache(max_bytes=1 << 20, ttl_seconds=60))
+    db.add(Expense(id="e1", owner_user_id="user-1", source="manual", vendor="Kaufland"))
+    db.commit()
+    db.expire_all()
+    assert db.get(Expense, "e1").vendor.value == "Kaufland"
+    assert len(crypto_service.cache) == 1
+
+    retired = rotate_module.retire_data_keys(db, datetime.utcnow() + timedelta(seconds=1))
+
+    assert retired == 1
+    assert len(crypto_service.cache) == 0
+
+
+def test_stopped_run_resumes_and_app_writes_win(db, monkeypatch, tmp_path):
+    """Test the progress file and the guard against rows updated meanwhile"""
+    _add_master_key_rows(db, monkeypatch, 6)
+    progress_path = tmp_path / "rotation.json"
+    progress_path.write_text(json.dumps({"started_at": "2024-12-10T10:00:00", "last_id": "e02"}))
+
+    # The app updates a row while its batch is being re-encrypted
+    decrypt_all = rotate_module.decrypt_all
+
+    def decrypt_all_while_app_writes(values):
+        decrypt_all(values)
+        db.execute(update(Expense.__table__).where(Expense.id == "e04").values(amount=12))
+
+    monkeypatch.setattr(rotate_module, "decrypt_all", decrypt_all_while_app_writes)
+    report = rotate_keys(db, batch_size=10, progress_path=str(progress_path))
+
+    assert report.skipped == 1
+    assert report.rotated == 3  # e03, e05, legacy
+    key_ids = _key_ids(db)
+    assert key_ids["e00"] == key_ids["e02"] == key_ids["e04"] == {None}
+    assert None not in key_ids["e03"] | key_ids["e05"] | key_ids["legacy"]
+    assert db.get(Expense, "e04").vendor.value == "Vendor 4"
+    assert not progress_path.exists()
+
+
+def test_master_key_rotation_rewraps_data_keys(db, monkeypatch):
+    """Test that data keys wrapped by a previous master key are wrapped again"""
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY", base64.b64encode(bytes(range(32))).decode())
+    old_service = CryptoService()
+    key_id, wrapped_key, old_master_key_id = old_service.generate_data_key()
+    old_service.add_data_key(key_id, old_service.unwrap_data_key(key_id, wrapped_key, old_master_key_id))
+    db.add(DataKey(id=key_id, user_id="user-1", master_key_id=old_master_key_id, wrapped_key=wrapped_key))
+    db.add(Expense(id="e1", owner_user_id="user-1", source="manual", vendor=LazyDecrypted(old_service.encrypt_data("Kaufland", key_id))))
+    db.commit()
+    # ENCRYPTION_PREVIOUS_KEYS lists the old master key
+    monkeypatch.setitem(crypto_service._master_keys, old_master_key_id, old_service.aesgcm)
+
+    report = rotate_keys(db)
+
+    assert report.rewrapped_keys == 1
+    assert report.current == 1
+    data_key = db.get(DataKey, key_id)
+    assert data_key.master_key_id == crypto_service.master_key_id
+    # Readable with the current master key alone
+    monkeypatch.delitem(crypto_service._master_keys, old_master_key_id)
+    monkeypatch.setattr(crypto_service, "_data_keys", {})
+    monkeypatch.setattr(settings, "CRYPTO_CACHE_ENABLED", False)
+    db.expire_all()
+    assert db.get(Expense, "e1").vendor.value == "Kaufland"
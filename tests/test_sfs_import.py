@@ -0,0 +1,196 @@
+import asyncio
+import io
+import zipfile
+
+import cv2
+import httpx
+import numpy as np
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import app.services.sfs_scraper as sfs_module
+from app.models import Category, Expense, User, Vendor
+from app.tasks.sfs_import import HostThrottle, ImportProgress, SFSImporter, import_receipts, read_sources
+from tests.stubs.sfs_server import SFSStubConfig, create_app, receipt_path
+
+# sfs_stub replaces httpx.AsyncClient; requests to the app itself use the real one
+API_CLIENT = httpx.AsyncClient
+
+
+@pytest.fixture
+def db(db):
+    db.add(User(id="user-1", username="import"))
+    db.add_all([
+        Category(id="cat-food", user_id="user-1", name="Mâncare & Restaurante"),
+        Category(id="cat-health", user_id="user-1", name="Sănătate"),
+        Category(id="cat-other", user_id="user-1", name="Alte cheltuieli"),
+    ])
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def sfs_stub(monkeypatch):
+    """Route the scraper to an in-process SFS stand-in and return its state"""
+    app = create_app(SFSStubConfig())
+    transport = httpx.ASGITransport(app=app)
+
+    class StubClient(httpx.AsyncClient):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = transport
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(sfs_module.httpx, "AsyncClient", StubClient)
+    return app.state.stub
+
+
+def _link(name: str) -> str:
+    return f"https://mev.sfs.md{receipt_path(name)}"
+
+
+def _qr_png(text: str) -> bytes:
+    image = cv2.QRCodeEncoder.create().encode(text)
+    image = cv2.resize(image, (image.shape[1] * 8, image.shape[0] * 8), interpolation=cv2.INTER_NEAREST)
+    image = cv2.copyMakeBorder(image, 40, 40, 40, 40, cv2.BORDER_CONSTANT, value=255)
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+def test_links_file_is_imported_in_batches(db, sfs_stub, tmp_path):
+    """Test import of a links file with a duplicate and an unknown receipt"""
+    links = "\n".join([
+        "Bonuri ianuarie:",
+        _link("multi_item"),
+        _link("tva_lines"),
+        _link("multi_item"),
+        _link("missing"),
+        f"mev.sfs.md{receipt_path('odd_numbers')}",
+    ])
+
+    summary = asyncio.run(import_receipts(db, "user-1", links.encode(), str(tmp_path / "progress.json")))
+
+    assert summary["total"] == 5
+    assert summary["imported"] == 3
+    assert summary["duplicates"] == 1
+    assert summary["failed"] == 1
+    assert summary["failures"][0]["source"] == "line 5"
+
+    expenses = db.query(Expense).filter(Expense.owner_user_id == "user-1").all()
+    assert len(expenses) == 3
+    assert {expense.source for expense in expenses} == {"import"}
+    pharmacy = next(expense for expense in expenses if expense.vendor_fiscal_code == "1003600000002")
+    assert pharmacy.vendor.value == "FARMACIE EXEMPLU S.R.L."
+    assert pharmacy.category_id == "cat-health"
+    assert db.get(Vendor, "1003600000002").usage_count == 1
+
+
+def test_rerun_resumes_from_progress(db, sfs_stub, tmp_path):
+    """Test that a second run skips receipts already imported"""
+    progress_path = str(tmp_path / "progress.json")
+    content = f"{_link('multi_item')}\n{_link('tva_lines')}\n".encode()
+
+    asyncio.run(import_receipts(db, "user-1", content, progress_path))
+    requests_after_first_run = len(sfs_stub.requests)
+    summary = asyncio.run(import_receipts(db, "user-1", content, progress_path))
+
+    assert summary["imported"] == 0
+    assert summary["already_imported"] == 2
+    assert len(sfs_stub.requests) == requests_after_first_run
+    assert db.query(Expense).count() == 2
+    assert len(ImportProgress(progress_path).done) == 2
+
+
+def test_zip_of_receipt_photos(db, sfs_stub):
+    """Test that QR codes in zipped photos are decoded and imported"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("ianuarie/bon1.png", _qr_png(_link("tva_lines")))
+        archive.writestr("ianuarie/poza.png", cv2.imencode(".png", np.full((64, 64), 255, dtype=np.uint8))[1].tobytes())
+        archive.writestr("linkuri.txt", _link("multi_item"))
+
+    sources = read_sources(buffer.getvalue())
+    summary = asyncio.run(SFSImporter(db, "user-1", batch_size=1).run(sources))
+
+    assert [source.name for source in sources] == ["ianuarie/bon1.png", "ianuarie/poza.png", "linkuri.txt:line 1"]
+    assert summary.imported == 2
+    assert summary.failed == [{"source": "ianuarie/poza.png", "error": "Nu am găsit un cod QR SFS"}]
+
+
+def test_host_throttle_spaces_requests():
+    """Test the per-host minimum interval between request starts"""
+    throttle = HostThrottle(max_concurrent=2, min_interval=0.05)
+    starts = []
+
+    async def request(host: str):
+        await throttle.acquire(host)
+        starts.append((host, asyncio.get_running_loop().time()))
+        throttle.release(host)
+
+    async def scenario():
+        await asyncio.gather(*(request("mev.sfs.md") for _ in range(3)), request("sift-mev.sfs.md"))
+
+    asyncio.run(scenario())
+
+    mev = [at for host, at in starts if host == "mev.sfs.md"]
+    assert all(later - earlier >= 0.045 for earlier, later in zip(mev, mev[1:]))
+    # Other hosts are not held back
+    assert starts[1][0] == "sift-mev.sfs.md"
+
+
+def test_failed_commit_reports_the_batch(db, sfs_stub, tmp_path, monkeypatch):
+    """Test that a batch whose commit fails is rolled back, reported and retried by the next run"""
+    progress_path = str(tmp_path / "progress.json")
+    content = f"{_link('multi_item')}\n{_link('tva_lines')}\n".encode()
+    commit = db.commit
+
+    def failing_commit():
+        raise OperationalError("INSERT", {}, Exception("disk I/O error"))
+
+    monkeypatch.setattr(db, "commit", failing_commit)
+    summary = asyncio.run(import_receipts(db, "user-1", content, progress_path))
+
+    assert summary["imported"] == 0
+    assert summary["failed"] == 2
+    assert {failure["source"] for failure in summary["failures"]} == {
+        sfs_module.sfs_scraper.receipt_code(_link(name)) for name in ("multi_item", "tva_lines")
+    }
+    assert db.query(Expense).count() == 0
+    assert ImportProgress(progress_path).done == {}
+
+    monkeypatch.setattr(db, "commit", commit)
+    summary = asyncio.run(import_receipts(db, "user-1", content, progress_path))
+
+    assert summary["imported"] == 2
+    assert db.query(Expense).count() == 2
+
+
+def test_api_imports_in_the_background(db, session_factory, sfs_stub, tmp_path, monkeypatch):
+    """Test that the upload answers with a job handle and the job reports its progress"""
+    import app.models.database as database_module
+    from app.api import expenses as expenses_api
+    from app.main import app
+    from app.models.database import get_db
+
+    monkeypatch.setattr(expenses_api.settings, "SFS_IMPORT_PROGRESS_DIR", str(tmp_path))
+    monkeypatch.setattr(expenses_api.settings, "DEFAULT_USER_ID", "user-1")
+    monkeypatch.setattr(database_module, "SessionLocal", session_factory)
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: db)
+    content = f"{_link('multi_item')}\n{_link('tva_lines')}\n".encode()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with API_CLIENT(transport=transport, base_url="http://api") as client:
+            started = await client.post("/api/v1/expenses/import/sfs", files={"file": ("links.txt", content)})
+            job = started.json()
+            status = await client.get(f"/api/v1/expenses/import/sfs/{job['job_id']}")
+            missing = await client.get("/api/v1/expenses/import/sfs/0000000000000000")
+            return started, status, missing
+
+    started, status, missing = asyncio.run(scenario())
+
+    assert started.status_code == 202
+    assert started.json()["total"] == 2
+    # The ASGI transport returns once the background task is done
+    assert status.json()["status"] == "completed"
+    assert status.json()["imported"] == 2
+    assert missing.status_code == 404
+    assert db.query(Expense).count() == 2
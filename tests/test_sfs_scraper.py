@@ -0,0 +1,274 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+from sqlalchemy.exc import OperationalError
+from app.models.sfs_receipt import SFSReceipt
+from app.models.user import User
+import app.services.sfs_scraper as sfs_module
+from app.services.sfs_html import LxmlBackend, SoupBackend, get_backend
+from app.services.sfs_scraper import SFSScraper
+from tests.stubs.sfs_server import SFSStubConfig, create_app, fixture_names, receipt_path
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "sfs"
+RECEIPT_URL = "https://mev.sfs.md/receipt-verifier/H902005680/6049.00/1941/2025-02-11"
+
+
+@pytest.fixture
+def sfs_stub(monkeypatch):
+    """Route the scraper to an in-process SFS stand-in serving tests/fixtures/sfs"""
+
+    def build(**config) -> tuple[SFSScraper, object]:
+        app = create_app(SFSStubConfig(**config))
+        transport = httpx.ASGITransport(app=app)
+
+        class StubClient(httpx.AsyncClient):
+            def __init__(self, *args, **kwargs):
+                kwargs["transport"] = transport
+                super().__init__(*args, **kwargs)
+
+        monkeypatch.setattr(sfs_module.httpx, "AsyncClient", StubClient)
+        return SFSScraper(), app.state.stub
+
+    return build
+
+
+def test_receipt_code_is_canonical():
+    """Test that equivalent SFS links map to the same receipt code"""
+    scraper = SFSScraper()
+
+    assert scraper.receipt_code(RECEIPT_URL) == "H902005680/6049.00/1941/2025-02-11"
+    assert scraper.receipt_code(f" {RECEIPT_URL}/ ") == "H902005680/6049.00/1941/2025-02-11"
+    assert scraper.receipt_code("https://sift-mev.sfs.md/receipt/H902005680/6049.00/1941/2025-02-11") == "H902005680/6049.00/1941/2025-02-11"
+    assert scraper.receipt_code("https://example.com/") is None
+
+
+def test_repeated_receipt_is_served_from_cache(db, monkeypatch):
+    """Test that a receipt is fetched once and then read from the sfs_receipts table"""
+    scraper = SFSScraper()
+    fetched = []
+
+    async def fake_fetch_and_parse(qr_url):
+        fetched.append(qr_url)
+        return {"amount": 60.49, "currency": "MDL", "vendor": "KAUFLAND S.R.L.", "items": []}
+
+    monkeypatch.setattr(scraper, "_fetch_and_parse", fake_fetch_and_parse)
+
+    async def scenario():
+        first = await scraper.parse_qr_url(RECEIPT_URL, db)
+        second = await scraper.parse_qr_url(f"{RECEIPT_URL}/", db)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first == second
+    assert fetched == [RECEIPT_URL]
+    assert db.get(SFSReceipt, "H902005680/6049.00/1941/2025-02-11").data != str(first)
+    assert scraper.cache_stats.snapshot() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_cache_can_be_disabled(db, monkeypatch):
+    """Test that SFS_RECEIPT_CACHE_ENABLED=false always scrapes"""
+    scraper = SFSScraper()
+    fetched = []
+
+    async def fake_fetch_and_parse(qr_url):
+        fetched.append(qr_url)
+        return {"amount": 1.0}
+
+    monkeypatch.setattr(scraper, "_fetch_and_parse", fake_fetch_and_parse)
+    monkeypatch.setattr(sfs_module.settings, "SFS_RECEIPT_CACHE_ENABLED", False)
+
+    asyncio.run(scraper.parse_qr_url(RECEIPT_URL, db))
+    asyncio.run(scraper.parse_qr_url(RECEIPT_URL, db))
+
+    assert len(fetched) == 2
+    assert db.query(SFSReceipt).count() == 0
+
+
+def test_only_complete_receipts_are_cached(db, monkeypatch):
+    """Test that a parse without a total is not cached, so the next request scrapes again"""
+    scraper = SFSScraper()
+    fetched = []
+
+    async def fake_fetch_and_parse(qr_url):
+        fetched.append(qr_url)
+        return {"amount": 0.0, "currency": "MDL", "vendor": None, "items": []}
+
+    monkeypatch.setattr(scraper, "_fetch_and_parse", fake_fetch_and_parse)
+
+    asyncio.run(scraper.parse_qr_url(RECEIPT_URL, db))
+    asyncio.run(scraper.parse_qr_url(RECEIPT_URL, db))
+
+    assert len(fetched) == 2
+    assert db.query(SFSReceipt).count() == 0
+
+
+def test_unreadable_cache_entry_is_scraped_again(db, monkeypatch):
+    """Test that a cached value that does not decrypt or parse as JSON is ignored"""
+    scraper = SFSScraper()
+    db.add(SFSReceipt(receipt_code="H902005680/6049.00/1941/2025-02-11", data=sfs_module.encrypt_data("{not json")))
+    db.commit()
+
+    async def fake_fetch_and_parse(qr_url):
+        return {"amount": 60.49, "currency": "MDL", "vendor": "KAUFLAND S.R.L.", "items": []}
+
+    monkeypatch.setattr(scraper, "_fetch_and_parse", fake_fetch_and_parse)
+
+    result = asyncio.run(scraper.parse_qr_url(RECEIPT_URL, db))
+
+    assert result["amount"] == 60.49
+    assert scraper._cached_receipt(db, "H902005680/6049.00/1941/2025-02-11")["amount"] == 60.49
+
+
+def test_cache_errors_are_not_raised(db, monkeypatch):
+    """Test that a failing cache read is treated as a miss"""
+    scraper = SFSScraper()
+
+    def broken_get(*args, **kwargs):
+        raise OperationalError("SELECT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(db, "get", broken_get)
+
+    assert scraper._cached_receipt(db, "H902005680/6049.00/1941/2025-02-11") is None
+
+
+def test_caching_leaves_the_callers_transaction_alone(db, monkeypatch):
+    """Test that storing a receipt neither commits nor rolls back the caller's pending changes"""
+    scraper = SFSScraper()
+    pending = User(id="user-1", username="pending")
+    db.add(pending)
+
+    async def fake_fetch_and_parse(qr_url):
+        return {"amount": 60.49, "currency": "MDL", "vendor": "KAUFLAND S.R.L.", "items": []}
+
+    monkeypatch.setattr(scraper, "_fetch_and_parse", fake_fetch_and_parse)
+
+    asyncio.run(scraper.parse_qr_url(RECEIPT_URL, db))
+
+    assert pending in db.new
+    assert db.query(SFSReceipt).count() == 1
+
+
+def _mock_sfs(monkeypatch, handler):
+    transport = httpx.MockTransport(handler)
+
+    class MockClient(httpx.AsyncClient):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = transport
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(sfs_module.httpx, "AsyncClient", MockClient)
+    monkeypatch.setattr(sfs_module.settings, "SFS_CANDIDATE_STAGGER_SECONDS", 0.05)
+
+
+def test_candidates_race_and_first_success_wins(monkeypatch):
+    """Test that a hanging first candidate does not delay a working one"""
+
+    requested = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(request.url.host)
+        if request.url.host == "mev.sfs.md":
+            await asyncio.sleep(5)
+            return httpx.Response(200, text="slow")
+        return httpx.Response(200, text="<html>sift</html>")
+
+    _mock_sfs(monkeypatch, handler)
+    scraper = SFSScraper()
+    candidates = scraper._build_candidate_urls(RECEIPT_URL)
+
+    started = time.perf_counter()
+    text = asyncio.run(scraper._fetch(candidates, {}))
+
+    assert text == "<html>sift</html>"
+    assert time.perf_counter() - started < 1
+    assert requested[-1] == "sift-mev.sfs.md"
+    assert dict(scraper.pattern_stats) == {"sift": {"success": 1}}
+
+
+def test_failed_candidate_starts_the_next_and_ranking_is_remembered(monkeypatch):
+    """Test that failures skip the stagger and successful patterns move to the front"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "sift-mev.sfs.md":
+            return httpx.Response(200, text="ok")
+        return httpx.Response(404)
+
+    _mock_sfs(monkeypatch, handler)
+    scraper = SFSScraper()
+
+    assert asyncio.run(scraper._fetch(scraper._build_candidate_urls(RECEIPT_URL), {})) == "ok"
+    assert scraper.pattern_stats["original"]["failure"] == 1
+    assert scraper._build_candidate_urls(RECEIPT_URL)[0][0] == "sift"
+
+
+def test_all_candidates_failing_raises_last_error(monkeypatch):
+    """Test that the error of the last candidate is raised when none loads"""
+
+    _mock_sfs(monkeypatch, lambda request: httpx.Response(404))
+    scraper = SFSScraper()
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(scraper._fetch(scraper._build_candidate_urls(RECEIPT_URL), {}))
+
+
+@pytest.mark.parametrize("name", fixture_names())
+def test_html_backends_agree(name):
+    """Test that the lxml backend returns exactly what html.parser returns"""
+    html = (FIXTURES_DIR / f"{name}.html").read_text(encoding="utf-8")
+
+    reference = SFSScraper(html_backend=SoupBackend()).parse_html(html)
+    fast = SFSScraper(html_backend=LxmlBackend()).parse_html(html)
+
+    assert fast == reference
+
+
+def test_unknown_html_backend_is_rejected():
+    """Test that a typo in SFS_HTML_PARSER fails loudly"""
+    with pytest.raises(ValueError):
+        get_backend("html5")
+
+
+@pytest.mark.parametrize("name", fixture_names())
+def test_parse_qr_url_matches_golden_output(sfs_stub, name):
+    """Test every fixture receipt end to end against its recorded .json output"""
+    scraper, stub = sfs_stub()
+    expected = json.loads((FIXTURES_DIR / f"{name}.json").read_text(encoding="utf-8"))
+
+    result = asyncio.run(scraper.parse_qr_url(f"http://sfs-stub{receipt_path(name)}"))
+
+    assert result == expected
+    assert stub.requests[0] == receipt_path(name)
+
+
+def test_unknown_receipt_is_an_error(sfs_stub):
+    """Test that a receipt SFS does not know raises instead of returning empty data"""
+    scraper, _ = sfs_stub()
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(scraper.parse_qr_url(f"http://sfs-stub{receipt_path('missing')}"))
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("60.49", 60.49),
+    ("60,49", 60.49),
+    ("1 234,50", 1234.5),
+    ("1.234,50", 1234.5),
+    ("1,234.50", 1234.5),
+    ("1,234,567", 1234567.0),
+    ("2\xa0499,00", 2499.0),
+    ("6\xa0502,35\xa0MDL", 6502.35),
+    ("299,85B", 299.85),
+    ("12 lei", 12.0),
+    ("-10.00", -10.0),
+    ("0.350", 0.35),
+    ("", None),
+    ("abc", None),
+])
+def test_clean_number(value, expected):
+    """Test the number formats seen on SFS receipts"""
+    assert SFSScraper()._clean_number(value) == expected
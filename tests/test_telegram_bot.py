@@ -0,0 +1,70 @@
+import asyncio
+import importlib
+
+import httpx
+import pytest
+
+from app.bot.telegram_bot import TelegramBot
+from tests.stubs.telegram_server import TelegramStubConfig, create_app
+
+# app.bot re-exports the telegram_bot instance under the module's name
+telegram_module = importlib.import_module("app.bot.telegram_bot")
+
+
+@pytest.fixture
+def telegram_stub(monkeypatch):
+    """Route TelegramBot to an in-process Bot API stand-in and return a factory"""
+
+    def build(**config) -> tuple[TelegramBot, object]:
+        app = create_app(TelegramStubConfig(**config))
+        transport = httpx.ASGITransport(app=app)
+
+        class StubClient(httpx.AsyncClient):
+            def __init__(self, *args, **kwargs):
+                kwargs["transport"] = transport
+                super().__init__(*args, **kwargs)
+
+        monkeypatch.setattr(telegram_module.httpx, "AsyncClient", StubClient)
+        monkeypatch.setattr(telegram_module.settings, "TELEGRAM_API_BASE_URL", "http://telegram-stub")
+        return TelegramBot(), app.state.stub
+
+    return build
+
+
+def test_send_edit_and_download(telegram_stub):
+    """Test the calls the bot handlers rely on"""
+    bot, stub = telegram_stub()
+
+    async def scenario():
+        sent = await bot.send_message(1, "🤖 Procesez cheltuiala...")
+        edited = await bot.edit_message_text(1, sent["result"]["message_id"], "✅ gata")
+        file_info = await bot.get_file("photo-800")
+        content = await bot.download_file(file_info["result"]["file_path"])
+        return edited, content
+
+    edited, content = asyncio.run(scenario())
+
+    assert edited["ok"] is True
+    assert content.startswith(b"\xff\xd8")
+    assert [call["method"] for call in stub.calls] == ["sendMessage", "editMessageText", "getFile", "download"]
+
+
+def test_short_retry_after_is_retried(telegram_stub):
+    """Test that a 429 with a short retry_after is retried once"""
+    bot, stub = telegram_stub(error_429_rate=1.0, retry_after_seconds=0)
+
+    result = asyncio.run(bot.send_message(1, "test"))
+
+    assert result["error_code"] == 429
+    assert len(stub.calls_for("sendMessage")) == 2
+
+
+def test_long_retry_after_is_not_waited(telegram_stub, monkeypatch):
+    """Test that a long retry_after is returned instead of waited"""
+    monkeypatch.setattr(telegram_module.settings, "TELEGRAM_MAX_RETRY_AFTER_SECONDS", 1.0)
+    bot, stub = telegram_stub(error_429_rate=1.0, retry_after_seconds=30)
+
+    result = asyncio.run(bot.set_webhook("https://example.com/hook"))
+
+    assert result["parameters"]["retry_after"] == 30
+    assert len(stub.calls_for("setWebhook")) == 1
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+import app.models.database as database_module
+from app.bot import handlers
+from app.bot.text_batcher import TextMessageBatcher
+
+
+def test_burst_is_delivered_to_first_message():
+    """Test that messages inside the window are collected by the first caller"""
+    batcher = TextMessageBatcher(window=0.05, max_wait=1.0)
+
+    async def scenario():
+        first = asyncio.create_task(batcher.collect(1, "pâine 12"))
+        await asyncio.sleep(0.01)
+        second = await batcher.collect(1, "lapte 25")
+        other_chat = await batcher.collect(2, "taxi 70")
+        return await first, second, other_chat
+
+    first, second, other_chat = asyncio.run(scenario())
+
+    assert first == ["pâine 12", "lapte 25"]
+    assert second is None
+    assert other_chat == ["taxi 70"]
+
+
+def test_burst_flushes_at_max_size():
+    """Test that a full burst does not wait for the window"""
+    batcher = TextMessageBatcher(window=10.0, max_wait=10.0, max_size=2)
+
+    async def scenario():
+        first = asyncio.create_task(batcher.collect(1, "a 1"))
+        await asyncio.sleep(0)
+        await batcher.collect(1, "b 2")
+        return await asyncio.wait_for(first, timeout=1.0)
+
+    assert asyncio.run(scenario()) == ["a 1", "b 2"]
+
+
+def test_disabled_window_returns_immediately():
+    """Test that a zero window turns debouncing off"""
+    batcher = TextMessageBatcher(window=0)
+
+    assert asyncio.run(batcher.collect(1, "cafea 50")) == ["cafea 50"]
+
+
+def test_submit_returns_before_the_burst_is_parsed():
+    """Test that submit does not wait and hands the whole burst to the callback once"""
+    batcher = TextMessageBatcher(window=0.05, max_wait=1.0)
+    bursts = []
+
+    async def on_burst(texts):
+        bursts.append(texts)
+
+    async def scenario():
+        batcher.submit(1, "pâine 12", on_burst)
+        batcher.submit(1, "lapte 25", on_burst)
+        submitted = list(bursts)
+        await asyncio.sleep(0.2)
+        return submitted
+
+    assert asyncio.run(scenario()) == []
+    assert bursts == [["pâine 12", "lapte 25"]]
+
+
+@pytest.fixture
+def routed(monkeypatch):
+    """Record which handler each text ends up in instead of answering it"""
+    calls = []
+
+    async def handle_text_expense(chat_id, user_id, text, db):
+        calls.append(("single", text))
+
+    async def handle_text_expenses(chat_id, user_id, texts, db):
+        calls.append(("batch", texts))
+
+    monkeypatch.setattr(handlers, "handle_text_expense", handle_text_expense)
+    monkeypatch.setattr(handlers, "handle_text_expenses", handle_text_expenses)
+    return calls
+
+
+def test_locally_parsed_text_is_answered_at_once(db, routed, monkeypatch):
+    """Test that the local fast path does not go through the debounce window"""
+    from app.bot.text_batcher import text_batcher
+
+    monkeypatch.setattr(text_batcher, "window", 10.0)
+
+    asyncio.run(asyncio.wait_for(handlers.handle_text_message(1, "user-1", "cafea 50 lei", db), timeout=1.0))
+
+    assert routed == [("single", "cafea 50 lei")]
+
+
+def test_only_bursts_split_multi_line_messages(db, routed, monkeypatch):
+    """Test that a lone multi-line message stays one expense and bursts are split per line"""
+    monkeypatch.setattr(database_module, "SessionLocal", lambda: db)
+
+    asyncio.run(handlers.handle_text_burst(1, "user-1", ["pâine 12\nlapte 25"]))
+    asyncio.run(handlers.handle_text_burst(1, "user-1", ["pâine 12\nlapte 25", "am dat 70 pe taxi"]))
+
+    assert routed == [
+        ("single", "pâine 12\nlapte 25"),
+        ("batch", ["pâine 12", "lapte 25", "am dat 70 pe taxi"]),
+    ]
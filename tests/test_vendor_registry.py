@@ -0,0 +1,106 @@
+import app.services.vendor_registry as registry_module
+from app.models.vendor import Vendor
+from app.services.vendor_registry import apply_known_vendor, get_vendor, record_receipt
+
+RECEIPT = {
+    "amount": 60.49,
+    "vendor": "MAGAZIN EXEMPLU S.R.L.",
+    "category": "Mâncare & Restaurante",
+    "fiscal_code": "1012600000001",
+    "registration_number": "J403001234",
+    "address": "mun. Chişinău, str. Exemplu 1",
+}
+
+
+def test_first_receipt_registers_vendor(db):
+    """Test that a confirmed receipt creates the vendor row"""
+    record_receipt(db, dict(RECEIPT))
+    db.commit()
+
+    vendor = db.get(Vendor, "1012600000001")
+    assert vendor.name == "MAGAZIN EXEMPLU S.R.L."
+    assert vendor.registration_number == "J403001234"
+    assert vendor.usage_count == 1
+    assert vendor.default_category == "Mâncare & Restaurante"
+
+
+def test_default_category_follows_confirmations(db):
+    """Test that the most confirmed category becomes the default"""
+    record_receipt(db, dict(RECEIPT))
+    record_receipt(db, {**RECEIPT, "category": "Cumpărături"})
+    record_receipt(db, {**RECEIPT, "category": "Cumpărături", "vendor": "Unknown"})
+    db.commit()
+    db.expire_all()
+
+    vendor = get_vendor(db, "1012600000001")
+    assert vendor.usage_count == 3
+    assert vendor.category_counts == {"Mâncare & Restaurante": 1, "Cumpărături": 2}
+    assert vendor.default_category == "Cumpărături"
+    # An undetected name does not overwrite the known one
+    assert vendor.name == "MAGAZIN EXEMPLU S.R.L."
+
+
+def test_known_vendor_is_applied_to_parsed_receipt(db):
+    """Test that scraping a known vendor reuses its name and category"""
+    record_receipt(db, dict(RECEIPT))
+    db.commit()
+
+    parsed = apply_known_vendor(db, {"fiscal_code": "1012600000001", "vendor": "Unknown", "category": "Cumpărături"})
+
+    assert parsed["vendor"] == "MAGAZIN EXEMPLU S.R.L."
+    assert parsed["category"] == "Mâncare & Restaurante"
+    assert parsed["address"] == "mun. Chişinău, str. Exemplu 1"
+
+
+def test_receipts_without_fiscal_code_are_ignored(db):
+    """Test that non-SFS expenses do not touch the registry"""
+    assert record_receipt(db, {"vendor": "Taxi", "category": "Transport"}) is None
+    assert apply_known_vendor(db, {"vendor": "Taxi"}) == {"vendor": "Taxi"}
+    assert db.query(Vendor).count() == 0
+
+
+def test_custom_categories_are_not_shared(db):
+    """Test that one user's own category names never become a vendor's default"""
+    record_receipt(db, {**RECEIPT, "category": "Cadouri pentru Ana"})
+    record_receipt(db, {**RECEIPT, "category": "Cadouri pentru Ana"})
+    record_receipt(db, dict(RECEIPT))
+    db.commit()
+
+    vendor = get_vendor(db, "1012600000001")
+    assert vendor.category_counts == {"Mâncare & Restaurante": 1}
+    assert vendor.default_category == "Mâncare & Restaurante"
+
+
+def test_legacy_custom_default_is_not_applied(db):
+    """Test that a custom default learned before the fix is ignored and dropped"""
+    db.add(Vendor(
+        fiscal_code="1012600000001",
+        usage_count=3,
+        category_counts={"Cadouri pentru Ana": 3},
+        default_category="Cadouri pentru Ana",
+    ))
+    db.commit()
+
+    parsed = apply_known_vendor(db, {"fiscal_code": "1012600000001", "category": "Cumpărături"})
+    assert parsed["category"] == "Cumpărături"
+
+    record_receipt(db, {**RECEIPT, "category": "Cumpărături"})
+    vendor = get_vendor(db, "1012600000001")
+    assert vendor.category_counts == {"Cumpărături": 1}
+    assert vendor.default_category == "Cumpărături"
+
+
+def test_vendor_registered_concurrently_is_updated(db, monkeypatch):
+    """Test that a fiscal code stored by another transaction first does not fail the commit"""
+    record_receipt(db, dict(RECEIPT))
+    db.commit()
+    db.expunge_all()
+    # This transaction read the registry before the other one committed
+    monkeypatch.setattr(registry_module, "get_vendor", lambda db, fiscal_code: None)
+
+    vendor = record_receipt(db, {**RECEIPT, "category": "Cumpărături"})
+    db.commit()
+
+    assert vendor.usage_count == 2
+    assert vendor.category_counts == {"Mâncare & Restaurante": 1, "Cumpărături": 1}
+    assert db.query(Vendor).count() == 1